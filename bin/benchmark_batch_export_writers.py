@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark batch export writers on a synthetic batch of events.
+
+Compares the rows per second written by each writer when encoding record batches column by column
+against encoding them row by row. Run from the repository root with:
+
+    DEBUG=1 PYTHONPATH=. python bin/benchmark_batch_export_writers.py
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime as dt
+import json
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "posthog.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import pyarrow as pa  # noqa: E402
+
+from posthog.temporal.batch_exports.temporary_file import (  # noqa: E402
+    BatchExportWriter,
+    CSVBatchExportWriter,
+    JSONLBatchExportWriter,
+)
+from posthog.temporal.batch_exports.utils import cast_record_batch_json_columns  # noqa: E402
+
+
+def generate_events_record_batch(num_rows: int, json_columns: tuple[str, ...]) -> pa.RecordBatch:
+    """Generate a record batch of events resembling those we batch export."""
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    timestamps = pa.array([start + dt.timedelta(milliseconds=i) for i in range(num_rows)])
+    properties = [
+        json.dumps(
+            {
+                "$current_url": f"https://posthog.com/docs/{i}",
+                "$browser": "Chrome",
+                "$browser_version": 120 + i % 5,
+                "$lib": "web",
+                "$session_id": f"018d{i:028x}",
+                "tags": ["a", "b", f"tag-{i % 10}"],
+                "nested": {"title": 'Say "hi"', "count": i},
+            }
+        )
+        for i in range(num_rows)
+    ]
+
+    record_batch = pa.RecordBatch.from_pydict(
+        {
+            "uuid": [f"018d{i:028x}" for i in range(num_rows)],
+            "event": ["$pageview" if i % 3 else "$autocapture" for i in range(num_rows)],
+            "distinct_id": [f"user-{i % 1000}" for i in range(num_rows)],
+            "team_id": [1] * num_rows,
+            "timestamp": timestamps,
+            "properties": properties,
+            "person_properties": [json.dumps({"email": f"user-{i % 1000}@posthog.com"}) for i in range(num_rows)],
+            "elements_chain": ["" if i % 3 else 'a:href="/docs"nth-child="1"' for i in range(num_rows)],
+            "_inserted_at": timestamps,
+        }
+    )
+    return cast_record_batch_json_columns(record_batch, json_columns=json_columns)
+
+
+async def measure_rows_per_second(writer: BatchExportWriter, record_batch: pa.RecordBatch, iterations: int) -> float:
+    """Write the record batch `iterations` times and return how many rows per second were written."""
+    start = time.perf_counter()
+    async with writer.open_temporary_file():
+        for _ in range(iterations):
+            await writer.write_record_batch(record_batch, flush=False)
+    elapsed = time.perf_counter() - start
+
+    return record_batch.num_rows * iterations / elapsed
+
+
+async def flush_nowhere(*args, **kwargs) -> None:
+    pass
+
+
+async def main(num_rows: int, iterations: int) -> None:
+    json_record_batch = generate_events_record_batch(num_rows, json_columns=("properties", "person_properties"))
+    string_record_batch = generate_events_record_batch(num_rows, json_columns=())
+    field_names = [name for name in json_record_batch.column_names if name != "_inserted_at"]
+
+    benchmarks = {
+        "JSONL": (
+            lambda write_by_row: JSONLBatchExportWriter(
+                max_bytes=0, flush_callable=flush_nowhere, write_by_row=write_by_row
+            ),
+            json_record_batch,
+        ),
+        "TSV (as exported to Postgres)": (
+            lambda write_by_row: CSVBatchExportWriter(
+                max_bytes=0,
+                flush_callable=flush_nowhere,
+                field_names=field_names,
+                delimiter="\t",
+                quoting=csv.QUOTE_MINIMAL,
+                escape_char=None,
+                write_by_row=write_by_row,
+            ),
+            string_record_batch,
+        ),
+    }
+
+    for name, (make_writer, record_batch) in benchmarks.items():
+        by_row = await measure_rows_per_second(make_writer(True), record_batch, iterations)
+        by_column = await measure_rows_per_second(make_writer(False), record_batch, iterations)
+        print(  # noqa: T201
+            f"{name}: {by_row:,.0f} rows/s by row, {by_column:,.0f} rows/s by column ({by_column / by_row:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of rows in each record batch.")
+    parser.add_argument("--iterations", type=int, default=5, help="Number of record batches written.")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.iterations))
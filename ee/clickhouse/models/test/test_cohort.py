@@ -6,9 +6,9 @@ from freezegun import freeze_time
 from posthog.client import sync_execute
 from posthog.hogql.hogql import HogQLContext
 from posthog.models.action import Action
-from posthog.models.cohort import Cohort
+from posthog.models.cohort import Cohort, calculate_people_ch_in_batch
 from posthog.models.cohort.sql import GET_COHORTPEOPLE_BY_COHORT_ID
-from posthog.models.cohort.util import format_filter_query, get_person_ids_by_cohort_id
+from posthog.models.cohort.util import format_filter_query, get_person_ids_by_cohort_id, iter_cohort_person_ids
 from posthog.models.filters import Filter
 from posthog.models.organization import Organization
 from posthog.models.person import Person
@@ -457,6 +457,29 @@ class TestCohort(ClickhouseTestMixin, BaseTest):
         self.assertIn(str(user1.uuid), results)
         self.assertIn(str(user3.uuid), results)
 
+    def test_iter_cohort_person_ids(self):
+        persons = [
+            _create_person(distinct_ids=[f"user{i}"], team_id=self.team.pk, properties={"$some_prop": "something"})
+            for i in range(5)
+        ]
+        _create_person(distinct_ids=["other"], team_id=self.team.pk, properties={"$some_prop": "another"})
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "$some_prop", "value": "something", "type": "person"}]}],
+            name="cohort1",
+        )
+        cohort.calculate_people_ch(pending_version=0)
+        static_cohort = Cohort.objects.create(team=self.team, groups=[], is_static=True)
+        static_cohort.insert_users_by_list(["user0", "user1", "user2"])
+
+        batches = list(iter_cohort_person_ids(cohort, batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertCountEqual([person_id for batch in batches for person_id in batch], [str(p.uuid) for p in persons])
+
+        batches = list(iter_cohort_person_ids(static_cohort, batch_size=3))
+        self.assertEqual(len(batches), 1)
+        self.assertCountEqual(batches[0], [str(p.uuid) for p in persons[:3]])
+
     def test_insert_by_distinct_id_or_email(self):
         Person.objects.create(team_id=self.team.pk, distinct_ids=["1"])
         Person.objects.create(team_id=self.team.pk, distinct_ids=["123"])
@@ -755,6 +778,92 @@ class TestCohort(ClickhouseTestMixin, BaseTest):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0][0], p1.uuid)
 
+    def test_cohortpeople_recalculated_incrementally(self):
+        properties = [{"key": "$some_prop", "value": "something", "type": "person"}]
+
+        with freeze_time(datetime.now() - timedelta(days=3)):
+            p1 = Person.objects.create(team_id=self.team.pk, distinct_ids=["1"], properties={"$some_prop": "something"})
+            p2 = Person.objects.create(team_id=self.team.pk, distinct_ids=["2"], properties={"$some_prop": "something"})
+            p3 = Person.objects.create(team_id=self.team.pk, distinct_ids=["3"], properties={"$some_prop": "other"})
+
+            cohort1 = Cohort.objects.create(team=self.team, groups=[{"properties": properties}], name="cohort1")
+            cohort1.calculate_people_ch(pending_version=1)
+
+            # arrives with a _timestamp from before the previous calculation, so it's only picked up by a full one
+            p5 = Person.objects.create(team_id=self.team.pk, distinct_ids=["5"], properties={"$some_prop": "something"})
+
+        p2.version = 1
+        p2.properties = {"$some_prop": "another"}
+        p2.save()
+        p3.version = 1
+        p3.properties = {"$some_prop": "something"}
+        p3.save()
+        p4 = Person.objects.create(team_id=self.team.pk, distinct_ids=["4"], properties={"$some_prop": "something"})
+
+        cohort1.calculate_people_ch(pending_version=2, incremental=True)
+
+        results = self._get_cohortpeople(cohort1)
+        self.assertCountEqual([result[0] for result in results], [p1.uuid, p3.uuid, p4.uuid])
+        self.assertEqual(cohort1.count, 3)
+
+        cohort1.calculate_people_ch(pending_version=3)
+
+        results = self._get_cohortpeople(cohort1)
+        self.assertCountEqual([result[0] for result in results], [p1.uuid, p3.uuid, p4.uuid, p5.uuid])
+
+    def test_cohortpeople_calculated_in_batch(self):
+        p1 = Person.objects.create(
+            team_id=self.team.pk, distinct_ids=["1"], properties={"$some_prop": "something", "email": "a@posthog.com"}
+        )
+        p2 = Person.objects.create(
+            team_id=self.team.pk, distinct_ids=["2"], properties={"$some_prop": "something", "email": "b@example.com"}
+        )
+        p3 = Person.objects.create(team_id=self.team.pk, distinct_ids=["3"], properties={"email": "c@posthog.com"})
+
+        cohort1 = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "$some_prop", "value": "something", "type": "person"}]}],
+            name="cohort1",
+        )
+        cohort2 = Cohort.objects.create(
+            team=self.team,
+            groups=[
+                {"properties": [{"key": "email", "value": "@posthog.com", "type": "person", "operator": "icontains"}]}
+            ],
+            name="cohort2",
+        )
+        cohort3 = Cohort.objects.create(
+            team=self.team,
+            groups=[
+                {
+                    "properties": [
+                        {"key": "id", "value": cohort1.pk, "type": "cohort"},
+                        {"key": "id", "value": cohort2.pk, "type": "cohort", "negation": True},
+                    ]
+                }
+            ],
+            name="cohort3",
+        )
+        cohort1.calculate_people_ch(pending_version=1)
+
+        calculate_people_ch_in_batch(
+            self.team.pk, [cohort3, cohort1, cohort2], {cohort1.pk: 2, cohort2.pk: 1, cohort3.pk: 1}
+        )
+
+        self.assertCountEqual([result[0] for result in self._get_cohortpeople(cohort1)], [p1.uuid, p2.uuid])
+        self.assertCountEqual([result[0] for result in self._get_cohortpeople(cohort2)], [p1.uuid, p3.uuid])
+        self.assertCountEqual([result[0] for result in self._get_cohortpeople(cohort3)], [p2.uuid])
+        self.assertEqual((cohort1.version, cohort1.count), (2, 2))
+        self.assertEqual((cohort2.version, cohort2.count), (1, 2))
+        self.assertEqual((cohort3.version, cohort3.count), (1, 1))
+
+        # the previous version of the cohort calculated on its own is cleared
+        stale_rows = sync_execute(
+            "SELECT sum(sign) FROM cohortpeople WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = 1",
+            {"team_id": self.team.pk, "cohort_id": cohort1.pk},
+        )
+        self.assertEqual(stale_rows[0][0], 0)
+
     def test_cohort_change(self):
         p1 = Person.objects.create(
             team_id=self.team.pk,
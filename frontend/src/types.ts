@@ -4151,6 +4151,7 @@ export type BatchExportServiceS3 = {
         kms_key_id: string | null
         endpoint_url: string | null
         file_format: string
+        max_concurrent_uploads?: number | null
     }
 }
 
@@ -0,0 +1,110 @@
+import operator
+from collections.abc import Callable
+from copy import deepcopy
+from typing import Any, Optional
+
+from hogvm.python.loader import DecodedBytecode, Op, header_length
+from hogvm.python.utils import (
+    CONTAINER_TYPES,
+    HogVMException,
+    get_nested_value,
+    like,
+    regex_match,
+    unify_comparison_types,
+)
+
+# Operations on the two values at the top of the stack, given in the order they're popped
+BINARY_OPERATIONS: dict[int, Callable[[Any, Any], Any]] = {
+    Op.PLUS: lambda a, b: a + b,
+    Op.MINUS: lambda a, b: a - b,
+    Op.MULTIPLY: lambda a, b: a * b,
+    Op.DIVIDE: lambda a, b: a / b,
+    Op.MOD: lambda a, b: a % b,
+    Op.EQ: lambda a, b: operator.eq(*unify_comparison_types(a, b)),
+    Op.NOT_EQ: lambda a, b: operator.ne(*unify_comparison_types(a, b)),
+    Op.GT: lambda a, b: operator.gt(*unify_comparison_types(a, b)),
+    Op.GT_EQ: lambda a, b: operator.ge(*unify_comparison_types(a, b)),
+    Op.LT: lambda a, b: operator.lt(*unify_comparison_types(a, b)),
+    Op.LT_EQ: lambda a, b: operator.le(*unify_comparison_types(a, b)),
+    Op.LIKE: lambda a, b: like(a, b),
+    Op.ILIKE: lambda a, b: like(a, b, case_insensitive=True),
+    Op.NOT_LIKE: lambda a, b: not like(a, b),
+    Op.NOT_ILIKE: lambda a, b: not like(a, b, case_insensitive=True),
+    Op.IN: lambda a, b: a in b,
+    Op.NOT_IN: lambda a, b: a not in b,
+    Op.REGEX: lambda a, b: regex_match(a, b),
+    Op.NOT_REGEX: lambda a, b: not regex_match(a, b),
+    Op.IREGEX: lambda a, b: regex_match(a, b, case_insensitive=True),
+    Op.NOT_IREGEX: lambda a, b: not regex_match(a, b, case_insensitive=True),
+}
+
+CONSTANT_OPERATIONS = {Op.TRUE, Op.FALSE, Op.NULL, Op.STRING, Op.INTEGER, Op.FLOAT}
+COLUMNAR_OPERATIONS = {*CONSTANT_OPERATIONS, *BINARY_OPERATIONS, Op.GET_GLOBAL, Op.NOT, Op.AND, Op.OR, Op.POP}
+
+
+def get_columnar_program(bytecode: DecodedBytecode) -> Optional[list[tuple[Any, tuple]]]:
+    """
+    The instructions of the bytecode if it can be evaluated column-wise, i.e. for many sets of globals at once.
+
+    That's bytecode that runs straight through, without jumps, calls, locals or closures, and only reads globals by
+    constant chains, as filters do.
+    """
+    program = []
+    ip = header_length(bytecode.bytecode)
+    while ip < len(bytecode.bytecode):
+        instruction = bytecode.instructions[ip]
+        if instruction is None:
+            return None
+        op, operands, ip = instruction
+        if op not in COLUMNAR_OPERATIONS or (op == Op.GET_GLOBAL and operands[1] is None):
+            return None
+        program.append((op, operands))
+    return program
+
+
+def global_chain_roots(program: list[tuple[Any, tuple]]) -> set[str]:
+    return {operands[1][0] for op, operands in program if op == Op.GET_GLOBAL}
+
+
+def execute_columnar(program: list[tuple[Any, tuple]], globals_list: list[dict[str, Any]]) -> list[Any]:
+    """
+    Evaluate the program for each of the globals, one instruction at a time for all of them.
+
+    Every global the program reads must be set in each of the globals. Memory isn't accounted for, as without loops or
+    calls the program can't allocate much more than its inputs.
+    """
+    rows = len(globals_list)
+    stack: list[list[Any]] = []
+    for op, operands in program:
+        if op in BINARY_OPERATIONS:
+            operation = BINARY_OPERATIONS[op]
+            first, second = stack.pop(), stack.pop()
+            stack.append([operation(a, b) for a, b in zip(first, second)])
+        elif op == Op.GET_GLOBAL:
+            chain = operands[1]
+            stack.append([get_nested_value(globals, chain, True) for globals in globals_list])
+        elif op == Op.STRING or op == Op.INTEGER or op == Op.FLOAT:
+            stack.append([operands[0]] * rows)
+        elif op == Op.TRUE:
+            stack.append([True] * rows)
+        elif op == Op.FALSE:
+            stack.append([False] * rows)
+        elif op == Op.NULL:
+            stack.append([None] * rows)
+        elif op == Op.NOT:
+            stack.append([not value for value in stack.pop()])
+        elif op == Op.AND:
+            columns = [stack.pop() for _ in range(operands[0])]
+            stack.append([all(values) for values in zip(*columns)] if columns else [True] * rows)
+        elif op == Op.OR:
+            columns = [stack.pop() for _ in range(operands[0])]
+            stack.append([any(values) for values in zip(*columns)] if columns else [False] * rows)
+        elif op == Op.POP:
+            stack.pop()
+
+    if len(stack) > 1:
+        raise HogVMException("Invalid bytecode. More than one value left on stack")
+    if not stack:
+        return [None] * rows
+    # Values read from the globals are copied, as they would be by the VM
+    return [deepcopy(value) if isinstance(value, CONTAINER_TYPES) else value for value in stack[0]]
@@ -1,5 +1,4 @@
 from datetime import timedelta
-import re
 import time
 from copy import deepcopy
 from typing import Any, Optional, TYPE_CHECKING
@@ -7,7 +6,9 @@ from collections.abc import Callable
 
 from hogvm.python.debugger import debugger, color_bytecode
 from hogvm.python.objects import is_hog_error, new_hog_closure, CallFrame, ThrowFrame, new_hog_callable, is_hog_upvalue
-from hogvm.python.operation import Operation, HOGQL_BYTECODE_IDENTIFIER, HOGQL_BYTECODE_IDENTIFIER_V0
+from hogvm.python.columnar import execute_columnar, get_columnar_program, global_chain_roots
+from hogvm.python.loader import DecodedBytecode, Op, header_length, load_bytecode
+from hogvm.python.operation import HOGQL_BYTECODE_IDENTIFIER, HOGQL_BYTECODE_IDENTIFIER_V0
 from hogvm.python.stl import STL
 from hogvm.python.stl.bytecode import BYTECODE_STL
 from dataclasses import dataclass
@@ -17,8 +18,9 @@ from hogvm.python.utils import (
     HogVMException,
     get_nested_value,
     like,
+    regex_match,
     set_nested_value,
-    calculate_cost,
+    ContainerCostCache,
     unify_comparison_types,
 )
 
@@ -33,12 +35,12 @@ CALLSTACK_LENGTH = 1000
 @dataclass
 class BytecodeResult:
     result: Any
-    bytecodes: dict[str, list[Any]]
+    bytecodes: dict[str, Any]
     stdout: list[str]
 
 
 def execute_bytecode(
-    input: list[Any] | dict,
+    input: list[Any] | DecodedBytecode | dict,
     globals: Optional[dict[str, Any]] = None,
     functions: Optional[dict[str, Callable[..., Any]]] = None,
     timeout=timedelta(seconds=5),
@@ -46,7 +48,8 @@ def execute_bytecode(
     debug=False,
 ) -> BytecodeResult:
     bytecodes = input if isinstance(input, dict) else {"root": {"bytecode": input}}
-    root_bytecode = bytecodes.get("root", {}).get("bytecode", []) or []
+    root_chunk = load_bytecode(bytecodes.get("root", {}).get("bytecode", []) or [])
+    root_bytecode = root_chunk.bytecode
 
     if (
         not root_bytecode
@@ -61,6 +64,7 @@ def execute_bytecode(
     upvalues: list[dict] = []
     upvalues_by_id: dict[int, dict] = {}
     mem_stack: list = []
+    cost_cache = ContainerCostCache()
     call_stack: list[CallFrame] = []
     throw_stack: list[ThrowFrame] = []
     declared_functions: dict[str, tuple[int, int]] = {}
@@ -92,22 +96,29 @@ def execute_bytecode(
             )
         )
     frame = call_stack[-1]
+    chunk: DecodedBytecode = root_chunk
     chunk_bytecode: list[Any] = root_bytecode
+    loaded_chunks: dict[str, DecodedBytecode] = {}
     chunk_globals = globals
 
     def set_chunk_bytecode():
-        nonlocal chunk_bytecode, chunk_globals, last_op, debug_bytecode
+        nonlocal chunk, chunk_bytecode, chunk_globals, last_op, debug_bytecode
         if not frame.chunk or frame.chunk == "root":
-            chunk_bytecode = root_bytecode
+            chunk = root_chunk
             chunk_globals = globals
         elif frame.chunk.startswith("stl/") and frame.chunk[4:] in BYTECODE_STL:
-            chunk_bytecode = BYTECODE_STL[frame.chunk[4:]][1]
+            if frame.chunk not in loaded_chunks:
+                loaded_chunks[frame.chunk] = load_bytecode(BYTECODE_STL[frame.chunk[4:]][1])
+            chunk = loaded_chunks[frame.chunk]
             chunk_globals = {}
         elif bytecodes.get(frame.chunk):
-            chunk_bytecode = bytecodes[frame.chunk].get("bytecode", [])
+            if frame.chunk not in loaded_chunks:
+                loaded_chunks[frame.chunk] = load_bytecode(bytecodes[frame.chunk].get("bytecode", []))
+            chunk = loaded_chunks[frame.chunk]
             chunk_globals = bytecodes[frame.chunk].get("globals", {})
         else:
             raise HogVMException(f"Unknown chunk: {frame.chunk}")
+        chunk_bytecode = chunk.bytecode
         last_op = len(chunk_bytecode) - 1
         if debug:
             debug_bytecode = color_bytecode(chunk_bytecode)
@@ -132,29 +143,29 @@ def execute_bytecode(
         stack = stack[0:count]
         mem_used -= sum(mem_stack[count:])
         mem_stack = mem_stack[0:count]
+        for value in removed:
+            cost_cache.release(value)
         return removed
 
-    def next_token():
-        nonlocal frame, chunk_bytecode
-        if frame.ip >= last_op:
-            raise HogVMException("Unexpected end of bytecode")
-        frame.ip += 1
-        return chunk_bytecode[frame.ip]
-
     def pop_stack():
         if not stack:
             raise HogVMException("Stack underflow")
         nonlocal mem_used
         mem_used -= mem_stack.pop()
-        return stack.pop()
+        value = stack.pop()
+        cost_cache.release(value)
+        return value
 
-    def push_stack(value):
+    def push_stack(value, retained_cost: Optional[int] = None):
+        # Pass `retained_cost` if the value was already retained in the cost cache, e.g. to cost it before popping
+        # the values it's made of, which would otherwise drop them from the cache
         stack.append(value)
-        mem_stack.append(calculate_cost(value))
+        mem_stack.append(cost_cache.retain(value) if retained_cost is None else retained_cost)
         nonlocal mem_used
         mem_used += mem_stack[-1]
         nonlocal max_mem_used
-        max_mem_used = max(mem_used, max_mem_used)
+        if mem_used > max_mem_used:
+            max_mem_used = mem_used
         if mem_used > MAX_MEMORY:
             raise HogVMException(f"Memory limit of {MAX_MEMORY} bytes exceeded. Tried to allocate {mem_used} bytes.")
 
@@ -199,88 +210,110 @@ def execute_bytecode(
             set_chunk_bytecode()
 
         ops += 1
-        symbol = chunk_bytecode[frame.ip]
+        symbol, operands, next_ip = chunk.instructions[frame.ip] or chunk.instruction(frame.ip)
         if (ops & 127) == 0:  # every 128th operation
             check_timeout()
         elif debug:
-            debugger(symbol, chunk_bytecode, debug_bytecode, frame.ip, stack, call_stack, throw_stack)
+            debugger(chunk_bytecode[frame.ip], chunk_bytecode, debug_bytecode, frame.ip, stack, call_stack, throw_stack)
         match symbol:
+            # The most common operations first, as cases are tried in order
+            case Op.GET_LOCAL:
+                stack_start = 0 if not call_stack else call_stack[-1].stack_start
+                push_stack(stack[operands[0] + stack_start])
+            case Op.SET_LOCAL:
+                stack_start = 0 if not call_stack else call_stack[-1].stack_start
+                if not stack:
+                    raise HogVMException("Stack underflow")
+                cost = cost_cache.retain(stack[-1])
+                value = pop_stack()
+                index = operands[0] + stack_start
+                cost_cache.release(stack[index])
+                stack[index] = value
+                last_cost = mem_stack[index]
+                mem_stack[index] = cost
+                mem_used += mem_stack[index] - last_cost
+                max_mem_used = max(mem_used, max_mem_used)
+            case Op.JUMP_IF_FALSE:
+                if not pop_stack():
+                    next_ip = operands[0]
+            case Op.JUMP:
+                next_ip = operands[0]
             case None:
                 break
-            case Operation.STRING:
-                push_stack(next_token())
-            case Operation.INTEGER:
-                push_stack(next_token())
-            case Operation.FLOAT:
-                push_stack(next_token())
-            case Operation.TRUE:
+            case Op.STRING:
+                push_stack(operands[0])
+            case Op.INTEGER:
+                push_stack(operands[0])
+            case Op.FLOAT:
+                push_stack(operands[0])
+            case Op.TRUE:
                 push_stack(True)
-            case Operation.FALSE:
+            case Op.FALSE:
                 push_stack(False)
-            case Operation.NULL:
+            case Op.NULL:
                 push_stack(None)
-            case Operation.NOT:
+            case Op.NOT:
                 push_stack(not pop_stack())
-            case Operation.AND:
-                push_stack(all([pop_stack() for _ in range(next_token())]))  # noqa: C419
-            case Operation.OR:
-                push_stack(any([pop_stack() for _ in range(next_token())]))  # noqa: C419
-            case Operation.PLUS:
+            case Op.AND:
+                push_stack(all([pop_stack() for _ in range(operands[0])]))  # noqa: C419
+            case Op.OR:
+                push_stack(any([pop_stack() for _ in range(operands[0])]))  # noqa: C419
+            case Op.PLUS:
                 push_stack(pop_stack() + pop_stack())
-            case Operation.MINUS:
+            case Op.MINUS:
                 push_stack(pop_stack() - pop_stack())
-            case Operation.DIVIDE:
+            case Op.DIVIDE:
                 push_stack(pop_stack() / pop_stack())
-            case Operation.MULTIPLY:
+            case Op.MULTIPLY:
                 push_stack(pop_stack() * pop_stack())
-            case Operation.MOD:
+            case Op.MOD:
                 push_stack(pop_stack() % pop_stack())
-            case Operation.EQ:
+            case Op.EQ:
                 var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
                 push_stack(var1 == var2)
-            case Operation.NOT_EQ:
+            case Op.NOT_EQ:
                 var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
                 push_stack(var1 != var2)
-            case Operation.GT:
+            case Op.GT:
                 var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
                 push_stack(var1 > var2)
-            case Operation.GT_EQ:
+            case Op.GT_EQ:
                 var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
                 push_stack(var1 >= var2)
-            case Operation.LT:
+            case Op.LT:
                 var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
                 push_stack(var1 < var2)
-            case Operation.LT_EQ:
+            case Op.LT_EQ:
                 var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
                 push_stack(var1 <= var2)
-            case Operation.LIKE:
+            case Op.LIKE:
                 push_stack(like(pop_stack(), pop_stack()))
-            case Operation.ILIKE:
-                push_stack(like(pop_stack(), pop_stack(), re.IGNORECASE))
-            case Operation.NOT_LIKE:
+            case Op.ILIKE:
+                push_stack(like(pop_stack(), pop_stack(), case_insensitive=True))
+            case Op.NOT_LIKE:
                 push_stack(not like(pop_stack(), pop_stack()))
-            case Operation.NOT_ILIKE:
-                push_stack(not like(pop_stack(), pop_stack(), re.IGNORECASE))
-            case Operation.IN:
+            case Op.NOT_ILIKE:
+                push_stack(not like(pop_stack(), pop_stack(), case_insensitive=True))
+            case Op.IN:
                 push_stack(pop_stack() in pop_stack())
-            case Operation.NOT_IN:
+            case Op.NOT_IN:
                 push_stack(pop_stack() not in pop_stack())
-            case Operation.REGEX:
+            case Op.REGEX:
                 args = [pop_stack(), pop_stack()]
-                # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
-                push_stack(bool(re.search(re.compile(args[1]), args[0])))
-            case Operation.NOT_REGEX:
+                push_stack(regex_match(args[0], args[1]))
+            case Op.NOT_REGEX:
                 args = [pop_stack(), pop_stack()]
-                # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
-                push_stack(not bool(re.search(re.compile(args[1]), args[0])))
-            case Operation.IREGEX:
+                push_stack(not regex_match(args[0], args[1]))
+            case Op.IREGEX:
                 args = [pop_stack(), pop_stack()]
-                push_stack(bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])))
-            case Operation.NOT_IREGEX:
+                push_stack(regex_match(args[0], args[1], case_insensitive=True))
+            case Op.NOT_IREGEX:
                 args = [pop_stack(), pop_stack()]
-                push_stack(not bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])))
-            case Operation.GET_GLOBAL:
-                chain = [pop_stack() for _ in range(next_token())]
+                push_stack(not regex_match(args[0], args[1], case_insensitive=True))
+            case Op.GET_GLOBAL:
+                count, chain = operands
+                if chain is None:
+                    chain = [pop_stack() for _ in range(count)]
                 if chunk_globals and chain[0] in chunk_globals:
                     push_stack(deepcopy(get_nested_value(chunk_globals, chain, True)))
                 elif functions and chain[0] in functions:
@@ -324,97 +357,78 @@ def execute_bytecode(
                     )
                 else:
                     raise HogVMException(f"Global variable not found: {chain[0]}")
-            case Operation.POP:
+            case Op.POP:
                 pop_stack()
-            case Operation.CLOSE_UPVALUE:
+            case Op.CLOSE_UPVALUE:
                 stack_keep_first_elements(len(stack) - 1)
-            case Operation.RETURN:
+            case Op.RETURN:
+                if not stack:
+                    raise HogVMException("Stack underflow")
+                response_cost = cost_cache.retain(stack[-1])
                 response = pop_stack()
                 last_call_frame = call_stack.pop()
                 if len(call_stack) == 0 or last_call_frame is None:
                     return BytecodeResult(result=response, stdout=stdout, bytecodes=bytecodes)
                 stack_start = last_call_frame.stack_start
                 stack_keep_first_elements(stack_start)
-                push_stack(response)
+                push_stack(response, response_cost)
                 frame = call_stack[-1]
                 set_chunk_bytecode()
                 continue  # resume the loop without incrementing frame.ip
 
-            case Operation.GET_LOCAL:
-                stack_start = 0 if not call_stack else call_stack[-1].stack_start
-                push_stack(stack[next_token() + stack_start])
-            case Operation.SET_LOCAL:
-                stack_start = 0 if not call_stack else call_stack[-1].stack_start
-                value = pop_stack()
-                index = next_token() + stack_start
-                stack[index] = value
-                last_cost = mem_stack[index]
-                mem_stack[index] = calculate_cost(value)
-                mem_used += mem_stack[index] - last_cost
-                max_mem_used = max(mem_used, max_mem_used)
-            case Operation.GET_PROPERTY:
+            case Op.GET_PROPERTY:
                 property = pop_stack()
                 push_stack(get_nested_value(pop_stack(), [property]))
-            case Operation.GET_PROPERTY_NULLISH:
+            case Op.GET_PROPERTY_NULLISH:
                 property = pop_stack()
                 push_stack(get_nested_value(pop_stack(), [property], nullish=True))
-            case Operation.SET_PROPERTY:
+            case Op.SET_PROPERTY:
                 value = pop_stack()
                 field = pop_stack()
-                set_nested_value(pop_stack(), [field], value)
-            case Operation.DICT:
-                count = next_token()
+                obj = pop_stack()
+                set_nested_value(obj, [field], value)
+                cost_cache.invalidate(obj)
+            case Op.DICT:
+                count = operands[0]
                 if count > 0:
                     elems = stack[-(count * 2) :]
-                    stack = stack[: -(count * 2)]
-                    mem_used -= sum(mem_stack[-(count * 2) :])
-                    mem_stack = mem_stack[: -(count * 2)]
-                    push_stack({elems[i]: elems[i + 1] for i in range(0, len(elems), 2)})
+                    value = {elems[i]: elems[i + 1] for i in range(0, len(elems), 2)}
+                    cost = cost_cache.retain(value)
+                    stack_keep_first_elements(len(stack) - count * 2)
+                    push_stack(value, cost)
                 else:
                     push_stack({})
-            case Operation.ARRAY:
-                count = next_token()
+            case Op.ARRAY:
+                count = operands[0]
                 if count > 0:
                     elems = stack[-count:]
-                    stack = stack[:-count]
-                    mem_used -= sum(mem_stack[-count:])
-                    mem_stack = mem_stack[:-count]
-                    push_stack(elems)
+                    value = elems
+                    cost = cost_cache.retain(value)
+                    stack_keep_first_elements(len(stack) - count)
+                    push_stack(value, cost)
                 else:
                     push_stack([])
-            case Operation.TUPLE:
-                count = next_token()
+            case Op.TUPLE:
+                count = operands[0]
                 if count > 0:
                     elems = stack[-count:]
-                    stack = stack[:-count]
-                    mem_used -= sum(mem_stack[-count:])
-                    mem_stack = mem_stack[:-count]
-                    push_stack(tuple(elems))
+                    value = tuple(elems)
+                    cost = cost_cache.retain(value)
+                    stack_keep_first_elements(len(stack) - count)
+                    push_stack(value, cost)
                 else:
                     push_stack(())
-            case Operation.JUMP:
-                count = next_token()
-                frame.ip += count
-            case Operation.JUMP_IF_FALSE:
-                count = next_token()
-                if not pop_stack():
-                    frame.ip += count
-            case Operation.JUMP_IF_STACK_NOT_NULL:
-                count = next_token()
+            case Op.JUMP_IF_STACK_NOT_NULL:
                 if len(stack) > 0 and stack[-1] is not None:
-                    frame.ip += count
-            case Operation.DECLARE_FN:
+                    next_ip = operands[0]
+            case Op.DECLARE_FN:
                 # DEPRECATED
-                name = next_token()
-                arg_len = next_token()
-                body_len = next_token()
-                declared_functions[name] = (frame.ip + 1, arg_len)
-                frame.ip += body_len
-            case Operation.CALLABLE:
-                name = next_token()  # TODO: do we need it? it could change as the variable is reassigned
-                arg_count = next_token()
-                upvalue_count = next_token()
-                body_length = next_token()
+                name, arg_len, body_len = operands
+                declared_functions[name] = (next_ip, arg_len)
+                next_ip += body_len
+            case Op.CALLABLE:
+                # TODO: do we need the name? it could change as the variable is reassigned
+                name, arg_count, upvalue_count, body_length = operands
                 push_stack(
                     new_hog_callable(
                         type="local",
@@ -422,28 +436,27 @@ def execute_bytecode(
                         chunk=frame.chunk,
                         arg_count=arg_count,
                         upvalue_count=upvalue_count,
-                        ip=frame.ip + 1,
+                        ip=next_ip,
                     )
                 )
-                frame.ip += body_length
-            case Operation.CLOSURE:
+                next_ip += body_length
+            case Op.CLOSURE:
                 closure_callable = pop_stack()
                 closure = new_hog_closure(closure_callable)
                 stack_start = frame.stack_start
-                upvalue_count = next_token()
+                upvalue_count, closure_upvalues = operands
                 if upvalue_count != closure_callable["upvalueCount"]:
                     raise HogVMException(
                         f"Invalid upvalue count. Expected {closure_callable['upvalueCount']}, got {upvalue_count}"
                     )
-                for _ in range(closure_callable["upvalueCount"]):
-                    is_local, index = next_token(), next_token()
+                for is_local, index in closure_upvalues:
                     if is_local:
                         closure["upvalues"].append(capture_upvalue(stack_start + index)["id"])
                     else:
                         closure["upvalues"].append(frame.closure["upvalues"][index])
                 push_stack(closure)
-            case Operation.GET_UPVALUE:
-                index = next_token()
+            case Op.GET_UPVALUE:
+                index = operands[0]
                 closure = frame.closure
                 if index >= len(closure["upvalues"]):
                     raise HogVMException(f"Invalid upvalue index: {index}")
@@ -454,8 +467,8 @@ def execute_bytecode(
                     push_stack(upvalue["value"])
                 else:
                     push_stack(stack[upvalue["location"]])
-            case Operation.SET_UPVALUE:
-                index = next_token()
+            case Op.SET_UPVALUE:
+                index = operands[0]
                 closure = frame.closure
                 if index >= len(closure["upvalues"]):
                     raise HogVMException(f"Invalid upvalue index: {index}")
@@ -465,15 +478,23 @@ def execute_bytecode(
                 if upvalue["closed"]:
                     upvalue["value"] = pop_stack()
                 else:
-                    stack[upvalue["location"]] = pop_stack()
-            case Operation.CALL_GLOBAL:
+                    if not stack:
+                        raise HogVMException("Stack underflow")
+                    location = upvalue["location"]
+                    cost = cost_cache.retain(stack[-1])
+                    value = pop_stack()
+                    cost_cache.release(stack[location])
+                    stack[location] = value
+                    mem_used += cost - mem_stack[location]
+                    mem_stack[location] = cost
+                    max_mem_used = max(mem_used, max_mem_used)
+            case Op.CALL_GLOBAL:
                 check_timeout()
-                name = next_token()
-                arg_count = next_token()
+                name, arg_count = operands
                 # This is for backwards compatibility. We use a closure on the stack with local functions now.
                 if name in declared_functions:
                     func_ip, arg_len = declared_functions[name]
-                    frame.ip += 1  # advance for when we return
+                    frame.ip = next_ip  # advance for when we return
                     if arg_len > arg_count:
                         for _ in range(arg_len - arg_count):
                             push_stack(None)
@@ -501,7 +522,7 @@ def execute_bytecode(
                         if arg_count != 1:
                             raise HogVMException("Function import requires exactly 1 argument")
                         module_name = pop_stack()
-                        frame.ip += 1  # advance for when we return
+                        frame.ip = next_ip  # advance for when we return
                         frame = CallFrame(
                             ip=0,
                             chunk=module_name,
@@ -526,7 +547,10 @@ def execute_bytecode(
                             args = [pop_stack() for _ in range(arg_count)]
                         else:
                             args = stack_keep_first_elements(len(stack) - arg_count)
-                        push_stack(functions[name](*args))
+                        result = functions[name](*args)
+                        # Host functions may mutate their arguments
+                        cost_cache.clear()
+                        push_stack(result)
                     elif name in STL:
                         if version == 0:
                             args = [pop_stack() for _ in range(arg_count)]
@@ -537,7 +561,7 @@ def execute_bytecode(
                         arg_names = BYTECODE_STL[name][0]
                         if len(arg_names) != arg_count:
                             raise HogVMException(f"Function {name} requires exactly {len(arg_names)} arguments")
-                        frame.ip += 1  # advance for when we return
+                        frame.ip = next_ip  # advance for when we return
                         frame = CallFrame(
                             ip=0,
                             chunk=f"stl/{name}",
@@ -559,7 +583,7 @@ def execute_bytecode(
                         continue  # resume the loop without incrementing frame.ip
                     else:
                         raise HogVMException(f"Unsupported function call: {name}")
-            case Operation.CALL_LOCAL:
+            case Op.CALL_LOCAL:
                 check_timeout()
                 closure = pop_stack()
                 if not isinstance(closure, dict) or closure.get("__hogClosure__") is None:
@@ -567,7 +591,7 @@ def execute_bytecode(
                 callable = closure.get("callable")
                 if not isinstance(callable, dict) or callable.get("__hogCallable__") is None:
                     raise HogVMException(f"Invalid callable: {callable}")
-                args_length = next_token()
+                args_length = operands[0]
                 if args_length > MAX_FUNCTION_ARGS_LENGTH:
                     raise HogVMException("Too many arguments")
 
@@ -580,7 +604,7 @@ def execute_bytecode(
                         raise HogVMException(
                             f"Too many arguments. Passed {args_length}, expected {callable['argCount']}"
                         )
-                    frame.ip += 1  # advance for when we return
+                    frame.ip = next_ip  # advance for when we return
                     frame = CallFrame(
                         ip=callable["ip"],
                         chunk=callable["chunk"],
@@ -616,18 +640,16 @@ def execute_bytecode(
                 else:
                     raise HogVMException("Invalid callable")
 
-            case Operation.TRY:
+            case Op.TRY:
                 throw_stack.append(
-                    ThrowFrame(
-                        call_stack_len=len(call_stack), stack_len=len(stack), catch_ip=frame.ip + 1 + next_token()
-                    )
+                    ThrowFrame(call_stack_len=len(call_stack), stack_len=len(stack), catch_ip=operands[0])
                 )
-            case Operation.POP_TRY:
+            case Op.POP_TRY:
                 if throw_stack:
                     throw_stack.pop()
                 else:
                     raise HogVMException("Invalid operation POP_TRY: no try block to pop")
-            case Operation.THROW:
+            case Op.THROW:
                 exception = pop_stack()
                 if not is_hog_error(exception):
                     raise HogVMException("Can not throw: value is not of type Error")
@@ -656,6 +678,43 @@ def execute_bytecode(
                     f'Unexpected node while running bytecode in chunk "{frame.chunk}": {chunk_bytecode[frame.ip]}'
                 )
 
-        frame.ip += 1
+        frame.ip = next_ip
 
     return BytecodeResult(result=pop_stack() if len(stack) > 0 else None, stdout=stdout, bytecodes=bytecodes)
+
+
+def execute_bytecode_batch(
+    input: list[Any] | DecodedBytecode,
+    globals_list: list[Optional[dict[str, Any]]],
+    functions: Optional[dict[str, Callable[..., Any]]] = None,
+    timeout=timedelta(seconds=5),
+    team: Optional["Team"] = None,
+) -> list[BytecodeResult]:
+    """
+    Execute the same bytecode for each of the globals, e.g. to run a filter over many events.
+
+    The bytecode is only decoded once, and filter-like bytecode is evaluated column-wise, one instruction at a time for
+    all the globals that have the values it reads.
+    """
+    bytecode = load_bytecode(input)
+    bytecodes = {"root": {"bytecode": bytecode}}
+    results: list[Optional[BytecodeResult]] = [None] * len(globals_list)
+
+    program = get_columnar_program(bytecode) if header_length(bytecode.bytecode) > 0 else None
+    if program is not None:
+        roots = global_chain_roots(program)
+        rows = [(index, globals) for index, globals in enumerate(globals_list) if globals and roots.issubset(globals)]
+        try:
+            values = execute_columnar(program, [globals for _, globals in rows])
+        except Exception:
+            pass  # executed one by one below, which raises the error for the globals that cause it
+        else:
+            for (index, _), value in zip(rows, values):
+                results[index] = BytecodeResult(result=value, stdout=[], bytecodes=bytecodes)
+
+    return [
+        result
+        if result is not None
+        else execute_bytecode(bytecode, globals=globals, functions=functions, timeout=timeout, team=team)
+        for result, globals in zip(results, globals_list)
+    ]
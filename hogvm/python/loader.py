@@ -0,0 +1,155 @@
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from hogvm.python.operation import Operation, HOGQL_BYTECODE_IDENTIFIER, HOGQL_BYTECODE_IDENTIFIER_V0
+from hogvm.python.utils import HogVMException
+
+# Operations as plain ints. Comparing against these is several times faster than against enum members, which matters
+# when dispatching every instruction.
+Op = SimpleNamespace(**{operation.name: operation.value for operation in Operation})
+
+# Decoded bytecode is cached by content, as the same filters and functions run over and over
+DECODED_BYTECODE_CACHE_SIZE = 1024
+# Longer runs of strings aren't looked at for a GET_GLOBAL to fold into, which keeps decoding linear
+MAX_GLOBAL_CHAIN_LENGTH = 16
+
+# Operations with a fixed number of operands following them in the bytecode. CLOSURE has a variable number.
+OPERAND_COUNTS: dict[int, int] = {
+    **{operation.value: 0 for operation in Operation},
+    Op.GET_GLOBAL: 1,
+    Op.CALL_GLOBAL: 2,
+    Op.AND: 1,
+    Op.OR: 1,
+    Op.STRING: 1,
+    Op.INTEGER: 1,
+    Op.FLOAT: 1,
+    Op.GET_LOCAL: 1,
+    Op.SET_LOCAL: 1,
+    Op.JUMP: 1,
+    Op.JUMP_IF_FALSE: 1,
+    Op.DECLARE_FN: 3,
+    Op.DICT: 1,
+    Op.ARRAY: 1,
+    Op.TUPLE: 1,
+    Op.JUMP_IF_STACK_NOT_NULL: 1,
+    Op.TRY: 1,
+    Op.CALLABLE: 4,
+    Op.CALL_LOCAL: 1,
+    Op.GET_UPVALUE: 1,
+    Op.SET_UPVALUE: 1,
+}
+
+# (operation, operands, ip of the next instruction)
+Instruction = tuple[Any, tuple, int]
+
+
+class DecodedBytecode:
+    """
+    Bytecode decoded into instructions, indexed by their position in the original bytecode, so that call frames,
+    callables and catch blocks can keep pointing into it.
+
+    Jump targets are resolved to absolute positions, and chains of strings fed into GET_GLOBAL are folded into the
+    GET_GLOBAL. Positions that aren't reached by reading the bytecode from the start (i.e. only invalid bytecode
+    jumps to them) are decoded the first time they're executed.
+    """
+
+    __slots__ = ("bytecode", "instructions")
+
+    def __init__(self, bytecode: list[Any]):
+        self.bytecode = bytecode
+        self.instructions: list[Optional[Instruction]] = [None] * len(bytecode)
+
+        ip = header_length(bytecode)
+        while ip < len(bytecode):
+            try:
+                instruction = decode_instruction(bytecode, ip)
+            except (HogVMException, TypeError):
+                break  # raised again if the truncated instruction is ever executed
+            self.instructions[ip] = instruction
+            ip = instruction[2]
+
+    def instruction(self, ip: int) -> Instruction:
+        instruction = self.instructions[ip]
+        if instruction is None:
+            instruction = self.instructions[ip] = decode_instruction(self.bytecode, ip)
+        return instruction
+
+
+def header_length(bytecode: list[Any]) -> int:
+    if not bytecode:
+        return 0
+    if bytecode[0] == HOGQL_BYTECODE_IDENTIFIER:
+        return 2
+    if bytecode[0] == HOGQL_BYTECODE_IDENTIFIER_V0:
+        return 1
+    return 0
+
+
+def decode_instruction(bytecode: list[Any], ip: int) -> Instruction:
+    symbol = bytecode[ip]
+    if not isinstance(symbol, int | float) or symbol not in OPERAND_COUNTS:
+        # Unknown symbols are left for the VM to complain about if they're ever executed
+        return symbol, (), ip + 1
+
+    op = int(symbol)
+    if op == Op.CLOSURE:
+        upvalue_count = _operand(bytecode, ip + 1)
+        upvalues = tuple(
+            (_operand(bytecode, ip + 2 + i * 2), _operand(bytecode, ip + 3 + i * 2)) for i in range(upvalue_count)
+        )
+        return op, (upvalue_count, upvalues), ip + 2 + upvalue_count * 2
+
+    count = OPERAND_COUNTS[op]
+    operands = tuple(_operand(bytecode, ip + 1 + i) for i in range(count))
+    next_ip = ip + 1 + count
+
+    if op == Op.STRING:
+        chain = _get_global_chain(bytecode, ip)
+        if chain is not None:
+            return Op.GET_GLOBAL, (len(chain), chain), ip + 2 * len(chain) + 2
+    elif op == Op.GET_GLOBAL:
+        operands = (operands[0], None)
+    elif op in (Op.JUMP, Op.JUMP_IF_FALSE, Op.JUMP_IF_STACK_NOT_NULL):
+        operands = (next_ip + operands[0],)
+    elif op == Op.TRY:
+        operands = (ip + 1 + operands[0],)
+
+    return op, operands, next_ip
+
+
+def load_bytecode(bytecode: "list[Any] | DecodedBytecode") -> DecodedBytecode:
+    if isinstance(bytecode, DecodedBytecode):
+        return bytecode
+    try:
+        # Types are part of the key, as e.g. 1 == 1.0 == True but they don't behave the same
+        return _decode_bytecode(tuple(bytecode), tuple(map(type, bytecode)))
+    except TypeError:  # unhashable tokens
+        return DecodedBytecode(bytecode)
+
+
+@lru_cache(maxsize=DECODED_BYTECODE_CACHE_SIZE)
+def _decode_bytecode(bytecode: tuple, types: tuple) -> DecodedBytecode:
+    return DecodedBytecode(list(bytecode))
+
+
+def _operand(bytecode: list[Any], ip: int) -> Any:
+    if ip >= len(bytecode):
+        raise HogVMException("Unexpected end of bytecode")
+    return bytecode[ip]
+
+
+def _get_global_chain(bytecode: list[Any], ip: int) -> Optional[tuple]:
+    """If the STRING at `ip` starts a run of strings all popped by a GET_GLOBAL, the chain that GET_GLOBAL looks up."""
+    strings: list[Any] = []
+    while ip + 1 < len(bytecode) and _is_op(bytecode[ip], Op.STRING) and len(strings) < MAX_GLOBAL_CHAIN_LENGTH:
+        strings.append(bytecode[ip + 1])
+        ip += 2
+    if ip + 1 < len(bytecode) and _is_op(bytecode[ip], Op.GET_GLOBAL) and bytecode[ip + 1] == len(strings):
+        # GET_GLOBAL pops the chain off the stack, so the first string pushed is the last link
+        return tuple(reversed(strings))
+    return None
+
+
+def _is_op(symbol: Any, op: int) -> bool:
+    return isinstance(symbol, int | float) and symbol == op
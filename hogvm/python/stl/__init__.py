@@ -3,7 +3,6 @@ import datetime
 import time
 from typing import Any, Optional, TYPE_CHECKING
 from collections.abc import Callable
-import re
 import json
 
 import pytz
@@ -24,7 +23,7 @@ from .date import (
 )
 from .crypto import sha256Hex, md5Hex, sha256HmacChainHex
 from ..objects import is_hog_error, new_hog_error, is_hog_callable, is_hog_closure
-from ..utils import like, get_nested_value
+from ..utils import like, get_nested_value, regex_match
 
 if TYPE_CHECKING:
     from posthog.models import Team
@@ -429,16 +428,14 @@ STL: dict[str, STLFunction] = {
         minArgs=1,
         maxArgs=None,
     ),
-    "match": STLFunction(
-        fn=lambda args, team, stdout, timeout: bool(re.search(re.compile(args[1]), args[0])), minArgs=2, maxArgs=2
-    ),
+    "match": STLFunction(fn=lambda args, team, stdout, timeout: regex_match(args[0], args[1]), minArgs=2, maxArgs=2),
     "like": STLFunction(fn=lambda args, team, stdout, timeout: like(args[0], args[1]), minArgs=2, maxArgs=2),
     "ilike": STLFunction(
-        fn=lambda args, team, stdout, timeout: like(args[0], args[1], re.IGNORECASE), minArgs=2, maxArgs=2
+        fn=lambda args, team, stdout, timeout: like(args[0], args[1], case_insensitive=True), minArgs=2, maxArgs=2
     ),
     "notLike": STLFunction(fn=lambda args, team, stdout, timeout: not like(args[0], args[1]), minArgs=2, maxArgs=2),
     "notILike": STLFunction(
-        fn=lambda args, team, stdout, timeout: not like(args[0], args[1], re.IGNORECASE), minArgs=2, maxArgs=2
+        fn=lambda args, team, stdout, timeout: not like(args[0], args[1], case_insensitive=True), minArgs=2, maxArgs=2
     ),
     "toString": STLFunction(fn=toString, minArgs=1, maxArgs=1),
     "toUUID": STLFunction(fn=toString, minArgs=1, maxArgs=1),
@@ -2,14 +2,24 @@ import json
 from typing import Any, Optional
 from collections.abc import Callable
 
+import pytest
 
-from hogvm.python.execute import execute_bytecode, get_nested_value
+
+from hogvm.python.execute import execute_bytecode, execute_bytecode_batch, get_nested_value
+from hogvm.python.loader import Op, load_bytecode
 from hogvm.python.operation import (
     Operation as op,
     HOGQL_BYTECODE_IDENTIFIER as _H,
     HOGQL_BYTECODE_VERSION as VERSION,
 )
-from hogvm.python.utils import UncaughtHogVMException
+from hogvm.python.utils import (
+    HogVMException,
+    UncaughtHogVMException,
+    ContainerCostCache,
+    calculate_cost,
+    compile_like,
+    compile_regex,
+)
 from posthog.hogql.bytecode import create_bytecode
 from posthog.hogql.parser import parse_expr, parse_program
 
@@ -117,6 +127,65 @@ class TestBytecodeExecute:
         chain = ["properties", "tuple", 3]
         assert get_nested_value(my_dict, chain) == "item3"
 
+    def test_regex_and_like_patterns_are_cached(self):
+        compile_regex.cache_clear()
+        compile_like.cache_clear()
+        for _ in range(3):
+            assert self._run("'test' =~ 'e.*'") is True
+            assert self._run("'test' ~* 'EST'") is True
+            assert self._run("'baa' like '%a%'") is True
+            assert self._run("'baa' ilike '%A%'") is True
+        assert compile_regex.cache_info().hits == 4
+        assert compile_like.cache_info().hits == 4
+
+    def test_regex_runs_in_linear_time(self):
+        # Catastrophic backtracking with a backtracking regex engine
+        assert self._run(f"'{'a' * 100}!' =~ '^(a+)+$'") is False
+        assert self._run(f"match('{'a' * 100}!', '^(a|a)*$')") is False
+
+    def test_decoded_bytecode(self):
+        bytecode = create_bytecode(parse_program("let a := properties.foo; return concat(a, '!')"))
+        decoded = load_bytecode(bytecode)
+        assert load_bytecode(json.loads(json.dumps(bytecode))) is not decoded  # enums and ints are cached apart
+        assert load_bytecode(list(bytecode)) is decoded
+        assert execute_bytecode(decoded, {"properties": {"foo": "bar"}}).result == "bar!"
+        assert execute_bytecode({"root": {"bytecode": decoded}}, {"properties": {"foo": "bar"}}).result == "bar!"
+
+    def test_decoded_bytecode_instructions(self):
+        decoded = load_bytecode(
+            [_H, VERSION, op.STRING, "foo", op.STRING, "properties", op.GET_GLOBAL, 2, op.JUMP_IF_FALSE, 2, op.NULL]
+        )
+        # The strings pushed for GET_GLOBAL are folded into it
+        assert decoded.instruction(2) == (Op.GET_GLOBAL, (2, ("properties", "foo")), 8)
+        # Jump targets are absolute
+        assert decoded.instruction(8) == (Op.JUMP_IF_FALSE, (12,), 10)
+        # Positions only reachable by invalid jumps are decoded when they're needed
+        assert decoded.instructions[4] is None
+        assert decoded.instruction(4) == (Op.STRING, ("properties",), 6)
+
+    def test_execute_bytecode_batch(self):
+        globals_list: list[Optional[dict]] = [
+            {"event": "$pageview", "properties": {"$current_url": "https://posthog.com/docs", "tags": ["a"]}},
+            {"event": "$pageview", "properties": {"$current_url": "https://example.com", "tags": []}},
+            {"event": "$autocapture", "properties": {"$current_url": "", "tags": []}},
+            {"event": "$pageview", "properties": {"$current_url": "http://localhost", "tags": ["b"]}},
+        ]
+        for code in [
+            "event = '$pageview' and properties.$current_url ilike '%posthog.com%'",
+            "properties.$current_url =~ '^https://' or 'b' in properties.tags",
+            "properties.tags",
+            "concat(event, '!')",  # not column-wise
+        ]:
+            bytecode = create_bytecode(parse_expr(code))
+            expected = [execute_bytecode(bytecode, globals).result for globals in globals_list]
+            assert [result.result for result in execute_bytecode_batch(bytecode, globals_list)] == expected
+
+        # Missing globals are looked up by the VM, which errors like it would for the one event
+        with pytest.raises(HogVMException, match="Global variable not found: properties"):
+            execute_bytecode_batch(create_bytecode(parse_expr("properties.a = 1")), [*globals_list, {"event": "a"}])
+        with pytest.raises(TypeError):
+            execute_bytecode_batch(create_bytecode(parse_expr("1 in properties.missing")), globals_list)
+
     def test_errors(self):
         try:
             execute_bytecode([_H, VERSION, op.TRUE, op.CALL_GLOBAL, "notAFunction", 1], {})
@@ -272,6 +341,46 @@ class TestBytecodeExecute:
         else:
             raise AssertionError("Expected Exception not raised")
 
+    def test_memory_limits_nested_modify(self):
+        # `obj` only grows through `inner`, so its cached cost must be forgotten when `inner` is modified
+        code = """
+            let big := 'banana'
+            for (let i := 0; i < 17; i := i + 1) {
+                big := concat(big, big)
+            }
+            let obj := {'inner': {'items': []}}
+            let inner := obj.inner
+            for (let i := 0; i < 100; i := i + 1) {
+                inner.items := arrayPushBack(inner.items, big)
+                let a := obj
+                let b := obj
+                let c := obj
+                let d := obj
+            }
+        """
+        try:
+            execute_bytecode(create_bytecode(parse_program(code)), {})
+        except Exception as e:
+            assert str(e) == "Memory limit of 67108864 bytes exceeded. Tried to allocate 69993447 bytes."
+        else:
+            raise AssertionError("Expected Exception not raised")
+
+    def test_container_cost_cache(self):
+        shared = {"key": ["value", 1, None]}
+        cyclic: dict = {"name": "cycle"}
+        cyclic["self"] = {"parent": cyclic}
+        values = [shared, [shared, shared, ("tuple", shared)], cyclic, "string", 1, None]
+
+        cache = ContainerCostCache()
+        for value in values:
+            assert cache.retain(value) == calculate_cost(value)
+            assert cache.retain(value) == calculate_cost(value)
+
+        shared["key"].append("more")
+        cache.invalidate(shared["key"])
+        for value in values:
+            assert cache.retain(value) == calculate_cost(value)
+
     def test_functions(self):
         def stringify(*args):
             if args[0] == 1:
@@ -1,8 +1,15 @@
+import itertools
 import re
+from functools import lru_cache
 from typing import Any
 
+import re2
+
 
 COST_PER_UNIT = 8
+CONTAINER_TYPES = (dict, list, tuple)
+# Compiled regex and LIKE patterns, shared across executions
+REGEX_CACHE_SIZE = 1024
 
 
 class HogVMException(Exception):
@@ -25,10 +32,24 @@ class UncaughtHogVMException(HogVMException):
         return f"{self.type}('{msg}')"
 
 
-def like(string, pattern, flags=0):
-    pattern = re.escape(pattern).replace("%", ".*")
-    re_pattern = re.compile(pattern, flags)
-    return re_pattern.search(string) is not None
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_regex(pattern: str) -> Any:
+    # RE2 runs in linear time, and matches the regex flavour of ClickHouse and the NodeJS VM
+    return re2.compile(pattern)
+
+
+def regex_match(string, pattern, case_insensitive=False) -> bool:
+    return compile_regex(f"(?i){pattern}" if case_insensitive else pattern).search(string) is not None
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_like(pattern: str, case_insensitive=False) -> Any:
+    regex = re.sub(r"[-/\\^$*+?.()|[\]{}]", r"\\\g<0>", pattern).replace("%", ".*")
+    return re2.compile(f"(?i){regex}" if case_insensitive else regex)
+
+
+def like(string, pattern, case_insensitive=False) -> bool:
+    return compile_like(pattern, case_insensitive).search(string) is not None
 
 
 def get_nested_value(obj, chain, nullish=False) -> Any:
@@ -97,6 +118,101 @@ def calculate_cost(object, marked: set | None = None) -> int:
     return COST_PER_UNIT
 
 
+class ContainerCostCache:
+    """
+    Memoizes `calculate_cost` for the dicts, lists and tuples held on the VM stack, so that pushing a container that
+    is already on the stack (e.g. reading a local) doesn't walk it again.
+
+    Entries are reference counted: one reference for each stack slot holding the container, and one for each cached
+    container it's nested in. Costs go stale when a container is mutated in place, so `invalidate()` must be called
+    with any container that's mutated, and `clear()` after anything that may have mutated containers we don't know of.
+    """
+
+    def __init__(self):
+        # id -> [container, cost, references, nested containers, ids of containers it's nested in]
+        # Keeping the container alive stops its id from being reused while it's cached.
+        self._entries: dict[int, list] = {}
+
+    def retain(self, value) -> int:
+        """Cost of the value, which is now held by one more stack slot."""
+        if isinstance(value, CONTAINER_TYPES):
+            return self._retain(value, set())[0]
+        if isinstance(value, str):
+            return COST_PER_UNIT + len(value)
+        return COST_PER_UNIT
+
+    def release(self, value) -> None:
+        """The value is held by one less stack slot."""
+        if isinstance(value, CONTAINER_TYPES):
+            self._release(id(value))
+
+    def invalidate(self, value) -> None:
+        """Forget the cost of a container that was mutated, and of every container it's nested in."""
+        entry = self._entries.pop(id(value), None)
+        if entry is None:
+            return
+        for parent_id in entry[4]:
+            parent = self._entries.get(parent_id)
+            if parent is not None:
+                self.invalidate(parent[0])
+        self._unlink_nested(id(value), entry)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _retain(self, value, marked: set) -> tuple[int, bool]:
+        # Returns the cost and whether it depends on a cycle back to a container above it, in which case it's not cached
+        entry = self._entries.get(id(value))
+        if entry is not None:
+            entry[2] += 1
+            return entry[1], False
+        if id(value) in marked:
+            return COST_PER_UNIT, True
+
+        marked.add(id(value))
+        cost = COST_PER_UNIT
+        cyclic = False
+        nested: list = []
+        for item in itertools.chain.from_iterable(value.items()) if isinstance(value, dict) else value:
+            if isinstance(item, CONTAINER_TYPES):
+                item_cost, item_cyclic = self._retain(item, marked)
+                cost += item_cost
+                if item_cyclic:
+                    cyclic = True
+                else:
+                    nested.append(item)
+            elif isinstance(item, str):
+                cost += COST_PER_UNIT + len(item)
+            else:
+                cost += COST_PER_UNIT
+        marked.remove(id(value))
+
+        if cyclic:
+            for item in nested:
+                self._release(id(item))
+        else:
+            self._entries[id(value)] = [value, cost, 1, nested, set()]
+            for item in nested:
+                self._entries[id(item)][4].add(id(value))
+        return cost, cyclic
+
+    def _release(self, value_id: int) -> None:
+        entry = self._entries.get(value_id)
+        if entry is None:
+            return
+        entry[2] -= 1
+        if entry[2] <= 0:
+            del self._entries[value_id]
+            self._unlink_nested(value_id, entry)
+
+    def _unlink_nested(self, value_id: int, entry: list) -> None:
+        for item in entry[3]:
+            nested_entry = self._entries.get(id(item))
+            if nested_entry is not None:
+                nested_entry[4].discard(value_id)
+                self._release(id(item))
+
+
 def unify_comparison_types(left, right):
     if isinstance(left, int | float) and isinstance(right, str):
         return left, float(right)
@@ -13,6 +13,9 @@ const Keys = {
         return `${prefix}snapshots/team-${teamId}/${suffix}`
     },
     realtimeSubscriptions: (prefix: string): string => `${prefix}realtime-subscriptions`,
+    realtimeSnapshots(prefix: string, teamId: number, suffix: string): string {
+        return `${prefix}realtime-snapshots/team-${teamId}/${suffix}`
+    },
 }
 
 /**
@@ -98,6 +101,11 @@ export class RealtimeManager extends EventEmitter {
                 const pipeline = client.pipeline()
                 pipeline.zadd(key, timestamp, messages)
                 pipeline.expire(key, this.ttlSeconds)
+                // lets the API stop waiting for snapshots as soon as they're added
+                pipeline.publish(
+                    Keys.realtimeSnapshots(this.serverConfig.SESSION_RECORDING_REDIS_PREFIX, teamId, sesssionId),
+                    timestamp.toString()
+                )
                 return pipeline.exec()
             })
         } catch (error) {
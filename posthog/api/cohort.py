@@ -1,4 +1,6 @@
 import csv
+import uuid
+from itertools import chain
 from posthog.clickhouse.client.connection import Workload
 
 from django.db import DatabaseError
@@ -55,7 +57,12 @@ from posthog.event_usage import report_user_action
 from posthog.hogql.context import HogQLContext
 from posthog.models import Cohort, FeatureFlag, User, Person
 from posthog.models.async_deletion import AsyncDeletion, DeletionType
-from posthog.models.cohort.util import get_dependent_cohorts, print_cohort_hogql_query
+from posthog.models.cohort.util import (
+    get_cohort_person_ids_page,
+    get_dependent_cohorts,
+    iter_cohort_person_ids,
+    print_cohort_hogql_query,
+)
 from posthog.models.cohort import CohortOrEmpty
 from posthog.models.filters.filter import Filter
 from posthog.models.filters.path_filter import PathFilter
@@ -83,7 +90,7 @@ from posthog.tasks.calculate_cohort import (
     update_cohort,
     insert_cohort_from_query,
 )
-from posthog.utils import format_query_params_absolute_url
+from posthog.utils import add_query_params, format_query_params_absolute_url
 from prometheus_client import Counter
 
 
@@ -355,23 +362,42 @@ class CohortViewSet(TeamAndOrgViewSetMixin, ForbidDestroyModel, viewsets.ModelVi
         elif not filter.limit:
             filter = filter.shallow_clone({LIMIT: 100})
 
-        query, params = PersonQuery(filter, team.pk, cohort=cohort).get_query(paginate=True)
-        raw_result = sync_execute(
-            query,
-            {**params, **filter.hogql_context.values},
-            workload=Workload.OFFLINE,  # this endpoint is only used by external API requests
-        )
-        actor_ids = [row[0] for row in raw_result]
-        serialized_actors = get_serialized_people(team, actor_ids, distinct_id_limit=10)
+        if is_csv_request and not filter.search and not filter.property_groups.values and not filter.offset:
+            # Exports page through every person in the cohort, so they're paged by person id rather than by offset
+            after = request.GET.get("after")
+            if after is not None:
+                try:
+                    uuid.UUID(after)
+                except ValueError:
+                    raise ValidationError({"after": "Must be a person id."})
+            actor_ids = get_cohort_person_ids_page(cohort, after=after, limit=filter.limit)
+            next_url = (
+                add_query_params(request.build_absolute_uri(), {"after": actor_ids[-1]})
+                if len(actor_ids) >= filter.limit
+                else None
+            )
+            previous_url = None
+        else:
+            query, params = PersonQuery(filter, team.pk, cohort=cohort).get_query(paginate=True)
+            raw_result = sync_execute(
+                query,
+                {**params, **filter.hogql_context.values},
+                workload=Workload.OFFLINE,  # this endpoint is only used by external API requests
+            )
+            actor_ids = [row[0] for row in raw_result]
 
-        _should_paginate = len(actor_ids) >= filter.limit
+            _should_paginate = len(actor_ids) >= filter.limit
+
+            next_url = (
+                format_query_params_absolute_url(request, filter.offset + filter.limit) if _should_paginate else None
+            )
+            previous_url = (
+                format_query_params_absolute_url(request, filter.offset - filter.limit)
+                if filter.offset - filter.limit >= 0
+                else None
+            )
+        serialized_actors = get_serialized_people(team, actor_ids, distinct_id_limit=10)
 
-        next_url = format_query_params_absolute_url(request, filter.offset + filter.limit) if _should_paginate else None
-        previous_url = (
-            format_query_params_absolute_url(request, filter.offset - filter.limit)
-            if filter.offset - filter.limit >= 0
-            else None
-        )
         if is_csv_request:
             KEYS_ORDER = [
                 "id",
@@ -516,13 +542,7 @@ def will_create_loops(cohort: Cohort) -> bool:
 
 
 def insert_cohort_people_into_pg(cohort: Cohort):
-    ids = sync_execute(
-        "SELECT person_id FROM {} where team_id = %(team_id)s AND cohort_id = %(cohort_id)s".format(
-            PERSON_STATIC_COHORT_TABLE
-        ),
-        {"cohort_id": cohort.pk, "team_id": cohort.team.pk},
-    )
-    cohort.insert_users_list_by_uuid(items=[str(id[0]) for id in ids])
+    cohort.insert_users_list_by_uuid(items=chain.from_iterable(iter_cohort_person_ids(cohort)))
 
 
 def insert_cohort_query_actors_into_ch(cohort: Cohort):
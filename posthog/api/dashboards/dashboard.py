@@ -2,6 +2,7 @@ import json
 from typing import Any, Optional, cast
 
 import structlog
+from django.conf import settings
 from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
@@ -22,15 +23,21 @@ from posthog.api.routing import TeamAndOrgViewSetMixin
 from posthog.api.shared import UserBasicSerializer
 from posthog.api.tagged_item import TaggedItemSerializerMixin, TaggedItemViewSetMixin
 from posthog.api.utils import action
+from posthog.caching.dashboard_tile_batching import calculate_dashboard_tiles_in_batches
 from posthog.event_usage import report_user_action
 from posthog.helpers import create_dashboard_from_template
 from posthog.helpers.dashboard_templates import create_from_template
+from posthog.hogql_queries.query_runner import execution_mode_from_refresh, shared_insights_execution_mode
 from posthog.models import Dashboard, DashboardTile, Insight, Text
 from posthog.models.dashboard_templates import DashboardTemplate
 from posthog.models.tagged_item import TaggedItem
 from posthog.models.user import User
 from posthog.user_permissions import UserPermissionsSerializerMixin
-from posthog.utils import filters_override_requested_by_client, variables_override_requested_by_client
+from posthog.utils import (
+    filters_override_requested_by_client,
+    refresh_requested_by_client,
+    variables_override_requested_by_client,
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -403,6 +410,9 @@ class DashboardSerializer(DashboardBasicSerializer):
         )
         self.user_permissions.set_preloaded_dashboard_tiles(list(tiles))
 
+        if settings.DASHBOARD_TILE_BATCHING_ENABLED:
+            self.calculate_tiles_in_batches(dashboard, tiles)
+
         for tile in tiles:
             self.context.update({"dashboard_tile": tile})
 
@@ -414,6 +424,22 @@ class DashboardSerializer(DashboardBasicSerializer):
 
         return serialized_tiles
 
+    def calculate_tiles_in_batches(self, dashboard: Dashboard, tiles) -> None:
+        """Warm the cache for tiles that can be calculated together, before they're serialized one by one."""
+        request = self.context["request"]
+        execution_mode = execution_mode_from_refresh(refresh_requested_by_client(request))
+        if self.context.get("is_shared", False):
+            execution_mode = shared_insights_execution_mode(execution_mode)
+
+        calculate_dashboard_tiles_in_batches(
+            dashboard,
+            tiles,
+            team=self.context["get_team"](),
+            execution_mode=execution_mode,
+            user=None if request.user.is_anonymous else request.user,
+            filters_override=filters_override_requested_by_client(request),
+        )
+
     def get_filters(self, dashboard: Dashboard) -> dict:
         request = self.context.get("request")
         if request:
@@ -43,6 +43,7 @@ def process_query_dict(
     query_id: Optional[str] = None,
     insight_id: Optional[int] = None,
     dashboard_id: Optional[int] = None,
+    is_refresh_forced: Optional[bool] = None,
 ) -> dict | BaseModel:
     model = QuerySchemaRoot.model_validate(query_json)
     tag_queries(query=query_json)
@@ -63,6 +64,7 @@ def process_query_dict(
         query_id=query_id,
         insight_id=insight_id,
         dashboard_id=dashboard_id,
+        is_refresh_forced=is_refresh_forced,
     )
 
 
@@ -78,6 +80,7 @@ def process_query_model(
     query_id: Optional[str] = None,
     insight_id: Optional[int] = None,
     dashboard_id: Optional[int] = None,
+    is_refresh_forced: Optional[bool] = None,
 ) -> dict | BaseModel:
     result: dict | BaseModel
 
@@ -96,6 +99,7 @@ def process_query_model(
                 query_id=query_id,
                 insight_id=insight_id,
                 dashboard_id=dashboard_id,
+                is_refresh_forced=is_refresh_forced,
             )
         elif execution_mode == ExecutionMode.CACHE_ONLY_NEVER_CALCULATE:
             # Caching is handled by query runners, so in this case we can only return a cache miss
@@ -138,6 +142,7 @@ def process_query_model(
             query_id=query_id,
             insight_id=insight_id,
             dashboard_id=dashboard_id,
+            is_refresh_forced=is_refresh_forced,
         )
 
     return result
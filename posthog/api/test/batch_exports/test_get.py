@@ -62,6 +62,61 @@ def test_can_get_exports_for_your_organizations(client: HttpClient):
         }
 
 
+def test_get_does_not_return_secrets_nested_in_config(client: HttpClient):
+    temporal = sync_connect()
+
+    destination_data = {
+        "type": "Redshift",
+        "config": {
+            "user": "user",
+            "password": "my-password",
+            "host": "redshift.example.com",
+            "database": "dev",
+            "mode": "COPY",
+            "copy_inputs": {
+                "s3_bucket": "my-staging-bucket",
+                "region_name": "us-east-1",
+                "aws_access_key_id": "abc123",
+                "aws_secret_access_key": "secret",
+            },
+        },
+    }
+
+    batch_export_data = {
+        "name": "my-redshift-destination",
+        "destination": destination_data,
+        "interval": "hour",
+    }
+
+    organization = create_organization("Test Org")
+    team = create_team(organization)
+    user = create_user("test@user.com", "Test User", organization)
+    client.force_login(user)
+
+    with start_test_worker(temporal):
+        response = create_batch_export_ok(
+            client,
+            team.pk,
+            batch_export_data,
+        )
+
+        response = get_batch_export(client, team.pk, response["id"])
+        assert response.status_code == status.HTTP_200_OK, response.json()
+
+        batch_export = response.json()
+
+        # Check that the destination config is returned, except for credentials, including those to stage files.
+        assert batch_export["destination"]["config"] == {
+            "host": "redshift.example.com",
+            "database": "dev",
+            "mode": "COPY",
+            "copy_inputs": {
+                "s3_bucket": "my-staging-bucket",
+                "region_name": "us-east-1",
+            },
+        }
+
+
 def test_cannot_get_exports_for_other_organizations(client: HttpClient):
     temporal = sync_connect()
 
@@ -176,6 +176,67 @@ def test_can_patch_config(client: HttpClient, interval, timezone):
         assert new_schedule.schedule.spec.time_zone_name == old_schedule.schedule.spec.time_zone_name == timezone
 
 
+def test_patch_keeps_secrets_nested_in_config(client: HttpClient):
+    temporal = sync_connect()
+
+    destination_data = {
+        "type": "Redshift",
+        "config": {
+            "user": "user",
+            "password": "my-password",
+            "host": "redshift.example.com",
+            "database": "dev",
+            "mode": "COPY",
+            "copy_inputs": {
+                "s3_bucket": "my-staging-bucket",
+                "region_name": "us-east-1",
+                "aws_access_key_id": "abc123",
+                "aws_secret_access_key": "secret",
+            },
+        },
+    }
+
+    batch_export_data = {
+        "name": "my-redshift-destination",
+        "destination": destination_data,
+        "interval": "hour",
+    }
+
+    organization = create_organization("Test Org")
+    team = create_team(organization)
+    user = create_user("test@user.com", "Test User", organization)
+    client.force_login(user)
+
+    with start_test_worker(temporal):
+        batch_export = create_batch_export_ok(
+            client,
+            team.pk,
+            batch_export_data,
+        )
+
+        # Secrets are not returned, so the config sent back won't have them. The existing values should be preserved.
+        new_destination_data = {
+            "type": "Redshift",
+            "config": {
+                "copy_inputs": {
+                    "s3_bucket": "my-new-staging-bucket",
+                    "region_name": "us-east-1",
+                },
+            },
+        }
+
+        response = patch_batch_export(client, team.pk, batch_export["id"], {"destination": new_destination_data})
+        assert response.status_code == status.HTTP_200_OK, response.json()
+
+        destination = BatchExport.objects.get(id=batch_export["id"]).destination
+        assert destination.config["copy_inputs"] == {
+            "s3_bucket": "my-new-staging-bucket",
+            "region_name": "us-east-1",
+            "aws_access_key_id": "abc123",
+            "aws_secret_access_key": "secret",
+        }
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("interval", ["hour", "day"])
 def test_can_patch_config_with_invalid_old_values(client: HttpClient, interval):
@@ -507,6 +507,31 @@ email@example.org,
         self.assertEqual(lines[1].split(",")[headers.index("email")], "test@test.com")
         self.assertEqual(lines[0].count("distinct_id"), 10)
 
+    def test_csv_export_pages_through_persons_by_id(self):
+        for i in range(5):
+            Person.objects.create(
+                distinct_ids=[f"person{i}"], team_id=self.team.pk, properties={"$some_prop": "something"}
+            )
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "$some_prop", "value": "something", "type": "person"}]}],
+            name="cohort1",
+        )
+        cohort.calculate_people_ch(pending_version=0)
+
+        person_ids: list[str] = []
+        next_url: Optional[str] = f"/api/cohort/{cohort.pk}/persons?is_csv_export=1&limit=2"
+        while next_url:
+            response = self.client.get(next_url).json()
+            person_ids.extend(person["uuid"] for person in response["results"])
+            next_url = response["next"]
+
+        self.assertEqual(len(person_ids), 5)
+        self.assertCountEqual(person_ids, set(person_ids))
+
+        response = self.client.get(f"/api/cohort/{cohort.pk}/persons?is_csv_export=1&after=not-a-uuid")
+        self.assertEqual(response.status_code, 400)
+
     def test_filter_by_cohort(self):
         _create_person(team=self.team, distinct_ids=[f"fake"], properties={})
         for i in range(150):
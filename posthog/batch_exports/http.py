@@ -176,12 +176,35 @@ class BatchExportDestinationSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance: BatchExportDestination) -> dict:
         data = super().to_representation(instance)
-        data["config"] = {
-            k: v for k, v in data["config"].items() if k not in BatchExportDestination.secret_fields[instance.type]
-        }
+        data["config"] = without_secret_fields(data["config"], BatchExportDestination.secret_fields[instance.type])
         return data
 
 
+def without_secret_fields(config: dict, secret_fields: set[str]) -> dict:
+    """Return a copy of a destination config without its secret fields, including those nested in objects."""
+    config_without_secrets = {}
+    for key, value in config.items():
+        if key in secret_fields:
+            continue
+
+        nested_secret_fields = {field.removeprefix(f"{key}.") for field in secret_fields if field.startswith(f"{key}.")}
+        if nested_secret_fields and isinstance(value, dict):
+            value = without_secret_fields(value, nested_secret_fields)
+
+        config_without_secrets[key] = value
+    return config_without_secrets
+
+
+def merge_destination_config(config: dict, new_config: dict, secret_fields: set[str]) -> dict:
+    """Update a destination config, keeping secret fields that are not sent back, including those nested in objects."""
+    merged_config = {**config, **new_config}
+    for key, value in new_config.items():
+        has_nested_secret_fields = any(field.startswith(f"{key}.") for field in secret_fields)
+        if has_nested_secret_fields and isinstance(value, dict) and isinstance(config.get(key), dict):
+            merged_config[key] = {**config[key], **value}
+    return merged_config
+
+
 class HogQLSelectQueryField(serializers.Field):
     def to_internal_value(self, data: str) -> ast.SelectQuery | ast.SelectSetQuery:
         """Parse a HogQL SelectQuery from a string query."""
@@ -364,10 +387,11 @@ class BatchExportSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             if destination_data:
                 batch_export.destination.type = destination_data.get("type", batch_export.destination.type)
-                batch_export.destination.config = {
-                    **batch_export.destination.config,
-                    **destination_data.get("config", {}),
-                }
+                batch_export.destination.config = merge_destination_config(
+                    batch_export.destination.config,
+                    destination_data.get("config", {}),
+                    BatchExportDestination.secret_fields[batch_export.destination.type],
+                )
 
             if hogql_query := validated_data.pop("hogql_query", None):
                 batch_export_schema = self.serialize_hogql_query_to_batch_export_schema(hogql_query)
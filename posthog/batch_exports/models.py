@@ -29,11 +29,12 @@ class BatchExportDestination(UUIDModel):
         HTTP = "HTTP"
         NOOP = "NoOp"
 
+    # Secrets nested in an object of the config are listed by their dotted path
     secret_fields = {
         "S3": {"aws_access_key_id", "aws_secret_access_key"},
         "Snowflake": {"user", "password"},
         "Postgres": {"user", "password"},
-        "Redshift": {"user", "password"},
+        "Redshift": {"user", "password", "copy_inputs.aws_access_key_id", "copy_inputs.aws_secret_access_key"},
         "BigQuery": {"private_key", "private_key_id", "client_email", "token_uri"},
         "HTTP": set("token"),
         "NoOp": set(),
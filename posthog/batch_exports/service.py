@@ -7,6 +7,7 @@ import structlog
 import temporalio
 import temporalio.common
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from temporalio.client import (
     Client,
     Schedule,
@@ -81,6 +82,8 @@ class S3BatchExportInputs:
             For example, for one hour batches, this should be 3600.
         data_interval_end: For manual runs, the end date of the batch. This should be set to `None` for regularly
             scheduled runs and for backfills.
+        max_concurrent_uploads: How many parts of the multi-part upload may be uploading at the same time.
+            Defaults to `BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS` when not set.
     """
 
     batch_export_id: str
@@ -103,6 +106,7 @@ class S3BatchExportInputs:
     is_earliest_backfill: bool = False
     batch_export_model: BatchExportModel | None = None
     batch_export_schema: BatchExportSchema | None = None
+    max_concurrent_uploads: int | None = None
 
 
 @dataclass
@@ -153,11 +157,44 @@ class PostgresBatchExportInputs:
     batch_export_schema: BatchExportSchema | None = None
 
 
+@dataclass
+class RedshiftCopyInputs:
+    """Inputs for loading data into Redshift with COPY from files staged in S3.
+
+    Attributes:
+        s3_bucket: The S3 bucket where files are staged. Redshift must be able to read from it.
+        region_name: The AWS region where the bucket is located.
+        s3_key_prefix: A prefix for the keys of staged files.
+        aws_access_key_id: The AWS access key ID used to stage files, and by Redshift to read them
+            unless `iam_role` is set.
+        aws_secret_access_key: The AWS secret access key matching `aws_access_key_id`.
+        iam_role: The ARN of an IAM role Redshift assumes to read staged files.
+        endpoint_url: A custom S3 endpoint used to stage files.
+        file_format: The format of staged files: Either "JSONLines" (gzip compressed) or "Parquet".
+    """
+
+    s3_bucket: str
+    region_name: str
+    s3_key_prefix: str = ""
+    aws_access_key_id: str | None = None
+    aws_secret_access_key: str | None = None
+    iam_role: str | None = None
+    endpoint_url: str | None = None
+    file_format: str = "JSONLines"
+
+
 @dataclass
 class RedshiftBatchExportInputs(PostgresBatchExportInputs):
-    """Inputs for Redshift export workflow."""
+    """Inputs for Redshift export workflow.
+
+    Attributes:
+        mode: How records are loaded into Redshift: Either with "INSERT" statements, or with "COPY" from files
+            staged in S3 as configured by `copy_inputs`.
+    """
 
     properties_data_type: str = "varchar"
+    mode: str = "INSERT"
+    copy_inputs: RedshiftCopyInputs | None = None
 
 
 @dataclass
@@ -435,6 +472,8 @@ class BackfillBatchExportInputs:
     end_at: str | None
     buffer_limit: int = 1
     start_delay: float = 1.0
+    max_concurrent_runs: int = 1
+    merge_empty_intervals: bool = False
 
 
 def backfill_export(
@@ -471,6 +510,8 @@ def backfill_export(
         team_id=team_id,
         start_at=start_at.isoformat() if start_at else None,
         end_at=end_at.isoformat() if end_at else None,
+        max_concurrent_runs=settings.BATCH_EXPORT_BACKFILL_MAX_CONCURRENT_RUNS,
+        merge_empty_intervals=settings.BATCH_EXPORT_BACKFILL_MERGE_EMPTY_INTERVALS,
     )
     start_at_utc_str = start_at.astimezone(tz=dt.UTC).isoformat() if start_at else "START"
     # TODO: Should we use another signal besides "None"? i.e. "Inf" or "END".
@@ -786,3 +827,29 @@ async def aupdate_batch_export_backfill_status(backfill_id: UUID, status: str) -
         raise ValueError(f"BatchExportBackfill with id {backfill_id} not found.")
 
     return await model.aget()
+
+
+async def afetch_batch_export_backfill_completed_intervals(
+    backfill_id: UUID,
+) -> list[tuple[dt.datetime | None, dt.datetime]]:
+    """Fetch the data intervals of the BatchExportRuns completed as part of a BatchExportBackfill.
+
+    BatchExportRuns are not linked to the BatchExportBackfill that triggered them, so we take any completed
+    run of the same BatchExport created since the backfill was, and ending within the backfill's bounds.
+
+    Arguments:
+        backfill_id: The id of the BatchExportBackfill whose completed intervals to fetch.
+    """
+    backfill = await BatchExportBackfill.objects.aget(id=backfill_id)
+    runs = BatchExportRun.objects.filter(
+        batch_export_id=backfill.batch_export_id,
+        status=BatchExportRun.Status.COMPLETED,
+        created_at__gte=backfill.created_at,
+    )
+
+    if backfill.start_at is not None:
+        runs = runs.filter(data_interval_end__gt=backfill.start_at)
+    if backfill.end_at is not None:
+        runs = runs.filter(data_interval_end__lte=backfill.end_at)
+
+    return [interval async for interval in runs.values_list("data_interval_start", "data_interval_end")]
@@ -1,7 +1,10 @@
 import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
 from datetime import timedelta
 from functools import wraps
-from typing import no_type_check, Any
+from typing import Generic, Optional, TypeVar, no_type_check, Any
 
 import orjson
 from rest_framework.utils.encoders import JSONEncoder
@@ -51,6 +54,54 @@ def cache_for(cache_time: timedelta, background_refresh=False):
     return wrapper
 
 
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe, size-bounded, process-local cache that evicts the least recently used entries first.
+
+    Entries optionally expire after `ttl`, which is a safety net for values that can change without us noticing.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[timedelta] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl.total_seconds() if ttl is not None else None
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            inserted_at, value = entry
+            if self.ttl_seconds is not None and time.monotonic() - inserted_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 def instance_memoize(callback):
     name = f"_{callback.__name__}_memo"
 
@@ -0,0 +1,154 @@
+import dataclasses
+from collections import defaultdict
+from collections.abc import Hashable, Iterable
+from datetime import UTC, datetime
+from typing import Optional
+
+import structlog
+from prometheus_client import Counter
+from redis.lock import Lock
+from sentry_sdk import capture_exception
+
+from posthog.caching.utils import last_refresh_from_cached_result
+from posthog.clickhouse.query_tagging import tag_queries
+from posthog.hogql.modifiers import create_default_modifiers_for_user
+from posthog.hogql_queries.insights.trends.trends_batch_query import batch_key, calculate_trends_batch, is_batchable
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.hogql_queries.legacy_compatibility.flagged_conversion_manager import conversion_to_query_based
+from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_runner import ExecutionMode, get_query_runner_or_none
+from posthog.models import Dashboard, DashboardTile, Team, User
+from posthog.schema import DashboardFilter
+
+logger = structlog.get_logger(__name__)
+
+DASHBOARD_TILE_BATCH_COUNTER = Counter(
+    "posthog_dashboard_tile_batch_total",
+    "Dashboard tiles calculated together with other tiles of the same dashboard, in a single query.",
+)
+
+# With other execution modes tiles either never calculate, calculate asynchronously, or always recalculate on their own
+BATCHABLE_EXECUTION_MODES = (ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE,)
+
+
+@dataclasses.dataclass
+class _BatchedTile:
+    runner: TrendsQueryRunner
+    cache_manager: QueryCacheManager
+    calculation_lock: Lock
+
+
+def _tile_query_runner(
+    tile: DashboardTile, *, team: Team, dashboard_filters: Optional[DashboardFilter]
+) -> Optional[TrendsQueryRunner]:
+    insight = tile.insight
+    if insight is None or insight.deleted:
+        return None
+
+    with conversion_to_query_based(insight):
+        query = insight.query
+        if isinstance(query, dict) and query.get("kind") == "InsightVizNode":
+            query = query.get("source")
+        if not isinstance(query, dict) or query.get("kind") != "TrendsQuery":
+            return None
+        runner = get_query_runner_or_none(query, team)
+
+    if not isinstance(runner, TrendsQueryRunner):
+        return None
+    if dashboard_filters:
+        runner.apply_dashboard_filters(dashboard_filters)
+    return runner
+
+
+def _needs_calculation(runner: TrendsQueryRunner, cache_manager: QueryCacheManager) -> bool:
+    cached_metadata = cache_manager.get_cache_metadata()
+    if not runner.is_cached_response(cached_metadata):
+        return True
+    return runner._is_stale(last_refresh=last_refresh_from_cached_result(cached_metadata))
+
+
+def calculate_dashboard_tiles_in_batches(
+    dashboard: Dashboard,
+    tiles: Iterable[DashboardTile],
+    *,
+    team: Team,
+    execution_mode: ExecutionMode,
+    user: Optional[User],
+    filters_override: Optional[dict] = None,
+) -> None:
+    """
+    Calculate stale trends tiles of a dashboard together, so that serializing the tiles then hits the cache.
+
+    Tiles whose trends series are plain event counts over the same date range and interval share a single
+    scan of the events table, instead of each running its own query. Anything that can't be batched,
+    or fails to be, is left for the usual per-tile calculation.
+    """
+    if execution_mode not in BATCHABLE_EXECUTION_MODES:
+        return
+
+    dashboard_filters_json = filters_override if filters_override is not None else dashboard.filters
+    dashboard_filters = DashboardFilter.model_validate(dashboard_filters_json) if dashboard_filters_json else None
+
+    batches: dict[Hashable, list[tuple[TrendsQueryRunner, QueryCacheManager]]] = defaultdict(list)
+    for tile in tiles:
+        try:
+            runner = _tile_query_runner(tile, team=team, dashboard_filters=dashboard_filters)
+            if runner is None or not is_batchable(runner):
+                continue
+            cache_manager = QueryCacheManager(
+                team_id=team.pk,
+                cache_key=runner.get_cache_key(),
+                insight_id=tile.insight_id,
+                dashboard_id=dashboard.pk,
+            )
+            if not _needs_calculation(runner, cache_manager):
+                continue
+            if user:
+                # Like in `QueryRunner`, user based modifiers are applied after the cache key is determined
+                runner.modifiers = create_default_modifiers_for_user(user, team, runner.modifiers)
+                runner.modifiers.useMaterializedViews = True
+            batches[batch_key(runner)].append((runner, cache_manager))
+        except Exception as e:
+            capture_exception(e)
+            logger.exception("Failed to plan dashboard tile for batching", tile_id=tile.pk)
+
+    for candidates in batches.values():
+        if len(candidates) < 2:
+            continue
+        _calculate_batch(dashboard, candidates)
+
+
+def _calculate_batch(dashboard: Dashboard, candidates: list[tuple[TrendsQueryRunner, QueryCacheManager]]) -> None:
+    batched_tiles: list[_BatchedTile] = []
+    seen_cache_keys: set[str] = set()
+    for runner, cache_manager in candidates:
+        if cache_manager.cache_key in seen_cache_keys:
+            continue
+        # Someone else is already calculating this tile, it'll wait for their result when serialized
+        calculation_lock = cache_manager.calculation_lock()
+        if not calculation_lock.acquire(blocking=False):
+            continue
+        seen_cache_keys.add(cache_manager.cache_key)
+        batched_tiles.append(_BatchedTile(runner, cache_manager, calculation_lock))
+
+    try:
+        if len(batched_tiles) < 2:
+            return
+
+        tag_queries(dashboard_id=dashboard.pk)
+        last_refresh = datetime.now(UTC)
+        try:
+            responses = calculate_trends_batch([batched_tile.runner for batched_tile in batched_tiles])
+        except Exception as e:
+            capture_exception(e)
+            logger.exception("Failed to calculate batch of dashboard tiles", dashboard_id=dashboard.pk)
+            return
+
+        for batched_tile, response in zip(batched_tiles, responses):
+            batched_tile.runner.cache_calculated_response(
+                response, cache_manager=batched_tile.cache_manager, last_refresh=last_refresh
+            )
+        DASHBOARD_TILE_BATCH_COUNTER.inc(len(batched_tiles))
+    finally:
+        for batched_tile in batched_tiles:
+            batched_tile.runner._release_calculation_lock(batched_tile.calculation_lock)
@@ -0,0 +1,161 @@
+from typing import Any
+from unittest.mock import patch
+
+from django.core.cache import cache
+from freezegun import freeze_time
+
+from posthog.api.services.query import process_query_dict
+from posthog.caching.dashboard_tile_batching import calculate_dashboard_tiles_in_batches
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_runner import ExecutionMode
+from posthog.models import Dashboard, DashboardTile, Insight
+from posthog.schema import CachedTrendsQueryResponse, DashboardFilter, EventsNode, TrendsQueryResponse
+from posthog.test.base import BaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+
+
+def trends_query(event: str, **kwargs: Any) -> dict:
+    return {
+        "kind": "InsightVizNode",
+        "source": {
+            "kind": "TrendsQuery",
+            "dateRange": {"date_from": "-7d"},
+            "interval": "day",
+            "series": [{"kind": "EventsNode", "event": event}],
+            **kwargs,
+        },
+    }
+
+
+def fake_calculate_trends_batch(runners: list[TrendsQueryRunner]) -> list[TrendsQueryResponse]:
+    responses = []
+    for runner in runners:
+        series = runner.query.series[0]
+        assert isinstance(series, EventsNode)
+        responses.append(TrendsQueryResponse(results=[{"label": series.event}], hasMore=False))
+    return responses
+
+
+@freeze_time("2024-06-10T12:00:00Z")
+@patch(
+    "posthog.caching.dashboard_tile_batching.calculate_trends_batch",
+    side_effect=fake_calculate_trends_batch,
+)
+class TestDashboardTileBatching(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.dashboard = Dashboard.objects.create(team=self.team, name="dashboard")
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def _create_tile(self, query: dict) -> DashboardTile:
+        insight = Insight.objects.create(team=self.team, query=query)
+        return DashboardTile.objects.create(dashboard=self.dashboard, insight=insight)
+
+    def _tiles(self) -> list[DashboardTile]:
+        return list(DashboardTile.dashboard_queryset(self.dashboard.tiles.all()))
+
+    def _cached_response(self, tile: DashboardTile) -> dict | None:
+        assert tile.insight is not None
+        runner = TrendsQueryRunner(query=tile.insight.query["source"], team=self.team)
+        return QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key()).get_cache_data()
+
+    def _calculate(self, execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE):
+        calculate_dashboard_tiles_in_batches(
+            self.dashboard, self._tiles(), team=self.team, execution_mode=execution_mode, user=None
+        )
+
+    def test_compatible_tiles_are_calculated_together(self, mock_calculate_trends_batch):
+        pageview_tile = self._create_tile(trends_query("$pageview"))
+        pageleave_tile = self._create_tile(trends_query("$pageleave"))
+        # Different date range, and not a plain count, so neither of these can join the batch
+        month_tile = self._create_tile(trends_query("$pageview", dateRange={"date_from": "-30d"}))
+        breakdown_tile = self._create_tile(trends_query("$pageview", breakdownFilter={"breakdown": "$browser"}))
+
+        self._calculate()
+
+        mock_calculate_trends_batch.assert_called_once()
+        assert len(mock_calculate_trends_batch.call_args.args[0]) == 2
+
+        pageview_response = self._cached_response(pageview_tile)
+        assert pageview_response is not None
+        assert pageview_response["results"] == [{"label": "$pageview"}]
+        assert pageview_response["is_cached"] is False
+        pageleave_response = self._cached_response(pageleave_tile)
+        assert pageleave_response is not None
+        assert pageleave_response["results"] == [{"label": "$pageleave"}]
+        assert self._cached_response(month_tile) is None
+        assert self._cached_response(breakdown_tile) is None
+
+    def test_fresh_tiles_are_not_recalculated(self, mock_calculate_trends_batch):
+        self._create_tile(trends_query("$pageview"))
+        self._create_tile(trends_query("$pageleave"))
+
+        self._calculate()
+        self._calculate()
+
+        mock_calculate_trends_batch.assert_called_once()
+
+    def test_single_compatible_tile_is_left_alone(self, mock_calculate_trends_batch):
+        self._create_tile(trends_query("$pageview"))
+        self._create_tile(trends_query("$pageleave", dateRange={"date_from": "-30d"}))
+
+        self._calculate()
+
+        mock_calculate_trends_batch.assert_not_called()
+
+    def test_only_blocking_calculation_is_batched(self, mock_calculate_trends_batch):
+        self._create_tile(trends_query("$pageview"))
+        self._create_tile(trends_query("$pageleave"))
+
+        self._calculate(ExecutionMode.CACHE_ONLY_NEVER_CALCULATE)
+        self._calculate(ExecutionMode.CALCULATE_ASYNC_ALWAYS)
+
+        mock_calculate_trends_batch.assert_not_called()
+
+
+@freeze_time("2024-06-10T12:00:00Z")
+class TestDashboardTileBatchingRendering(ClickhouseTestMixin, BaseTest):
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def test_rendering_a_tile_hits_the_batched_result(self):
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2024-06-09T12:00:00Z")
+        _create_event(team=self.team, event="$pageleave", distinct_id="p1", timestamp="2024-06-10T11:00:00Z")
+        flush_persons_and_events()
+        dashboard = Dashboard.objects.create(team=self.team, name="dashboard", filters={"date_from": "-3d"})
+        tiles = [
+            DashboardTile.objects.create(
+                dashboard=dashboard, insight=Insight.objects.create(team=self.team, query=trends_query(event))
+            )
+            for event in ("$pageview", "$pageleave")
+        ]
+
+        calculate_dashboard_tiles_in_batches(
+            dashboard,
+            DashboardTile.dashboard_queryset(dashboard.tiles.all()),
+            team=self.team,
+            execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE,
+            user=None,
+        )
+
+        for tile, expected_data in zip(tiles, ([0, 0, 1, 0], [0, 0, 0, 1])):
+            assert tile.insight is not None
+            runner = TrendsQueryRunner(query=tile.insight.query["source"], team=self.team)
+            runner.apply_dashboard_filters(DashboardFilter(date_from="-3d"))
+            with patch.object(TrendsQueryRunner, "calculate") as mock_calculate:
+                response = process_query_dict(
+                    self.team,
+                    tile.insight.query,
+                    dashboard_filters_json=dashboard.filters,
+                    insight_id=tile.insight.pk,
+                    dashboard_id=dashboard.pk,
+                )
+            mock_calculate.assert_not_called()
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.is_cached
+            assert response.cache_key == runner.get_cache_key()
+            assert response.results[0]["data"] == expected_data
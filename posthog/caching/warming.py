@@ -6,12 +6,19 @@ from typing import Optional
 import structlog
 from celery import shared_task
 from celery.canvas import chain
+from django.conf import settings
 from django.db.models import Q
 from prometheus_client import Counter, Gauge
 from sentry_sdk import capture_exception
 
 from posthog.api.services.query import process_query_dict
 from posthog.caching.utils import largest_teams
+from posthog.clickhouse.client.query_scheduler import (
+    QueryLane,
+    dispatch_scheduled_tasks,
+    releases_scheduler_slot,
+    schedule_task,
+)
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.errors import CHQueryErrorTooManySimultaneousQueries
 from posthog.hogql.constants import LimitContext
@@ -111,11 +118,26 @@ def schedule_warming_for_teams_task():
     for team, shared_only in all_teams:
         insight_tuples = priority_insights(team, shared_only=shared_only)
 
+        if settings.QUERY_SCHEDULER_ENABLED:
+            # The warming lane limits how many queries run at once per team, and takes turns between teams
+            for insight_tuple in insight_tuples:
+                schedule_task(
+                    warm_insight_cache_task.si(*insight_tuple),
+                    team_id=team.pk,
+                    lane=QueryLane.WARMING,
+                    expires_after=expire_after - datetime.now(UTC),
+                    dispatch=False,
+                )
+            continue
+
         # We chain the task execution to prevent queries *for a single team* running at the same time
         chain(
             *(warm_insight_cache_task.si(*insight_tuple).set(expires=expire_after) for insight_tuple in insight_tuples)
         )()
 
+    if settings.QUERY_SCHEDULER_ENABLED:
+        dispatch_scheduled_tasks()
+
 
 @shared_task(
     queue=CeleryQueue.ANALYTICS_LIMITED.value,  # Important! Prevents Clickhouse from being overwhelmed
@@ -126,6 +148,7 @@ def schedule_warming_for_teams_task():
     retry_backoff_max=3,
     max_retries=3,
 )
+@releases_scheduler_slot
 def warm_insight_cache_task(insight_id: int, dashboard_id: Optional[int]):
     try:
         insight = Insight.objects.get(pk=insight_id)
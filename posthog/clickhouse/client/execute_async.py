@@ -1,16 +1,20 @@
 import datetime
 import uuid
+from functools import partial
 from typing import TYPE_CHECKING, Optional
 
 import orjson as json
 import sentry_sdk
 import structlog
+from django.conf import settings
+from django.db import transaction
 from prometheus_client import Histogram
 from pydantic import BaseModel
 from rest_framework.exceptions import APIException, NotFound
 
 from posthog import celery, redis
-from posthog.clickhouse.client.async_task_chain import add_task_to_on_commit
+from posthog.clickhouse.client.async_task_chain import add_task_to_on_commit, is_in_context
+from posthog.clickhouse.client.query_scheduler import QueryLane, schedule_task
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.errors import CHQueryErrorTooManySimultaneousQueries, ExposedCHQueryError
 from posthog.hogql.constants import LimitContext
@@ -138,6 +142,7 @@ def execute_process_query(
     query_id: str,
     query_json: dict,
     limit_context: Optional[LimitContext],
+    is_refresh_forced: bool = False,
 ):
     manager = QueryStatusManager(query_id, team_id)
 
@@ -185,6 +190,7 @@ def execute_process_query(
             insight_id=query_status.insight_id,
             dashboard_id=query_status.dashboard_id,
             user=user,
+            is_refresh_forced=is_refresh_forced,
         )
         if isinstance(results, BaseModel):
             results = results.model_dump(by_alias=True)
@@ -220,7 +226,10 @@ def enqueue_process_query_task(
     query_id: Optional[str] = None,
     # Attention: This is to pierce through the _manager_ cache, query runner will always refresh
     refresh_requested: bool = False,
+    # Whether the user asked for the refresh, rather than it being kicked off for stale results
+    is_refresh_forced: bool = False,
     force: bool = False,
+    lane: QueryLane = QueryLane.INTERACTIVE,
     _test_only_bypass_celery: bool = False,
 ) -> QueryStatus:
     if not query_id:
@@ -245,10 +254,19 @@ def enqueue_process_query_task(
     )
     manager.store_query_status(query_status)
 
-    task_signature = process_query_task.si(team.id, user_id, query_id, query_json, LimitContext.QUERY_ASYNC)
+    task_signature = process_query_task.si(
+        team.id, user_id, query_id, query_json, LimitContext.QUERY_ASYNC, is_refresh_forced=is_refresh_forced
+    )
 
     if _test_only_bypass_celery:
         task_signature()
+    elif settings.QUERY_SCHEDULER_ENABLED and not is_in_context():
+        # The task ID is known upfront, so the query can be cancelled while it's still waiting in the scheduler
+        query_status.task_id = str(uuid.uuid4())
+        manager.store_query_status(query_status)
+        transaction.on_commit(
+            partial(schedule_task, task_signature, team_id=team.id, lane=lane, task_id=query_status.task_id)
+        )
     else:
         add_task_to_on_commit(task_signature=task_signature, manager=manager, query_status=query_status)
 
@@ -0,0 +1,350 @@
+import dataclasses
+import time
+import uuid
+from datetime import timedelta
+from enum import StrEnum
+from functools import wraps
+from typing import Optional
+
+import orjson as json
+import structlog
+from celery import current_task, signature
+from celery.canvas import Signature
+from django.conf import settings
+from prometheus_client import Counter, Gauge, Histogram
+from redis import Redis
+from redis.exceptions import LockError
+from sentry_sdk import capture_exception
+
+from posthog import redis
+
+logger = structlog.get_logger(__name__)
+
+QUERY_SCHEDULER_QUEUE_DEPTH = Gauge(
+    "posthog_query_scheduler_queue_depth",
+    "Number of scheduled tasks waiting in each lane of the query scheduler.",
+    labelnames=["lane"],
+)
+QUERY_SCHEDULER_RUNNING = Gauge(
+    "posthog_query_scheduler_running",
+    "Number of tasks dispatched by the query scheduler that haven't finished yet, per lane.",
+    labelnames=["lane"],
+)
+QUERY_SCHEDULER_DISPATCHED_COUNTER = Counter(
+    "posthog_query_scheduler_dispatched_total",
+    "Tasks sent to Celery by the query scheduler, or dropped because they expired while waiting.",
+    labelnames=["lane", "outcome"],
+)
+QUERY_SCHEDULER_WAIT_TIME = Histogram(
+    "posthog_query_scheduler_wait_seconds",
+    "Time tasks spent waiting in the query scheduler before being sent to Celery.",
+    labelnames=["lane"],
+)
+
+KEY_PREFIX = "query_scheduler"
+DISPATCH_LOCK_KEY = f"{KEY_PREFIX}:dispatch_lock"
+LANE_CREDITS_KEY = f"{KEY_PREFIX}:lane_credits"
+# A dispatched task that never reports back stops counting against concurrency limits after this long
+SLOT_TTL_SECONDS = 60 * 15
+MAX_DISPATCHES_PER_RUN = 1000
+
+
+class QueryLane(StrEnum):
+    INTERACTIVE = "interactive"  # Someone is waiting for the result
+    DASHBOARD = "dashboard"  # Dashboard tiles being refreshed
+    WARMING = "warming"  # Keeping caches warm before anyone asks
+
+
+@dataclasses.dataclass(frozen=True)
+class LaneSettings:
+    # Share of dispatches the lane gets relative to the other lanes, while they all have work waiting
+    weight: int
+    # Maximum tasks of the lane in flight at once
+    concurrency: int
+    # Maximum tasks of the lane in flight at once for a single team
+    team_concurrency: int
+
+
+DEFAULT_LANE_SETTINGS: dict[QueryLane, LaneSettings] = {
+    QueryLane.INTERACTIVE: LaneSettings(weight=6, concurrency=60, team_concurrency=10),
+    QueryLane.DASHBOARD: LaneSettings(weight=3, concurrency=30, team_concurrency=5),
+    QueryLane.WARMING: LaneSettings(weight=1, concurrency=10, team_concurrency=1),
+}
+
+
+def get_lane_settings(lane: QueryLane) -> LaneSettings:
+    overrides = settings.QUERY_SCHEDULER_LANE_SETTINGS.get(lane.value, {})
+    field_names = {field.name for field in dataclasses.fields(LaneSettings)}
+    return dataclasses.replace(
+        DEFAULT_LANE_SETTINGS[lane], **{key: int(value) for key, value in overrides.items() if key in field_names}
+    )
+
+
+def get_team_weight(team_id: int) -> float:
+    return max(float(settings.QUERY_SCHEDULER_TEAM_WEIGHTS.get(str(team_id), 1)), 0.01)
+
+
+def _queue_key(lane: QueryLane, team_id: int) -> str:
+    return f"{KEY_PREFIX}:{lane}:queue:{team_id}"
+
+
+def _teams_key(lane: QueryLane) -> str:
+    return f"{KEY_PREFIX}:{lane}:teams"
+
+
+def _blocked_teams_key(lane: QueryLane) -> str:
+    return f"{KEY_PREFIX}:{lane}:blocked_teams"
+
+
+def _virtual_time_key(lane: QueryLane) -> str:
+    return f"{KEY_PREFIX}:{lane}:virtual_time"
+
+
+def _depth_key(lane: QueryLane) -> str:
+    return f"{KEY_PREFIX}:{lane}:depth"
+
+
+def _running_key(lane: QueryLane) -> str:
+    return f"{KEY_PREFIX}:{lane}:running"
+
+
+def _team_running_key(lane: QueryLane, team_id: int) -> str:
+    return f"{KEY_PREFIX}:{lane}:running:{team_id}"
+
+
+def _slot_key(task_id: str) -> str:
+    return f"{KEY_PREFIX}:slot:{task_id}"
+
+
+def schedule_task(
+    task_signature: Signature,
+    *,
+    team_id: int,
+    lane: QueryLane,
+    task_id: Optional[str] = None,
+    expires_after: Optional[timedelta] = None,
+    dispatch: bool = True,
+) -> str:
+    """
+    Queue a Celery task in the team's queue of the lane, then dispatch whatever the limits allow.
+
+    Lanes share dispatches by weight, and within a lane teams are served by start-time fair queuing:
+    each team's queue is tagged with a virtual time that advances by `1 / weight` per dispatched task,
+    and the queue with the lowest tag goes next. A team with hundreds of queued tasks therefore takes
+    turns with everyone else, instead of holding up the lane until its backlog clears.
+    Pass `dispatch=False` when queuing many tasks in a row, and dispatch once at the end.
+    Returns the Celery task ID the task will be sent with.
+    """
+    redis_client = redis.get_client()
+    task_id = task_id or str(uuid.uuid4())
+    now = time.time()
+    envelope = {
+        "signature": dict(task_signature),
+        "task_id": task_id,
+        "enqueued_at": now,
+        "expires_at": now + expires_after.total_seconds() if expires_after is not None else None,
+    }
+
+    # Teams joining the lane start at its current virtual time, so they can't bank turns while idle
+    virtual_time = float(redis_client.get(_virtual_time_key(lane)) or 0)
+    pipeline = redis_client.pipeline()
+    pipeline.rpush(_queue_key(lane, team_id), json.dumps(envelope))
+    if redis_client.zscore(_blocked_teams_key(lane), str(team_id)) is None:
+        # Teams at their concurrency limit get back in line once one of their tasks finishes
+        pipeline.zadd(_teams_key(lane), {str(team_id): virtual_time}, nx=True)
+    pipeline.incr(_depth_key(lane))
+    pipeline.execute()
+
+    if dispatch:
+        dispatch_scheduled_tasks()
+    return task_id
+
+
+def dispatch_scheduled_tasks() -> int:
+    """Send queued tasks to Celery while lane and team concurrency limits allow. Returns how many were dequeued."""
+    redis_client = redis.get_client()
+    dispatch_lock = redis_client.lock(DISPATCH_LOCK_KEY, timeout=30)
+    if not dispatch_lock.acquire(blocking=True, blocking_timeout=2):
+        # Someone else is dispatching, and will pick up our tasks too
+        return 0
+
+    dispatched = 0
+    try:
+        now = time.time()
+        for lane in QueryLane:
+            redis_client.zremrangebyscore(_running_key(lane), "-inf", now)
+            _unblock_teams(redis_client, lane, now)
+
+        exhausted_lanes: set[QueryLane] = set()
+        while dispatched < MAX_DISPATCHES_PER_RUN:
+            next_lane: Optional[QueryLane] = _next_lane(redis_client, now, exclude=exhausted_lanes)
+            if next_lane is None:
+                break
+            if _dispatch_from_lane(redis_client, next_lane, now):
+                dispatched += 1
+            else:
+                # Every team with queued tasks is at its own concurrency limit
+                exhausted_lanes.add(next_lane)
+
+        for lane in QueryLane:
+            QUERY_SCHEDULER_QUEUE_DEPTH.labels(lane=lane.value).set(int(redis_client.get(_depth_key(lane)) or 0))
+            QUERY_SCHEDULER_RUNNING.labels(lane=lane.value).set(redis_client.zcard(_running_key(lane)))
+    finally:
+        try:
+            dispatch_lock.release()
+        except LockError:
+            logger.warning("Query scheduler dispatch lock expired before release")
+
+    return dispatched
+
+
+def _next_lane(redis_client: Redis, now: float, *, exclude: set[QueryLane]) -> Optional[QueryLane]:
+    """Smooth weighted round robin among lanes that have queued tasks and room to run them."""
+    eligible_lanes = [
+        lane
+        for lane in QueryLane
+        if lane not in exclude
+        and int(redis_client.get(_depth_key(lane)) or 0) > 0
+        and redis_client.zcard(_running_key(lane)) < get_lane_settings(lane).concurrency
+    ]
+    if not eligible_lanes:
+        return None
+
+    credits = {key.decode(): float(value) for key, value in redis_client.hgetall(LANE_CREDITS_KEY).items()}
+    weights = {lane: get_lane_settings(lane).weight for lane in eligible_lanes}
+    for lane in eligible_lanes:
+        credits[lane.value] = credits.get(lane.value, 0) + weights[lane]
+    next_lane = max(eligible_lanes, key=lambda lane: credits[lane.value])
+    credits[next_lane.value] -= sum(weights.values())
+    redis_client.hset(LANE_CREDITS_KEY, mapping={lane.value: credits[lane.value] for lane in eligible_lanes})
+    return next_lane
+
+
+def _is_team_at_concurrency_limit(redis_client: Redis, lane: QueryLane, team_id: int, now: float) -> bool:
+    team_running_key = _team_running_key(lane, team_id)
+    redis_client.zremrangebyscore(team_running_key, "-inf", now)
+    return redis_client.zcard(team_running_key) >= get_lane_settings(lane).team_concurrency
+
+
+def _unblock_teams(redis_client: Redis, lane: QueryLane, now: float) -> None:
+    """Put teams whose running tasks expired without reporting back in line again."""
+    for raw_team_id, team_virtual_time in redis_client.zrange(_blocked_teams_key(lane), 0, -1, withscores=True):
+        if not _is_team_at_concurrency_limit(redis_client, lane, int(raw_team_id), now):
+            _move_team(
+                redis_client, raw_team_id, team_virtual_time, source=_blocked_teams_key(lane), target=_teams_key(lane)
+            )
+
+
+def _move_team(
+    redis_client: Redis, raw_team_id: bytes | str, team_virtual_time: float, *, source: str, target: str
+) -> None:
+    pipeline = redis_client.pipeline()
+    pipeline.zrem(source, raw_team_id)
+    pipeline.zadd(target, {raw_team_id: team_virtual_time})
+    pipeline.execute()
+
+
+def _dispatch_from_lane(redis_client: Redis, lane: QueryLane, now: float) -> bool:
+    """
+    Dispatch the next task of the team with the lowest virtual time in the lane.
+
+    Teams at their concurrency limit are parked in a separate set until one of their tasks finishes,
+    so picking the next team only ever looks at the head of the sorted set.
+    """
+    while True:
+        next_teams = redis_client.zrange(_teams_key(lane), 0, 0, withscores=True)
+        if not next_teams:
+            return False
+        raw_team_id, team_virtual_time = next_teams[0]
+        team_id = int(raw_team_id)
+        if _is_team_at_concurrency_limit(redis_client, lane, team_id, now):
+            _move_team(
+                redis_client, raw_team_id, team_virtual_time, source=_teams_key(lane), target=_blocked_teams_key(lane)
+            )
+            continue
+
+        raw_envelope = redis_client.lpop(_queue_key(lane, team_id))
+        if raw_envelope is None:
+            redis_client.zrem(_teams_key(lane), str(team_id))
+            continue
+
+        pipeline = redis_client.pipeline()
+        pipeline.decr(_depth_key(lane))
+        pipeline.set(_virtual_time_key(lane), team_virtual_time)
+        if redis_client.llen(_queue_key(lane, team_id)) > 0:
+            pipeline.zadd(_teams_key(lane), {str(team_id): team_virtual_time + 1 / get_team_weight(team_id)})
+        else:
+            pipeline.zrem(_teams_key(lane), str(team_id))
+        pipeline.execute()
+
+        _send(redis_client, lane, team_id, json.loads(raw_envelope), now)
+        return True
+
+
+def _send(redis_client: Redis, lane: QueryLane, team_id: int, envelope: dict, now: float) -> None:
+    expires_at: Optional[float] = envelope["expires_at"]
+    if expires_at is not None and expires_at <= now:
+        QUERY_SCHEDULER_DISPATCHED_COUNTER.labels(lane=lane.value, outcome="expired").inc()
+        return
+
+    task_id: str = envelope["task_id"]
+    slot_expires_at = now + SLOT_TTL_SECONDS
+    pipeline = redis_client.pipeline()
+    pipeline.zadd(_running_key(lane), {task_id: slot_expires_at})
+    pipeline.zadd(_team_running_key(lane, team_id), {task_id: slot_expires_at})
+    pipeline.expire(_team_running_key(lane, team_id), SLOT_TTL_SECONDS)
+    pipeline.set(_slot_key(task_id), f"{lane.value}:{team_id}", ex=SLOT_TTL_SECONDS)
+    pipeline.execute()
+
+    try:
+        signature(envelope["signature"]).apply_async(
+            task_id=task_id, expires=expires_at - now if expires_at is not None else None
+        )
+    except Exception as e:
+        release_task_slot(task_id)
+        capture_exception(e)
+        logger.exception("Failed to send scheduled task", lane=lane.value, team_id=team_id, task_id=task_id)
+        return
+
+    QUERY_SCHEDULER_DISPATCHED_COUNTER.labels(lane=lane.value, outcome="sent").inc()
+    QUERY_SCHEDULER_WAIT_TIME.labels(lane=lane.value).observe(now - envelope["enqueued_at"])
+
+
+def release_task_slot(task_id: str) -> None:
+    """Stop counting a dispatched task against its lane and team concurrency limits."""
+    redis_client = redis.get_client()
+    slot = redis_client.get(_slot_key(task_id))
+    if slot is None:
+        return
+    lane_value, team_id = slot.decode().split(":")
+    lane = QueryLane(lane_value)
+
+    pipeline = redis_client.pipeline()
+    pipeline.zrem(_running_key(lane), task_id)
+    pipeline.zrem(_team_running_key(lane, int(team_id)), task_id)
+    pipeline.delete(_slot_key(task_id))
+    pipeline.zscore(_blocked_teams_key(lane), team_id)
+    *_, team_virtual_time = pipeline.execute()
+
+    if team_virtual_time is not None:
+        # The team has room to run another task again
+        _move_team(redis_client, team_id, team_virtual_time, source=_blocked_teams_key(lane), target=_teams_key(lane))
+
+
+def releases_scheduler_slot(task_func):
+    """For tasks sent by the scheduler: once the task is done, free up its slot and dispatch whatever's next."""
+
+    @wraps(task_func)
+    def wrapper(*args, **kwargs):
+        try:
+            return task_func(*args, **kwargs)
+        finally:
+            if settings.QUERY_SCHEDULER_ENABLED and current_task and current_task.request.id:
+                try:
+                    release_task_slot(current_task.request.id)
+                    dispatch_scheduled_tasks()
+                except Exception as e:
+                    capture_exception(e)
+                    logger.exception("Failed to release query scheduler slot", task_id=current_task.request.id)
+
+    return wrapper
@@ -0,0 +1,144 @@
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from celery import shared_task
+from django.test import SimpleTestCase, override_settings
+
+from posthog.clickhouse.client.query_scheduler import (
+    SLOT_TTL_SECONDS,
+    QueryLane,
+    dispatch_scheduled_tasks,
+    release_task_slot,
+    schedule_task,
+)
+from posthog.redis import get_client
+
+
+@shared_task(ignore_result=True)
+def scheduled_test_task(team_id: int, index: int) -> None:
+    pass
+
+
+@override_settings(
+    QUERY_SCHEDULER_ENABLED=True,
+    QUERY_SCHEDULER_LANE_SETTINGS={
+        "interactive": {"concurrency": 4, "team_concurrency": 4},
+        "dashboard": {"concurrency": 4, "team_concurrency": 4},
+        "warming": {"concurrency": 4, "team_concurrency": 1},
+    },
+    QUERY_SCHEDULER_TEAM_WEIGHTS={},
+)
+class TestQueryScheduler(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        get_client().flushall()
+        self.sent: list[tuple[str, tuple, str]] = []
+        patcher = patch("posthog.clickhouse.client.query_scheduler.signature", side_effect=self._signature)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _signature(self, signature_dict: dict) -> MagicMock:
+        task_signature = MagicMock()
+        task_signature.apply_async.side_effect = lambda task_id, expires: self.sent.append(
+            (signature_dict["task"], tuple(signature_dict["args"]), task_id)
+        )
+        return task_signature
+
+    def _schedule(self, team_id: int, index: int, lane: QueryLane = QueryLane.INTERACTIVE, **kwargs) -> str:
+        return schedule_task(
+            scheduled_test_task.si(team_id, index), team_id=team_id, lane=lane, dispatch=False, **kwargs
+        )
+
+    def _finish_all(self) -> None:
+        for _, _, task_id in self.sent:
+            release_task_slot(task_id)
+
+    def test_dispatches_up_to_lane_concurrency(self):
+        task_ids = [self._schedule(team_id=1, index=index) for index in range(6)]
+
+        assert dispatch_scheduled_tasks() == 4
+        assert [args for _, args, _ in self.sent] == [(1, 0), (1, 1), (1, 2), (1, 3)]
+        assert [task_id for _, _, task_id in self.sent] == task_ids[:4]
+
+        # Nothing more fits until a running task finishes
+        assert dispatch_scheduled_tasks() == 0
+        release_task_slot(task_ids[0])
+        assert dispatch_scheduled_tasks() == 1
+        assert self.sent[-1][1] == (1, 4)
+
+    def test_teams_take_turns_within_a_lane(self):
+        for index in range(5):
+            self._schedule(team_id=1, index=index)
+        for index in range(2):
+            self._schedule(team_id=2, index=index)
+
+        dispatch_scheduled_tasks()
+        self._finish_all()
+        dispatch_scheduled_tasks()
+
+        assert [args for _, args, _ in self.sent] == [(1, 0), (2, 0), (1, 1), (2, 1), (1, 2), (1, 3), (1, 4)]
+
+    @override_settings(QUERY_SCHEDULER_TEAM_WEIGHTS={"2": 2})
+    def test_team_weights(self):
+        for index in range(4):
+            self._schedule(team_id=1, index=index)
+            self._schedule(team_id=2, index=index)
+
+        dispatch_scheduled_tasks()
+
+        assert [args for _, args, _ in self.sent] == [(1, 0), (2, 0), (2, 1), (1, 1)]
+
+    def test_team_concurrency(self):
+        for index in range(3):
+            self._schedule(team_id=1, index=index, lane=QueryLane.WARMING)
+        self._schedule(team_id=2, index=0, lane=QueryLane.WARMING)
+
+        dispatch_scheduled_tasks()
+
+        assert [args for _, args, _ in self.sent] == [(1, 0), (2, 0)]
+
+        # Team 1 is back in line once its running task finishes
+        self._schedule(team_id=2, index=1, lane=QueryLane.WARMING)
+        release_task_slot(self.sent[0][2])
+        dispatch_scheduled_tasks()
+
+        assert [args for _, args, _ in self.sent[2:]] == [(1, 1)]
+
+    def test_team_concurrency_frees_up_when_running_tasks_expire(self):
+        for index in range(2):
+            self._schedule(team_id=1, index=index, lane=QueryLane.WARMING)
+
+        dispatch_scheduled_tasks()
+        with patch("posthog.clickhouse.client.query_scheduler.time.time", return_value=time.time() + SLOT_TTL_SECONDS):
+            dispatch_scheduled_tasks()
+
+        assert [args for _, args, _ in self.sent] == [(1, 0), (1, 1)]
+
+    @override_settings(
+        QUERY_SCHEDULER_LANE_SETTINGS={
+            "interactive": {"concurrency": 20, "team_concurrency": 20},
+            "dashboard": {"concurrency": 20, "team_concurrency": 20},
+            "warming": {"concurrency": 20, "team_concurrency": 20},
+        }
+    )
+    def test_lanes_share_dispatches_by_weight(self):
+        lanes_by_team = {1: QueryLane.INTERACTIVE, 2: QueryLane.DASHBOARD, 3: QueryLane.WARMING}
+        for index in range(10):
+            for team_id, lane in lanes_by_team.items():
+                self._schedule(team_id=team_id, index=index, lane=lane)
+
+        dispatch_scheduled_tasks()
+        sent_by_team = [args[0] for _, args, _ in self.sent]
+
+        # Interactive (weight 6) gets ahead of dashboard (weight 3), but warming (weight 1) still gets its turn
+        assert [sent_by_team[:10].count(team_id) for team_id in lanes_by_team] == [6, 3, 1]
+        assert len(sent_by_team) == 30
+
+    def test_expired_tasks_are_dropped(self):
+        self._schedule(team_id=1, index=0, expires_after=timedelta(seconds=-1))
+        self._schedule(team_id=1, index=1, expires_after=timedelta(minutes=5))
+
+        dispatch_scheduled_tasks()
+
+        assert [args for _, args, _ in self.sent] == [(1, 1)]
@@ -0,0 +1,148 @@
+import dataclasses
+import hashlib
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Optional
+
+import structlog
+from django.conf import settings
+from prometheus_client import Counter
+
+from posthog.cache_utils import LRUCache
+from posthog.hogql import ast
+from posthog.hogql.base import AST
+from posthog.hogql.database.database_cache import get_schema_version
+
+if TYPE_CHECKING:
+    from posthog.hogql.constants import HogQLGlobalSettings
+    from posthog.hogql.context import HogQLContext, HogQLNotice
+
+logger = structlog.get_logger(__name__)
+
+HOGQL_COMPILED_QUERY_CACHE_COUNTER = Counter(
+    "posthog_hogql_compiled_query_cache_total",
+    "Whether printed ClickHouse SQL for a HogQL query could be reused from the process-local cache.",
+    labelnames=["result"],
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledQuery:
+    sql: str
+    values: dict[str, Any]
+    settings: Optional[dict[str, Any]]
+    warnings: list["HogQLNotice"]
+    notices: list["HogQLNotice"]
+
+
+_compiled_query_cache: LRUCache[tuple, CompiledQuery] = LRUCache(
+    maxsize=settings.HOGQL_COMPILED_QUERY_CACHE_SIZE,
+    ttl=timedelta(seconds=settings.HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS),
+)
+
+
+class _UncacheableAST(Exception):
+    pass
+
+
+def _feed(hasher: Any, value: Any) -> None:
+    if isinstance(value, AST):
+        if isinstance(value, ast.Expr) and value.type is not None:
+            # Pre-resolved nodes carry types pointing into a specific database, we can't fingerprint those
+            raise _UncacheableAST()
+        hasher.update(value.__class__.__name__.encode())
+        hasher.update(b"(")
+        for field in dataclasses.fields(value):
+            if field.name in ("start", "end", "type"):
+                continue
+            hasher.update(field.name.encode())
+            hasher.update(b"=")
+            _feed(hasher, getattr(value, field.name))
+            hasher.update(b",")
+        hasher.update(b")")
+    elif isinstance(value, list | tuple):
+        hasher.update(b"[")
+        for item in value:
+            _feed(hasher, item)
+            hasher.update(b",")
+        hasher.update(b"]")
+    elif isinstance(value, dict):
+        hasher.update(b"{")
+        for key, item in value.items():
+            _feed(hasher, key)
+            hasher.update(b":")
+            _feed(hasher, item)
+            hasher.update(b",")
+        hasher.update(b"}")
+    else:
+        hasher.update(f"{type(value).__name__}:{value!r}".encode())
+
+
+def ast_fingerprint(node: AST) -> Optional[str]:
+    """Structural hash of an unresolved AST, ignoring source locations. None if the AST can't be fingerprinted."""
+    hasher = hashlib.sha256()
+    try:
+        _feed(hasher, node)
+    except _UncacheableAST:
+        return None
+    return hasher.hexdigest()
+
+
+def compiled_query_cache_key(
+    node: AST, context: "HogQLContext", query_settings: Optional["HogQLGlobalSettings"], pretty: bool
+) -> Optional[tuple]:
+    """
+    Everything that goes into printing a top level ClickHouse query, or None if the result can't be cached.
+
+    The context must come with an empty `values` dict, as printed placeholders are numbered from its length.
+    """
+    if (
+        not settings.HOGQL_COMPILED_QUERY_CACHE_ENABLED
+        or context.team_id is None
+        or context.database is None
+        or context.globals is not None
+        or len(context.values) > 0
+    ):
+        return None
+
+    fingerprint = ast_fingerprint(node)
+    if fingerprint is None:
+        return None
+
+    try:
+        schema_version = get_schema_version(context.team_id)
+    except Exception as e:
+        logger.warning("Failed to get HogQL database schema version", team_id=context.team_id, error=str(e))
+        return None
+
+    return (
+        fingerprint,
+        context.team_id,
+        schema_version,
+        context.database.get_timezone(),
+        context.database.get_week_start_day(),
+        context.modifiers.model_dump_json(exclude_none=True),
+        query_settings.model_dump_json(exclude_none=True) if query_settings is not None else None,
+        pretty,
+        context.enable_select_queries,
+        context.limit_top_select,
+        context.within_non_hogql_query,
+        context.debug,
+    )
+
+
+def get_compiled_query(cache_key: tuple) -> Optional[CompiledQuery]:
+    compiled_query = _compiled_query_cache.get(cache_key)
+    HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="hit" if compiled_query is not None else "miss").inc()
+    return compiled_query
+
+
+def set_compiled_query(cache_key: tuple, context: "HogQLContext", compiled_query: CompiledQuery) -> None:
+    if not context.cacheable:
+        # Printing depended on state that isn't part of the cache key, e.g. cohort versions
+        HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="uncacheable").inc()
+        return
+    _compiled_query_cache.set(cache_key, compiled_query)
+
+
+def clear_compiled_query_cache() -> None:
+    _compiled_query_cache.clear()
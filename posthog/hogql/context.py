@@ -54,6 +54,8 @@ class HogQLContext:
     debug: bool = False
 
     property_swapper: Optional["PropertySwapper"] = None
+    # Set to False while printing if the output depends on Postgres state that changes without a schema version bump
+    cacheable: bool = True
 
     def add_value(self, value: Any) -> str:
         key = f"hogql_val_{len(self.values)}"
@@ -9,6 +9,7 @@ from sentry_sdk import capture_exception
 
 from posthog.hogql import ast
 from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database_cache import get_or_create_hogql_database
 from posthog.hogql.database.models import (
     BooleanDatabaseField,
     DatabaseField,
@@ -213,18 +214,29 @@ def _use_person_id_from_person_overrides(database: Database) -> None:
 def create_hogql_database(
     team_id: int, modifiers: Optional[HogQLQueryModifiers] = None, team_arg: Optional["Team"] = None
 ) -> Database:
-    from posthog.hogql.database.s3_table import S3Table
     from posthog.hogql.query import create_default_modifiers_for_team
     from posthog.models import Team
+
+    team = team_arg or Team.objects.get(pk=team_id)
+    modifiers = create_default_modifiers_for_team(team, modifiers)
+
+    return get_or_create_hogql_database(
+        team, modifiers, create=lambda: _create_hogql_database(team_id, team=team, modifiers=modifiers)
+    )
+
+
+def _create_hogql_database(team_id: int, *, team: "Team", modifiers: HogQLQueryModifiers) -> Database:
+    from posthog.hogql.database.s3_table import S3Table
     from posthog.warehouse.models import (
         DataWarehouseJoin,
         DataWarehouseSavedQuery,
         DataWarehouseTable,
     )
 
-    team = team_arg or Team.objects.get(pk=team_id)
-    modifiers = create_default_modifiers_for_team(team, modifiers)
-    database = Database(timezone=team.timezone, week_start_day=team.week_start_day)
+    database = Database(
+        timezone=team.timezone,
+        week_start_day=WeekStartDay(team.week_start_day) if team.week_start_day is not None else None,
+    )
 
     if modifiers.personsOnEventsMode == PersonsOnEventsMode.DISABLED:
         # no change
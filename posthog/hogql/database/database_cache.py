@@ -0,0 +1,102 @@
+from collections.abc import Callable
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import structlog
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from prometheus_client import Counter
+
+from posthog import redis
+from posthog.cache_utils import LRUCache
+from posthog.schema import HogQLQueryModifiers
+
+if TYPE_CHECKING:
+    from posthog.hogql.database.database import Database
+    from posthog.models import Team
+
+logger = structlog.get_logger(__name__)
+
+HOGQL_DATABASE_CACHE_COUNTER = Counter(
+    "posthog_hogql_database_cache_total",
+    "Whether a team's HogQL database schema was served from the process-local cache or had to be built.",
+    labelnames=["result"],
+)
+
+SCHEMA_VERSION_KEY_PREFIX = "hogql_database_schema_version"
+
+_database_cache: LRUCache[tuple, "Database"] = LRUCache(
+    maxsize=settings.HOGQL_DATABASE_CACHE_SIZE,
+    ttl=timedelta(seconds=settings.HOGQL_DATABASE_CACHE_TTL_SECONDS),
+)
+
+
+def _schema_version_key(team_id: int) -> str:
+    return f"{SCHEMA_VERSION_KEY_PREFIX}:{team_id}"
+
+
+def get_schema_version(team_id: int) -> int:
+    """
+    Version of the team's schema inputs (warehouse tables, joins, saved queries, group types).
+
+    The counter lives in Redis, so bumping it in one process invalidates the cached schema in all of them.
+    """
+    version = redis.get_client().get(_schema_version_key(team_id))
+    return int(version) if version else 0
+
+
+def invalidate_hogql_database_cache(team_id: int) -> None:
+    """Bump the team's schema version once the current transaction commits, so no one caches the old state."""
+    transaction.on_commit(lambda: redis.get_client().incr(_schema_version_key(team_id)))
+
+
+def get_or_create_hogql_database(
+    team: "Team", modifiers: HogQLQueryModifiers, create: Callable[[], "Database"]
+) -> "Database":
+    """
+    Return the team's `Database` from the process-local cache, building it with `create` on a miss.
+
+    Cached databases are shared between queries, so they must not be mutated after being built.
+    """
+    if not settings.HOGQL_DATABASE_CACHE_ENABLED:
+        return create()
+
+    try:
+        schema_version = get_schema_version(team.pk)
+    except Exception as e:
+        # Without a version we can't tell if the cached schema is current, so let's not use the cache at all
+        logger.warning("Failed to get HogQL database schema version", team_id=team.pk, error=str(e))
+        HOGQL_DATABASE_CACHE_COUNTER.labels(result="error").inc()
+        return create()
+
+    cache_key = (
+        team.pk,
+        schema_version,
+        team.timezone,
+        team.week_start_day,
+        modifiers.model_dump_json(exclude_none=True),
+    )
+    database = _database_cache.get(cache_key)
+    if database is not None:
+        HOGQL_DATABASE_CACHE_COUNTER.labels(result="hit").inc()
+        return database
+
+    HOGQL_DATABASE_CACHE_COUNTER.labels(result="miss").inc()
+    database = create()
+    _database_cache.set(cache_key, database)
+    return database
+
+
+def clear_hogql_database_cache() -> None:
+    _database_cache.clear()
+
+
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseTable")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseJoin")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseSavedQuery")
+@receiver([post_save, post_delete], sender="posthog.DataWarehouseCredential")
+@receiver([post_save, post_delete], sender="posthog.GroupTypeMapping")
+def schema_input_changed(sender, instance, **kwargs):
+    invalidate_hogql_database_cache(instance.team_id)
@@ -76,6 +76,8 @@ class CohortPeople(LazyTable):
     fields: dict[str, FieldOrTable] = COHORT_PEOPLE_FIELDS
 
     def lazy_select(self, table_to_add: LazyTableToAdd, context, node):
+        # Printed with the current cohort versions
+        context.cacheable = False
         return select_from_cohort_people_table(table_to_add.fields_accessed, context.team_id)
 
     def to_printed_clickhouse(self, context):
@@ -8,6 +8,7 @@ from parameterized import parameterized
 
 from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS
 from posthog.hogql.database.database import create_hogql_database, serialize_database
+from posthog.hogql.database.database_cache import clear_hogql_database_cache
 from posthog.hogql.database.models import FieldTraverser, LazyJoin, StringDatabaseField, ExpressionField, Table
 from posthog.hogql.errors import ExposedHogQLError
 from posthog.hogql.modifiers import create_default_modifiers_for_team
@@ -252,6 +253,41 @@ class TestDatabase(BaseTest, QueryMatchingTest):
 
         assert db.events.fields["event"] == StringDatabaseField(name="event")
 
+    @override_settings(HOGQL_DATABASE_CACHE_ENABLED=True)
+    def test_database_is_cached_until_schema_changes(self):
+        clear_hogql_database_cache()
+        db = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+
+        with self.assertNumQueries(0):
+            assert create_hogql_database(team_id=self.team.pk, team_arg=self.team) is db
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupTypeMapping.objects.create(team=self.team, group_type="test", group_type_index=0)
+
+        new_db = create_hogql_database(team_id=self.team.pk, team_arg=self.team)
+        assert new_db is not db
+        assert new_db.events.fields["test"] == FieldTraverser(chain=["group_0"])
+
+    @override_settings(HOGQL_DATABASE_CACHE_ENABLED=True)
+    def test_database_cache_is_keyed_by_modifiers(self):
+        clear_hogql_database_cache()
+        db = create_hogql_database(
+            team_id=self.team.pk,
+            modifiers=HogQLQueryModifiers(personsOnEventsMode=PersonsOnEventsMode.DISABLED),
+            team_arg=self.team,
+        )
+        poe_db = create_hogql_database(
+            team_id=self.team.pk,
+            modifiers=HogQLQueryModifiers(
+                personsOnEventsMode=PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS
+            ),
+            team_arg=self.team,
+        )
+
+        assert db is not poe_db
+        assert db.events.fields["person"] == FieldTraverser(chain=["pdi", "person"])
+        assert poe_db.events.fields["person"] == FieldTraverser(chain=["poe"])
+
     def test_database_expression_fields(self):
         db = create_hogql_database(team_id=self.team.pk)
         db.numbers.fields["expression"] = ExpressionField(name="expression", expr=parse_expr("1 + 1"))
@@ -14,6 +14,9 @@ def matches_action(node: ast.Expr, args: list[ast.Expr], context: HogQLContext)
     from posthog.models import Action
     from posthog.hogql.property import action_to_expr
 
+    # Printed with the action's current steps
+    context.cacheable = False
+
     if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
         actions = Action.objects.filter(id=int(arg.value), team_id=context.team_id).all()
         if len(actions) == 1:
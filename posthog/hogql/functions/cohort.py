@@ -24,6 +24,8 @@ def cohort_query_node(node: ast.Expr, context: HogQLContext) -> ast.Expr:
 
 
 def cohort(node: ast.Expr, args: list[ast.Expr], context: HogQLContext) -> ast.Expr:
+    # Printed with the current cohort version
+    context.cacheable = False
     arg = args[0]
     if not isinstance(arg, ast.Constant):
         raise QueryError("cohort() takes only constant arguments", node=arg)
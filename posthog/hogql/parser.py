@@ -3,8 +3,10 @@ from collections.abc import Callable
 
 from antlr4 import CommonTokenStream, InputStream, ParseTreeVisitor, ParserRuleContext
 from antlr4.error.ErrorListener import ErrorListener
+from django.conf import settings
 from prometheus_client import Histogram
 
+from posthog.cache_utils import LRUCache
 from posthog.hogql import ast
 from posthog.hogql.ast import SelectSetNode
 from posthog.hogql.base import AST
@@ -15,6 +17,7 @@ from posthog.hogql.grammar.HogQLParser import HogQLParser
 from posthog.hogql.parse_string import parse_string_literal_text, parse_string_literal_ctx, parse_string_text_ctx
 from posthog.hogql.placeholders import replace_placeholders
 from posthog.hogql.timings import HogQLTimings
+from posthog.hogql.visitor import clone_expr
 from hogql_parser import (
     parse_expr as _parse_expr_cpp,
     parse_order_expr as _parse_order_expr_cpp,
@@ -63,11 +66,43 @@ RULE_TO_HISTOGRAM: dict[Literal["expr", "order_expr", "select", "full_template_s
     cast(Literal["expr", "order_expr", "select", "full_template_string"], rule): Histogram(
         f"parse_{rule}_seconds",
         f"Time to parse {rule} expression",
-        labelnames=["backend"],
+        labelnames=["backend", "cache"],
     )
     for rule in ("expr", "order_expr", "select", "full_template_string")
 }
 
+# Parsed ASTs are never handed out directly, callers get a copy they're free to mutate
+_parse_cache: LRUCache[tuple, ast.Expr] = LRUCache(maxsize=settings.HOGQL_PARSE_CACHE_SIZE)
+
+
+def _parse(
+    rule: Literal["expr", "order_expr", "select", "full_template_string", "program"],
+    string: str,
+    *args,
+    backend: Literal["python", "cpp"],
+    histogram: Histogram,
+    copy: bool = True,
+):
+    """
+    Parse `string` with `rule`, reusing the AST from an earlier identical parse if possible.
+
+    Pass `copy=False` only if the caller clones the result itself, e.g. by replacing placeholders.
+    """
+    if not settings.HOGQL_PARSE_CACHE_ENABLED:
+        with histogram.labels(backend=backend, cache="disabled").time():
+            return RULE_TO_PARSE_FUNCTION[backend][rule](string, *args)
+
+    cache_key = (string, rule, backend, *args)
+    node = _parse_cache.get(cache_key)
+    if node is not None:
+        with histogram.labels(backend=backend, cache="hit").time():
+            return clone_expr(node) if copy else node
+
+    with histogram.labels(backend=backend, cache="miss").time():
+        node = cast(ast.Expr, RULE_TO_PARSE_FUNCTION[backend][rule](string, *args))
+        _parse_cache.set(cache_key, node)
+        return clone_expr(node) if copy else node
+
 
 def parse_string_template(
     string: str,
@@ -80,8 +115,13 @@ def parse_string_template(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_full_template_string_{backend}"):
-        with RULE_TO_HISTOGRAM["full_template_string"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["full_template_string"]("F'" + string)
+        node = _parse(
+            "full_template_string",
+            "F'" + string,
+            backend=backend,
+            histogram=RULE_TO_HISTOGRAM["full_template_string"],
+            copy=not placeholders,
+        )
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -101,8 +141,7 @@ def parse_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["expr"](expr, start)
+        node = _parse("expr", expr, start, backend=backend, histogram=RULE_TO_HISTOGRAM["expr"], copy=not placeholders)
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -119,8 +158,13 @@ def parse_order_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_order_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["order_expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["order_expr"](order_expr)
+        node = _parse(
+            "order_expr",
+            order_expr,
+            backend=backend,
+            histogram=RULE_TO_HISTOGRAM["order_expr"],
+            copy=not placeholders,
+        )
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -137,8 +181,9 @@ def parse_select(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_select_{backend}"):
-        with RULE_TO_HISTOGRAM["select"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["select"](statement)
+        node = _parse(
+            "select", statement, backend=backend, histogram=RULE_TO_HISTOGRAM["select"], copy=not placeholders
+        )
         if placeholders:
             with timings.measure("replace_placeholders"):
                 node = replace_placeholders(node, placeholders)
@@ -154,8 +199,7 @@ def parse_program(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["program"](source)
+        node = _parse("program", source, backend=backend, histogram=RULE_TO_HISTOGRAM["expr"])
     return node
 
 
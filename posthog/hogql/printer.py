@@ -9,6 +9,12 @@ from uuid import UUID
 from posthog.clickhouse.property_groups import property_groups
 from posthog.hogql import ast
 from posthog.hogql.base import AST, _T_AST
+from posthog.hogql.compiled_query_cache import (
+    CompiledQuery,
+    compiled_query_cache_key,
+    get_compiled_query,
+    set_compiled_query,
+)
 from posthog.hogql.constants import (
     MAX_SELECT_RETURNED_ROWS,
     HogQLGlobalSettings,
@@ -85,10 +91,30 @@ def print_ast(
     settings: Optional[HogQLGlobalSettings] = None,
     pretty: bool = False,
 ) -> str:
+    cache_key = None
+    if dialect == "clickhouse" and not stack and context.database is None and context.team_id is not None:
+        # Only top level queries whose database we build ourselves can be reused, see `compiled_query_cache.py`
+        with context.timings.measure("create_hogql_database"):
+            context.database = create_hogql_database(context.team_id, context.modifiers, context.team)
+        with context.timings.measure("compiled_query_cache"):
+            cache_key = compiled_query_cache_key(node, context, settings, pretty)
+            compiled_query = get_compiled_query(cache_key) if cache_key is not None else None
+        if compiled_query is not None:
+            with context.timings.measure("compiled_query_cache_hit"):
+                context.modifiers = set_default_in_cohort_via(context.modifiers)
+                context.values.update(compiled_query.values)
+                context.warnings.extend(compiled_query.warnings)
+                context.notices.extend(compiled_query.notices)
+                if settings is not None and compiled_query.settings is not None:
+                    for key, value in compiled_query.settings.items():
+                        setattr(settings, key, value)
+            return compiled_query.sql
+
+    warnings_count, notices_count = len(context.warnings), len(context.notices)
     prepared_ast = prepare_ast_for_printing(node=node, context=context, dialect=dialect, stack=stack, settings=settings)
     if prepared_ast is None:
         return ""
-    return print_prepared_ast(
+    sql = print_prepared_ast(
         node=prepared_ast,
         context=context,
         dialect=dialect,
@@ -97,6 +123,20 @@ def print_ast(
         pretty=pretty,
     )
 
+    if cache_key is not None:
+        set_compiled_query(
+            cache_key,
+            context,
+            CompiledQuery(
+                sql=sql,
+                values=dict(context.values),
+                settings=settings.model_dump() if settings is not None else None,
+                warnings=context.warnings[warnings_count:],
+                notices=context.notices[notices_count:],
+            ),
+        )
+    return sql
+
 
 def prepare_ast_for_printing(
     node: _T_AST,
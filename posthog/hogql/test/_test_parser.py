@@ -1,6 +1,8 @@
 from typing import Literal, cast, Optional
 
 import math
+from django.test import override_settings
+
 from posthog.hogql.ast import (
     VariableAssignment,
     Constant,
@@ -36,6 +38,8 @@ from posthog.test.base import BaseTest, MemoryLeakTestMixin
 def parser_test_factory(backend: Literal["python", "cpp"]):
     base_classes = (MemoryLeakTestMixin, BaseTest) if backend == "cpp" else (BaseTest,)
 
+    # The parse cache would turn repeated memory leak check runs into cache hits
+    @override_settings(HOGQL_PARSE_CACHE_ENABLED=False)
     class TestParser(*base_classes):
         MEMORY_INCREASE_PER_PARSE_LIMIT_B = 10_000
         MEMORY_INCREASE_INCREMENTAL_FACTOR_LIMIT = 0.1
@@ -2562,4 +2566,31 @@ def parser_test_factory(backend: Literal["python", "cpp"]):
             )
             self.assertEqual(program, expected)
 
+        def test_parse_cache_returns_copies(self):
+            with override_settings(HOGQL_PARSE_CACHE_ENABLED=True):
+                query = "select event, timestamp from events where timestamp >= {date_from} order by timestamp"
+                first = parse_select(query, backend=backend)
+                assert isinstance(first, ast.SelectQuery)
+                first.select.append(ast.Field(chain=["uuid"]))
+
+                second = parse_select(query, backend=backend)
+                self.assertEqual(second, parse_select(query, backend=backend))
+                assert isinstance(second, ast.SelectQuery)
+                self.assertEqual(len(second.select), 2)
+
+                third = parse_select(
+                    query, placeholders={"date_from": ast.Constant(value="2024-01-01")}, backend=backend
+                )
+                assert isinstance(third, ast.SelectQuery)
+                self.assertEqual(
+                    clear_locations(cast(ast.CompareOperation, third.where).right), ast.Constant(value="2024-01-01")
+                )
+
+                fourth = parse_select(query, backend=backend)
+                assert isinstance(fourth, ast.SelectQuery)
+                self.assertEqual(
+                    clear_locations(cast(ast.CompareOperation, fourth.where).right),
+                    ast.Placeholder(expr=ast.Field(chain=["date_from"])),
+                )
+
     return TestParser
@@ -8,6 +8,7 @@ from django.test import override_settings
 
 from posthog.clickhouse.client.execute import sync_execute
 from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import clear_compiled_query_cache
 from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS, HogQLQuerySettings, HogQLGlobalSettings
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.database import Database
@@ -15,7 +16,7 @@ from posthog.hogql.database.models import DateDatabaseField, StringDatabaseField
 from posthog.hogql.errors import ExposedHogQLError, QueryError
 from posthog.hogql.parser import parse_select, parse_expr
 from posthog.hogql.printer import print_ast, to_printed_hogql, prepare_ast_for_printing, print_prepared_ast
-from posthog.models import PropertyDefinition
+from posthog.models import Cohort, PropertyDefinition
 from posthog.models.team.team import WeekStartDay
 from posthog.schema import (
     HogQLQueryModifiers,
@@ -2143,3 +2144,59 @@ class TestPrinter(BaseTest):
             in printed
         )
         assert f"AS id FROM person WHERE and(equals(person.team_id, {self.team.pk}), in(id, tuple(4, 5, 6)))" in printed
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=True)
+    def test_compiled_query_cache(self):
+        clear_compiled_query_cache()
+        query = "select event, count() from events where event = 'hello' group by event"
+
+        first_context = HogQLContext(team_id=self.team.pk, enable_select_queries=True)
+        first = print_ast(parse_select(query), first_context, "clickhouse")
+        assert "compiled_query_cache_hit" not in first_context.timings.to_dict()
+
+        second_context = HogQLContext(team_id=self.team.pk, enable_select_queries=True)
+        second = print_ast(parse_select(query), second_context, "clickhouse")
+        assert "./compiled_query_cache_hit" in second_context.timings.to_dict()
+        assert second == first
+        assert second_context.values == first_context.values
+
+        # Different constants print differently
+        third_context = HogQLContext(team_id=self.team.pk, enable_select_queries=True)
+        print_ast(parse_select(query.replace("hello", "world")), third_context, "clickhouse")
+        assert "./compiled_query_cache_hit" not in third_context.timings.to_dict()
+        assert "world" in third_context.values.values()
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=True)
+    def test_compiled_query_cache_restores_settings(self):
+        clear_compiled_query_cache()
+
+        printed, printed_settings = [], []
+        for _ in range(2):
+            query = parse_select("select event from events")
+            assert isinstance(query, ast.SelectQuery)
+            query.settings = HogQLQuerySettings(optimize_aggregation_in_order=True)
+            settings = HogQLGlobalSettings()
+            printed.append(
+                print_ast(
+                    query,
+                    HogQLContext(team_id=self.team.pk, enable_select_queries=True),
+                    "clickhouse",
+                    settings=settings,
+                )
+            )
+            printed_settings.append(settings)
+
+        assert printed[1] == printed[0]
+        assert printed_settings[1] == printed_settings[0]
+        assert printed_settings[1].optimize_aggregation_in_order is True
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=True)
+    def test_compiled_query_cache_skips_cohorts(self):
+        clear_compiled_query_cache()
+        cohort = Cohort.objects.create(team=self.team, is_static=True, name="static cohort")
+        query = f"select event from events where person_id in cohort {cohort.pk}"
+
+        for _ in range(2):
+            context = HogQLContext(team_id=self.team.pk, enable_select_queries=True)
+            print_ast(parse_select(query), context, "clickhouse")
+            assert "./compiled_query_cache_hit" not in context.timings.to_dict()
@@ -86,6 +86,8 @@ class MultipleInCohortResolver(TraversingVisitor):
     ) -> list[tuple[int, StaticOrDynamic, int]]:
         from posthog.models import Cohort
 
+        # Printed with the current cohort versions
+        self.context.cacheable = False
         cohorts: list[tuple[int, StaticOrDynamic, int]] = []
 
         for node in compare_operations:
@@ -287,6 +289,8 @@ class InCohortResolver(TraversingVisitor):
 
             from posthog.models import Cohort
 
+            # Printed with the current cohort version
+            self.context.cacheable = False
             if (isinstance(arg.value, int) or isinstance(arg.value, float)) and not isinstance(arg.value, bool):
                 cohorts = Cohort.objects.filter(id=int(arg.value), team_id=self.context.team_id).values_list(
                     "id", "is_static", "version", "name"
@@ -0,0 +1,145 @@
+from typing import Optional
+
+from freezegun import freeze_time
+
+from posthog.hogql_queries.insights.trends.trends_batch_query import batch_key, calculate_trends_batch, is_batchable
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.schema import (
+    BaseMathType,
+    BreakdownFilter,
+    ChartDisplayType,
+    EventPropertyFilter,
+    EventsNode,
+    InsightDateRange,
+    IntervalType,
+    PropertyOperator,
+    TrendsFilter,
+    TrendsQuery,
+)
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, _create_person
+
+
+class TestTrendsBatchQuery(ClickhouseTestMixin, APIBaseTest):
+    def _create_query_runner(
+        self,
+        series: list[EventsNode],
+        date_from: str = "2020-01-09",
+        date_to: Optional[str] = "2020-01-20",
+        interval: IntervalType = IntervalType.DAY,
+        trends_filter: Optional[TrendsFilter] = None,
+        breakdown_filter: Optional[BreakdownFilter] = None,
+    ) -> TrendsQueryRunner:
+        query = TrendsQuery(
+            dateRange=InsightDateRange(date_from=date_from, date_to=date_to),
+            interval=interval,
+            series=series,
+            trendsFilter=trends_filter,
+            breakdownFilter=breakdown_filter,
+        )
+        return TrendsQueryRunner(team=self.team, query=query)
+
+    def _create_events(self):
+        _create_person(team_id=self.team.pk, distinct_ids=["p1"], properties={})
+        for timestamp, event, browser in [
+            ("2020-01-11T12:00:00Z", "$pageview", "Chrome"),
+            ("2020-01-11T13:00:00Z", "$pageview", "Firefox"),
+            ("2020-01-12T12:00:00Z", "$pageleave", "Chrome"),
+            ("2020-01-15T12:00:00Z", "$pageview", "Chrome"),
+            ("2020-01-21T12:00:00Z", "$pageview", "Chrome"),
+        ]:
+            _create_event(
+                team=self.team,
+                event=event,
+                distinct_id="p1",
+                timestamp=timestamp,
+                properties={"$browser": browser},
+            )
+
+    def test_is_batchable(self):
+        assert is_batchable(self._create_query_runner([EventsNode(event="$pageview")]))
+        assert is_batchable(
+            self._create_query_runner(
+                [EventsNode(event="$pageview"), EventsNode(event="$pageleave")], interval=IntervalType.HOUR
+            )
+        )
+
+        assert not is_batchable(
+            self._create_query_runner([EventsNode(event="$pageview", math=BaseMathType.DAU)]),
+        )
+        assert not is_batchable(self._create_query_runner([EventsNode(event="$pageview")], interval=IntervalType.WEEK))
+        assert not is_batchable(
+            self._create_query_runner(
+                [EventsNode(event="$pageview")], breakdown_filter=BreakdownFilter(breakdown="$browser")
+            )
+        )
+        assert not is_batchable(
+            self._create_query_runner([EventsNode(event="$pageview")], trends_filter=TrendsFilter(formula="A*2"))
+        )
+        assert not is_batchable(
+            self._create_query_runner(
+                [EventsNode(event="$pageview")], trends_filter=TrendsFilter(display=ChartDisplayType.BOLD_NUMBER)
+            )
+        )
+
+    def test_batch_key(self):
+        runner = self._create_query_runner([EventsNode(event="$pageview")])
+
+        assert batch_key(runner) == batch_key(self._create_query_runner([EventsNode(event="$pageleave")]))
+        assert batch_key(runner) != batch_key(
+            self._create_query_runner([EventsNode(event="$pageview")], date_from="2020-01-10")
+        )
+        assert batch_key(runner) != batch_key(
+            self._create_query_runner([EventsNode(event="$pageview")], interval=IntervalType.HOUR)
+        )
+
+    def test_batch_results_match_separate_calculation(self):
+        self._create_events()
+
+        with freeze_time("2020-01-20T23:59:59Z"):
+            runners = [
+                self._create_query_runner([EventsNode(event="$pageview")]),
+                self._create_query_runner(
+                    [
+                        EventsNode(
+                            event="$pageview",
+                            properties=[
+                                EventPropertyFilter(key="$browser", value="Chrome", operator=PropertyOperator.EXACT)
+                            ],
+                        ),
+                        EventsNode(event="$pageleave"),
+                    ]
+                ),
+                self._create_query_runner([EventsNode(event=None)]),
+            ]
+            batched_responses = calculate_trends_batch(runners)
+            separate_responses = [runner.calculate() for runner in runners]
+
+        assert len(batched_responses) == 3
+        for batched_response, separate_response in zip(batched_responses, separate_responses):
+            assert len(batched_response.results) == len(separate_response.results)
+            for batched_series, separate_series in zip(batched_response.results, separate_response.results):
+                for key in ("data", "days", "labels", "count", "label", "action"):
+                    assert batched_series[key] == separate_series[key], key
+
+        assert batched_responses[0].results[0]["data"] == [0, 0, 2, 0, 0, 0, 1, 0, 0, 0, 0, 0]
+        assert batched_responses[1].results[0]["data"] == [0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0]
+        assert batched_responses[1].results[1]["data"] == [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0]
+        assert batched_responses[2].results[0]["count"] == 4
+
+    def test_batch_results_include_more_than_100_intervals(self):
+        _create_person(team_id=self.team.pk, distinct_ids=["p1"], properties={})
+        for timestamp in ["2020-01-11T00:30:00Z", "2020-01-15T12:30:00Z", "2020-01-20T23:30:00Z"]:
+            _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp=timestamp)
+
+        with freeze_time("2020-01-20T23:59:59Z"):
+            runner = self._create_query_runner(
+                [EventsNode(event="$pageview")], date_from="2020-01-11", interval=IntervalType.HOUR
+            )
+            [batched_response] = calculate_trends_batch([runner])
+            separate_response = runner.calculate()
+
+        data = batched_response.results[0]["data"]
+        assert len(data) == 240
+        assert data == separate_response.results[0]["data"]
+        assert [index for index, count in enumerate(data) if count] == [0, 108, 239]
+        assert batched_response.results[0]["count"] == 3
@@ -21,6 +21,7 @@ from posthog.hogql_queries.insights.trends.breakdown import (
     BREAKDOWN_NULL_STRING_LABEL,
     BREAKDOWN_OTHER_STRING_LABEL,
 )
+from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.hogql_queries.insights.trends.trends_query_runner import (
     BREAKDOWN_OTHER_DISPLAY,
     TrendsQueryRunner,
@@ -37,6 +38,7 @@ from posthog.schema import (
     BreakdownFilter,
     BreakdownItem,
     BreakdownType,
+    CachedTrendsQueryResponse,
     ChartDisplayType,
     CompareFilter,
     CompareItem,
@@ -4919,3 +4921,127 @@ class TestTrendsQueryRunner(ClickhouseTestMixin, APIBaseTest):
 
         assert len(response.results) == 1
         assert response.results[0]["data"] == [1.1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.1]
+
+    @override_settings(TRENDS_INCREMENTAL_CALCULATION_ENABLED=True)
+    def test_incremental_calculation_reuses_cached_intervals(self):
+        self._create_test_events()
+
+        with freeze_time("2020-01-15T13:00:00Z"):
+            response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS
+            )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.results[0]["data"] == [1, 0, 1, 3, 1, 0, 2]
+
+        # Arrives late for an interval that was already closed at the last refresh, so it's not picked up
+        _create_event(team=self.team, event="$pageview", distinct_id="p2", timestamp="2020-01-12T13:00:00Z")
+        flush_persons_and_events()
+
+        with freeze_time("2020-01-17T13:00:00Z"):
+            response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+            )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.results[0]["days"] == [
+                "2020-01-11",
+                "2020-01-12",
+                "2020-01-13",
+                "2020-01-14",
+                "2020-01-15",
+                "2020-01-16",
+                "2020-01-17",
+            ]
+            assert response.results[0]["data"] == [1, 3, 1, 0, 2, 0, 1]
+            assert response.results[0]["count"] == 8
+            assert response.hogql is not None
+            assert "2020-01-14 00:00:00" in response.hogql
+
+            # A forced refresh recalculates everything, late events included
+            response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS
+            )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.results[0]["data"] == [1, 4, 1, 0, 2, 0, 1]
+
+    @override_settings(TRENDS_INCREMENTAL_CALCULATION_ENABLED=True)
+    def test_incremental_calculation_on_async_refresh_of_stale_results(self):
+        self._create_test_events()
+
+        with freeze_time("2020-01-15T13:00:00Z"):
+            self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS
+            )
+
+        _create_event(team=self.team, event="$pageview", distinct_id="p2", timestamp="2020-01-12T13:00:00Z")
+        flush_persons_and_events()
+
+        with freeze_time("2020-01-17T13:00:00Z"):
+            # The stale results are returned right away, while the async query task refreshes them
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                    execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE
+                )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.query_status is not None
+            assert response.results[0]["data"] == [1, 0, 1, 3, 1, 0, 2]
+
+            response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.CACHE_ONLY_NEVER_CALCULATE
+            )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            # The late event is not picked up, so only the intervals since the last refresh were calculated
+            assert response.results[0]["data"] == [1, 3, 1, 0, 2, 0, 1]
+            assert response.hogql is not None
+            assert "2020-01-14 00:00:00" in response.hogql
+
+    @override_settings(TRENDS_INCREMENTAL_CALCULATION_ENABLED=True)
+    @patch(
+        "posthog.hogql_queries.insights.trends.trends_query_runner.FULL_CALCULATION_EVERY_N_INCREMENTAL_REFRESHES", 1
+    )
+    def test_incremental_calculation_recalculates_everything_periodically(self):
+        self._create_test_events()
+
+        with freeze_time("2020-01-15T13:00:00Z"):
+            self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS
+            )
+
+        _create_event(team=self.team, event="$pageview", distinct_id="p2", timestamp="2020-01-12T13:00:00Z")
+        flush_persons_and_events()
+
+        with freeze_time("2020-01-17T13:00:00Z"):
+            response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+            )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.results[0]["data"] == [1, 3, 1, 0, 2, 0, 1]
+
+        with freeze_time("2020-01-18T13:00:00Z"):
+            response = self._create_query_runner("-6d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+            )
+            assert isinstance(response, CachedTrendsQueryResponse)
+            assert response.results[0]["data"] == [4, 1, 0, 2, 0, 1, 0]
+
+    @override_settings(TRENDS_INCREMENTAL_CALCULATION_ENABLED=True)
+    def test_incremental_calculation_skips_cumulative_trends(self):
+        self._create_test_events()
+
+        with freeze_time("2020-01-15T13:00:00Z"):
+            self._create_query_runner(
+                "-6d",
+                None,
+                IntervalType.DAY,
+                None,
+                TrendsFilter(display=ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE),
+            ).run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+
+        with freeze_time("2020-01-17T13:00:00Z"):
+            runner = self._create_query_runner(
+                "-6d",
+                None,
+                IntervalType.DAY,
+                None,
+                TrendsFilter(display=ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE),
+            )
+            assert runner._get_incremental_calculation() is None
@@ -0,0 +1,138 @@
+from collections.abc import Hashable
+
+from posthog.hogql import ast
+from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS
+from posthog.hogql.printer import to_printed_hogql
+from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.timings import HogQLTimings
+from posthog.hogql_queries.insights.trends.trends_query_builder import TrendsQueryBuilder
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.schema import ActionsNode, EventsNode, HogQLQueryResponse, TrendsQueryResponse
+
+# Intervals whose buckets we can match to `QueryDateRange.all_values()` exactly, regardless of week start day
+BATCHABLE_INTERVALS = ("minute", "hour", "day")
+
+
+def is_batchable(runner: TrendsQueryRunner) -> bool:
+    """Whether all series of this trends query are plain event counts over time, calculable by `calculate_trends_batch`."""
+    query = runner.query
+    if runner._trends_display.is_total_value() or runner._trends_display.should_wrap_inner_query():
+        return False
+    if runner.breakdown_enabled or runner.query_date_range.interval_name not in BATCHABLE_INTERVALS:
+        return False
+    if query.compareFilter is not None and query.compareFilter.compare:
+        return False
+    if query.trendsFilter is not None and (
+        query.trendsFilter.formula
+        or (query.trendsFilter.smoothingIntervals is not None and query.trendsFilter.smoothingIntervals > 1)
+    ):
+        return False
+    if query.samplingFactor and query.samplingFactor != 1:
+        return False
+    return len(runner.series) > 0 and all(
+        isinstance(series.series, EventsNode | ActionsNode)
+        and series.series.math in (None, "total")
+        and series.overriden_query is None
+        for series in runner.series
+    )
+
+
+def batch_key(runner: TrendsQueryRunner) -> Hashable:
+    """Queries with the same batch key can be calculated together in one scan of the events table."""
+    return (
+        runner.team.pk,
+        runner.query_date_range.date_from_str,
+        runner.query_date_range.date_to_str,
+        runner.query_date_range.interval_name,
+        runner.modifiers.model_dump_json(exclude_none=True),
+        runner.limit_context,
+    )
+
+
+def calculate_trends_batch(runners: list[TrendsQueryRunner]) -> list[TrendsQueryResponse]:
+    """
+    Calculate several trends queries with the same batch key in a single query.
+
+    Each series becomes a `countIf` over the events matched by the union of all series filters,
+    and the per interval counts are then split back into a response for each query.
+    """
+    first_runner = runners[0]
+    query_date_range = first_runner.query_date_range
+    timings = HogQLTimings()
+
+    series_filters: list[ast.Expr] = []
+    with timings.measure("trends_batch_to_query"):
+        for runner in runners:
+            for series in runner.series:
+                series_filters.append(
+                    TrendsQueryBuilder(
+                        trends_query=runner.query,
+                        team=runner.team,
+                        query_date_range=runner.query_date_range,
+                        series=series.series,
+                        timings=timings,
+                        modifiers=runner.modifiers,
+                        limit_context=runner.limit_context,
+                    ).build_series_filter()
+                )
+
+        query = ast.SelectQuery(
+            select=[
+                ast.Alias(
+                    alias="day_start",
+                    expr=ast.Call(
+                        name=f"toStartOf{query_date_range.interval_name.title()}",
+                        args=[ast.Field(chain=["timestamp"])],
+                    ),
+                ),
+                *(
+                    ast.Alias(alias=f"total_{index}", expr=ast.Call(name="countIf", args=[series_filter]))
+                    for index, series_filter in enumerate(series_filters)
+                ),
+            ],
+            select_from=ast.JoinExpr(table=ast.Field(chain=["events"]), alias="e"),
+            where=ast.Or(exprs=series_filters) if len(series_filters) > 1 else series_filters[0],
+            group_by=[ast.Field(chain=["day_start"])],
+            order_by=[ast.OrderExpr(expr=ast.Field(chain=["day_start"]), order="ASC")],
+            # One row per interval, so get around the default 100 limit as the separate trends queries do
+            limit=ast.Constant(value=MAX_SELECT_RETURNED_ROWS),
+        )
+
+    response = execute_hogql_query(
+        query_type="TrendsBatchQuery",
+        query=query,
+        team=first_runner.team,
+        timings=timings,
+        modifiers=first_runner.modifiers,
+        limit_context=first_runner.limit_context,
+    )
+    with timings.measure("printing_hogql_for_response"):
+        response_hogql = to_printed_hogql(query, first_runner.team, first_runner.modifiers)
+
+    days_format = first_runner._days_format()
+    totals_by_day = {row[0].strftime(days_format): row[1:] for row in response.results}
+    dates = query_date_range.all_values()
+
+    responses: list[TrendsQueryResponse] = []
+    series_index = 0
+    for runner in runners:
+        results = []
+        for series in runner.series:
+            totals = [totals_by_day.get(date.strftime(days_format), [0] * len(series_filters)) for date in dates]
+            series_response = HogQLQueryResponse(
+                columns=["date", "total"],
+                results=[[dates, [day_totals[series_index] for day_totals in totals]]],
+            )
+            results.extend(runner.build_series_response(series_response, series, len(runner.series)))
+            series_index += 1
+
+        responses.append(
+            TrendsQueryResponse(
+                results=results,
+                hasMore=False,
+                timings=response.timings,
+                hogql=response_hogql,
+                modifiers=runner.modifiers,
+            )
+        )
+    return responses
@@ -71,6 +71,10 @@ class TrendsQueryBuilder(DataWarehouseInsightQueryMixin):
         inner_select = self._inner_select_query(inner_query=events_query, breakdown=breakdown)
         return self._outer_select_query(inner_query=inner_select, breakdown=breakdown)
 
+    def build_series_filter(self) -> ast.Expr:
+        """Filter matching the events counted in this series, to batch it with series of other queries."""
+        return self._events_filter(is_actors_query=False, breakdown=None, ignore_breakdowns=True)
+
     def _get_wrapper_query(
         self, events_query: ast.SelectQuery, breakdown: Breakdown
     ) -> ast.SelectQuery | ast.SelectSetQuery:
@@ -9,6 +9,7 @@ from django.conf import settings
 from django.utils.timezone import datetime
 from natsort import natsorted, ns
 
+from posthog.caching.utils import last_refresh_from_cached_result
 from posthog.caching.insights_api import (
     BASE_MINIMUM_INSIGHT_REFRESH_INTERVAL,
     REAL_TIME_INSIGHT_REFRESH_INTERVAL,
@@ -31,10 +32,12 @@ from posthog.hogql_queries.insights.trends.display import TrendsDisplay
 from posthog.hogql_queries.insights.trends.series_with_extras import SeriesWithExtras
 from posthog.hogql_queries.insights.trends.trends_actors_query_builder import TrendsActorsQueryBuilder
 from posthog.hogql_queries.insights.trends.trends_query_builder import TrendsQueryBuilder
+from posthog.hogql_queries.query_cache import QueryCacheManager
 from posthog.hogql_queries.query_runner import QueryRunner
 from posthog.hogql_queries.utils.formula_ast import FormulaAST
 from posthog.hogql_queries.utils.query_compare_to_date_range import QueryCompareToDateRange
 from posthog.hogql_queries.utils.query_date_range import QueryDateRange
+from posthog.hogql_queries.utils.query_incremental_date_range import QueryIncrementalDateRange
 from posthog.hogql_queries.utils.query_previous_period_date_range import (
     QueryPreviousPeriodDateRange,
 )
@@ -72,6 +75,11 @@ from posthog.schema import (
 from posthog.utils import format_label_date, multisort
 from posthog.warehouse.models.util import get_view_or_table_by_name
 
+# Intervals before the one containing the last refresh that are recalculated anyway, to pick up late arriving events
+INCREMENTAL_CALCULATION_LOOKBACK_INTERVALS = 1
+# Incremental refreshes in a row after which everything is recalculated, to pick up events that arrived even later
+FULL_CALCULATION_EVERY_N_INCREMENTAL_REFRESHES = 24
+
 
 class TrendsQueryRunner(QueryRunner):
     query: TrendsQuery
@@ -113,12 +121,14 @@ class TrendsQueryRunner(QueryRunner):
     def to_query(self) -> ast.SelectSetQuery:
         return ast.SelectSetQuery.create_from_queries(self.to_queries(), "UNION ALL")
 
-    def to_queries(self) -> list[ast.SelectQuery | ast.SelectSetQuery]:
+    def to_queries(
+        self, current_query_date_range: Optional[QueryDateRange] = None
+    ) -> list[ast.SelectQuery | ast.SelectSetQuery]:
         queries = []
         with self.timings.measure("trends_to_query"):
             for series in self.series:
                 if not series.is_previous_period_series:
-                    query_date_range = self.query_date_range
+                    query_date_range = current_query_date_range or self.query_date_range
                 else:
                     query_date_range = self.query_previous_date_range
 
@@ -292,7 +302,12 @@ class TrendsQueryRunner(QueryRunner):
         )
 
     def calculate(self):
-        queries = self.to_queries()
+        incremental_calculation = self._get_incremental_calculation()
+        if incremental_calculation is not None:
+            incremental_date_range, cached_results = incremental_calculation
+            queries = self.to_queries(current_query_date_range=incremental_date_range)
+        else:
+            queries = self.to_queries()
 
         if len(queries) == 0:
             response_hogql = ""
@@ -333,6 +348,12 @@ class TrendsQueryRunner(QueryRunner):
                 )
 
                 timings_matrix[index + 1] = response.timings
+                if incremental_calculation is not None:
+                    response = self._merge_cached_intervals(
+                        response,
+                        cached_result=cached_results[series_with_extra.series_order],
+                        date_from=incremental_date_range.date_from(),
+                    )
                 res_matrix[index] = self.build_series_response(response, series_with_extra, len(queries))
                 if response.error:
                     debug_errors.append(response.error)
@@ -429,6 +450,116 @@ class TrendsQueryRunner(QueryRunner):
             error=". ".join(debug_errors),
         )
 
+    def _is_incremental_calculation_supported(self) -> bool:
+        """Only plain time series can be merged from separately calculated intervals."""
+        if self._trends_display.is_total_value() or self._trends_display.should_wrap_inner_query():
+            return False
+        if self.breakdown_enabled:
+            # The top breakdown values, and so what ends up as "Other", depend on the whole date range
+            return False
+        if self.query.compareFilter is not None and self.query.compareFilter.compare:
+            return False
+        if self.query.trendsFilter is not None and (
+            self.query.trendsFilter.formula
+            or (
+                self.query.trendsFilter.smoothingIntervals is not None
+                and self.query.trendsFilter.smoothingIntervals > 1
+            )
+        ):
+            return False
+        if self.query.samplingFactor and self.query.samplingFactor != 1:
+            return False
+        # Active users and first time math look at events outside of the interval they're counted in
+        return not any(
+            series.series.math in ("weekly_active", "monthly_active", "first_time_for_user") for series in self.series
+        )
+
+    def _get_incremental_calculation(self) -> Optional[tuple[QueryIncrementalDateRange, dict[int, dict[str, Any]]]]:
+        """
+        If a previous calculation of this query is cached, the date range that still needs calculating,
+        along with the cached result of each series keyed by series order.
+        """
+        if (
+            not settings.TRENDS_INCREMENTAL_CALCULATION_ENABLED
+            or self.is_refresh_forced
+            or not self._is_incremental_calculation_supported()
+        ):
+            return None
+
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=self.get_cache_key())
+        cached_response = cache_manager.get_cache_data()
+        if not self.is_cached_response(cached_response):
+            return None
+        last_refresh = last_refresh_from_cached_result(cached_response)
+        if last_refresh is None:
+            return None
+
+        incremental_date_range = QueryIncrementalDateRange(
+            date_range=self.query.dateRange,
+            team=self.team,
+            interval=self.query_date_range.interval_type,
+            now=self.query_date_range.now_with_timezone,
+            date_from=last_refresh
+            - self.query_date_range.interval_relativedelta() * INCREMENTAL_CALCULATION_LOOKBACK_INTERVALS,
+        )
+        if not (
+            self.query_date_range.align_with_interval(self.query_date_range.date_from())
+            < incremental_date_range.date_from()
+            <= self.query_date_range.date_to()
+        ):
+            return None
+
+        cached_days = self._days_before(incremental_date_range.date_from())
+        cached_results: dict[int, dict[str, Any]] = {}
+        for result in cached_response.get("results") or []:
+            order = result.get("action", {}).get("order")
+            if order is None or order in cached_results or not set(cached_days).issubset(result.get("days", [])):
+                return None
+            cached_results[order] = result
+        if set(cached_results.keys()) != {series.series_order for series in self.series}:
+            return None
+
+        if cache_manager.count_incremental_refresh() > FULL_CALCULATION_EVERY_N_INCREMENTAL_REFRESHES:
+            cache_manager.reset_incremental_refreshes()
+            return None
+
+        return incremental_date_range, cached_results
+
+    def _days_format(self) -> str:
+        return "%Y-%m-%d{}".format(" %H:%M:%S" if self.query_date_range.interval_name in ("hour", "minute") else "")
+
+    def _days_before(self, date_from: datetime) -> list[str]:
+        days_format = self._days_format()
+        return [
+            day
+            for day in (date.strftime(days_format) for date in self.query_date_range.all_values())
+            if day < date_from.strftime(days_format)
+        ]
+
+    def _merge_cached_intervals(
+        self, response: HogQLQueryResponse, cached_result: dict[str, Any], date_from: datetime
+    ) -> HogQLQueryResponse:
+        """Prepend the cached totals of the intervals before `date_from` to the freshly calculated ones."""
+        days_format = self._days_format()
+        cached_data = dict(zip(cached_result["days"], cached_result["data"]))
+        cached_dates = [
+            date
+            for date in self.query_date_range.all_values()
+            if date.strftime(days_format) < date_from.strftime(days_format)
+        ]
+
+        assert response.columns is not None
+        date_index, total_index = response.columns.index("date"), response.columns.index("total")
+        results = []
+        for row in response.results:
+            merged_row = list(row)
+            merged_row[date_index] = cached_dates + list(row[date_index])
+            merged_row[total_index] = [cached_data[date.strftime(days_format)] for date in cached_dates] + list(
+                row[total_index]
+            )
+            results.append(merged_row)
+        return response.model_copy(update={"results": results})
+
     def build_series_response(self, response: HogQLQueryResponse, series: SeriesWithExtras, series_count: int):
         def get_value(name: str, val: Any):
             if name not in ["date", "total", "breakdown_value"]:
@@ -1,15 +1,35 @@
 from datetime import datetime, UTC
 from typing import Optional
+from uuid import uuid4
 
+import structlog
+import zstd
 from django.conf import settings
 from django.core.cache import cache
+from prometheus_client import Counter
+from redis.lock import Lock
 
 from posthog import redis
 from posthog.cache_utils import OrjsonJsonSerializer
 from posthog.utils import get_safe_cache
 
+logger = structlog.get_logger(__name__)
+
+QUERY_CACHE_CHUNKED_READ_COUNTER = Counter(
+    "posthog_query_cache_chunked_read_total",
+    "Reads of cached query results that were stored in compressed chunks.",
+    labelnames=["result"],
+)
+
+# Marks a cached value whose results are stored separately, in zstd compressed chunks
+CHUNKED_FORMAT_KEY = "__chunked_results"
+
 
 class QueryCacheManager:
+    CALCULATION_LOCK_KEY_PREFIX = "query_calculation_lock"
+    RESULTS_CHUNK_KEY_PREFIX = "query_cache_results_chunk"
+    INCREMENTAL_REFRESHES_KEY_PREFIX = "query_cache_incremental_refreshes"
+
     def __init__(
         self,
         *,
@@ -28,6 +48,37 @@ class QueryCacheManager:
     def identifier(self):
         return f"{self.insight_id}:{self.dashboard_id or ''}"
 
+    def calculation_lock(self) -> Lock:
+        """
+        Single-flight lock for calculating the results of this cache key.
+
+        Whoever holds the lock is calculating the query and will write the result to the cache, so concurrent callers
+        with the same cache key can wait for the lock to be released and read the cache instead of hitting ClickHouse
+        with the exact same query. The lock expires on its own, so a crashed worker can't block others indefinitely.
+        """
+        return self.redis_client.lock(
+            f"{self.CALCULATION_LOCK_KEY_PREFIX}:{self.cache_key}",
+            timeout=settings.QUERY_CALCULATION_LOCK_TIMEOUT_SECONDS,
+        )
+
+    def is_calculation_in_progress(self) -> bool:
+        return self.calculation_lock().locked()
+
+    @property
+    def incremental_refreshes_key(self) -> str:
+        return f"{self.INCREMENTAL_REFRESHES_KEY_PREFIX}:{self.cache_key}"
+
+    def count_incremental_refresh(self) -> int:
+        """Count a refresh that builds on the cached results, returning how many of them happened in a row."""
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.incr(self.incremental_refreshes_key)
+        pipeline.expire(self.incremental_refreshes_key, settings.CACHED_RESULTS_TTL)
+        incremental_refreshes, _ = pipeline.execute()
+        return incremental_refreshes
+
+    def reset_incremental_refreshes(self) -> None:
+        self.redis_client.delete(self.incremental_refreshes_key)
+
     @staticmethod
     def get_stale_insights(*, team_id: int, limit: Optional[int] = None) -> list[str]:
         """
@@ -82,17 +133,90 @@ class QueryCacheManager:
         self.redis_client.zrem(f"cache_timestamps:{self.team_id}", self.identifier)
 
     def set_cache_data(self, *, response: dict, target_age: Optional[datetime]) -> None:
-        fresh_response_serialized = OrjsonJsonSerializer({}).dumps(response)
-        cache.set(self.cache_key, fresh_response_serialized, settings.CACHED_RESULTS_TTL)
+        previous_chunk_keys = self._get_chunk_keys(self.get_cache_metadata())
+
+        serializer = OrjsonJsonSerializer({})
+        results_serialized = serializer.dumps(response.get("results"))
+        if len(results_serialized) <= settings.QUERY_CACHE_CHUNKING_THRESHOLD_BYTES:
+            cache.set(self.cache_key, serializer.dumps(response), settings.CACHED_RESULTS_TTL)
+        else:
+            self._set_chunked_cache_data(response=response, results_serialized=results_serialized)
+
+        if previous_chunk_keys:
+            # Nothing points to the overwritten chunks anymore, readers that still do will just see a cache miss
+            self.redis_client.delete(*previous_chunk_keys)
 
         if target_age:
             self.update_target_age(target_age)
         else:
             self.remove_last_refresh()
 
-    def get_cache_data(self) -> Optional[dict]:
+    def _set_chunked_cache_data(self, *, response: dict, results_serialized: bytes) -> None:
+        """
+        Store large results as zstd compressed chunks next to a small value holding the rest of the response.
+
+        Chunks are written to Redis directly, as the Django cache would try to compress them again.
+        Chunk keys are unique to each write, so a reader can never mix up chunks of two different calculations.
+        Chunks of overwritten results are deleted by `set_cache_data`.
+        """
+        results_compressed = zstd.compress(results_serialized)
+        chunk_size = settings.QUERY_CACHE_CHUNK_SIZE_BYTES
+        chunks_key = f"{self.RESULTS_CHUNK_KEY_PREFIX}:{self.cache_key}:{uuid4().hex}"
+        chunks = [
+            results_compressed[offset : offset + chunk_size] for offset in range(0, len(results_compressed), chunk_size)
+        ]
+        # Chunks go first, so that the metadata never points to missing results
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for index, chunk in enumerate(chunks):
+            pipeline.set(f"{chunks_key}:{index}", chunk, ex=settings.CACHED_RESULTS_TTL)
+        pipeline.execute()
+
+        metadata = {key: value for key, value in response.items() if key != "results"}
+        metadata[CHUNKED_FORMAT_KEY] = {"key": chunks_key, "chunks": len(chunks)}
+        cache.set(self.cache_key, OrjsonJsonSerializer({}).dumps(metadata), settings.CACHED_RESULTS_TTL)
+
+    def get_cache_metadata(self) -> Optional[dict]:
+        """
+        Cached response, without downloading `results` if they're stored in chunks.
+
+        Enough to decide if the cached response is fresh. Small responses are stored in one piece,
+        so for them this returns the full response including `results`.
+        """
         cached_response_bytes: Optional[bytes] = get_safe_cache(self.cache_key)
         if not cached_response_bytes:
             return None
 
         return OrjsonJsonSerializer({}).loads(cached_response_bytes)
+
+    def get_cache_data(self, metadata: Optional[dict] = None) -> Optional[dict]:
+        """Full cached response. Pass in the output of `get_cache_metadata` to avoid reading it again."""
+        cached_response = metadata if metadata is not None else self.get_cache_metadata()
+        if not isinstance(cached_response, dict) or CHUNKED_FORMAT_KEY not in cached_response:
+            return cached_response
+
+        chunk_keys = self._get_chunk_keys(cached_response)
+        cached_response = dict(cached_response)
+        cached_response.pop(CHUNKED_FORMAT_KEY)
+        try:
+            chunks: list[Optional[bytes]] = self.redis_client.mget(chunk_keys)
+        except Exception as e:
+            logger.warning("Failed to read cached query result chunks", cache_key=self.cache_key, error=str(e))
+            QUERY_CACHE_CHUNKED_READ_COUNTER.labels(result="error").inc()
+            return None
+        present_chunks = [chunk for chunk in chunks if chunk is not None]
+        if len(present_chunks) < len(chunks):
+            # Some chunks were evicted, which makes the whole response a cache miss
+            QUERY_CACHE_CHUNKED_READ_COUNTER.labels(result="missing_chunks").inc()
+            return None
+
+        results_compressed = b"".join(present_chunks)
+        cached_response["results"] = OrjsonJsonSerializer({}).loads(zstd.decompress(results_compressed))
+        QUERY_CACHE_CHUNKED_READ_COUNTER.labels(result="success").inc()
+        return cached_response
+
+    @staticmethod
+    def _get_chunk_keys(cached_response: Optional[dict]) -> list[str]:
+        if not isinstance(cached_response, dict) or CHUNKED_FORMAT_KEY not in cached_response:
+            return []
+        chunked_format = cached_response[CHUNKED_FORMAT_KEY]
+        return [f"{chunked_format['key']}:{index}" for index in range(chunked_format["chunks"])]
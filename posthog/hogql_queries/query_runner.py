@@ -4,12 +4,16 @@ from enum import StrEnum
 from typing import Any, Generic, Optional, TypeGuard, TypeVar, Union, cast
 
 import structlog
+from django.conf import settings
 from prometheus_client import Counter
 from pydantic import BaseModel, ConfigDict
+from redis.exceptions import LockError
+from redis.lock import Lock
 from sentry_sdk import capture_exception, get_traceparent, push_scope, set_tag
 
 from posthog.caching.utils import ThresholdMode, cache_target_age, is_stale, last_refresh_from_cached_result
 from posthog.clickhouse.client.execute_async import QueryNotFoundError, enqueue_process_query_task, get_query_status
+from posthog.clickhouse.client.query_scheduler import QueryLane
 from posthog.clickhouse.query_tagging import get_query_tag_value, tag_queries
 from posthog.hogql import ast
 from posthog.hogql.constants import LimitContext
@@ -77,6 +81,12 @@ QUERY_CACHE_HIT_COUNTER = Counter(
     labelnames=[LABEL_TEAM_ID, "cache_hit", "trigger"],
 )
 
+QUERY_CALCULATION_SINGLE_FLIGHT_COUNTER = Counter(
+    "posthog_query_calculation_single_flight_total",
+    "When a query calculation found the same query already being calculated, and how waiting for it ended.",
+    labelnames=[LABEL_TEAM_ID, "outcome"],
+)
+
 EXTENDED_CACHE_AGE = timedelta(days=1)
 
 
@@ -472,6 +482,7 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     timings: HogQLTimings
     modifiers: HogQLQueryModifiers
     limit_context: LimitContext
+    is_refresh_forced: bool
 
     def __init__(
         self,
@@ -488,6 +499,8 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         _modifiers = modifiers or (query.modifiers if hasattr(query, "modifiers") else None)
         self.modifiers = create_default_modifiers_for_team(team, _modifiers)
         self.query_id = query_id
+        # Set by `run`, a forced refresh must recalculate everything instead of building on cached results
+        self.is_refresh_forced = False
 
         if not self.is_query_node(query):
             query = self.query_type.model_validate(query)
@@ -526,8 +539,15 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         *,
         cache_manager: QueryCacheManager,
         refresh_requested: bool = False,
+        is_refresh_forced: bool = False,
         user: Optional[User] = None,
     ) -> QueryStatus:
+        in_flight_query_status = self.get_async_query_status(cache_key=cache_manager.cache_key)
+        if in_flight_query_status is not None and self._is_in_flight(in_flight_query_status):
+            # This exact query is already queued or running, its result will land in the cache - don't enqueue it again
+            QUERY_CALCULATION_SINGLE_FLIGHT_COUNTER.labels(team_id=self.team.pk, outcome="enqueue_deduplicated").inc()
+            return in_flight_query_status
+
         return enqueue_process_query_task(
             team=self.team,
             user_id=user.id if user else None,
@@ -536,6 +556,8 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             query_json=self.query.model_dump(),
             query_id=self.query_id or cache_manager.cache_key,  # Use cache key as query ID to avoid duplicates
             refresh_requested=refresh_requested,
+            is_refresh_forced=is_refresh_forced,
+            lane=QueryLane.DASHBOARD if cache_manager.dashboard_id is not None else QueryLane.INTERACTIVE,
         )
 
     def get_async_query_status(self, *, cache_key: str) -> Optional[QueryStatus]:
@@ -548,6 +570,32 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         except QueryNotFoundError:
             return None
 
+    def _is_in_flight(self, query_status: QueryStatus) -> bool:
+        # A status that outlived the calculation lock belongs to a task that died without reporting back
+        if query_status.start_time is None:
+            return False
+        lock_timeout = timedelta(seconds=settings.QUERY_CALCULATION_LOCK_TIMEOUT_SECONDS)
+        return query_status.start_time + lock_timeout > datetime.now(UTC)
+
+    def _get_fresh_cached_response(
+        self, cache_manager: QueryCacheManager, refreshed_after: Optional[datetime] = None
+    ) -> Optional[CR]:
+        cached_metadata = cache_manager.get_cache_metadata()
+        if not self.is_cached_response(cached_metadata):
+            return None
+        last_refresh = last_refresh_from_cached_result(cached_metadata)
+        if self._is_stale(last_refresh=last_refresh):
+            return None
+        if refreshed_after is not None and (last_refresh is None or last_refresh <= refreshed_after):
+            return None
+
+        cached_response_candidate = cache_manager.get_cache_data(cached_metadata)
+        if not self.is_cached_response(cached_response_candidate):
+            return None
+
+        cached_response_candidate["is_cached"] = True
+        return self.cached_response_type(**cached_response_candidate)
+
     def count_query_cache_hit(self, hit: str, trigger: str = "") -> None:
         if (get_query_tag_value("trigger") or "").startswith("warming"):
             # We don't want to count for cache hits caused by warming itself
@@ -559,7 +607,18 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     ) -> Optional[CR | CacheMissResponse]:
         CachedResponse: type[CR] = self.cached_response_type
         cached_response: CR | CacheMissResponse
-        cached_response_candidate = cache_manager.get_cache_data()
+        cached_metadata = cache_manager.get_cache_metadata()
+
+        if (
+            execution_mode == ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+            and self.is_cached_response(cached_metadata)
+            and self._is_stale(last_refresh=last_refresh_from_cached_result(cached_metadata))
+        ):
+            # We're going to recalculate anyway, so there's no point in downloading the stale results
+            self.count_query_cache_hit(hit="stale", trigger=cached_metadata.get("calculation_trigger") or "")
+            return None
+
+        cached_response_candidate = cache_manager.get_cache_data(cached_metadata)
 
         if self.is_cached_response(cached_response_candidate):
             cached_response_candidate["is_cached"] = True
@@ -633,6 +692,7 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         query_id: Optional[str] = None,
         insight_id: Optional[int] = None,
         dashboard_id: Optional[int] = None,
+        is_refresh_forced: Optional[bool] = None,
     ) -> CR | CacheMissResponse | QueryStatusResponse:
         cache_key = self.get_cache_key()
 
@@ -648,7 +708,12 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             set_tag("dashboard_id", str(dashboard_id))
 
         self.query_id = query_id or self.query_id
-        CachedResponse: type[CR] = self.cached_response_type
+        # The async query task always calculates, but only refreshes the user asked for are forced
+        self.is_refresh_forced = (
+            is_refresh_forced
+            if is_refresh_forced is not None
+            else execution_mode in (ExecutionMode.CALCULATE_BLOCKING_ALWAYS, ExecutionMode.CALCULATE_ASYNC_ALWAYS)
+        )
         cache_manager = QueryCacheManager(
             team_id=self.team.pk,
             cache_key=cache_key,
@@ -660,7 +725,7 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             # We should always kick off async calculation and disregard the cache
             return QueryStatusResponse(
                 query_status=self.enqueue_async_calculation(
-                    refresh_requested=True, cache_manager=cache_manager, user=user
+                    refresh_requested=True, is_refresh_forced=True, cache_manager=cache_manager, user=user
                 )
             )
         elif execution_mode != ExecutionMode.CALCULATE_BLOCKING_ALWAYS:
@@ -671,8 +736,50 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             if results is not None:
                 return results
 
+        if self.limit_context == LimitContext.EXPORT:
+            # Exports don't write to the cache, so there would be no result to wait for
+            return self._calculate_and_cache(cache_manager=cache_manager, user=user)
+
+        # Single-flight: only one caller calculates a given cache key at a time, the others wait for its result
+        calculation_lock = cache_manager.calculation_lock()
+        holds_calculation_lock = calculation_lock.acquire(blocking=False)
+        if not holds_calculation_lock:
+            # Whatever is cached before waiting is the result we're here to replace, only a newer one will do
+            refreshed_after = last_refresh_from_cached_result(cache_manager.get_cache_metadata() or {})
+            holds_calculation_lock = calculation_lock.acquire(
+                blocking=True, blocking_timeout=settings.QUERY_CALCULATION_LOCK_WAIT_SECONDS
+            )
+            if not holds_calculation_lock:
+                # Waited long enough, calculate on our own rather than failing the request
+                QUERY_CALCULATION_SINGLE_FLIGHT_COUNTER.labels(team_id=self.team.pk, outcome="timeout").inc()
+            elif (
+                not self.is_refresh_forced
+                and (fresh_cached_response := self._get_fresh_cached_response(cache_manager, refreshed_after))
+                is not None
+            ):
+                self._release_calculation_lock(calculation_lock)
+                QUERY_CALCULATION_SINGLE_FLIGHT_COUNTER.labels(team_id=self.team.pk, outcome="reused").inc()
+                return fresh_cached_response
+            else:
+                # Whoever held the lock didn't leave a newer usable result (e.g. the query failed),
+                # or the refresh was forced and must not be answered by a calculation started before it
+                QUERY_CALCULATION_SINGLE_FLIGHT_COUNTER.labels(team_id=self.team.pk, outcome="no_result").inc()
+
+        try:
+            return self._calculate_and_cache(cache_manager=cache_manager, user=user)
+        finally:
+            if holds_calculation_lock:
+                self._release_calculation_lock(calculation_lock)
+
+    def _release_calculation_lock(self, calculation_lock: Lock) -> None:
+        try:
+            calculation_lock.release()
+        except LockError:
+            # The lock expired while calculating, someone else may hold it by now
+            logger.warning("Query calculation lock expired before release", team_id=self.team.pk)
+
+    def _calculate_and_cache(self, *, cache_manager: QueryCacheManager, user: Optional[User]) -> CR:
         last_refresh = datetime.now(UTC)
-        target_age = self.cache_target_age(last_refresh=last_refresh)
 
         # Avoid affecting cache key
         # Add user based modifiers here, primarily for user specific feature flagging
@@ -680,8 +787,16 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             self.modifiers = create_default_modifiers_for_user(user, self.team, self.modifiers)
             self.modifiers.useMaterializedViews = True
 
+        return self.cache_calculated_response(self.calculate(), cache_manager=cache_manager, last_refresh=last_refresh)
+
+    def cache_calculated_response(self, response: R, *, cache_manager: QueryCacheManager, last_refresh: datetime) -> CR:
+        """Cache a response calculated for this query, whether by `calculate` or as part of a batch of queries."""
+        cache_key = cache_manager.cache_key
+        CachedResponse: type[CR] = self.cached_response_type
+        target_age = self.cache_target_age(last_refresh=last_refresh)
+
         fresh_response_dict = {
-            **self.calculate().model_dump(),
+            **response.model_dump(),
             "is_cached": False,
             "last_refresh": last_refresh,
             "next_allowed_client_refresh": last_refresh + self._refresh_frequency(),
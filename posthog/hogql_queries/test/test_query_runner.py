@@ -1,12 +1,16 @@
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Any, Literal, Optional
 from unittest import mock
 from zoneinfo import ZoneInfo
 
 from django.core.cache import cache
+from django.test import override_settings
 from freezegun import freeze_time
 from pydantic import BaseModel
 
+from posthog.hogql_queries.query_cache import QueryCacheManager
 from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
 from posthog.models.team.team import Team
 from posthog.schema import (
@@ -248,6 +252,167 @@ class TestQueryRunner(BaseTest):
             self.assertEqual(response.last_refresh.isoformat(), "2023-02-04T13:37:42+00:00")
             mock_on_commit.assert_called_once()
 
+    def _calculate_elsewhere(self, runner: QueryRunner) -> threading.Thread:
+        """Someone else calculates the same query, caching their result shortly before releasing the lock."""
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+        other_lock = cache_manager.calculation_lock()
+        other_lock_acquired = threading.Event()
+
+        def calculate_elsewhere():
+            with other_lock:
+                other_lock_acquired.set()
+                time.sleep(0.2)
+                runner.cache_calculated_response(
+                    runner.calculate(), cache_manager=cache_manager, last_refresh=datetime.now(tz=ZoneInfo("UTC"))
+                )
+
+        other_calculation = threading.Thread(target=calculate_elsewhere)
+        other_calculation.start()
+        other_lock_acquired.wait()
+        return other_calculation
+
+    def test_waits_for_concurrent_calculation_of_same_query(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        other_calculation = self._calculate_elsewhere(TestQueryRunner(query={"some_attr": "bla"}, team=self.team))
+
+        with mock.patch.object(runner, "calculate") as mock_calculate:
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+        other_calculation.join()
+
+        mock_calculate.assert_not_called()
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+
+    def test_forced_refresh_does_not_reuse_concurrent_calculation(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+        other_calculation = self._calculate_elsewhere(TestQueryRunner(query={"some_attr": "bla"}, team=self.team))
+
+        response = runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        other_calculation.join()
+
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, False)
+
+    @override_settings(QUERY_CALCULATION_LOCK_WAIT_SECONDS=0.2)
+    def test_calculates_if_concurrent_calculation_takes_too_long(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+
+        other_lock = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key()).calculation_lock()
+        self.assertTrue(other_lock.acquire(blocking=False))
+
+        response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, False)
+        # We never held the lock, so the other calculation still does
+        self.assertTrue(other_lock.owned())
+        other_lock.release()
+
+    def test_releases_calculation_lock_after_calculating(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+
+        with mock.patch.object(runner, "calculate", side_effect=ValueError("Query failed")):
+            with self.assertRaises(ValueError):
+                runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        self.assertFalse(cache_manager.is_calculation_in_progress())
+
+        runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        self.assertFalse(cache_manager.is_calculation_in_progress())
+
+    @mock.patch("django.db.transaction.on_commit")
+    def test_enqueue_async_calculation_deduplicates_in_flight_queries(self, mock_on_commit):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            first_response = runner.run(execution_mode=ExecutionMode.CALCULATE_ASYNC_ALWAYS)
+            second_response = runner.run(execution_mode=ExecutionMode.CALCULATE_ASYNC_ALWAYS)
+
+        mock_on_commit.assert_called_once()
+        self.assertEqual(first_response.query_status.id, second_response.query_status.id)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37 + 15, 42)):
+            # The first task seemingly died, so let's enqueue again
+            with override_settings(QUERY_CALCULATION_LOCK_TIMEOUT_SECONDS=60):
+                runner.run(execution_mode=ExecutionMode.CALCULATE_ASYNC_ALWAYS)
+
+        self.assertEqual(mock_on_commit.call_count, 2)
+
+    @override_settings(QUERY_CACHE_CHUNKING_THRESHOLD_BYTES=10, QUERY_CACHE_CHUNK_SIZE_BYTES=16)
+    def test_cache_response_with_chunked_results(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            fresh_response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+            metadata = cache_manager.get_cache_metadata()
+            assert metadata is not None
+            self.assertNotIn("results", metadata)
+            self.assertEqual(metadata["last_refresh"], "2023-02-04T13:37:42Z")
+            self.assertGreater(metadata["__chunked_results"]["chunks"], 1)
+
+            cached_response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+            self.assertEqual(cached_response.is_cached, True)
+            self.assertEqual(cached_response.results, [["row", 1, 2, 3], list(range(10))])
+            self.assertEqual(cached_response.last_refresh, fresh_response.last_refresh)
+
+            # Losing any chunk makes it a cache miss
+            cache_manager.redis_client.delete(f"{metadata['__chunked_results']['key']}:0")
+            self.assertIsNone(cache_manager.get_cache_data())
+            response = runner.run(execution_mode=ExecutionMode.CACHE_ONLY_NEVER_CALCULATE)
+            self.assertIsInstance(response, CacheMissResponse)
+
+    @override_settings(QUERY_CACHE_CHUNKING_THRESHOLD_BYTES=10, QUERY_CACHE_CHUNK_SIZE_BYTES=16)
+    def test_overwriting_chunked_results_deletes_previous_chunks(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+
+        runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        first_metadata = cache_manager.get_cache_metadata()
+        assert first_metadata is not None
+        first_chunks_key = first_metadata["__chunked_results"]["key"]
+
+        runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        second_metadata = cache_manager.get_cache_metadata()
+        assert second_metadata is not None
+
+        self.assertNotEqual(second_metadata["__chunked_results"]["key"], first_chunks_key)
+        self.assertEqual(cache_manager.redis_client.keys(f"{first_chunks_key}:*"), [])
+        cached_data = cache_manager.get_cache_data()
+        assert cached_data is not None
+        self.assertEqual(cached_data["results"], [["row", 1, 2, 3], list(range(10))])
+
+    def test_stale_cache_results_are_not_read_when_recalculating(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37 + 11, 42)):
+            with mock.patch.object(QueryCacheManager, "get_cache_data") as get_cache_data:
+                response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+            get_cache_data.assert_not_called()
+            self.assertEqual(response.is_cached, False)
+
     def test_modifier_passthrough(self):
         try:
             from ee.clickhouse.materialized_columns.analyze import materialize
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
+from posthog.hogql_queries.utils.query_date_range import QueryDateRange
+from posthog.models.team import Team
+from posthog.schema import DateRange, InsightDateRange, IntervalType
+
+
+class QueryIncrementalDateRange(QueryDateRange):
+    """The tail end of a date range, starting at the beginning of the interval containing `date_from`."""
+
+    _team: Team
+    _date_range: Optional[InsightDateRange | DateRange]
+    _interval: Optional[IntervalType]
+    _now_without_timezone: datetime
+    _incremental_date_from: datetime
+
+    def __init__(
+        self,
+        date_range: Optional[InsightDateRange | DateRange],
+        team: Team,
+        interval: Optional[IntervalType],
+        now: datetime,
+        date_from: datetime,
+    ) -> None:
+        super().__init__(date_range, team, interval, now)
+        self._incremental_date_from = self.align_with_interval(date_from.astimezone(self._team.timezone_info))
+
+    def date_from(self) -> datetime:
+        return self._incremental_date_from
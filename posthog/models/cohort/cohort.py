@@ -1,11 +1,13 @@
 import time
+from collections.abc import Iterable, Iterator
 from datetime import datetime
+from itertools import islice
 from typing import Any, Literal, Optional, Union, cast
 
 import structlog
 from django.conf import settings
 from django.db import connection, models
-from django.db.models import Case, Q, When
+from django.db.models import Case, Q, QuerySet, When
 from django.db.models.expressions import F
 from django.utils import timezone
 from sentry_sdk import capture_exception
@@ -199,9 +201,10 @@ class Cohort(models.Model):
             "deleted": self.deleted,
         }
 
-    def calculate_people_ch(self, pending_version: int, *, initiating_user_id: Optional[int] = None):
+    def calculate_people_ch(
+        self, pending_version: int, *, initiating_user_id: Optional[int] = None, incremental: bool = False
+    ):
         from posthog.models.cohort.util import recalculate_cohortpeople
-        from posthog.tasks.calculate_cohort import clear_stale_cohort
 
         logger.warn(
             "cohort_calculation_started",
@@ -212,28 +215,38 @@ class Cohort(models.Model):
         start_time = time.monotonic()
 
         try:
-            count = recalculate_cohortpeople(self, pending_version, initiating_user_id=initiating_user_id)
-            self.count = count
-
-            self.last_calculation = timezone.now()
-            self.errors_calculating = 0
-            self.last_error_at = None
+            count = recalculate_cohortpeople(
+                self, pending_version, initiating_user_id=initiating_user_id, incremental=incremental
+            )
         except Exception:
-            self.errors_calculating = F("errors_calculating") + 1
-            self.last_error_at = timezone.now()
+            self._calculation_failed(pending_version)
+            raise
 
-            logger.warning(
-                "cohort_calculation_failed",
-                id=self.pk,
-                current_version=self.version,
-                new_version=pending_version,
-                exc_info=True,
-            )
+        self._calculation_succeeded(pending_version, count, start_time)
 
-            raise
-        finally:
-            self.is_calculating = False
-            self.save()
+    def _calculation_failed(self, pending_version: int) -> None:
+        self.errors_calculating = F("errors_calculating") + 1
+        self.last_error_at = timezone.now()
+        self.is_calculating = False
+        self.save()
+
+        logger.warning(
+            "cohort_calculation_failed",
+            id=self.pk,
+            current_version=self.version,
+            new_version=pending_version,
+            exc_info=True,
+        )
+
+    def _calculation_succeeded(self, pending_version: int, count: Optional[int], start_time: float) -> None:
+        from posthog.tasks.calculate_cohort import clear_stale_cohort
+
+        self.count = count
+        self.last_calculation = timezone.now()
+        self.errors_calculating = 0
+        self.last_error_at = None
+        self.is_calculating = False
+        self.save()
 
         # Update filter to match pending version if still valid
         Cohort.objects.filter(pk=self.pk).filter(Q(version__lt=pending_version) | Q(version__isnull=True)).update(
@@ -313,13 +326,16 @@ class Cohort(models.Model):
             self.save()
             capture_exception(err)
 
-    def insert_users_list_by_uuid(self, items: list[str], insert_in_clickhouse: bool = False, batchsize=1000) -> None:
+    def insert_users_list_by_uuid(
+        self, items: Iterable[str], insert_in_clickhouse: bool = False, batchsize=1000
+    ) -> None:
         from posthog.models.cohort.util import get_static_cohort_size, insert_static_cohort
 
         try:
             cursor = connection.cursor()
-            for i in range(0, len(items), batchsize):
-                batch = items[i : i + batchsize]
+            # Items are consumed a batch at a time, so they can be streamed in
+            items_iterator = iter(items)
+            while batch := list(islice(items_iterator, batchsize)):
                 persons_query = (
                     Person.objects.filter(team_id=self.team_id).filter(uuid__in=batch).exclude(cohort__id=self.id)
                 )
@@ -357,11 +373,11 @@ class Cohort(models.Model):
             self.save()
             capture_exception(err)
 
-    def _clickhouse_persons_query(self, batch_size=10000, offset=0):
-        from posthog.models.cohort.util import get_person_ids_by_cohort_id
+    def _clickhouse_persons(self, batch_size=10000) -> Iterator[QuerySet]:
+        from posthog.models.cohort.util import iter_cohort_person_ids
 
-        uuids = get_person_ids_by_cohort_id(team=self.team, cohort_id=self.pk, limit=batch_size, offset=offset)
-        return Person.objects.filter(uuid__in=uuids, team=self.team)
+        for uuids in iter_cohort_person_ids(self, batch_size=batch_size):
+            yield Person.objects.filter(uuid__in=uuids, team=self.team)
 
     __repr__ = sane_repr("id", "name", "last_calculation")
 
@@ -373,6 +389,31 @@ def get_and_update_pending_version(cohort: Cohort):
     return cohort.pending_version
 
 
+def calculate_people_ch_in_batch(team_id: int, cohorts: list[Cohort], pending_versions: dict[int, int]) -> None:
+    """Calculates cohorts of a team together, as `Cohort.calculate_people_ch` would calculate each of them."""
+    from posthog.models.cohort.util import recalculate_cohortpeople_in_batch
+
+    for cohort in cohorts:
+        logger.warn(
+            "cohort_calculation_started",
+            id=cohort.pk,
+            current_version=cohort.version,
+            new_version=pending_versions[cohort.pk],
+            batch_size=len(cohorts),
+        )
+    start_time = time.monotonic()
+
+    try:
+        counts = recalculate_cohortpeople_in_batch(team_id, cohorts, pending_versions)
+    except Exception:
+        for cohort in cohorts:
+            cohort._calculation_failed(pending_versions[cohort.pk])
+        raise
+
+    for cohort in cohorts:
+        cohort._calculation_succeeded(pending_versions[cohort.pk], counts[cohort.pk], start_time)
+
+
 class CohortPeople(models.Model):
     id = models.BigAutoField(primary_key=True)
     cohort = models.ForeignKey("Cohort", on_delete=models.CASCADE)
@@ -34,6 +34,13 @@ FROM cohortpeople
 WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(version)s
 """
 
+GET_COHORT_SIZES_SQL = """
+SELECT cohort_id, count(DISTINCT person_id)
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id IN %(cohort_ids)s AND version = transform(cohort_id, %(cohort_ids)s, %(versions)s, 0)
+GROUP BY cohort_id
+"""
+
 # Continually ensure that all previous version rows are deleted and insert persons that match the criteria
 # optimize_aggregation_in_order = 1 is necessary to avoid oom'ing for our biggest clients
 RECALCULATE_COHORT_BY_ID = """
@@ -49,6 +56,54 @@ WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version < %(new_ve
 SETTINGS optimize_aggregation_in_order = 1, join_algorithm = 'auto'
 """
 
+# Recalculate a cohort from its previous version, only evaluating the cohort filter for persons that changed since.
+# Everyone else is carried over to the new version as they were, and all previous version rows are deleted as above.
+RECALCULATE_COHORT_INCREMENTALLY_BY_ID = """
+INSERT INTO cohortpeople
+SELECT id, %(cohort_id)s as cohort_id, %(team_id)s as team_id, 1 AS sign, %(new_version)s AS version
+FROM (
+    {cohort_filter}
+) as person
+WHERE id IN ({changed_persons})
+UNION ALL
+SELECT person_id, cohort_id, team_id, 1, %(new_version)s
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(previous_version)s AND sign = 1
+AND person_id NOT IN ({changed_persons})
+UNION ALL
+SELECT person_id, cohort_id, team_id, -1, version
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version < %(new_version)s AND sign = 1
+SETTINGS optimize_aggregation_in_order = 1, join_algorithm = 'auto'
+"""
+
+# Recalculate several cohorts of a team that only filter on person properties in one scan of the person table.
+# Each person is paired with the cohorts whose condition they match, and every cohort gets its own new version.
+RECALCULATE_COHORTS_IN_BATCH = """
+INSERT INTO cohortpeople
+SELECT id, cohort_id, %(team_id)s as team_id, 1 AS sign, transform(cohort_id, %(cohort_ids)s, %(new_versions)s, 0) AS version
+FROM (
+    SELECT id, arrayJoin(arrayFilter((cohort_id, matches) -> matches, %(cohort_ids)s, [{cohort_conditions}])) AS cohort_id
+    FROM (
+        SELECT id, argMax(properties, version) as person_props
+        FROM person
+        WHERE team_id = %(team_id)s
+        GROUP BY id
+        HAVING max(is_deleted) = 0
+    )
+) as person
+UNION ALL
+SELECT person_id, cohort_id, team_id, -1, version
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id IN %(cohort_ids)s AND sign = 1
+AND version < transform(cohort_id, %(cohort_ids)s, %(new_versions)s, 0)
+SETTINGS optimize_aggregation_in_order = 1, join_algorithm = 'auto'
+"""
+
+GET_PERSON_IDS_CHANGED_SINCE = """
+SELECT id FROM person WHERE team_id = %(team_id)s AND _timestamp > toDateTime(%(changed_since)s, 'UTC')
+"""
+
 # NOTE: Group by version id to ensure that signs are summed between corresponding rows.
 # Version filtering is not necessary as only positive rows of the latest version will be selected by sum(sign) > 0
 
@@ -84,6 +139,24 @@ WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s
 GROUP BY person_id, cohort_id, team_id
 """
 
+# Keyset pagination over a cohort's persons, as paging with OFFSET re-reads all the persons before each page
+GET_COHORTPEOPLE_PAGE_BY_COHORT_ID = """
+SELECT DISTINCT person_id
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(version)s AND person_id > toUUID(%(after)s)
+ORDER BY person_id
+LIMIT %(limit)s
+"""
+
+GET_STATIC_COHORTPEOPLE_PAGE_BY_COHORT_ID = f"""
+SELECT person_id
+FROM {PERSON_STATIC_COHORT_TABLE}
+WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND person_id > toUUID(%(after)s)
+GROUP BY person_id
+ORDER BY person_id
+LIMIT %(limit)s
+"""
+
 GET_STATIC_COHORT_SIZE_SQL = f"""
 SELECT count(DISTINCT person_id)
 FROM {PERSON_STATIC_COHORT_TABLE}
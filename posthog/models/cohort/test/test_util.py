@@ -1,8 +1,14 @@
 from posthog.models.cohort import Cohort
 from posthog.models.cohort.util import (
+    FULL_CALCULATION_EVERY_N_VERSIONS,
+    can_calculate_cohortpeople_in_batch,
+    can_recalculate_cohortpeople_incrementally,
+    format_cohort_person_condition,
     get_dependent_cohorts,
     simplified_cohort_filter_properties,
 )
+from django.utils import timezone
+
 from posthog.test.base import BaseTest, _create_person, flush_persons_and_events
 
 
@@ -328,6 +334,108 @@ class TestCohortUtils(BaseTest):
         )
 
 
+class TestIncrementalCohortCalculation(BaseTest):
+    def _calculated_cohort(self, groups: list[dict], **kwargs) -> Cohort:
+        return Cohort.objects.create(
+            team=self.team, name="cohort", groups=groups, version=1, last_calculation=timezone.now(), **kwargs
+        )
+
+    def test_person_property_cohorts_can_be_recalculated_incrementally(self):
+        cohort = self._calculated_cohort(
+            [
+                {"properties": [{"key": "name", "value": "test", "type": "person"}]},
+                {"properties": [{"key": "email", "value": "@posthog.com", "type": "person", "operator": "icontains"}]},
+            ]
+        )
+
+        self.assertTrue(can_recalculate_cohortpeople_incrementally(cohort, pending_version=2))
+        # every so often, cohorts are calculated from scratch anyway
+        self.assertFalse(can_recalculate_cohortpeople_incrementally(cohort, FULL_CALCULATION_EVERY_N_VERSIONS))
+
+    def test_behavioral_and_nested_cohorts_are_not_recalculated_incrementally(self):
+        behavioral_cohort = self._calculated_cohort([{"action_id": 1, "days": 7}])
+        nested_cohort = self._calculated_cohort(
+            [{"properties": [{"key": "id", "value": behavioral_cohort.pk, "type": "cohort"}]}]
+        )
+
+        self.assertFalse(can_recalculate_cohortpeople_incrementally(behavioral_cohort, pending_version=2))
+        self.assertFalse(can_recalculate_cohortpeople_incrementally(nested_cohort, pending_version=2))
+
+    def test_cohorts_never_calculated_are_not_recalculated_incrementally(self):
+        cohort = Cohort.objects.create(
+            team=self.team, name="cohort", groups=[{"properties": [{"key": "name", "value": "test", "type": "person"}]}]
+        )
+
+        self.assertFalse(can_recalculate_cohortpeople_incrementally(cohort, pending_version=1))
+
+
+class TestBatchCohortCalculation(BaseTest):
+    def test_person_property_and_nested_person_property_cohorts_can_be_calculated_in_batch(self):
+        person_cohort = _create_cohort(
+            team=self.team,
+            name="cohort1",
+            groups=[{"properties": [{"key": "name", "value": "test", "type": "person"}]}],
+        )
+        nested_cohort = _create_cohort(
+            team=self.team,
+            name="cohort2",
+            groups=[{"properties": [{"key": "id", "value": person_cohort.pk, "type": "cohort"}]}],
+        )
+        seen_cohorts_cache: dict = {}
+        get_dependent_cohorts(nested_cohort, seen_cohorts_cache=seen_cohorts_cache)
+
+        self.assertTrue(can_calculate_cohortpeople_in_batch(person_cohort, seen_cohorts_cache))
+        self.assertTrue(can_calculate_cohortpeople_in_batch(nested_cohort, seen_cohorts_cache))
+
+    def test_behavioral_static_and_empty_cohorts_are_not_calculated_in_batch(self):
+        behavioral_cohort = _create_cohort(team=self.team, name="cohort1", groups=[{"action_id": 1, "days": 7}])
+        nested_behavioral_cohort = _create_cohort(
+            team=self.team,
+            name="cohort2",
+            groups=[{"properties": [{"key": "id", "value": behavioral_cohort.pk, "type": "cohort"}]}],
+        )
+        static_cohort = _create_cohort(team=self.team, name="cohort3", groups=[], is_static=True)
+        empty_cohort = _create_cohort(team=self.team, name="cohort4", groups=[])
+        seen_cohorts_cache: dict = {}
+        get_dependent_cohorts(nested_behavioral_cohort, seen_cohorts_cache=seen_cohorts_cache)
+
+        for cohort in (behavioral_cohort, nested_behavioral_cohort, static_cohort, empty_cohort):
+            self.assertFalse(can_calculate_cohortpeople_in_batch(cohort, seen_cohorts_cache))
+
+    def test_format_cohort_person_condition_inlines_nested_cohorts(self):
+        person_cohort = _create_cohort(
+            team=self.team,
+            name="cohort1",
+            groups=[{"properties": [{"key": "name", "value": "test", "type": "person"}]}],
+        )
+        nested_cohort = _create_cohort(
+            team=self.team,
+            name="cohort2",
+            groups=[
+                {
+                    "properties": [
+                        {"key": "id", "value": person_cohort.pk, "type": "cohort", "negation": True},
+                        {"key": "email", "value": "@posthog.com", "type": "person", "operator": "icontains"},
+                    ]
+                }
+            ],
+        )
+        params: dict = {}
+
+        # Nested cohorts can't be formatted before the cohorts they depend on
+        self.assertIsNone(format_cohort_person_condition(nested_cohort, {}, params))
+
+        person_condition = format_cohort_person_condition(person_cohort, {}, params)
+        assert person_condition is not None
+        nested_condition = format_cohort_person_condition(nested_cohort, {person_cohort.pk: person_condition}, params)
+        assert nested_condition is not None
+
+        self.assertIn("person_props", person_condition)
+        self.assertIn(f"NOT {person_condition}", nested_condition)
+        self.assertIn("ILIKE", nested_condition)
+        self.assertEqual(list(params.values()), ["name", ["test"], "email", "%@posthog.com%"])
+
+
 class TestDependentCohorts(BaseTest):
     def test_dependent_cohorts_for_simple_cohort(self):
         cohort = _create_cohort(
@@ -1,5 +1,6 @@
 import uuid
-from datetime import datetime, timedelta
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
 from typing import Any, Optional, Union, cast
 
 import structlog
@@ -26,11 +27,17 @@ from posthog.models.cohort.cohort import Cohort, CohortOrEmpty
 from posthog.models.cohort.sql import (
     CALCULATE_COHORT_PEOPLE_SQL,
     GET_COHORT_SIZE_SQL,
+    GET_COHORT_SIZES_SQL,
+    GET_COHORTPEOPLE_PAGE_BY_COHORT_ID,
     GET_COHORTS_BY_PERSON_UUID,
     GET_PERSON_ID_BY_PRECALCULATED_COHORT_ID,
+    GET_PERSON_IDS_CHANGED_SINCE,
     GET_STATIC_COHORT_SIZE_SQL,
+    GET_STATIC_COHORTPEOPLE_PAGE_BY_COHORT_ID,
     GET_STATIC_COHORTPEOPLE_BY_PERSON_UUID,
     RECALCULATE_COHORT_BY_ID,
+    RECALCULATE_COHORT_INCREMENTALLY_BY_ID,
+    RECALCULATE_COHORTS_IN_BATCH,
     STALE_COHORTPEOPLE,
 )
 from posthog.models.person.sql import (
@@ -46,6 +53,16 @@ from posthog.queries.person_distinct_id_query import get_team_distinct_ids_query
 # temporary marker to denote when cohortpeople table started being populated
 TEMP_PRECALCULATED_MARKER = parser.parse("2021-06-07T15:00:00+00:00")
 
+# Person rows can reach ClickHouse a while after their _timestamp, and calculating a cohort takes a while too,
+# so incremental calculations also re-evaluate persons that changed a bit before the previous calculation finished
+INCREMENTAL_CALCULATION_LOOKBACK = timedelta(hours=1)
+# To catch persons that arrived even later than that, every so often cohorts are calculated from scratch anyway
+FULL_CALCULATION_EVERY_N_VERSIONS = 24
+
+COHORT_PERSON_IDS_BATCH_SIZE = 10_000
+# Person ids compare as UUIDs in ClickHouse, so this sorts before all of them
+FIRST_PERSON_ID = "00000000-0000-0000-0000-000000000000"
+
 logger = structlog.get_logger(__name__)
 
 
@@ -295,6 +312,40 @@ def get_person_ids_by_cohort_id(
     return [str(row[0]) for row in results]
 
 
+def get_cohort_person_ids_page(
+    cohort: Cohort, *, after: Optional[str] = None, limit: int = COHORT_PERSON_IDS_BATCH_SIZE
+) -> list[str]:
+    """
+    The ids of up to `limit` of the cohort's persons, ordered by id, that come after the person id `after`.
+
+    Unlike paging with an offset, reading a page takes the same time wherever it is in the cohort.
+    """
+    results = sync_execute(
+        GET_STATIC_COHORTPEOPLE_PAGE_BY_COHORT_ID if cohort.is_static else GET_COHORTPEOPLE_PAGE_BY_COHORT_ID,
+        {
+            "team_id": cohort.team_id,
+            "cohort_id": cohort.pk,
+            "version": cohort.version,
+            "after": after or FIRST_PERSON_ID,
+            "limit": limit,
+        },
+        workload=Workload.OFFLINE,
+    )
+    return [str(row[0]) for row in results]
+
+
+def iter_cohort_person_ids(cohort: Cohort, batch_size: int = COHORT_PERSON_IDS_BATCH_SIZE) -> Iterator[list[str]]:
+    """Streams the ids of all of the cohort's persons in batches, holding only one batch in memory at a time."""
+    after = None
+    while True:
+        person_ids = get_cohort_person_ids_page(cohort, after=after, limit=batch_size)
+        if person_ids:
+            yield person_ids
+        if len(person_ids) < batch_size:
+            return
+        after = person_ids[-1]
+
+
 def insert_static_cohort(person_uuids: list[Optional[uuid.UUID]], cohort_id: int, team: Team):
     persons = [
         {
@@ -324,9 +375,30 @@ def get_static_cohort_size(cohort: Cohort) -> Optional[int]:
         return None
 
 
+def can_recalculate_cohortpeople_incrementally(cohort: Cohort, pending_version: int) -> bool:
+    """
+    Only cohorts filtering on person properties alone can be recalculated incrementally, as their persons only enter or
+    leave them when the persons themselves change. Behavioral cohorts change as time passes or events come in.
+    """
+    if cohort.is_static or cohort.version is None or cohort.last_calculation is None:
+        return False
+
+    if pending_version % FULL_CALCULATION_EVERY_N_VERSIONS == 0:
+        return False
+
+    properties = cohort.properties.flat
+    return len(properties) > 0 and all(prop.type == "person" for prop in properties)
+
+
 def recalculate_cohortpeople(
-    cohort: Cohort, pending_version: int, *, initiating_user_id: Optional[int]
+    cohort: Cohort, pending_version: int, *, initiating_user_id: Optional[int], incremental: bool = False
 ) -> Optional[int]:
+    """
+    Inserts the persons matching the cohort under the pending version.
+
+    With `incremental`, cohorts that support it only evaluate the persons that changed since the cohort's previous
+    calculation, and carry over everyone else from the previous version.
+    """
     hogql_context = HogQLContext(within_non_hogql_query=True, team_id=cohort.team_id)
     cohort_query, cohort_params = format_person_query(cohort, 0, hogql_context)
 
@@ -340,7 +412,26 @@ def recalculate_cohortpeople(
             size_before=before_count,
         )
 
-    recalcluate_cohortpeople_sql = RECALCULATE_COHORT_BY_ID.format(cohort_filter=cohort_query)
+    # If the previous version doesn't hold the count we stored for it, there is nothing trustworthy to carry over
+    if (
+        incremental
+        and before_count is not None
+        and before_count == cohort.count
+        and can_recalculate_cohortpeople_incrementally(cohort, pending_version)
+    ):
+        recalcluate_cohortpeople_sql = RECALCULATE_COHORT_INCREMENTALLY_BY_ID.format(
+            cohort_filter=cohort_query, changed_persons=GET_PERSON_IDS_CHANGED_SINCE
+        )
+        incremental_params = {
+            "previous_version": cohort.version,
+            "changed_since": (cast(datetime, cohort.last_calculation) - INCREMENTAL_CALCULATION_LOOKBACK)
+            .astimezone(UTC)
+            .strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    else:
+        recalcluate_cohortpeople_sql = RECALCULATE_COHORT_BY_ID.format(cohort_filter=cohort_query)
+        incremental_params = {}
+        incremental = False
 
     tag_queries(kind="cohort_calculation", team_id=cohort.team_id, query_type="CohortsQuery")
     if initiating_user_id:
@@ -351,6 +442,7 @@ def recalculate_cohortpeople(
         {
             **cohort_params,
             **hogql_context.values,
+            **incremental_params,
             "cohort_id": cohort.pk,
             "team_id": cohort.team_id,
             "new_version": pending_version,
@@ -373,11 +465,150 @@ def recalculate_cohortpeople(
             cohort_id=cohort.pk,
             size_before=before_count,
             size=count,
+            incremental=incremental,
         )
 
     return count
 
 
+def can_calculate_cohortpeople_in_batch(cohort: Cohort, seen_cohorts_cache: dict[int, CohortOrEmpty]) -> bool:
+    """
+    Whether the cohort can be calculated together with other cohorts of its team in one scan of the person table.
+
+    That's cohorts filtering on person properties, and on other cohorts that do so too. `seen_cohorts_cache` must hold
+    the cohorts it depends on, as filled by `get_dependent_cohorts`.
+    """
+    if cohort.is_static or not cohort.properties.values:
+        return False
+
+    properties = cohort.properties.flat
+    if not properties:
+        return False
+
+    for prop in properties:
+        if prop.type == "cohort" and not isinstance(prop.value, list):
+            try:
+                dependent_cohort = seen_cohorts_cache.get(int(prop.value))
+            except (ValueError, TypeError):
+                return False
+            if not dependent_cohort or not can_calculate_cohortpeople_in_batch(dependent_cohort, seen_cohorts_cache):
+                return False
+        elif prop.type != "person":
+            return False
+
+    return True
+
+
+def format_cohort_person_condition(
+    cohort: Cohort, cohort_conditions: dict[int, str], params: dict[str, Any]
+) -> Optional[str]:
+    """
+    The condition matching the cohort's persons, over the `person_props` of the person table.
+
+    Conditions of the cohorts it depends on are taken from `cohort_conditions`, so cohorts must be formatted in
+    topological order. Returns None if the cohort depends on a cohort that couldn't be formatted.
+    """
+    from posthog.models.property.util import prop_filter_json_extract
+
+    def build_condition(prop: Union[PropertyGroup, Property], prepend: str, idx: int) -> Optional[str]:
+        if isinstance(prop, PropertyGroup):
+            conditions = []
+            for value_idx, value in enumerate(prop.values):
+                condition = build_condition(value, f"{prepend}_level_{idx}", value_idx)  # type: ignore
+                if condition is None:
+                    return None
+                conditions.append(condition)
+            return f"({f' {prop.type} '.join(conditions)})" if conditions else "1 = 1"
+
+        if prop.type == "cohort":
+            dependent_condition = cohort_conditions.get(int(cast(Union[int, str], prop.value)))
+            if dependent_condition is None:
+                return None
+            return f"NOT {dependent_condition}" if prop.negation else dependent_condition
+
+        condition, condition_params = prop_filter_json_extract(
+            prop, idx, prepend, prop_var="person_props", allow_denormalized_props=False, property_operator=""
+        )
+        params.update(condition_params)
+        return f"({condition.strip()})"
+
+    return build_condition(cohort.properties, prepend=f"batch_{cohort.pk}", idx=0)
+
+
+def recalculate_cohortpeople_in_batch(
+    team_id: int, cohorts: list[Cohort], pending_versions: dict[int, int]
+) -> dict[int, int]:
+    """
+    Inserts the persons matching each of the cohorts under its pending version, scanning the person table once.
+
+    The cohorts must all satisfy `can_calculate_cohortpeople_in_batch`. Returns the new count of each cohort.
+    """
+    seen_cohorts_cache: dict[int, CohortOrEmpty] = {cohort.pk: cohort for cohort in cohorts}
+    for cohort in cohorts:
+        get_dependent_cohorts(cohort, seen_cohorts_cache=seen_cohorts_cache)
+
+    # Nested cohorts' conditions are inlined into the cohorts depending on them, so they're formatted first
+    cohort_conditions: dict[int, str] = {}
+    params: dict[str, Any] = {}
+    for cohort_id in sort_cohorts_topologically({cohort.pk for cohort in cohorts}, seen_cohorts_cache):
+        cohort_or_empty = seen_cohorts_cache.get(cohort_id)
+        if not cohort_or_empty:
+            continue
+        condition = format_cohort_person_condition(cohort_or_empty, cohort_conditions, params)
+        if condition is not None:
+            cohort_conditions[cohort_id] = condition
+
+    cohort_ids = [cohort.pk for cohort in cohorts]
+    missing_cohort_ids = [cohort_id for cohort_id in cohort_ids if cohort_id not in cohort_conditions]
+    if missing_cohort_ids:
+        raise ValueError(f"Cohorts {missing_cohort_ids} can't be calculated in a batch")
+
+    new_versions = [pending_versions[cohort_id] for cohort_id in cohort_ids]
+
+    logger.warn(
+        "Recalculating cohortpeople in batch starting",
+        team_id=team_id,
+        cohort_ids=cohort_ids,
+    )
+
+    tag_queries(kind="cohort_calculation", team_id=team_id, query_type="CohortsBatchQuery")
+
+    sync_execute(
+        RECALCULATE_COHORTS_IN_BATCH.format(
+            cohort_conditions=", ".join(f"if({cohort_conditions[cohort_id]}, 1, 0)" for cohort_id in cohort_ids)
+        ),
+        {
+            **params,
+            "team_id": team_id,
+            "cohort_ids": cohort_ids,
+            "new_versions": new_versions,
+        },
+        settings={
+            "max_execution_time": 600,
+            "send_timeout": 600,
+            "receive_timeout": 600,
+            "optimize_on_insert": 0,
+        },
+        workload=Workload.OFFLINE,
+    )
+
+    count_result = sync_execute(
+        GET_COHORT_SIZES_SQL,
+        {"team_id": team_id, "cohort_ids": cohort_ids, "versions": new_versions},
+        workload=Workload.OFFLINE,
+    )
+    counts = {cohort_id: 0 for cohort_id in cohort_ids}
+    counts.update(count_result)
+
+    logger.warn(
+        "Recalculating cohortpeople in batch done",
+        team_id=team_id,
+        counts=counts,
+    )
+
+    return counts
+
+
 def clear_stale_cohortpeople(cohort: Cohort, before_version: int) -> None:
     if cohort.version and cohort.version > 0:
         stale_count_result = sync_execute(
@@ -361,7 +361,10 @@ def delete_experiment_flags(sender, instance, **kwargs):
 
 @mutable_receiver([post_save, post_delete], sender=FeatureFlag)
 def refresh_flag_cache_on_updates(sender, instance, **kwargs):
+    from .flag_index import invalidate_flag_index
+
     set_feature_flags_for_team_in_cache(instance.team_id)
+    invalidate_flag_index(instance.team_id)
 
 
 class FeatureFlagHashKeyOverride(models.Model):
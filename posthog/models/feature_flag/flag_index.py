@@ -0,0 +1,118 @@
+import copy
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from prometheus_client import Counter
+
+from posthog.cache_utils import LRUCache
+from posthog.models.filters import Filter
+from posthog.models.property import GroupTypeIndex
+from posthog.models.property.property import Property
+
+from .feature_flag import FeatureFlag
+
+FLAG_INDEX_CACHE_COUNTER = Counter(
+    "posthog_feature_flag_index_cache_total",
+    "Whether a feature flag compiled for evaluation was served from the process-local team flag index.",
+    labelnames=["result"],
+)
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    index: int
+    properties: list[Property]
+    property_keys: frozenset[str]
+    rollout_percentage: Optional[float]
+    variant: Optional[str]
+    uses_cohorts: bool
+    # Only is_not/is_not_set operators, so the condition matches when the person or group doesn't exist
+    matches_if_entity_doesnt_exist: bool
+
+
+@dataclass(frozen=True)
+class CompiledFeatureFlag:
+    """What's needed to evaluate a flag, worked out once rather than on every request."""
+
+    filters: dict
+    rollout_percentage: Optional[int]
+    aggregation_group_type_index: Optional[GroupTypeIndex]
+    conditions: list[CompiledCondition]
+    # Contiguous sub-domains of [0, 1], one per variant, to look up a variant by hash
+    variant_lookup_table: list[dict]
+
+    def is_compiled_from(self, feature_flag: FeatureFlag) -> bool:
+        return self.filters == feature_flag.filters and self.rollout_percentage == feature_flag.rollout_percentage
+
+
+def compile_feature_flag(feature_flag: FeatureFlag) -> CompiledFeatureFlag:
+    conditions = []
+    for index, condition in enumerate(feature_flag.conditions):
+        raw_properties = condition.get("properties") or []
+        properties = Filter(data=condition).property_groups.flat if raw_properties else []
+        conditions.append(
+            CompiledCondition(
+                index=index,
+                properties=properties,
+                property_keys=frozenset(property.key for property in properties),
+                rollout_percentage=condition.get("rollout_percentage"),
+                variant=condition.get("variant"),
+                uses_cohorts=any(property.type == "cohort" for property in properties),
+                matches_if_entity_doesnt_exist=bool(raw_properties)
+                and all(prop.get("operator") in ("is_not_set", "is_not") for prop in raw_properties),
+            )
+        )
+
+    variant_lookup_table = []
+    value_min = 0
+    for variant in feature_flag.variants:
+        value_max = value_min + variant["rollout_percentage"] / 100
+        variant_lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
+        value_min = value_max
+
+    return CompiledFeatureFlag(
+        # Copied, so that flags mutated in place after compilation don't match their stale compiled version
+        filters=copy.deepcopy(feature_flag.filters),
+        rollout_percentage=feature_flag.rollout_percentage,
+        aggregation_group_type_index=feature_flag.aggregation_group_type_index,
+        conditions=conditions,
+        variant_lookup_table=variant_lookup_table,
+    )
+
+
+# Team ID -> flag ID -> compiled flag
+_flag_index_cache: LRUCache[int, dict[int, CompiledFeatureFlag]] = LRUCache(maxsize=settings.FLAG_INDEX_CACHE_SIZE)
+
+
+def get_compiled_feature_flag(feature_flag: FeatureFlag) -> CompiledFeatureFlag:
+    """
+    Return the flag compiled for evaluation, from the team's process-local flag index if it's up to date.
+
+    Flags are compared to what they were compiled from, so a flag changed in another process is simply recompiled.
+    """
+    if feature_flag.pk is None or not settings.FLAG_INDEX_CACHE_ENABLED:
+        return compile_feature_flag(feature_flag)
+
+    team_index = _flag_index_cache.get(feature_flag.team_id)
+    if team_index is None:
+        team_index = {}
+        _flag_index_cache.set(feature_flag.team_id, team_index)
+
+    compiled_flag = team_index.get(feature_flag.pk)
+    if compiled_flag is not None and compiled_flag.is_compiled_from(feature_flag):
+        FLAG_INDEX_CACHE_COUNTER.labels(result="hit").inc()
+        return compiled_flag
+
+    FLAG_INDEX_CACHE_COUNTER.labels(result="miss").inc()
+    compiled_flag = compile_feature_flag(feature_flag)
+    team_index[feature_flag.pk] = compiled_flag
+    return compiled_flag
+
+
+def invalidate_flag_index(team_id: int) -> None:
+    _flag_index_cache.delete(team_id)
+
+
+def clear_flag_index_cache() -> None:
+    _flag_index_cache.clear()
@@ -37,12 +37,15 @@ from .feature_flag import (
     get_feature_flags_for_team_in_cache,
     set_feature_flags_for_team_in_cache,
 )
+from .flag_index import CompiledCondition, get_compiled_feature_flag
 
 logger = structlog.get_logger(__name__)
 
 __LONG_SCALE__ = float(0xFFFFFFFFFFFFFFF)
 
 FLAG_MATCHING_QUERY_TIMEOUT_MS = 300  # 300 ms. Any longer and we'll just error out.
+# Distinct IDs evaluated per round trip when evaluating flags in bulk
+BULK_FLAG_EVALUATION_CHUNK_SIZE = 1000
 
 FLAG_EVALUATION_ERROR_COUNTER = Counter(
     "flag_evaluation_error_total",
@@ -133,6 +136,8 @@ class FlagsMatcherCache:
 
 class FeatureFlagMatcher:
     failed_to_fetch_conditions = False
+    # Set when query conditions were fetched in bulk for many matchers, see `get_all_feature_flags_for_distinct_ids`
+    prefetched_query_conditions: Optional[dict[str, bool]] = None
 
     def __init__(
         self,
@@ -218,6 +223,7 @@ class FeatureFlagMatcher:
                     payload=payload,
                 )
 
+        compiled_flag = get_compiled_feature_flag(feature_flag)
         # Stable sort conditions with variant overrides to the top. This ensures that if overrides are present, they are
         # evaluated first, and the variant override is applied to the first matching condition.
         # :TRICKY: We need to include the enumeration index before the sort so the flag evaluation reason gets the right condition index.
@@ -226,7 +232,9 @@ class FeatureFlagMatcher:
             key=lambda condition_tuple: 0 if condition_tuple[1].get("variant") else 1,
         )
         for index, condition in sorted_flag_conditions:
-            is_match, evaluation_reason = self.is_condition_match(feature_flag, condition, index)
+            is_match, evaluation_reason = self.is_condition_match(
+                feature_flag, condition, index, compiled_flag.conditions[index].properties
+            )
             if is_match:
                 variant_override = condition.get("variant")
                 if variant_override in [variant["key"] for variant in feature_flag.variants]:
@@ -376,11 +384,16 @@ class FeatureFlagMatcher:
         return False, False, FeatureFlagMatchReason.NO_CONDITION_MATCH
 
     def is_condition_match(
-        self, feature_flag: FeatureFlag, condition: dict, condition_index: int
+        self,
+        feature_flag: FeatureFlag,
+        condition: dict,
+        condition_index: int,
+        properties: Optional[list[Property]] = None,
     ) -> tuple[bool, FeatureFlagMatchReason]:
         rollout_percentage = condition.get("rollout_percentage")
         if len(condition.get("properties", [])) > 0:
-            properties = Filter(data=condition).property_groups.flat
+            if properties is None:
+                properties = Filter(data=condition).property_groups.flat
             if self.can_compute_locally(properties, feature_flag.aggregation_group_type_index):
                 # :TRICKY: If overrides are enough to determine if a condition is a match,
                 # we can skip checking the query.
@@ -436,29 +449,39 @@ class FeatureFlagMatcher:
         if self.skip_database_flags:
             raise DatabaseError("Database healthcheck failed, not fetching flag conditions.")
 
+        query_conditions = (
+            self.prefetched_query_conditions if self.prefetched_query_conditions is not None else self.query_conditions
+        )
         # :TRICKY: Currently this option is only set with the is_not_set operator, but we can shortcircuit the condition check
         # if the person doesn't exist. This is important as it allows resolving flags correctly for non-ingested persons.
         if match_if_entity_doesnt_exist:
             existence_key = f"{ENTITY_EXISTS_PREFIX}{group_type_index if group_type_index is not None else PERSON_KEY}"
-            entity_doesnt_exist = self.query_conditions.get(existence_key) is False
+            entity_doesnt_exist = query_conditions.get(existence_key) is False
             # :TRICKY: We only return if entity doesn't exist, because if it does, we still need to check the condition properly.
             if entity_doesnt_exist:
                 return True
 
-        return self.query_conditions.get(key, False)
+        return query_conditions.get(key, False)
 
     # Define contiguous sub-domains within [0, 1].
     # By looking up a random hash value, you can find the associated variant key.
     # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
     # and the second will have value_min: 0.5 and value_max: 1.0
     def variant_lookup_table(self, feature_flag: FeatureFlag):
-        lookup_table = []
-        value_min = 0
-        for variant in feature_flag.variants:
-            value_max = value_min + variant["rollout_percentage"] / 100
-            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
-            value_min = value_max
-        return lookup_table
+        return get_compiled_feature_flag(feature_flag).variant_lookup_table
+
+    def condition_needs_database(self, feature_flag: FeatureFlag, condition: CompiledCondition) -> bool:
+        """
+        Whether evaluating the condition means looking up the person or group in the database.
+
+        Rollout-only conditions, conditions that property overrides fully determine, and conditions of group flags
+        whose group wasn't passed in are all resolved without the query.
+        """
+        if not condition.properties:
+            return False
+        if self.hashed_identifier(feature_flag) is None:
+            return False
+        return not self.can_compute_locally(condition.properties, feature_flag.aggregation_group_type_index)
 
     @cached_property
     def query_conditions(self) -> dict[str, bool]:
@@ -505,13 +528,14 @@ class FeatureFlagMatcher:
                         group_exists = group_query.exists()
                         all_conditions[f"{ENTITY_EXISTS_PREFIX}{existence_condition_key}"] = group_exists
 
-                def condition_eval(key, condition):
+                def condition_eval(key, condition, property_list: Optional[list[Property]] = None):
                     team_id = self.feature_flags[0].team_id
                     expr = None
                     annotate_query = True
                     nonlocal person_query
 
-                    property_list = Filter(data=condition).property_groups.flat
+                    if property_list is None:
+                        property_list = Filter(data=condition).property_groups.flat
                     properties_with_math_operators = get_all_properties_with_math_operators(
                         property_list, self.cohorts_cache, team_id
                     )
@@ -595,7 +619,11 @@ class FeatureFlagMatcher:
                             )
 
                 # only fetch all cohorts if not passed in any cached cohorts
-                if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
+                if not self.cohorts_cache and any(
+                    condition.uses_cohorts and self.condition_needs_database(feature_flag, condition)
+                    for feature_flag in self.feature_flags
+                    for condition in get_compiled_feature_flag(feature_flag).conditions
+                ):
                     all_cohorts = {
                         cohort.pk: cohort
                         for cohort in Cohort.objects.db_manager(DATABASE_FOR_FLAG_MATCHING).filter(
@@ -628,9 +656,13 @@ class FeatureFlagMatcher:
                         op="parse_feature_flag_conditions",
                         description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
                     ):
-                        for index, condition in enumerate(feature_flag.conditions):
-                            key = f"flag_{feature_flag.pk}_condition_{index}"
-                            condition_eval(key, condition)
+                        for compiled_condition in get_compiled_feature_flag(feature_flag).conditions:
+                            if not self.condition_needs_database(feature_flag, compiled_condition):
+                                continue
+                            key = f"flag_{feature_flag.pk}_condition_{compiled_condition.index}"
+                            condition_eval(
+                                key, feature_flag.conditions[compiled_condition.index], compiled_condition.properties
+                            )
 
                 if len(person_fields) > 0:
                     person_query = person_query.values(*person_fields)
@@ -731,8 +763,8 @@ class FeatureFlagMatcher:
     def has_pure_is_not_conditions(self) -> set[Literal["person"] | GroupTypeIndex]:
         entity_to_condition_check: set[Literal["person"] | GroupTypeIndex] = set()
         for feature_flag in self.feature_flags:
-            for condition in feature_flag.conditions:
-                if check_pure_is_not_operator_condition(condition):
+            for condition in get_compiled_feature_flag(feature_flag).conditions:
+                if condition.matches_if_entity_doesnt_exist and self.condition_needs_database(feature_flag, condition):
                     if feature_flag.aggregation_group_type_index is not None:
                         entity_to_condition_check.add(feature_flag.aggregation_group_type_index)
                     else:
@@ -968,6 +1000,192 @@ def get_all_feature_flags(
     )
 
 
+def get_all_feature_flags_for_distinct_ids(
+    team_id: int,
+    distinct_ids: list[str],
+    property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
+    using_database: str = DATABASE_FOR_FLAG_MATCHING,
+) -> dict[str, dict[str, Union[str, bool]]]:
+    """
+    Evaluate all of the team's flags for many distinct IDs at once, e.g. in backend jobs.
+
+    Hash key overrides and person conditions are fetched with one round trip per chunk of distinct IDs, instead of one
+    per distinct ID. `property_value_overrides` are optional person properties per distinct ID. Groups aren't supported,
+    so group flags are off, and flags that fail to evaluate for a distinct ID are left out of its values.
+    """
+    if property_value_overrides is None:
+        property_value_overrides = {}
+
+    all_feature_flags = get_feature_flags_for_team_in_cache(team_id)
+    if all_feature_flags is None:
+        all_feature_flags = set_feature_flags_for_team_in_cache(team_id)
+    if not all_feature_flags:
+        return {distinct_id: {} for distinct_id in distinct_ids}
+
+    cache = FlagsMatcherCache(team_id)
+    cohorts_cache: dict[int, CohortOrEmpty] = {}
+    flags_have_experience_continuity_enabled = any(
+        feature_flag.ensure_experience_continuity for feature_flag in all_feature_flags
+    )
+
+    flag_values: dict[str, dict[str, Union[str, bool]]] = {}
+    unique_distinct_ids = list(dict.fromkeys(distinct_ids))
+    for chunk_start in range(0, len(unique_distinct_ids), BULK_FLAG_EVALUATION_CHUNK_SIZE):
+        chunk = unique_distinct_ids[chunk_start : chunk_start + BULK_FLAG_EVALUATION_CHUNK_SIZE]
+        hash_key_overrides = (
+            get_feature_flag_hash_key_overrides_for_distinct_ids(team_id, chunk, using_database)
+            if flags_have_experience_continuity_enabled
+            else {}
+        )
+
+        matchers = {}
+        for distinct_id in chunk:
+            person_property_values, _ = add_local_person_and_group_properties(
+                distinct_id, {}, property_value_overrides.get(distinct_id), {}
+            )
+            matchers[distinct_id] = FeatureFlagMatcher(
+                all_feature_flags,
+                distinct_id,
+                cache=cache,
+                hash_key_overrides=hash_key_overrides.get(distinct_id, {}),
+                property_value_overrides=person_property_values,
+                cohorts_cache=cohorts_cache,
+            )
+
+        for distinct_id, query_conditions in _get_person_query_conditions_in_bulk(
+            team_id, all_feature_flags, matchers, cohorts_cache, using_database
+        ).items():
+            matchers[distinct_id].prefetched_query_conditions = query_conditions
+
+        for distinct_id, matcher in matchers.items():
+            flag_values[distinct_id], _, _, _ = matcher.get_matches()
+
+    return flag_values
+
+
+def _get_person_query_conditions_in_bulk(
+    team_id: int,
+    feature_flags: list[FeatureFlag],
+    matchers: dict[str, FeatureFlagMatcher],
+    cohorts_cache: dict[int, CohortOrEmpty],
+    using_database: str,
+) -> dict[str, dict[str, bool]]:
+    """
+    Evaluate the person conditions of many matchers with a single query, keyed by distinct ID.
+
+    Conditions are evaluated without property overrides, so matchers whose overrides cover some, but not all,
+    of the properties their conditions query are left out, and fetch their own query conditions instead.
+    """
+    # Groups aren't passed in, so group flags never get to their conditions
+    person_feature_flags = [flag for flag in feature_flags if flag.aggregation_group_type_index is None]
+    super_conditions: dict[str, list[Property]] = {}
+    for feature_flag in person_feature_flags:
+        if feature_flag.super_conditions:
+            prop_key = (feature_flag.super_conditions[0].get("properties") or [{}])[0].get("key")
+            if prop_key:
+                super_conditions[f"flag_{feature_flag.pk}_super_condition"] = Filter(
+                    data=feature_flag.super_conditions[0]
+                ).property_groups.flat
+                super_conditions[f"flag_{feature_flag.pk}_super_condition_is_set"] = Filter(
+                    data={"properties": [{"key": prop_key, "operator": "is_set"}]}
+                ).property_groups.flat
+
+    conditions: dict[str, list[Property]] = {}
+    distinct_ids: list[str] = []
+    referenced_keys_by_condition: dict[str, set[str]] = {}
+    for distinct_id, matcher in matchers.items():
+        matcher_conditions = dict(super_conditions)
+        for feature_flag in person_feature_flags:
+            for condition in get_compiled_feature_flag(feature_flag).conditions:
+                if matcher.condition_needs_database(feature_flag, condition):
+                    matcher_conditions[f"flag_{feature_flag.pk}_condition_{condition.index}"] = condition.properties
+
+        for key, properties in matcher_conditions.items():
+            if key not in referenced_keys_by_condition:
+                referenced_keys_by_condition[key] = _get_referenced_property_keys(properties, cohorts_cache, team_id)
+        if any(
+            referenced_keys_by_condition[key] & matcher.property_value_overrides.keys() for key in matcher_conditions
+        ):
+            continue
+        conditions.update(matcher_conditions)
+        distinct_ids.append(distinct_id)
+
+    if not distinct_ids or not conditions:
+        return {}
+
+    query_conditions: dict[str, dict[str, bool]] = {
+        # Left as is for people that don't exist, so that pure is_not conditions match them
+        distinct_id: {f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}": False}
+        for distinct_id in distinct_ids
+    }
+    person_query: QuerySet = Person.objects.db_manager(using_database).filter(
+        team_id=team_id,
+        persondistinctid__distinct_id__in=distinct_ids,
+        persondistinctid__team_id=team_id,
+    )
+    for key, properties in conditions.items():
+        properties_with_math_operators = get_all_properties_with_math_operators(properties, cohorts_cache, team_id)
+        expr = properties_to_Q(team_id, properties, cohorts_cache=cohorts_cache, using_database=using_database)
+        person_query = person_query.annotate(
+            **_get_property_type_annotations(properties_with_math_operators),
+            **{key: ExpressionWrapper(expr, output_field=BooleanField())},
+        )
+
+    for row in person_query.values("persondistinctid__distinct_id", *conditions.keys()):
+        distinct_id = row.pop("persondistinctid__distinct_id")
+        query_conditions[distinct_id] = {f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}": True, **row}
+    return query_conditions
+
+
+def _get_referenced_property_keys(
+    properties: list[Property], cohorts_cache: dict[int, CohortOrEmpty], team_id: int
+) -> set[str]:
+    """Keys of all the properties that can be overridden when querying the properties, including inside cohorts."""
+    keys = set()
+    for prop in properties:
+        if prop.type == "cohort":
+            cohort_id = int(cast(Union[str, int], prop.value))
+            if cohorts_cache.get(cohort_id) is None:
+                queried_cohort = (
+                    Cohort.objects.db_manager(DATABASE_FOR_FLAG_MATCHING)
+                    .filter(pk=cohort_id, team_id=team_id, deleted=False)
+                    .first()
+                )
+                cohorts_cache[cohort_id] = queried_cohort or ""
+
+            cohort = cohorts_cache[cohort_id]
+            if cohort:
+                keys |= _get_referenced_property_keys(cohort.properties.flat, cohorts_cache, team_id)
+        else:
+            keys.add(prop.key)
+    return keys
+
+
+def get_feature_flag_hash_key_overrides_for_distinct_ids(
+    team_id: int, distinct_ids: list[str], using_database: str = "default"
+) -> dict[str, dict[str, str]]:
+    """Hash key overrides of each distinct ID's person, keyed by distinct ID and then by feature flag key."""
+    person_id_by_distinct_id = dict(
+        PersonDistinctId.objects.db_manager(using_database)
+        .filter(distinct_id__in=distinct_ids, team_id=team_id)
+        .values_list("distinct_id", "person_id")
+    )
+
+    overrides_by_person_id: dict[int, dict[str, str]] = {}
+    for feature_flag_key, hash_key, person_id in (
+        FeatureFlagHashKeyOverride.objects.db_manager(using_database)
+        .filter(person_id__in=set(person_id_by_distinct_id.values()), team_id=team_id)
+        .values_list("feature_flag_key", "hash_key", "person_id")
+    ):
+        overrides_by_person_id.setdefault(person_id, {})[feature_flag_key] = hash_key
+
+    return {
+        distinct_id: overrides_by_person_id[person_id]
+        for distinct_id, person_id in person_id_by_distinct_id.items()
+        if person_id in overrides_by_person_id
+    }
+
+
 def set_feature_flag_hash_key_overrides(team_id: int, distinct_ids: list[str], hash_key_override: str) -> bool:
     # As a product decision, the first override wins, i.e consistency matters for the first walkthrough.
     # Thus, we don't need to do upserts here.
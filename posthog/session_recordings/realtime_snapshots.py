@@ -1,9 +1,11 @@
+import hashlib
 import json
-from time import sleep
-from typing import Optional
+from time import monotonic
+from typing import NamedTuple, Optional
 
 import structlog
 from prometheus_client import Counter, Histogram
+from redis.client import PubSub
 
 from posthog import settings
 from posthog.redis import get_client
@@ -33,6 +35,9 @@ REALTIME_SUBSCRIPTIONS_DATA_LENGTH = Histogram(
 
 SUBSCRIPTION_CHANNEL = "@posthog/replay/realtime-subscriptions"
 
+# realtime snapshot responses carry the cursor to pass back in to only get snapshots added since
+REALTIME_CURSOR_HEADER = "X-PostHog-Realtime-Cursor"
+
 
 def get_key(team_id: str, suffix: str) -> str:
     return f"@posthog/replay/snapshots/team-{team_id}/{suffix}"
@@ -61,19 +66,89 @@ def publish_subscription(team_id: str, session_id: str) -> None:
         raise
 
 
-def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Optional[list[str]]:
+class RealtimeCursor(NamedTuple):
+    """
+    Where a client has read the snapshots of a session up to. Snapshots can be added with the same score after we've
+    read some with it, so the cursor holds digests of those read at its score, to skip them when reading from it again.
+    """
+
+    score: float
+    digests: frozenset[str]
+
+    @classmethod
+    def parse(cls, value: str) -> "RealtimeCursor":
+        """Parses the string form of a cursor, raising ValueError if it isn't one."""
+        score, _, digests = value.partition(":")
+        return cls(score=float(score), digests=frozenset(digest for digest in digests.split(",") if digest))
+
+    def __str__(self) -> str:
+        return f"{self.score!r}:{','.join(sorted(self.digests))}"
+
+
+class RealtimeSnapshots(NamedTuple):
+    lines: list[str]
+    # pass back in to only read snapshots added after these
+    cursor: RealtimeCursor
+
+
+def get_snapshot_digest(encoded_snapshot: bytes) -> str:
+    return hashlib.blake2b(encoded_snapshot, digest_size=8).hexdigest()
+
+
+def get_notification_channel(team_id: str, session_id: str) -> str:
+    """
+    Mr Blobby publishes to this channel whenever it adds snapshots for the session to Redis
+    """
+    return f"@posthog/replay/realtime-snapshots/team-{team_id}/{session_id}"
+
+
+def wait_for_notification(pubsub: PubSub, timeout: float) -> bool:
+    """
+    Waits up to timeout seconds for a message on the subscribed channels, returns whether one arrived
+    """
+    deadline = monotonic() + timeout
+    while (remaining := deadline - monotonic()) > 0:
+        # returns early with None for subscription confirmations
+        if pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining) is not None:
+            return True
+    return False
+
+
+def get_realtime_snapshots(
+    team_id: str, session_id: str, cursor: Optional[RealtimeCursor] = None
+) -> Optional[RealtimeSnapshots]:
+    """
+    Reads the snapshots Mr Blobby has written to Redis for the session, only those added after the cursor if one is
+    given. When there are none, we wait for Mr Blobby to notify us it has added some before trying again.
+    """
+    attempt_count = 0
+    redis = get_client(settings.SESSION_RECORDING_REDIS_URL)
+    pubsub = redis.pubsub()
     try:
-        redis = get_client(settings.SESSION_RECORDING_REDIS_URL)
         key = get_key(team_id, session_id)
-        encoded_snapshots = redis.zrange(key, 0, -1, withscores=True)
+        # we subscribe before reading so that we can't miss snapshots added in between
+        pubsub.subscribe(get_notification_channel(team_id, session_id))
+
+        while True:
+            encoded_snapshots = redis.zrangebyscore(
+                key, "-inf" if cursor is None else cursor.score, "+inf", withscores=True
+            )
+            if cursor is not None:
+                encoded_snapshots = [
+                    s
+                    for s in encoded_snapshots
+                    if s[1] != cursor.score or get_snapshot_digest(s[0]) not in cursor.digests
+                ]
+
+            # We always publish as it could be that a rebalance has occurred
+            # and the consumer doesn't know it should be sending data to redis
+            publish_subscription(team_id, session_id)
 
-        # We always publish as it could be that a rebalance has occurred
-        # and the consumer doesn't know it should be sending data to redis
-        publish_subscription(team_id, session_id)
+            if encoded_snapshots or attempt_count >= settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_MAX:
+                break
 
-        if not encoded_snapshots and attempt_count < settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_MAX:
             logger.info(
-                "No realtime snapshots found, publishing subscription and retrying",
+                "No realtime snapshots found, publishing subscription and waiting for them",
                 team_id=team_id,
                 session_id=session_id,
                 attempt_count=attempt_count,
@@ -81,12 +156,13 @@ def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Op
 
             PUBLISHED_REALTIME_SUBSCRIPTIONS_COUNTER.labels(attempt_count=attempt_count).inc()
 
-            sleep(
+            wait_for_notification(
+                pubsub,
                 settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS
                 if attempt_count < 4
-                else settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS * 2
+                else settings.REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS * 2,
             )
-            return get_realtime_snapshots(team_id, session_id, attempt_count + 1)
+            attempt_count += 1
 
         if encoded_snapshots:
             snapshots = []
@@ -99,7 +175,13 @@ def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Op
 
             REALTIME_SUBSCRIPTIONS_LOADED_COUNTER.labels(attempt_count=attempt_count).inc()
             REALTIME_SUBSCRIPTIONS_DATA_LENGTH.labels(attempt_count=attempt_count).observe(len(snapshots))
-            return snapshots
+            cursor_score = encoded_snapshots[-1][1]
+            cursor_digests = {get_snapshot_digest(s[0]) for s in encoded_snapshots if s[1] == cursor_score}
+            if cursor is not None and cursor.score == cursor_score:
+                cursor_digests |= cursor.digests
+            return RealtimeSnapshots(
+                lines=snapshots, cursor=RealtimeCursor(score=cursor_score, digests=frozenset(cursor_digests))
+            )
 
         return None
     except Exception as e:
@@ -113,3 +195,5 @@ def get_realtime_snapshots(team_id: str, session_id: str, attempt_count=0) -> Op
             tags={"team_id": team_id, "session_id": session_id},
         )
         raise
+    finally:
+        pubsub.close()
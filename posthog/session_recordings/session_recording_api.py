@@ -13,7 +13,7 @@ import requests
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from drf_spectacular.utils import extend_schema
 from prometheus_client import Counter
 from rest_framework import exceptions, request, serializers, viewsets
@@ -54,6 +54,8 @@ from posthog.session_recordings.queries.session_recording_properties import (
 )
 from posthog.session_recordings.queries.session_replay_events import SessionReplayEvents
 from posthog.session_recordings.realtime_snapshots import (
+    REALTIME_CURSOR_HEADER,
+    RealtimeCursor,
     get_realtime_snapshots,
     publish_subscription,
 )
@@ -291,6 +293,67 @@ def stream_from(url: str, headers: dict | None = None) -> Generator[requests.Res
         session.close()
 
 
+def list_blob_keys(team_id: int, recording: SessionRecording, refresh: bool = False) -> list[str]:
+    """
+    Lists the keys of the recording's blobs, relative to the recording's blob prefix.
+    Listing object storage is slow for recordings with many blobs, so the listing is cached per recording.
+    """
+    cache_key = f"@posthog/replay/blob-keys/team-{team_id}/{recording.session_id}"
+    if not refresh:
+        cached_blob_keys = cache.get(cache_key)
+        if cached_blob_keys is not None:
+            return cached_blob_keys
+
+    blob_prefix = recording.object_storage_path or recording.build_blob_ingestion_storage_path()
+    blob_keys = [
+        full_key.replace(blob_prefix.rstrip("/") + "/", "")
+        for full_key in object_storage.list_objects(blob_prefix) or []
+    ]
+    cache.set(cache_key, blob_keys, timeout=settings.REPLAY_BLOB_KEYS_CACHE_TTL_SECONDS)
+    return blob_keys
+
+
+def blob_key_time_range(blob_key: str) -> tuple[int, int]:
+    """
+    Blob keys are like 1619712000-1619712060, the milliseconds since the epoch of the first and last snapshots in them
+    """
+    blob_key_base = blob_key.split(".")[0]  # Remove the extension if it exists
+    time_range = [int(x) for x in blob_key_base.split("-")]
+    return time_range[0], time_range[-1]
+
+
+def blob_keys_in_window(blob_keys: list[str], start_timestamp: int, end_timestamp: int) -> list[str]:
+    """
+    The blob keys with snapshots between the timestamps, in the order their snapshots were taken
+    """
+    in_window = [
+        blob_key
+        for blob_key in blob_keys
+        if blob_key_time_range(blob_key)[0] <= end_timestamp and blob_key_time_range(blob_key)[1] >= start_timestamp
+    ]
+    return sorted(in_window, key=blob_key_time_range)
+
+
+def stream_merged_blobs(urls: list[str]) -> Generator[bytes, None, None]:
+    """
+    Streams the JSONL files one after the other as a single JSONL file
+    """
+    ends_with_newline = True
+    for url in urls:
+        with stream_from(url=url) as streaming_response:
+            streaming_response.raise_for_status()
+
+            if not ends_with_newline:
+                yield b"\n"
+                ends_with_newline = True
+
+            # unlike the raw stream, this decompresses files stored with a content-encoding
+            for chunk in streaming_response.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    ends_with_newline = chunk.endswith(b"\n")
+                    yield chunk
+
+
 class SnapshotsBurstRateThrottle(PersonalApiKeyRateThrottle):
     scope = "snapshots_burst"
     rate = "120/minute"
@@ -520,6 +583,8 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
             return self._gather_session_recording_sources(recording)
         elif source == "realtime":
             return self._send_realtime_snapshots_to_client(recording, request, event_properties)
+        elif source == "blob" and "start_timestamp" in request.GET:
+            return self._stream_merged_blobs_to_client(recording, request, event_properties)
         elif source == "blob":
             return self._stream_blob_to_client(recording, request, event_properties)
         else:
@@ -556,12 +621,10 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
         response_data = {}
         sources: list[dict] = []
         blob_keys: list[str] | None = None
-        blob_prefix = ""
 
         if recording.object_storage_path:
             if recording.storage_version == "2023-08-01":
-                blob_prefix = recording.object_storage_path
-                blob_keys = object_storage.list_objects(cast(str, blob_prefix))
+                blob_keys = list_blob_keys(self.team.pk, recording, refresh=True)
             else:
                 # originally LTS files were in a single file
                 # TODO this branch can be deleted after 01-08-2024
@@ -575,21 +638,16 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
                 )
                 might_have_realtime = False
         else:
-            blob_prefix = recording.build_blob_ingestion_storage_path()
-            blob_keys = object_storage.list_objects(blob_prefix)
+            blob_keys = list_blob_keys(self.team.pk, recording, refresh=True)
 
         if blob_keys:
-            for full_key in blob_keys:
-                # Keys are like 1619712000-1619712060
-                blob_key = full_key.replace(blob_prefix.rstrip("/") + "/", "")
-                blob_key_base = blob_key.split(".")[0]  # Remove the extension if it exists
-                time_range = [datetime.fromtimestamp(int(x) / 1000, tz=UTC) for x in blob_key_base.split("-")]
-
+            for blob_key in blob_keys:
+                start_timestamp, end_timestamp = blob_key_time_range(blob_key)
                 sources.append(
                     {
                         "source": "blob",
-                        "start_timestamp": time_range[0],
-                        "end_timestamp": time_range.pop(),
+                        "start_timestamp": datetime.fromtimestamp(start_timestamp / 1000, tz=UTC),
+                        "end_timestamp": datetime.fromtimestamp(end_timestamp / 1000, tz=UTC),
                         "blob_key": blob_key,
                     }
                 )
@@ -617,6 +675,64 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
         serializer = SessionRecordingSourcesSerializer(response_data)
         return Response(serializer.data)
 
+    def _blob_file_key(self, recording: SessionRecording, blob_key: str) -> str:
+        if recording.object_storage_path:
+            return f"{recording.object_storage_path}/{blob_key}"
+        blob_prefix = settings.OBJECT_STORAGE_SESSION_RECORDING_BLOB_INGESTION_FOLDER
+        return f"{blob_prefix}/team_id/{self.team.pk}/session_id/{recording.session_id}/data/{blob_key}"
+
+    def _stream_merged_blobs_to_client(
+        self, recording: SessionRecording, request: request.Request, event_properties: dict
+    ) -> StreamingHttpResponse:
+        """
+        Streams every blob overlapping the requested time window as a single response,
+        so that clients don't need a request per blob
+        """
+        start_timestamp = self._validate_timestamp_param(request, "start_timestamp")
+        end_timestamp = self._validate_timestamp_param(request, "end_timestamp")
+        if start_timestamp > end_timestamp:
+            raise exceptions.ValidationError("start_timestamp must not be after end_timestamp")
+
+        if recording.object_storage_path and recording.storage_version != "2023-08-01":
+            raise exceptions.ValidationError("Recording is stored in a single file, request it by blob_key instead")
+
+        blob_keys = list_blob_keys(self.team.pk, recording)
+        if not blob_keys or max(blob_key_time_range(blob_key)[1] for blob_key in blob_keys) < end_timestamp:
+            # the recording might have more blobs since we listed them
+            blob_keys = list_blob_keys(self.team.pk, recording, refresh=True)
+
+        blob_keys = blob_keys_in_window(blob_keys, start_timestamp, end_timestamp)
+        if not blob_keys:
+            raise exceptions.NotFound("Snapshot files not found")
+
+        with GENERATE_PRE_SIGNED_URL_HISTOGRAM.time():
+            urls = []
+            for blob_key in blob_keys:
+                # very short-lived pre-signed URL, the response streams the files one after the other
+                url = object_storage.get_presigned_url(self._blob_file_key(recording, blob_key), expiration=60 * 5)
+                if not url:
+                    raise exceptions.NotFound("Snapshot file not found")
+                urls.append(url)
+
+        event_properties["source"] = "blob"
+        event_properties["blob_keys_count"] = len(blob_keys)
+        posthoganalytics.capture(
+            self._distinct_id_from_request(request),
+            "session recording snapshots v2 loaded",
+            event_properties,
+        )
+
+        response = StreamingHttpResponse(stream_merged_blobs(urls), content_type="application/json")
+        response["Content-Disposition"] = "inline"
+        return response
+
+    @staticmethod
+    def _validate_timestamp_param(request: request.Request, param: str) -> int:
+        value = request.GET.get(param, "")
+        if not value.isdigit():
+            raise exceptions.ValidationError(f"Must provide {param} as milliseconds since the epoch")
+        return int(value)
+
     @staticmethod
     def _validate_blob_key(blob_key: Any) -> None:
         if not blob_key:
@@ -772,15 +888,11 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
 
         # very short-lived pre-signed URL
         with GENERATE_PRE_SIGNED_URL_HISTOGRAM.time():
-            if recording.object_storage_path:
-                if recording.storage_version == "2023-08-01":
-                    file_key = f"{recording.object_storage_path}/{blob_key}"
-                else:
-                    # this is a legacy recording, we need to load the file from the old path
-                    file_key = convert_original_version_lts_recording(recording)
+            if recording.object_storage_path and recording.storage_version != "2023-08-01":
+                # this is a legacy recording, we need to load the file from the old path
+                file_key = convert_original_version_lts_recording(recording)
             else:
-                blob_prefix = settings.OBJECT_STORAGE_SESSION_RECORDING_BLOB_INGESTION_FOLDER
-                file_key = f"{blob_prefix}/team_id/{self.team.pk}/session_id/{recording.session_id}/data/{blob_key}"
+                file_key = self._blob_file_key(recording, blob_key)
             url = object_storage.get_presigned_url(file_key, expiration=60)
             if not url:
                 raise exceptions.NotFound("Snapshot file not found")
@@ -836,15 +948,24 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
     ) -> HttpResponse | Response:
         version = request.GET.get("version", "og")
 
+        # clients polling for realtime snapshots pass back the cursor of the previous response to only get new snapshots
+        cursor: Optional[RealtimeCursor] = None
+        if request.GET.get("cursor"):
+            try:
+                cursor = RealtimeCursor.parse(request.GET["cursor"])
+            except ValueError:
+                raise exceptions.ValidationError(f"Invalid cursor: {request.GET['cursor']}")
+
         with GET_REALTIME_SNAPSHOTS_FROM_REDIS.time():
-            snapshot_lines = (
-                get_realtime_snapshots(
-                    team_id=self.team.pk,
-                    session_id=str(recording.session_id),
-                )
-                or []
+            realtime_snapshots = get_realtime_snapshots(
+                team_id=self.team.pk,
+                session_id=str(recording.session_id),
+                cursor=cursor,
             )
 
+        snapshot_lines = realtime_snapshots.lines if realtime_snapshots else []
+        next_cursor = realtime_snapshots.cursor if realtime_snapshots else cursor
+
         event_properties["source"] = "realtime"
         event_properties["snapshots_length"] = len(snapshot_lines)
         posthoganalytics.capture(
@@ -860,7 +981,7 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
             # so that existing browser sessions, that don't know about the new format
             # can carry on working until the next refresh
             serializer = SessionRecordingSourcesSerializer({"snapshots": [json.loads(s) for s in snapshot_lines]})
-            return Response(serializer.data)
+            response: HttpResponse = Response(serializer.data)
         elif version == "2024-04-30":
             response = HttpResponse(
                 # convert list to a jsonl response
@@ -869,10 +990,13 @@ class SessionRecordingViewSet(TeamAndOrgViewSetMixin, viewsets.GenericViewSet, U
             )
             # the browser is not allowed to cache this at all
             response["Cache-Control"] = "no-store"
-            return response
         else:
             raise exceptions.ValidationError(f"Invalid version: {version}")
 
+        if next_cursor is not None:
+            response[REALTIME_CURSOR_HEADER] = str(next_cursor)
+        return response
+
 
 def list_recordings(
     filter: SessionRecordingsFilter, request: request.Request, context: dict[str, Any]
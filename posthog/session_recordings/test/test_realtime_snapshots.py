@@ -0,0 +1,93 @@
+import json
+from time import monotonic
+
+import pytest
+
+from posthog import settings
+from posthog.redis import get_client
+from posthog.session_recordings.realtime_snapshots import (
+    RealtimeCursor,
+    get_key,
+    get_notification_channel,
+    get_realtime_snapshots,
+    wait_for_notification,
+)
+
+
+@pytest.fixture
+def redis():
+    redis = get_client(settings.SESSION_RECORDING_REDIS_URL)
+    redis.flushall()
+    yield redis
+    redis.flushall()
+
+
+def add_snapshots(redis, team_id: str, session_id: str, timestamp: int, *snapshots: dict) -> None:
+    redis.zadd(get_key(team_id, session_id), {"\n".join(json.dumps(s) for s in snapshots): timestamp})
+
+
+def test_get_realtime_snapshots_reads_snapshots_after_cursor(redis):
+    add_snapshots(redis, "1", "session", 1000, {"n": 1}, {"n": 2})
+    add_snapshots(redis, "1", "session", 2000, {"n": 3})
+
+    realtime_snapshots = get_realtime_snapshots("1", "session")
+    assert realtime_snapshots is not None
+    assert realtime_snapshots.lines == ['{"n": 1}', '{"n": 2}', '{"n": 3}']
+    assert realtime_snapshots.cursor.score == 2000
+
+    add_snapshots(redis, "1", "session", 3000, {"n": 4})
+
+    realtime_snapshots = get_realtime_snapshots("1", "session", cursor=realtime_snapshots.cursor)
+    assert realtime_snapshots is not None
+    assert realtime_snapshots.lines == ['{"n": 4}']
+    assert realtime_snapshots.cursor.score == 3000
+
+
+def test_get_realtime_snapshots_reads_snapshots_added_with_the_same_score_as_the_cursor(redis, monkeypatch):
+    monkeypatch.setattr(settings, "REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_MAX", 0)
+    add_snapshots(redis, "1", "session", 1000, {"n": 2})
+
+    realtime_snapshots = get_realtime_snapshots("1", "session")
+    assert realtime_snapshots is not None
+    assert realtime_snapshots.lines == ['{"n": 2}']
+
+    # sorts before the snapshot already read, as members with the same score are ordered by their content
+    add_snapshots(redis, "1", "session", 1000, {"n": 1})
+
+    realtime_snapshots = get_realtime_snapshots(
+        "1", "session", cursor=RealtimeCursor.parse(str(realtime_snapshots.cursor))
+    )
+    assert realtime_snapshots is not None
+    assert realtime_snapshots.lines == ['{"n": 1}']
+    assert len(realtime_snapshots.cursor.digests) == 2
+
+    assert get_realtime_snapshots("1", "session", cursor=realtime_snapshots.cursor) is None
+
+
+def test_get_realtime_snapshots_gives_up_when_there_are_no_new_snapshots(redis, monkeypatch):
+    monkeypatch.setattr(settings, "REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_MAX", 2)
+    monkeypatch.setattr(settings, "REALTIME_SNAPSHOTS_FROM_REDIS_ATTEMPT_TIMEOUT_SECONDS", 0.05)
+    add_snapshots(redis, "1", "session", 1000, {"n": 1})
+
+    realtime_snapshots = get_realtime_snapshots("1", "session")
+    assert realtime_snapshots is not None
+
+    assert get_realtime_snapshots("1", "session", cursor=realtime_snapshots.cursor) is None
+    assert get_realtime_snapshots("1", "other-session") is None
+
+
+def test_wait_for_notification_returns_as_soon_as_snapshots_are_added(redis):
+    pubsub = redis.pubsub()
+    pubsub.subscribe(get_notification_channel("1", "session"))
+
+    start = monotonic()
+    assert wait_for_notification(pubsub, timeout=0.05) is False
+    assert monotonic() - start >= 0.05
+
+    redis.publish(get_notification_channel("1", "session"), "1000")
+
+    start = monotonic()
+    assert wait_for_notification(pubsub, timeout=10) is True
+    assert monotonic() - start < 1
+
+    pubsub.close()
@@ -25,6 +25,7 @@ from posthog.session_recordings.models.session_recording_event import (
 from posthog.session_recordings.queries.test.session_replay_sql import (
     produce_replay_summary,
 )
+from posthog.session_recordings.realtime_snapshots import REALTIME_CURSOR_HEADER, RealtimeCursor, RealtimeSnapshots
 from posthog.session_recordings.test import setup_stream_from
 from posthog.test.base import (
     APIBaseTest,
@@ -962,15 +963,78 @@ class TestSessionRecordings(APIBaseTest, ClickhouseTestMixin, QueryMatchingTest)
         # by default a session recording is deleted, so we have to explicitly mark the mock as not deleted
         mock_get_session_recording.return_value = SessionRecording(session_id=session_id, team=self.team, deleted=False)
 
-        mock_realtime_snapshots.return_value = [
-            json.dumps({"some": "\ud801\udc37 probably from console logs"}),
-            json.dumps({"some": "more data"}),
-        ]
+        mock_realtime_snapshots.return_value = RealtimeSnapshots(
+            lines=[
+                json.dumps({"some": "\ud801\udc37 probably from console logs"}),
+                json.dumps({"some": "more data"}),
+            ],
+            cursor=RealtimeCursor(score=1682608337071.0, digests=frozenset({"b", "a"})),
+        )
 
         response = self.client.get(url)
         assert response.status_code == status.HTTP_200_OK, response.json()
         assert response.headers.get("content-type") == "application/json"
         assert response.content == expected_response
+        assert response.headers.get(REALTIME_CURSOR_HEADER) == "1682608337071.0:a,b"
+
+        response = self.client.get(f"{url}&cursor=1682608337071.0:a,b")
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_realtime_snapshots.call_args.kwargs["cursor"] == RealtimeCursor(
+            score=1682608337071.0, digests=frozenset({"a", "b"})
+        )
+
+        response = self.client.get(f"{url}&cursor=yesterday")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @patch(
+        "posthog.session_recordings.queries.session_replay_events.SessionReplayEvents.exists",
+        return_value=True,
+    )
+    @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
+    @patch("posthog.session_recordings.session_recording_api.object_storage.list_objects")
+    @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
+    @patch("posthog.session_recordings.session_recording_api.stream_from")
+    def test_can_get_merged_session_recording_blobs_for_a_time_window(
+        self, mock_stream_from, mock_presigned_url, mock_list_objects, mock_get_session_recording, _mock_exists
+    ) -> None:
+        session_id = str(uuid.uuid4())
+        prefix = f"session_recordings/team_id/{self.team.pk}/session_id/{session_id}/data"
+        mock_get_session_recording.return_value = SessionRecording(session_id=session_id, team=self.team, deleted=False)
+        mock_list_objects.return_value = [f"{prefix}/3000-4000", f"{prefix}/1000-2000", f"{prefix}/5000-6000"]
+        mock_presigned_url.side_effect = lambda key, **kwargs: f"https://test.com/{key}"
+
+        def stream_from_sideeffect(url: str, **kwargs):
+            streaming_response = setup_stream_from()
+            # the first file ends in a newline, the second doesn't
+            blob_key = url.split("/")[-1]
+            streaming_response.iter_content.return_value = [f'{{"blob": "{blob_key}"}}'.encode(), b"\n"][
+                : 2 if blob_key == "1000-2000" else 1
+            ]
+            return streaming_response
+
+        mock_stream_from.side_effect = stream_from_sideeffect
+
+        url = f"/api/projects/{self.team.pk}/session_recordings/{session_id}/snapshots/?source=blob"
+        response = self.client.get(f"{url}&start_timestamp=1500&end_timestamp=3500")
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == b'{"blob": "1000-2000"}\n{"blob": "3000-4000"}'  # type: ignore
+        assert [call.kwargs["url"] for call in mock_stream_from.call_args_list] == [
+            f"https://test.com/{prefix}/1000-2000",
+            f"https://test.com/{prefix}/3000-4000",
+        ]
+
+        # the blob listing is cached between requests for the same recording
+        response = self.client.get(f"{url}&start_timestamp=5000&end_timestamp=5500")
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == b'{"blob": "5000-6000"}'  # type: ignore
+        assert mock_list_objects.call_count == 1
+
+        response = self.client.get(f"{url}&start_timestamp=6500&end_timestamp=7000")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert mock_list_objects.call_count == 2
+
+        response = self.client.get(f"{url}&start_timestamp=3000&end_timestamp=yesterday")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
 
     @patch("posthog.session_recordings.session_recording_api.SessionRecording.get_or_build")
     @patch("posthog.session_recordings.session_recording_api.object_storage.get_presigned_url")
@@ -111,6 +111,24 @@ IN_UNIT_TESTING: bool = get_from_env("IN_UNIT_TESTING", False, type_cast=str_to_
 
 HOGQL_INCREASED_MAX_EXECUTION_TIME: int = get_from_env("HOGQL_INCREASED_MAX_EXECUTION_TIME", 600, type_cast=int)
 
+# Process-local cache of built HogQL database schemas, invalidated whenever a team's warehouse setup changes
+HOGQL_DATABASE_CACHE_ENABLED: bool = get_from_env("HOGQL_DATABASE_CACHE_ENABLED", not TEST, type_cast=str_to_bool)
+HOGQL_DATABASE_CACHE_SIZE: int = get_from_env("HOGQL_DATABASE_CACHE_SIZE", 256, type_cast=int)
+# Safety net for changes made outside of Django (e.g. group types created by the plugin server)
+HOGQL_DATABASE_CACHE_TTL_SECONDS: int = get_from_env("HOGQL_DATABASE_CACHE_TTL_SECONDS", 60, type_cast=int)
+
+# Process-local cache of parsed HogQL ASTs, keyed by the source string
+HOGQL_PARSE_CACHE_ENABLED: bool = get_from_env("HOGQL_PARSE_CACHE_ENABLED", True, type_cast=str_to_bool)
+HOGQL_PARSE_CACHE_SIZE: int = get_from_env("HOGQL_PARSE_CACHE_SIZE", 4096, type_cast=int)
+
+# Process-local cache of ClickHouse SQL printed from HogQL ASTs, keyed by AST structure, team schema and modifiers
+HOGQL_COMPILED_QUERY_CACHE_ENABLED: bool = get_from_env(
+    "HOGQL_COMPILED_QUERY_CACHE_ENABLED", not TEST, type_cast=str_to_bool
+)
+HOGQL_COMPILED_QUERY_CACHE_SIZE: int = get_from_env("HOGQL_COMPILED_QUERY_CACHE_SIZE", 1024, type_cast=int)
+# Bounds how long property definition type changes can go unnoticed in cached SQL
+HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS: int = get_from_env("HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS", 120, type_cast=int)
+
 # Extend and override these settings with EE's ones
 if "ee.apps.EnterpriseConfig" in INSTALLED_APPS:
     from ee.settings import *  # noqa: F401, F403
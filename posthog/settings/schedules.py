@@ -1,5 +1,8 @@
+import json
+import os
+
 from posthog.settings.base_variables import TEST
-from posthog.settings.utils import get_from_env
+from posthog.settings.utils import get_from_env, str_to_bool
 
 USE_PRECALCULATED_CH_COHORT_PEOPLE = not TEST
 
@@ -37,6 +40,35 @@ COUNT_TILES_WITH_NO_FILTERS_HASH_INTERVAL_SECONDS = get_from_env(
 
 CACHED_RESULTS_TTL = 7 * 24 * 60 * 60  # how long to keep cached results for
 
+# Only one process calculates a given query cache key at a time, others wait for its result
+QUERY_CALCULATION_LOCK_TIMEOUT_SECONDS = get_from_env("QUERY_CALCULATION_LOCK_TIMEOUT_SECONDS", 600, type_cast=int)
+QUERY_CALCULATION_LOCK_WAIT_SECONDS = get_from_env("QUERY_CALCULATION_LOCK_WAIT_SECONDS", 60, type_cast=float)
+
+# Async queries wait in per-lane, per-team fair queues and are only sent to Celery when there's room for them
+QUERY_SCHEDULER_ENABLED = get_from_env("QUERY_SCHEDULER_ENABLED", False, type_cast=str_to_bool)
+try:
+    # Overrides of `weight`, `concurrency` and `team_concurrency` per lane, e.g. {"warming": {"concurrency": 20}}
+    QUERY_SCHEDULER_LANE_SETTINGS: dict = json.loads(os.getenv("QUERY_SCHEDULER_LANE_SETTINGS", "{}"))
+except Exception:
+    QUERY_SCHEDULER_LANE_SETTINGS = {}
+try:
+    # Teams get a share of their lane proportional to their weight (default 1), e.g. {"2": 3}
+    QUERY_SCHEDULER_TEAM_WEIGHTS: dict = json.loads(os.getenv("QUERY_SCHEDULER_TEAM_WEIGHTS", "{}"))
+except Exception:
+    QUERY_SCHEDULER_TEAM_WEIGHTS = {}
+
+# Cached results larger than this are stored zstd compressed, in chunks, apart from the rest of the response
+QUERY_CACHE_CHUNKING_THRESHOLD_BYTES = get_from_env("QUERY_CACHE_CHUNKING_THRESHOLD_BYTES", 256 * 1024, type_cast=int)
+QUERY_CACHE_CHUNK_SIZE_BYTES = get_from_env("QUERY_CACHE_CHUNK_SIZE_BYTES", 1024 * 1024, type_cast=int)
+
+# Refreshing a cached trends time series only recalculates the intervals since its last refresh
+TRENDS_INCREMENTAL_CALCULATION_ENABLED = get_from_env(
+    "TRENDS_INCREMENTAL_CALCULATION_ENABLED", not TEST, type_cast=str_to_bool
+)
+
+# Stale dashboard tiles whose queries can share a scan of the events table are calculated in a single query
+DASHBOARD_TILE_BATCHING_ENABLED = get_from_env("DASHBOARD_TILE_BATCHING_ENABLED", not TEST, type_cast=str_to_bool)
+
 # Schedule to run asynchronous data deletion on. Follows crontab syntax.
 # Use empty string to prevent this
 CLEAR_CLICKHOUSE_REMOVED_DATA_SCHEDULE_CRON = get_from_env(
@@ -1,6 +1,6 @@
 import os
 
-from posthog.settings.utils import get_from_env, get_list
+from posthog.settings.utils import get_from_env, get_list, str_to_bool
 
 TEMPORAL_NAMESPACE: str = os.getenv("TEMPORAL_NAMESPACE", "default")
 TEMPORAL_TASK_QUEUE: str = os.getenv("TEMPORAL_TASK_QUEUE", "no-sandbox-python-django")
@@ -12,12 +12,38 @@ TEMPORAL_CLIENT_KEY: str | None = os.getenv("TEMPORAL_CLIENT_KEY", None)
 TEMPORAL_WORKFLOW_MAX_ATTEMPTS: str = os.getenv("TEMPORAL_WORKFLOW_MAX_ATTEMPTS", "3")
 
 BATCH_EXPORT_S3_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
+BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS: int = get_from_env("BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS", 4, type_cast=int)
 BATCH_EXPORT_SNOWFLAKE_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 100  # 100MB
 BATCH_EXPORT_POSTGRES_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
 BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 100  # 100MB
+BATCH_EXPORT_REDSHIFT_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
 BATCH_EXPORT_HTTP_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
 BATCH_EXPORT_HTTP_BATCH_SIZE: int = 5000
 BATCH_EXPORT_BUFFER_QUEUE_MAX_SIZE_BYTES: int = 1024 * 1024 * 300  # 300MB
+BATCH_EXPORT_BUFFER_QUEUE_MIN_SIZE_BYTES: int = get_from_env(
+    "BATCH_EXPORT_BUFFER_QUEUE_MIN_SIZE_BYTES", 1024 * 1024 * 50, type_cast=int
+)  # 50MB
+# Seconds of the destination's throughput to buffer in the queue, or 0 to always allow the max size.
+BATCH_EXPORT_BUFFER_QUEUE_TARGET_SECONDS: int = get_from_env(
+    "BATCH_EXPORT_BUFFER_QUEUE_TARGET_SECONDS", 30, type_cast=int
+)
+BATCH_EXPORT_RECORD_BATCH_TARGET_SIZE_BYTES: int = get_from_env(
+    "BATCH_EXPORT_RECORD_BATCH_TARGET_SIZE_BYTES", 1024 * 1024 * 10, type_cast=int
+)  # 10MB
+BATCH_EXPORT_BACKFILL_MAX_CONCURRENT_RUNS: int = get_from_env(
+    "BATCH_EXPORT_BACKFILL_MAX_CONCURRENT_RUNS", 1, type_cast=int
+)
+BATCH_EXPORT_BACKFILL_MERGE_EMPTY_INTERVALS: bool = get_from_env(
+    "BATCH_EXPORT_BACKFILL_MERGE_EMPTY_INTERVALS", False, type_cast=str_to_bool
+)
+# Each backfill run executes one ClickHouse query, so this caps the queries a team's backfills run at once.
+BATCH_EXPORT_BACKFILL_MAX_CONCURRENT_QUERIES_PER_TEAM: int = get_from_env(
+    "BATCH_EXPORT_BACKFILL_MAX_CONCURRENT_QUERIES_PER_TEAM", 4, type_cast=int
+)
+# Comma separated list of overrides in the format "team_id:max_concurrent_queries"
+BATCH_EXPORT_BACKFILL_CONCURRENCY_OVERRIDES: dict[int, int] = dict(
+    [map(int, o.split(":")) for o in os.getenv("BATCH_EXPORT_BACKFILL_CONCURRENCY_OVERRIDES", "").split(",") if o]  # type: ignore
+)
 
 UNCONSTRAINED_TIMESTAMP_TEAM_IDS: list[str] = get_list(os.getenv("UNCONSTRAINED_TIMESTAMP_TEAM_IDS", ""))
 ASYNC_ARROW_STREAMING_TEAM_IDS: list[str] = get_list(os.getenv("ASYNC_ARROW_STREAMING_TEAM_IDS", ""))
@@ -29,6 +55,10 @@ OVERRIDE_TIMESTAMP_TEAM_IDS: dict[int, int] = dict(
 
 CLICKHOUSE_MAX_EXECUTION_TIME: int = get_from_env("CLICKHOUSE_MAX_EXECUTION_TIME", 0, type_cast=int)
 CLICKHOUSE_MAX_MEMORY_USAGE: int = get_from_env("CLICKHOUSE_MAX_MEMORY_USAGE", 100 * 1000 * 1000 * 1000, type_cast=int)
+# Compression of the Arrow record batches streamed from ClickHouse: "lz4_frame", "zstd" or "none".
+CLICKHOUSE_ARROW_COMPRESSION_METHOD: str = get_from_env("CLICKHOUSE_ARROW_COMPRESSION_METHOD", "zstd")
+# HTTP compression of responses streaming Arrow record batches: "gzip", "deflate", "br" or empty to disable.
+CLICKHOUSE_ARROW_HTTP_COMPRESSION: str = get_from_env("CLICKHOUSE_ARROW_HTTP_COMPRESSION", "gzip")
 CLICKHOUSE_MAX_BLOCK_SIZE_DEFAULT: int = get_from_env("CLICKHOUSE_MAX_BLOCK_SIZE_DEFAULT", 10000, type_cast=int)
 # Comma separated list of overrides in the format "team_id:block_size"
 CLICKHOUSE_MAX_BLOCK_SIZE_OVERRIDES: dict[int, int] = dict(
@@ -59,6 +59,10 @@ DECIDE_SKIP_HASH_KEY_OVERRIDE_WRITES = get_from_env(
 # if `true` we disable session replay if over quota
 DECIDE_SESSION_REPLAY_QUOTA_CHECK = get_from_env("DECIDE_SESSION_REPLAY_QUOTA_CHECK", False, type_cast=str_to_bool)
 
+# Process-local index of feature flags compiled for evaluation, per team
+FLAG_INDEX_CACHE_ENABLED = get_from_env("FLAG_INDEX_CACHE_ENABLED", True, type_cast=str_to_bool)
+FLAG_INDEX_CACHE_SIZE = get_from_env("FLAG_INDEX_CACHE_SIZE", 1000, type_cast=int)
+
 # Application definition
 
 INSTALLED_APPS = [
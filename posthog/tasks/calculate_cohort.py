@@ -1,4 +1,5 @@
 import time
+from collections import defaultdict
 from typing import Any, Optional
 
 import structlog
@@ -13,8 +14,13 @@ from datetime import timedelta
 
 from posthog.api.monitoring import Feature
 from posthog.models import Cohort
-from posthog.models.cohort import get_and_update_pending_version
-from posthog.models.cohort.util import clear_stale_cohortpeople
+from posthog.models.cohort import CohortOrEmpty, calculate_people_ch_in_batch, get_and_update_pending_version
+from posthog.models.cohort.util import (
+    can_calculate_cohortpeople_in_batch,
+    can_recalculate_cohortpeople_incrementally,
+    clear_stale_cohortpeople,
+    get_dependent_cohorts,
+)
 from posthog.models.user import User
 
 COHORT_RECALCULATIONS_BACKLOG_GAUGE = Gauge(
@@ -30,6 +36,8 @@ COHORT_STALENESS_HOURS_GAUGE = Gauge(
 logger = structlog.get_logger(__name__)
 
 MAX_AGE_MINUTES = 15
+# Below this, there's no scan of the person table to share, so cohorts of a team are calculated on their own
+MIN_COHORTS_TO_CALCULATE_IN_BATCH = 2
 
 
 def calculate_cohorts(parallel_count: int) -> None:
@@ -49,7 +57,7 @@ def calculate_cohorts(parallel_count: int) -> None:
         output_field=DurationField(),
     )
 
-    for cohort in (
+    due_cohorts = (
         Cohort.objects.filter(
             deleted=False,
             is_calculating=False,
@@ -63,9 +71,30 @@ def calculate_cohorts(parallel_count: int) -> None:
         )
         .exclude(is_static=True)
         .order_by(F("last_calculation").asc(nulls_first=True))[0:parallel_count]
-    ):
+    )
+
+    # Cohorts of a team that only filter on person properties are calculated together, in one scan of its persons.
+    # That's only worth it for cohorts that need a full recalculation, the others only evaluate persons that changed.
+    batches: dict[int, list[Cohort]] = defaultdict(list)
+    seen_cohorts_cache: dict[int, CohortOrEmpty] = {}
+    for cohort in due_cohorts:
         cohort = Cohort.objects.filter(pk=cohort.pk).get()
-        update_cohort(cohort, initiating_user=None)
+        get_dependent_cohorts(cohort, seen_cohorts_cache=seen_cohorts_cache)
+        # The version `get_and_update_pending_version` will hand out for this calculation
+        next_pending_version = (cohort.pending_version or 0) + 1
+        needs_full_recalculation = not can_recalculate_cohortpeople_incrementally(cohort, next_pending_version)
+        if needs_full_recalculation and can_calculate_cohortpeople_in_batch(cohort, seen_cohorts_cache):
+            batches[cohort.team_id].append(cohort)
+        else:
+            # Nothing about the cohort itself changed since it was last calculated, only its persons may have
+            update_cohort(cohort, initiating_user=None, incremental=True)
+
+    for cohorts in batches.values():
+        if len(cohorts) >= MIN_COHORTS_TO_CALCULATE_IN_BATCH:
+            update_cohorts_in_batch(cohorts)
+        else:
+            for cohort in cohorts:
+                update_cohort(cohort, initiating_user=None, incremental=True)
 
     # update gauge
     backlog = (
@@ -81,9 +110,16 @@ def calculate_cohorts(parallel_count: int) -> None:
     COHORT_RECALCULATIONS_BACKLOG_GAUGE.set(backlog)
 
 
-def update_cohort(cohort: Cohort, *, initiating_user: Optional[User]) -> None:
+def update_cohort(cohort: Cohort, *, initiating_user: Optional[User], incremental: bool = False) -> None:
     pending_version = get_and_update_pending_version(cohort)
-    calculate_cohort_ch.delay(cohort.id, pending_version, initiating_user.id if initiating_user else None)
+    calculate_cohort_ch.delay(
+        cohort.id, pending_version, initiating_user.id if initiating_user else None, incremental=incremental
+    )
+
+
+def update_cohorts_in_batch(cohorts: list[Cohort]) -> None:
+    pending_versions = [(cohort.pk, get_and_update_pending_version(cohort)) for cohort in cohorts]
+    calculate_cohorts_in_batch_ch.delay(cohorts[0].team_id, pending_versions)
 
 
 @shared_task(ignore_result=True)
@@ -93,7 +129,9 @@ def clear_stale_cohort(cohort_id: int, before_version: int) -> None:
 
 
 @shared_task(ignore_result=True, max_retries=2)
-def calculate_cohort_ch(cohort_id: int, pending_version: int, initiating_user_id: Optional[int] = None) -> None:
+def calculate_cohort_ch(
+    cohort_id: int, pending_version: int, initiating_user_id: Optional[int] = None, incremental: bool = False
+) -> None:
     cohort: Cohort = Cohort.objects.get(pk=cohort_id)
 
     set_tag("feature", Feature.COHORT.value)
@@ -105,7 +143,22 @@ def calculate_cohort_ch(cohort_id: int, pending_version: int, initiating_user_id
         staleness_hours = (timezone.now() - cohort.last_calculation).total_seconds() / 3600
     COHORT_STALENESS_HOURS_GAUGE.set(staleness_hours)
 
-    cohort.calculate_people_ch(pending_version, initiating_user_id=initiating_user_id)
+    cohort.calculate_people_ch(pending_version, initiating_user_id=initiating_user_id, incremental=incremental)
+
+
+@shared_task(ignore_result=True, max_retries=2)
+def calculate_cohorts_in_batch_ch(team_id: int, pending_versions: list[tuple[int, int]]) -> None:
+    versions_by_cohort_id = dict(pending_versions)
+    cohorts = list(Cohort.objects.filter(team_id=team_id, pk__in=versions_by_cohort_id.keys()))
+
+    set_tag("feature", Feature.COHORT.value)
+    set_tag("team_id", team_id)
+
+    for cohort in cohorts:
+        if cohort.last_calculation is not None:
+            COHORT_STALENESS_HOURS_GAUGE.set((timezone.now() - cohort.last_calculation).total_seconds() / 3600)
+
+    calculate_people_ch_in_batch(team_id, cohorts, versions_by_cohort_id)
 
 
 @shared_task(ignore_result=True, max_retries=1)
@@ -2,7 +2,6 @@ import datetime
 import io
 from typing import Any, Optional
 from collections.abc import Generator
-from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
 
 from pydantic import BaseModel
 import requests
@@ -16,7 +15,7 @@ from posthog.api.services.query import process_query_dict
 from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.jwt import PosthogJwtAudience, encode_jwt
 from posthog.models.exported_asset import ExportedAsset, save_content
-from posthog.utils import absolute_uri
+from posthog.utils import absolute_uri, add_query_params
 from .ordered_csv_renderer import OrderedCsvRenderer
 from ..exporter import (
     EXPORT_FAILED_COUNTER,
@@ -59,28 +58,6 @@ RESULT_LIMIT_LENGTH = 10
 # 5. We save the final blob output and update the ExportedAsset
 
 
-def add_query_params(url: str, params: dict[str, str]) -> str:
-    """
-    Uses parse_qsl because parse_qs turns all values into lists but doesn't unbox them when re-encoded
-    """
-    parsed = urlparse(url)
-    query_params = parse_qsl(parsed.query, keep_blank_values=True)
-
-    update_params: list[tuple[str, Any]] = []
-    for param, value in query_params:
-        if param in params:
-            update_params.append((param, params.pop(param)))
-        else:
-            update_params.append((param, value))
-
-    for key, value in params.items():
-        update_params.append((key, value))
-
-    encodedQueryParams = urlencode(update_params, quote_via=quote)
-    parsed = parsed._replace(query=encodedQueryParams)
-    return urlunparse(parsed)
-
-
 def _convert_response_to_csv_data(data: Any) -> Generator[Any, None, None]:
     if isinstance(data.get("results"), list):
         results = data.get("results")
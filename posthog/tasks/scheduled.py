@@ -32,6 +32,7 @@ from posthog.tasks.tasks import (
     clickhouse_row_count,
     clickhouse_send_license_usage,
     delete_expired_exported_assets,
+    dispatch_scheduled_queries,
     ee_persist_finished_recordings,
     find_flags_with_enriched_analytics,
     graphile_worker_queue_size,
@@ -96,6 +97,9 @@ def setup_periodic_tasks(sender: Celery, **kwargs: Any) -> None:
 
     add_periodic_task_with_expiry(sender, 20, start_poll_query_performance.s(), "20 sec query performance heartbeat")
 
+    if settings.QUERY_SCHEDULER_ENABLED:
+        add_periodic_task_with_expiry(sender, 10, dispatch_scheduled_queries.s(), "10 sec scheduled query dispatch")
+
     sender.add_periodic_task(
         crontab(hour="*", minute="0"),
         schedule_warming_for_teams_task.s(),
@@ -12,6 +12,7 @@ from redis import Redis
 from structlog import get_logger
 
 from posthog.clickhouse.client.limit import CeleryConcurrencyLimitExceeded, limit_concurrency
+from posthog.clickhouse.client.query_scheduler import dispatch_scheduled_tasks, releases_scheduler_slot
 from posthog.cloud_utils import is_cloud
 from posthog.errors import CHQueryErrorTooManySimultaneousQueries
 from posthog.hogql.constants import LimitContext
@@ -31,6 +32,12 @@ def delete_expired_exported_assets() -> None:
     ExportedAsset.delete_expired_assets()
 
 
+@shared_task(ignore_result=True)
+def dispatch_scheduled_queries() -> None:
+    # Safety net, in case slots were freed up without anyone dispatching afterwards (e.g. a worker died)
+    dispatch_scheduled_tasks()
+
+
 @shared_task(ignore_result=True)
 def redis_heartbeat() -> None:
     get_client().set("POSTHOG_HEARTBEAT", int(time.time()))
@@ -51,6 +58,7 @@ def redis_heartbeat() -> None:
     expires=60 * 10,  # Do not run queries that got stuck for more than this
     reject_on_worker_lost=True,
 )
+@releases_scheduler_slot
 @limit_concurrency(90)  # Do not go above what CH can handle (max_concurrent_queries)
 @limit_concurrency(
     10, key=lambda *args, **kwargs: kwargs.get("team_id") or args[0]
@@ -61,6 +69,7 @@ def process_query_task(
     query_id: str,
     query_json: dict,
     limit_context: Optional[LimitContext] = None,
+    is_refresh_forced: bool = False,
 ) -> None:
     """
     Kick off query
@@ -74,6 +83,7 @@ def process_query_task(
         query_id=query_id,
         query_json=query_json,
         limit_context=limit_context,
+        is_refresh_forced=is_refresh_forced,
     )
 
 
@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, patch
 from freezegun import freeze_time
 
 from posthog.models.cohort import Cohort
+from posthog.models.cohort.util import FULL_CALCULATION_EVERY_N_VERSIONS
 from posthog.models.person import Person
 from posthog.tasks.calculate_cohort import calculate_cohort_from_list, calculate_cohorts, MAX_AGE_MINUTES
 from posthog.test.base import APIBaseTest
@@ -91,4 +92,62 @@ def calculate_cohort_test_factory(event_factory: Callable, person_factory: Calla
             calculate_cohorts(5)
             self.assertEqual(patch_update_cohort.call_count, 2)
 
+        @patch("posthog.tasks.calculate_cohort.update_cohorts_in_batch")
+        @patch("posthog.tasks.calculate_cohort.update_cohort")
+        def test_person_property_cohorts_of_a_team_are_calculated_in_batch(
+            self, patch_update_cohort: MagicMock, patch_update_cohorts_in_batch: MagicMock
+        ) -> None:
+            last_calculation = timezone.now() - relativedelta(minutes=MAX_AGE_MINUTES + 1)
+            person_cohort = Cohort.objects.create(
+                team_id=self.team.pk,
+                last_calculation=last_calculation,
+                groups=[{"properties": [{"key": "name", "value": "test", "type": "person"}]}],
+            )
+            nested_cohort = Cohort.objects.create(
+                team_id=self.team.pk,
+                last_calculation=last_calculation,
+                groups=[{"properties": [{"key": "id", "value": person_cohort.pk, "type": "cohort"}]}],
+            )
+            behavioral_cohort = Cohort.objects.create(
+                team_id=self.team.pk,
+                last_calculation=last_calculation,
+                groups=[{"event_id": "$pageview", "days": 7}],
+            )
+
+            calculate_cohorts(5)
+
+            patch_update_cohorts_in_batch.assert_called_once()
+            self.assertCountEqual(patch_update_cohorts_in_batch.call_args[0][0], [person_cohort, nested_cohort])
+            patch_update_cohort.assert_called_once_with(behavioral_cohort, initiating_user=None, incremental=True)
+
+        @patch("posthog.tasks.calculate_cohort.update_cohorts_in_batch")
+        @patch("posthog.tasks.calculate_cohort.update_cohort")
+        def test_only_cohorts_due_for_full_recalculation_are_calculated_in_batch(
+            self, patch_update_cohort: MagicMock, patch_update_cohorts_in_batch: MagicMock
+        ) -> None:
+            last_calculation = timezone.now() - relativedelta(minutes=MAX_AGE_MINUTES + 1)
+            groups = [{"properties": [{"key": "name", "value": "test", "type": "person"}]}]
+            never_calculated_cohort = Cohort.objects.create(
+                team_id=self.team.pk, last_calculation=last_calculation, groups=groups
+            )
+            incremental_cohort = Cohort.objects.create(
+                team_id=self.team.pk, last_calculation=last_calculation, groups=groups, version=2, pending_version=2
+            )
+            # Its next version is due for the periodic full recalculation
+            full_recalculation_cohort = Cohort.objects.create(
+                team_id=self.team.pk,
+                last_calculation=last_calculation,
+                groups=groups,
+                version=FULL_CALCULATION_EVERY_N_VERSIONS - 1,
+                pending_version=FULL_CALCULATION_EVERY_N_VERSIONS - 1,
+            )
+
+            calculate_cohorts(5)
+
+            patch_update_cohorts_in_batch.assert_called_once()
+            self.assertCountEqual(
+                patch_update_cohorts_in_batch.call_args[0][0], [never_calculated_cohort, full_recalculation_cohort]
+            )
+            patch_update_cohort.assert_called_once_with(incremental_cohort, initiating_user=None, incremental=True)
+
     return TestCalculateCohort
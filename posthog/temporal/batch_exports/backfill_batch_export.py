@@ -1,8 +1,12 @@
 import asyncio
+import bisect
+import collections.abc
 import dataclasses
 import datetime as dt
 import json
+import math
 import typing
+import uuid
 import zoneinfo
 
 import temporalio
@@ -15,7 +19,11 @@ from asgiref.sync import sync_to_async
 from django.conf import settings
 
 from posthog.batch_exports.models import BatchExportBackfill
-from posthog.batch_exports.service import BackfillBatchExportInputs, unpause_batch_export
+from posthog.batch_exports.service import (
+    BackfillBatchExportInputs,
+    afetch_batch_export_backfill_completed_intervals,
+    unpause_batch_export,
+)
 from posthog.temporal.batch_exports.base import PostHogWorkflow
 from posthog.temporal.batch_exports.batch_exports import (
     CreateBatchExportBackfillInputs,
@@ -23,9 +31,25 @@ from posthog.temporal.batch_exports.batch_exports import (
     create_batch_export_backfill_model,
     update_batch_export_backfill_model_status,
 )
+from posthog.temporal.common.clickhouse import get_client
 from posthog.temporal.common.client import connect
 from posthog.temporal.common.heartbeat import Heartbeater
 
+# Bucket the timestamps of a range of events, returning the start of each bucket that has any events.
+SELECT_NON_EMPTY_EVENT_BUCKETS = """
+SELECT
+    arraySort(groupUniqArray(intDiv(toUnixTimestamp(timestamp), {bucket_seconds}) * {bucket_seconds})) AS buckets
+FROM
+    events
+WHERE
+    team_id = {team_id}
+    AND timestamp >= {interval_start}
+    AND timestamp < {interval_end}
+FORMAT JSONEachRow
+"""
+# Smaller buckets would make us read back too many of them, so we don't merge intervals not aligned to a minute.
+MIN_BUCKET_SECONDS = 60
+
 
 class TemporalScheduleNotFoundError(Exception):
     """Exception raised when a Temporal Schedule is not found."""
@@ -83,6 +107,9 @@ class BackfillScheduleInputs:
     end_at: str | None
     frequency_seconds: float
     start_delay: float = 5.0
+    backfill_id: str | None = None
+    max_concurrent_runs: int = 1
+    merge_empty_intervals: bool = False
 
 
 def get_utcnow():
@@ -150,10 +177,15 @@ def adjust_bound_datetime_to_schedule_time_zone(
 async def backfill_schedule(inputs: BackfillScheduleInputs) -> None:
     """Temporal Activity to backfill a Temporal Schedule.
 
-    The backfill is broken up into batches of 1. After a backfill batch is
-    requested, we wait for it to be done before continuing with the next.
+    The backfill is broken up into batches of 1, of which up to `max_concurrent_runs` run at a time,
+    as allowed by the team's limit of concurrent queries. After the limit of backfill batches is
+    requested, we wait for one to be done before continuing with the next. With `merge_empty_intervals`,
+    consecutive batches without any events are merged into a single batch.
 
-    This activity heartbeats while waiting to allow cancelling an ongoing backfill.
+    This activity heartbeats while waiting to allow cancelling an ongoing backfill. As batches may
+    finish out of order, the heartbeat details point to the last batch finished after all batches
+    before it. When retrying, batches already completed after that one are skipped if we know the
+    `backfill_id`.
     """
     start_at = dt.datetime.fromisoformat(inputs.start_at) if inputs.start_at else None
     end_at = dt.datetime.fromisoformat(inputs.end_at) if inputs.end_at else None
@@ -183,11 +215,7 @@ async def backfill_schedule(inputs: BackfillScheduleInputs) -> None:
                 last_batch_data_interval_end=last_activity_details.last_batch_data_interval_end,
             )
 
-            try:
-                await workflow_handle.result()
-            except temporalio.client.WorkflowFailureError:
-                # TODO: Handle failures here instead of in the batch export.
-                await asyncio.sleep(inputs.start_delay)
+            await wait_for_backfill_run(workflow_handle, inputs.start_delay)
 
             start_at = dt.datetime.fromisoformat(last_activity_details.last_batch_data_interval_end)
 
@@ -208,70 +236,275 @@ async def backfill_schedule(inputs: BackfillScheduleInputs) -> None:
                 end_at, schedule_time_zone_name=description.schedule.spec.time_zone_name, frequency=frequency
             )
 
-        full_backfill_range = backfill_range(start_at, end_at, frequency)
+        schedule_action: temporalio.client.ScheduleActionStartWorkflow = description.schedule.action
+        schedule_args = await client.data_converter.decode(schedule_action.args)
+        team_id = schedule_args[0]["team_id"]
 
-        for _, backfill_end_at in full_backfill_range:
-            if await check_temporal_schedule_exists(client, description.id) is False:
-                raise TemporalScheduleNotFoundError(description.id)
+        full_backfill_range: collections.abc.Iterable[tuple[dt.datetime | None, dt.datetime]] = backfill_range(
+            start_at, end_at, frequency
+        )
 
-            utcnow = get_utcnow()
-            backfill_end_at = backfill_end_at.astimezone(dt.UTC)
+        if (
+            inputs.merge_empty_intervals
+            and start_at is not None
+            and end_at is not None
+            and can_merge_empty_intervals(schedule_args[0])
+        ):
+            intervals = typing.cast(list[tuple[dt.datetime, dt.datetime]], list(full_backfill_range))
+            full_backfill_range = await amerge_empty_intervals(team_id, intervals)
+
+        if inputs.backfill_id is not None:
+            completed_intervals = await afetch_batch_export_backfill_completed_intervals(uuid.UUID(inputs.backfill_id))
+        else:
+            completed_intervals = []
 
-            if end_at is None and backfill_end_at >= utcnow:
-                # This backfill (with no `end_at`) has caught up with real time and should unpause the
-                # underlying batch export and exit.
-                await sync_to_async(unpause_batch_export)(client, inputs.schedule_id)
-                return
+        max_concurrent_runs = await aget_backfill_max_concurrent_runs(team_id, inputs.max_concurrent_runs)
+        progress = BackfillProgress(schedule_id=inputs.schedule_id, heartbeater=heartbeater)
 
-            schedule_action: temporalio.client.ScheduleActionStartWorkflow = description.schedule.action
+        try:
+            for backfill_start_at, backfill_end_at in full_backfill_range:
+                if await check_temporal_schedule_exists(client, description.id) is False:
+                    raise TemporalScheduleNotFoundError(description.id)
 
-            search_attributes = [
-                temporalio.common.SearchAttributePair(
-                    key=temporalio.common.SearchAttributeKey.for_text("TemporalScheduledById"), value=description.id
-                ),
-                temporalio.common.SearchAttributePair(
-                    key=temporalio.common.SearchAttributeKey.for_datetime("TemporalScheduledStartTime"),
-                    value=backfill_end_at,
-                ),
-            ]
-
-            args = await client.data_converter.decode(schedule_action.args)
-            args[0]["is_backfill"] = True
-            args[0]["is_earliest_backfill"] = start_at is None
-
-            await asyncio.sleep(inputs.start_delay)
-
-            try:
-                workflow_handle = await client.start_workflow(
-                    schedule_action.workflow,
-                    *args,
-                    id=f"{description.id}-{backfill_end_at:%Y-%m-%dT%H:%M:%S}Z",
-                    task_queue=schedule_action.task_queue,
-                    run_timeout=schedule_action.run_timeout,
-                    task_timeout=schedule_action.task_timeout,
-                    id_reuse_policy=temporalio.common.WorkflowIDReusePolicy.ALLOW_DUPLICATE,
-                    search_attributes=temporalio.common.TypedSearchAttributes(search_attributes=search_attributes),
-                )
-            except temporalio.exceptions.WorkflowAlreadyStartedError:
-                workflow_handle = client.get_workflow_handle(f"{description.id}-{backfill_end_at:%Y-%m-%dT%H:%M:%S}Z")
+                # Merged intervals are longer than the batch export's interval in the schedule's time zone.
+                is_merged_interval = backfill_start_at is not None and backfill_end_at - backfill_start_at > frequency
 
-            details = HeartbeatDetails(
-                schedule_id=inputs.schedule_id,
-                workflow_id=workflow_handle.id,
-                last_batch_data_interval_end=backfill_end_at.isoformat(),
-            )
+                utcnow = get_utcnow()
+                backfill_end_at = backfill_end_at.astimezone(dt.UTC)
+
+                if end_at is None and backfill_end_at >= utcnow:
+                    # This backfill (with no `end_at`) has caught up with real time and should unpause the
+                    # underlying batch export and exit, once all outstanding runs are done.
+                    await progress.wait_for_runs()
+                    await sync_to_async(unpause_batch_export)(client, inputs.schedule_id)
+                    return
+
+                if is_interval_completed(backfill_start_at, backfill_end_at, completed_intervals):
+                    continue
+
+                await progress.wait_for_runs(max_runs=max_concurrent_runs - 1)
 
-            heartbeater.details = details
+                args = await client.data_converter.decode(schedule_action.args)
+                args[0]["is_backfill"] = True
+                args[0]["is_earliest_backfill"] = start_at is None
+
+                if is_merged_interval and backfill_start_at is not None:
+                    # The workflow can't tell the bounds of a merged interval from its schedule.
+                    interval_seconds = int((backfill_end_at - backfill_start_at).total_seconds())
+                    args[0]["interval"] = f"every {interval_seconds} seconds"
+                    args[0]["data_interval_end"] = backfill_end_at.isoformat()
 
-            try:
-                await workflow_handle.result()
-            except temporalio.client.WorkflowFailureError:
-                # `WorkflowFailureError` includes cancellations, terminations, timeouts, and errors.
-                # Common errors should be handled by the workflow itself (i.e. by retrying an activity).
-                # We briefly sleep to allow heartbeating to potentially receive a cancellation request.
-                # TODO: Log anyways if we land here.
                 await asyncio.sleep(inputs.start_delay)
 
+                workflow_handle = await start_backfill_run(
+                    client, description.id, schedule_action, args, backfill_end_at
+                )
+                progress.add_run(workflow_handle, backfill_end_at, inputs.start_delay)
+
+            await progress.wait_for_runs()
+
+        finally:
+            progress.cancel_runs()
+
+
+async def start_backfill_run(
+    client: temporalio.client.Client,
+    schedule_id: str,
+    schedule_action: temporalio.client.ScheduleActionStartWorkflow,
+    args: list[typing.Any],
+    backfill_end_at: dt.datetime,
+) -> temporalio.client.WorkflowHandle:
+    """Start the workflow of a backfill run, or get it if it's already running."""
+    workflow_id = f"{schedule_id}-{backfill_end_at:%Y-%m-%dT%H:%M:%S}Z"
+    search_attributes: list[temporalio.common.SearchAttributePair] = [
+        temporalio.common.SearchAttributePair(
+            key=temporalio.common.SearchAttributeKey.for_text("TemporalScheduledById"), value=schedule_id
+        ),
+        temporalio.common.SearchAttributePair(
+            key=temporalio.common.SearchAttributeKey.for_datetime("TemporalScheduledStartTime"),
+            value=backfill_end_at,
+        ),
+    ]
+
+    try:
+        return await client.start_workflow(
+            schedule_action.workflow,
+            *args,
+            id=workflow_id,
+            task_queue=schedule_action.task_queue,
+            run_timeout=schedule_action.run_timeout,
+            task_timeout=schedule_action.task_timeout,
+            id_reuse_policy=temporalio.common.WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+            search_attributes=temporalio.common.TypedSearchAttributes(search_attributes=search_attributes),
+        )
+    except temporalio.exceptions.WorkflowAlreadyStartedError:
+        return client.get_workflow_handle(workflow_id)
+
+
+async def wait_for_backfill_run(workflow_handle: temporalio.client.WorkflowHandle, start_delay: float) -> None:
+    """Wait for the workflow of a backfill run to finish."""
+    try:
+        await workflow_handle.result()
+    except temporalio.client.WorkflowFailureError:
+        # `WorkflowFailureError` includes cancellations, terminations, timeouts, and errors.
+        # Common errors should be handled by the workflow itself (i.e. by retrying an activity).
+        # We briefly sleep to allow heartbeating to potentially receive a cancellation request.
+        # TODO: Log anyways if we land here.
+        await asyncio.sleep(start_delay)
+
+
+@dataclasses.dataclass
+class BackfillRun:
+    """A run started by a backfill."""
+
+    workflow_id: str
+    data_interval_end: dt.datetime
+    finished: bool = False
+
+
+class BackfillProgress:
+    """Track the backfill runs in flight, heartbeating the last run finished after all runs before it."""
+
+    def __init__(self, schedule_id: str, heartbeater: Heartbeater):
+        self.schedule_id = schedule_id
+        self.heartbeater = heartbeater
+        # Runs in the order they were started.
+        self._runs: collections.deque[BackfillRun] = collections.deque()
+        self._waiting: dict[asyncio.Task, BackfillRun] = {}
+
+    def add_run(
+        self, workflow_handle: temporalio.client.WorkflowHandle, data_interval_end: dt.datetime, start_delay: float
+    ) -> None:
+        run = BackfillRun(workflow_id=workflow_handle.id, data_interval_end=data_interval_end)
+        self._runs.append(run)
+        self._waiting[asyncio.create_task(wait_for_backfill_run(workflow_handle, start_delay))] = run
+
+    async def wait_for_runs(self, max_runs: int = 0) -> None:
+        """Wait until at most `max_runs` runs are in flight."""
+        while len(self._waiting) > max_runs:
+            done, _ = await asyncio.wait(self._waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                self._waiting.pop(task).finished = True
+                task.result()
+
+            finished_run = None
+            while self._runs and self._runs[0].finished:
+                finished_run = self._runs.popleft()
+
+            if finished_run is not None:
+                self.heartbeater.details = HeartbeatDetails(
+                    schedule_id=self.schedule_id,
+                    workflow_id=finished_run.workflow_id,
+                    last_batch_data_interval_end=finished_run.data_interval_end.isoformat(),
+                )
+
+    def cancel_runs(self) -> None:
+        """Stop waiting for runs in flight. This doesn't cancel their workflows."""
+        for task in self._waiting:
+            task.cancel()
+
+
+async def aget_backfill_max_concurrent_runs(team_id: int, max_concurrent_runs: int) -> int:
+    """Return how many runs a backfill of a team can have in flight.
+
+    Every run executes a ClickHouse query, so the team's limit of concurrent queries is split evenly
+    between its running backfills.
+    """
+    team_limit = settings.BATCH_EXPORT_BACKFILL_CONCURRENCY_OVERRIDES.get(
+        team_id, settings.BATCH_EXPORT_BACKFILL_MAX_CONCURRENT_QUERIES_PER_TEAM
+    )
+    running_backfills = await BatchExportBackfill.objects.filter(
+        team_id=team_id, status=BatchExportBackfill.Status.RUNNING
+    ).acount()
+
+    return max(1, min(max_concurrent_runs, team_limit // max(running_backfills, 1)))
+
+
+def is_interval_completed(
+    start_at: dt.datetime | None,
+    end_at: dt.datetime,
+    completed_intervals: collections.abc.Iterable[tuple[dt.datetime | None, dt.datetime]],
+) -> bool:
+    """Check if an interval is covered by any of the completed intervals ending at the same time."""
+    return any(
+        completed_end_at == end_at
+        and (completed_start_at is None or (start_at is not None and completed_start_at <= start_at))
+        for completed_start_at, completed_end_at in completed_intervals
+    )
+
+
+def can_merge_empty_intervals(batch_export_inputs: dict[str, typing.Any]) -> bool:
+    """Check if we can tell which intervals of a batch export are empty.
+
+    We only look for events, bounded by timestamp as they are backfilled, so other models and teams
+    whose exports are not bounded by timestamp are not merged.
+    """
+    model = batch_export_inputs.get("batch_export_model")
+    if model is not None and model["name"] != "events":
+        return False
+
+    return str(batch_export_inputs["team_id"]) not in settings.UNCONSTRAINED_TIMESTAMP_TEAM_IDS
+
+
+def merge_empty_intervals(
+    intervals: collections.abc.Sequence[tuple[dt.datetime, dt.datetime]],
+    non_empty_buckets: collections.abc.Iterable[int],
+) -> list[tuple[dt.datetime, dt.datetime]]:
+    """Merge each run of consecutive empty intervals into a single interval.
+
+    Arguments:
+        intervals: Consecutive intervals to merge.
+        non_empty_buckets: The start, as a Unix timestamp, of every bucket with any events. Buckets must be
+            aligned with the bounds of the intervals, so that no bucket spans two intervals.
+    """
+    bucket_starts = sorted(non_empty_buckets)
+    merged: list[tuple[dt.datetime, dt.datetime]] = []
+    previous_is_empty = False
+
+    for start_at, end_at in intervals:
+        index = bisect.bisect_left(bucket_starts, start_at.timestamp())
+        is_empty = index == len(bucket_starts) or bucket_starts[index] >= end_at.timestamp()
+
+        if is_empty and previous_is_empty:
+            merged[-1] = (merged[-1][0], end_at)
+        else:
+            merged.append((start_at, end_at))
+
+        previous_is_empty = is_empty
+
+    return merged
+
+
+async def amerge_empty_intervals(
+    team_id: int, intervals: list[tuple[dt.datetime, dt.datetime]]
+) -> list[tuple[dt.datetime, dt.datetime]]:
+    """Query ClickHouse for the events in the intervals to merge empty intervals.
+
+    Events are bucketed by the largest number of seconds all the interval bounds are aligned to, which
+    is the frequency of the batch export unless its time zone has daylight saving time.
+    """
+    if len(intervals) < 2:
+        return intervals
+
+    bucket_seconds = math.gcd(*(int(bound.timestamp()) for interval in intervals for bound in interval))
+    if bucket_seconds < MIN_BUCKET_SECONDS:
+        return intervals
+
+    async with get_client(team_id=team_id) as client:
+        response = await client.read_query(
+            SELECT_NON_EMPTY_EVENT_BUCKETS,
+            query_parameters={
+                "team_id": team_id,
+                "bucket_seconds": bucket_seconds,
+                "interval_start": intervals[0][0].astimezone(dt.UTC),
+                "interval_end": intervals[-1][1].astimezone(dt.UTC),
+            },
+        )
+
+    non_empty_buckets = [int(bucket) for bucket in json.loads(response)["buckets"]]
+    return merge_empty_intervals(intervals, non_empty_buckets)
+
 
 async def check_temporal_schedule_exists(client: temporalio.client.Client, schedule_id: str) -> bool:
     """Check if Temporal Schedule exists by trying to describe it."""
@@ -388,6 +621,9 @@ class BackfillBatchExportWorkflow(PostHogWorkflow):
             end_at=inputs.end_at,
             frequency_seconds=frequency_seconds,
             start_delay=inputs.start_delay,
+            backfill_id=backfill_id,
+            max_concurrent_runs=inputs.max_concurrent_runs,
+            merge_empty_intervals=inputs.merge_empty_intervals,
         )
         try:
             await temporalio.workflow.execute_activity(
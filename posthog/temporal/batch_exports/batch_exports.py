@@ -3,6 +3,7 @@ import collections
 import collections.abc
 import dataclasses
 import datetime as dt
+import time
 import typing
 import uuid
 from string import Template
@@ -11,7 +12,7 @@ import pyarrow as pa
 import structlog
 from django.conf import settings
 from temporalio import activity, exceptions, workflow
-from temporalio.common import RetryPolicy
+from temporalio.common import MetricHistogram, MetricHistogramFloat, MetricHistogramTimedelta, RetryPolicy
 
 from posthog.batch_exports.models import BatchExportBackfill, BatchExportRun
 from posthog.batch_exports.service import (
@@ -28,9 +29,16 @@ from posthog.batch_exports.service import (
     update_batch_export_run,
 )
 from posthog.temporal.batch_exports.metrics import (
+    get_clickhouse_bytes_read_metric,
+    get_clickhouse_bytes_received_metric,
+    get_clickhouse_read_throughput_metric,
     get_export_finished_metric,
     get_export_started_metric,
+    get_record_batch_queue_lag_metric,
+    get_record_batch_queue_max_size_metric,
+    get_record_batch_queue_occupancy_metric,
 )
+from posthog.temporal.common.asyncpa import ReadStatistics
 from posthog.temporal.common.clickhouse import ClickHouseClient
 from posthog.temporal.common.client import connect
 from posthog.temporal.common.logger import bind_temporal_worker_logger
@@ -290,31 +298,142 @@ async def iter_records_from_model_view(
         yield record_batch
 
 
+def slice_record_batch(record_batch: pa.RecordBatch, target_size_bytes: int) -> list[pa.RecordBatch]:
+    """Slice a record batch into record batches of roughly `target_size_bytes` each.
+
+    Rows are assumed to be of similar size, so the number of rows in each slice
+    is taken from the average row size. Slicing doesn't copy any data: the
+    slices share the buffers of the original record batch.
+    """
+    if target_size_bytes <= 0 or record_batch.num_rows <= 1 or record_batch.nbytes <= target_size_bytes:
+        return [record_batch]
+
+    rows_per_slice = max(1, record_batch.num_rows * target_size_bytes // record_batch.nbytes)
+    return [record_batch.slice(offset, rows_per_slice) for offset in range(0, record_batch.num_rows, rows_per_slice)]
+
+
 class RecordBatchQueue(asyncio.Queue):
-    """A queue of pyarrow RecordBatch instances limited by bytes."""
+    """A queue of pyarrow RecordBatch instances limited by bytes.
+
+    Producers can emit record batches of any size, so `put` slices those larger
+    than `target_record_batch_size_bytes`. This way the queue blocks producers
+    before going too far over its limit, and consumers work on evenly sized
+    record batches.
 
-    def __init__(self, max_size_bytes=0):
+    When `target_buffer_seconds` is set, the limit adapts to how fast record
+    batches are consumed: Consumers only get record batches as fast as they
+    can flush them to the destination, so there is no point in buffering more
+    than `target_buffer_seconds` of that throughput. The limit stays between
+    `min_size_bytes` and `max_size_bytes`.
+
+    Attributes:
+        adapt_after_seconds: Seconds of consuming before the throughput is
+            considered measured and the limit starts adapting to it.
+    """
+
+    adapt_after_seconds: float = 10.0
+
+    def __init__(
+        self,
+        max_size_bytes=0,
+        target_record_batch_size_bytes: int = 0,
+        min_size_bytes: int = 0,
+        target_buffer_seconds: float = 0,
+    ):
         super().__init__(maxsize=max_size_bytes)
         self._bytes_size = 0
         self._schema_set = asyncio.Event()
         self.record_batch_schema = None
         # This is set by `asyncio.Queue.__init__` calling `_init`
         self._queue: collections.deque
+        # This is set by `asyncio.Queue.__init__` and adapted in `adapt_max_size`
+        self._maxsize: int
+
+        self.max_size_bytes = max_size_bytes
+        self.min_size_bytes = min(min_size_bytes, max_size_bytes)
+        self.target_record_batch_size_bytes = target_record_batch_size_bytes
+        self.target_buffer_seconds = target_buffer_seconds
+
+        self._put_times: collections.deque[float] = collections.deque()
+        self._first_put_time: float | None = None
+        self._bytes_consumed = 0
+
+        if activity.in_activity():
+            self._lag_metric: MetricHistogramTimedelta | None = get_record_batch_queue_lag_metric()
+            self._occupancy_metric: MetricHistogramFloat | None = get_record_batch_queue_occupancy_metric()
+            self._max_size_metric: MetricHistogram | None = get_record_batch_queue_max_size_metric()
+        else:
+            self._lag_metric = self._occupancy_metric = self._max_size_metric = None
+
+    async def put(self, item: pa.RecordBatch) -> None:
+        """Put a record batch in the queue, sliced to the target size.
+
+        Each slice waits for free space in the queue on its own.
+        """
+        for record_batch in slice_record_batch(item, self.target_record_batch_size_bytes):
+            await super().put(record_batch)
 
     def _get(self) -> pa.RecordBatch:
-        """Override parent `_get` to keep track of bytes."""
+        """Override parent `_get` to keep track of bytes, lag, and throughput."""
+        if self._occupancy_metric is not None and self._maxsize > 0:
+            self._occupancy_metric.record(self._bytes_size / self._maxsize)
+
         item = self._queue.popleft()
-        self._bytes_size -= item.get_total_buffer_size()
+        put_time = self._put_times.popleft()
+        now = time.monotonic()
+
+        self._bytes_size -= item.nbytes
+        self._bytes_consumed += item.nbytes
+
+        if self._lag_metric is not None:
+            self._lag_metric.record(dt.timedelta(seconds=now - put_time))
+
+        self.adapt_max_size(now)
+
         return item
 
     def _put(self, item: pa.RecordBatch) -> None:
         """Override parent `_put` to keep track of bytes."""
-        self._bytes_size += item.get_total_buffer_size()
+        self._bytes_size += item.nbytes
 
         if not self._schema_set.is_set():
             self.set_schema(item)
 
+        now = time.monotonic()
+        if self._first_put_time is None:
+            self._first_put_time = now
+
         self._queue.append(item)
+        self._put_times.append(now)
+
+    def adapt_max_size(self, now: float) -> None:
+        """Adapt the queue limit to buffer `target_buffer_seconds` of consumer throughput.
+
+        Throughput is averaged since the first record batch was put in the
+        queue, which smooths over consumers pausing to flush.
+        """
+        if self.target_buffer_seconds <= 0 or self.max_size_bytes <= 0 or self._first_put_time is None:
+            return
+
+        seconds_consuming = now - self._first_put_time
+        if seconds_consuming < self.adapt_after_seconds:
+            return
+
+        throughput = self._bytes_consumed / seconds_consuming
+        max_size = int(throughput * self.target_buffer_seconds)
+        max_size = min(max(max_size, self.min_size_bytes), self.max_size_bytes)
+
+        if max_size == self._maxsize:
+            return
+
+        if max_size > self._maxsize:
+            # Any producer waiting for space may now have some.
+            self._wakeup_next(self._putters)  # type: ignore[attr-defined]
+
+        self._maxsize = max_size
+
+        if self._max_size_metric is not None:
+            self._max_size_metric.record(max_size)
 
     def set_schema(self, record_batch: pa.RecordBatch) -> None:
         """Used to keep track of schema of events in queue."""
@@ -335,7 +454,8 @@ class RecordBatchQueue(asyncio.Queue):
         """Size in bytes of record batches in the queue.
 
         This is used to determine when the queue is full, so it returns the
-        number of bytes.
+        number of bytes. Slices only count the bytes they reference from the
+        buffers they share with the record batch they were sliced from.
         """
         return self._bytes_size
 
@@ -427,17 +547,48 @@ def start_produce_batch_export_record_batches(
     extra_query_parameters = parameters.pop("extra_query_parameters", {}) or {}
     parameters = {**parameters, **extra_query_parameters}
 
-    queue = RecordBatchQueue(max_size_bytes=settings.BATCH_EXPORT_BUFFER_QUEUE_MAX_SIZE_BYTES)
+    queue = RecordBatchQueue(
+        max_size_bytes=settings.BATCH_EXPORT_BUFFER_QUEUE_MAX_SIZE_BYTES,
+        target_record_batch_size_bytes=settings.BATCH_EXPORT_RECORD_BATCH_TARGET_SIZE_BYTES,
+        min_size_bytes=settings.BATCH_EXPORT_BUFFER_QUEUE_MIN_SIZE_BYTES,
+        target_buffer_seconds=settings.BATCH_EXPORT_BUFFER_QUEUE_TARGET_SECONDS,
+    )
     query_id = uuid.uuid4()
     produce_task = asyncio.create_task(
-        client.aproduce_query_as_arrow_record_batches(
-            view, queue=queue, query_parameters=parameters, query_id=str(query_id)
+        produce_batch_export_record_batches(
+            client, view, queue=queue, query_parameters=parameters, query_id=str(query_id)
         )
     )
 
     return queue, produce_task
 
 
+async def produce_batch_export_record_batches(
+    client: ClickHouseClient,
+    query: str,
+    queue: asyncio.Queue,
+    query_parameters: dict[str, typing.Any],
+    query_id: str,
+) -> None:
+    """Produce record batches from a query to a queue, recording how much was read from ClickHouse.
+
+    Metrics are only recorded when running in an activity.
+    """
+    statistics = ReadStatistics()
+
+    try:
+        await client.aproduce_query_as_arrow_record_batches(
+            query, queue=queue, query_parameters=query_parameters, query_id=query_id, statistics=statistics
+        )
+    finally:
+        if activity.in_activity():
+            get_clickhouse_bytes_received_metric().add(statistics.bytes_received)
+            get_clickhouse_bytes_read_metric().add(statistics.bytes_read)
+
+            if statistics.seconds_receiving > 0:
+                get_clickhouse_read_throughput_metric().record(statistics.bytes_received / statistics.seconds_receiving)
+
+
 async def raise_on_produce_task_failure(produce_task: asyncio.Task) -> None:
     """Raise `RecordBatchProducerError` if a produce task failed.
 
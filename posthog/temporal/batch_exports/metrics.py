@@ -1,5 +1,5 @@
 from temporalio import activity, workflow
-from temporalio.common import MetricCounter
+from temporalio.common import MetricCounter, MetricHistogram, MetricHistogramFloat, MetricHistogramTimedelta
 
 
 def get_rows_exported_metric() -> MetricCounter:
@@ -10,6 +10,50 @@ def get_bytes_exported_metric() -> MetricCounter:
     return activity.metric_meter().create_counter("batch_export_bytes_exported", "Number of bytes exported.")
 
 
+def get_clickhouse_bytes_received_metric() -> MetricCounter:
+    return activity.metric_meter().create_counter(
+        "batch_export_clickhouse_bytes_received",
+        "Number of bytes received from ClickHouse over the network, before decompressing them.",
+    )
+
+
+def get_clickhouse_bytes_read_metric() -> MetricCounter:
+    return activity.metric_meter().create_counter(
+        "batch_export_clickhouse_bytes_read", "Number of bytes of record batches read from ClickHouse."
+    )
+
+
+def get_clickhouse_read_throughput_metric() -> MetricHistogramFloat:
+    return activity.metric_meter().create_histogram_float(
+        "batch_export_clickhouse_read_throughput",
+        "Bytes received from ClickHouse per second spent waiting to receive them.",
+        unit="B/s",
+    )
+
+
+def get_record_batch_queue_lag_metric() -> MetricHistogramTimedelta:
+    return activity.metric_meter().create_histogram_timedelta(
+        "batch_export_record_batch_queue_lag",
+        "Time record batches wait in the queue before being consumed.",
+        unit="ms",
+    )
+
+
+def get_record_batch_queue_occupancy_metric() -> MetricHistogramFloat:
+    return activity.metric_meter().create_histogram_float(
+        "batch_export_record_batch_queue_occupancy",
+        "Fraction of the record batch queue limit in use when consumers get a record batch.",
+    )
+
+
+def get_record_batch_queue_max_size_metric() -> MetricHistogram:
+    return activity.metric_meter().create_histogram(
+        "batch_export_record_batch_queue_max_size",
+        "Limit of the record batch queue after adapting it to the throughput of consumers.",
+        unit="B",
+    )
+
+
 def get_export_started_metric() -> MetricCounter:
     return workflow.metric_meter().create_counter("batch_export_started", "Number of batch exports started.")
 
@@ -4,11 +4,14 @@ import contextlib
 import dataclasses
 import datetime as dt
 import json
+import posixpath
 import typing
 
+import aioboto3
 import psycopg
 import pyarrow as pa
 import structlog
+from django.conf import settings
 from psycopg import sql
 from temporalio import activity, workflow
 from temporalio.common import RetryPolicy
@@ -19,6 +22,7 @@ from posthog.batch_exports.service import (
     BatchExportModel,
     BatchExportSchema,
     RedshiftBatchExportInputs,
+    RedshiftCopyInputs,
 )
 from posthog.temporal.batch_exports.base import PostHogWorkflow
 from posthog.temporal.batch_exports.batch_exports import (
@@ -32,16 +36,24 @@ from posthog.temporal.batch_exports.batch_exports import (
     start_batch_export_run,
     start_produce_batch_export_record_batches,
 )
-from posthog.temporal.batch_exports.metrics import get_rows_exported_metric
+from posthog.temporal.batch_exports.metrics import get_bytes_exported_metric, get_rows_exported_metric
 from posthog.temporal.batch_exports.postgres_batch_export import (
     Fields,
     PostgresInsertInputs,
     PostgreSQLClient,
     PostgreSQLField,
 )
+from posthog.temporal.batch_exports.temporary_file import (
+    BatchExportTemporaryFile,
+    BatchExportWriter,
+    JSONLBatchExportWriter,
+    ParquetBatchExportWriter,
+    UnsupportedFileFormatError,
+)
 from posthog.temporal.batch_exports.utils import (
     JsonType,
     apeek_first_and_rewind,
+    cast_record_batch_json_columns,
     set_status_to_running_task,
 )
 from posthog.temporal.common.clickhouse import get_client
@@ -194,6 +206,63 @@ class RedshiftClient(PostgreSQLClient):
                 await cursor.execute(delete_query)
                 await cursor.execute(merge_query)
 
+    async def acopy_from_s3(
+        self,
+        schema: str | None,
+        table_name: str,
+        columns: collections.abc.Sequence[str],
+        s3_uri: str,
+        copy_inputs: RedshiftCopyInputs,
+    ) -> None:
+        """Execute a COPY query to load a file staged in S3 into a Redshift table.
+
+        Arguments:
+            schema: The schema that contains the table we are COPYing into.
+            table_name: The name of the table we are COPYing into.
+            columns: The columns we are COPYing into, in the order they appear in Parquet files.
+            s3_uri: The S3 URI of the staged file.
+            copy_inputs: The configuration used to stage the file, which tells us its format and
+                how Redshift can access it.
+        """
+        if schema:
+            table_identifier = sql.Identifier(schema, table_name)
+        else:
+            table_identifier = sql.Identifier(table_name)
+
+        if copy_inputs.iam_role is not None:
+            authorization = sql.SQL("IAM_ROLE {iam_role}").format(iam_role=sql.Literal(copy_inputs.iam_role))
+        else:
+            authorization = sql.SQL("ACCESS_KEY_ID {access_key_id} SECRET_ACCESS_KEY {secret_access_key}").format(
+                access_key_id=sql.Literal(copy_inputs.aws_access_key_id),
+                secret_access_key=sql.Literal(copy_inputs.aws_secret_access_key),
+            )
+
+        if copy_inputs.file_format == "Parquet":
+            format_options = sql.SQL("FORMAT AS PARQUET")
+        else:
+            format_options = sql.SQL("FORMAT AS JSON 'auto ignorecase' GZIP TIMEFORMAT 'auto'")
+
+        copy_query = sql.SQL(
+            """\
+        COPY {table} ({fields})
+        FROM {s3_uri}
+        {authorization}
+        REGION {region_name}
+        {format_options}
+        """
+        ).format(
+            table=table_identifier,
+            fields=sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+            s3_uri=sql.Literal(s3_uri),
+            authorization=authorization,
+            region_name=sql.Literal(copy_inputs.region_name),
+            format_options=format_options,
+        )
+
+        async with self.connection.transaction():
+            async with self.connection.cursor() as cursor:
+                await cursor.execute(copy_query)
+
 
 def redshift_default_fields() -> list[BatchExportField]:
     batch_export_fields = default_fields()
@@ -293,10 +362,10 @@ async def insert_records_to_redshift(
 
     The recommended way to insert multiple values into Redshift is using a COPY statement (see:
     https://docs.aws.amazon.com/redshift/latest/dg/r_COPY.html). However, Redshift cannot COPY from local
-    files like Postgres, but only from files in S3 or executing commands in SSH hosts. Setting that up would
-    add complexity and require more configuration from the user compared to the old Redshift export plugin.
-    For this reasons, we are going with basic INSERT statements for now, and we can migrate to COPY from S3
-    later if the need arises.
+    files like Postgres, but only from files in S3 or executing commands in SSH hosts. Setting that up
+    requires more configuration from the user compared to the old Redshift export plugin, so INSERT
+    statements remain the default, and `copy_records_to_redshift` is used when the user has configured
+    an S3 bucket to stage files in.
 
     Arguments:
         record: A dictionary representing the record to insert. Each key should correspond to a column
@@ -372,15 +441,129 @@ async def insert_records_to_redshift(
     return total_rows_exported
 
 
+def get_copy_file_extension(file_format: str) -> str:
+    """Return the extension of files staged in `file_format` to COPY into Redshift.
+
+    Raises:
+        UnsupportedFileFormatError: If we cannot COPY from files in `file_format`.
+    """
+    match file_format:
+        case "JSONLines":
+            return "jsonl.gz"
+        case "Parquet":
+            return "parquet"
+        case _:
+            raise UnsupportedFileFormatError(file_format, "Redshift")
+
+
+async def copy_records_to_redshift(
+    record_batches: collections.abc.AsyncGenerator[pa.RecordBatch, None],
+    redshift_client: RedshiftClient,
+    schema: str | None,
+    table: str,
+    columns: collections.abc.Sequence[str],
+    copy_inputs: RedshiftCopyInputs,
+    key_prefix: str,
+    heartbeater: Heartbeater,
+    max_bytes: int,
+) -> int:
+    """Load record batches into Redshift by staging them in S3 and executing COPY queries.
+
+    Records are written to files of up to `max_bytes`, each of which is uploaded to S3 and COPY-ed
+    into Redshift before being deleted.
+
+    Arguments:
+        record_batches: The record batches to load. They should include all `columns`, and any JSON
+            columns to be loaded as SUPER should be cast to `JsonType`.
+        redshift_client: A client connected to Redshift.
+        schema: The schema that contains the table where to load records.
+        table: The name of the table where to load records.
+        columns: The columns of the table to load.
+        copy_inputs: Where to stage files in S3, and how Redshift can access them.
+        key_prefix: A prefix for the key of each staged file.
+        heartbeater: Used to record our progress as we load each file.
+        max_bytes: The size of staged files that triggers a COPY.
+    """
+    first_record_batch, record_batches_iterator = await apeek_first_and_rewind(record_batches)
+    if first_record_batch is None:
+        return 0
+
+    extension = get_copy_file_extension(copy_inputs.file_format)
+    rows_exported = get_rows_exported_metric()
+    bytes_exported = get_bytes_exported_metric()
+    session = aioboto3.Session()
+
+    async def flush_to_redshift(
+        local_results_file: BatchExportTemporaryFile,
+        records_since_last_flush: int,
+        bytes_since_last_flush: int,
+        flush_counter: int,
+        last_inserted_at: dt.datetime,
+        last: bool,
+        error: Exception | None,
+    ):
+        if error is not None:
+            # Partial files are not loaded in case we can retry.
+            return
+
+        key = posixpath.join(key_prefix, f"{flush_counter}.{extension}")
+
+        async with session.client(
+            "s3",
+            region_name=copy_inputs.region_name,
+            aws_access_key_id=copy_inputs.aws_access_key_id,
+            aws_secret_access_key=copy_inputs.aws_secret_access_key,
+            endpoint_url=copy_inputs.endpoint_url,
+        ) as s3_client:
+            await s3_client.upload_fileobj(local_results_file, copy_inputs.s3_bucket, key)
+
+            try:
+                await redshift_client.acopy_from_s3(
+                    schema, table, columns, f"s3://{copy_inputs.s3_bucket}/{key}", copy_inputs
+                )
+            finally:
+                await s3_client.delete_object(Bucket=copy_inputs.s3_bucket, Key=key)
+
+        rows_exported.add(records_since_last_flush)
+        bytes_exported.add(bytes_since_last_flush)
+        heartbeater.details = (str(last_inserted_at),)
+
+    writer: BatchExportWriter
+    if copy_inputs.file_format == "Parquet":
+        writer = ParquetBatchExportWriter(
+            max_bytes=max_bytes,
+            flush_callable=flush_to_redshift,
+            # Record batches don't always agree on which fields are nullable, so we make them all nullable.
+            schema=pa.schema([field.with_nullable(True) for field in first_record_batch.select(columns).schema]),
+            # Each file is COPY-ed on its own.
+            complete_file_on_flush=True,
+        )
+    else:
+        writer = JSONLBatchExportWriter(
+            max_bytes=max_bytes,
+            flush_callable=flush_to_redshift,
+            compression="gzip",
+        )
+
+    async with writer.open_temporary_file():
+        async for record_batch in record_batches_iterator:
+            await writer.write_record_batch(record_batch.select([*columns, "_inserted_at"]))
+
+    return writer.records_total
+
+
 @dataclasses.dataclass
 class RedshiftInsertInputs(PostgresInsertInputs):
     """Inputs for Redshift insert activity.
 
     Inherit from PostgresInsertInputs as they are the same, but allow
-    for setting property_data_type which is unique to Redshift.
+    for setting property_data_type which is unique to Redshift, and
+    loading with COPY instead of INSERT.
     """
 
     properties_data_type: str = "varchar"
+    mode: str = "INSERT"
+    copy_inputs: RedshiftCopyInputs | None = None
 
 
 @activity.defn
@@ -547,9 +730,7 @@ async def insert_into_redshift_activity(inputs: RedshiftInsertInputs) -> Records
 
                     return record, row["_inserted_at"]
 
-                async def record_generator() -> (
-                    collections.abc.AsyncGenerator[tuple[dict[str, typing.Any], dt.datetime], None]
-                ):
+                async def record_batch_generator() -> collections.abc.AsyncGenerator[pa.RecordBatch, None]:
                     while not queue.empty() or not produce_task.done():
                         try:
                             record_batch = queue.get_nowait()
@@ -563,18 +744,55 @@ async def insert_into_redshift_activity(inputs: RedshiftInsertInputs) -> Records
                                 await asyncio.sleep(0.1)
                                 continue
 
+                        yield record_batch
+
+                async def record_generator() -> (
+                    collections.abc.AsyncGenerator[tuple[dict[str, typing.Any], dt.datetime], None]
+                ):
+                    async for record_batch in record_batch_generator():
                         for record in record_batch.to_pylist():
                             yield map_to_record(record)
 
-                records_completed = await insert_records_to_redshift(
-                    record_generator(),
-                    redshift_client,
-                    inputs.schema,
-                    redshift_stage_table if requires_merge else redshift_table,
-                    heartbeater=heartbeater,
-                    use_super=properties_type == "SUPER",
-                    known_super_columns=known_super_columns,
-                )
+                async def super_record_batch_generator() -> collections.abc.AsyncGenerator[pa.RecordBatch, None]:
+                    """Cast columns loaded as SUPER to JSON, so that they are staged as JSON objects."""
+                    async for record_batch in record_batch_generator():
+                        yield cast_record_batch_json_columns(record_batch, json_columns=known_super_columns)
+
+                if inputs.mode == "COPY":
+                    if inputs.copy_inputs is None:
+                        raise ValueError("Loading with COPY requires 'copy_inputs' to be set")
+
+                    copy_inputs = inputs.copy_inputs
+                    if properties_type == "SUPER" and copy_inputs.file_format == "Parquet":
+                        await logger.awarning(
+                            "Staging JSONLines files instead of Parquet, as Parquet strings cannot be COPY-ed as SUPER"
+                        )
+                        copy_inputs = dataclasses.replace(copy_inputs, file_format="JSONLines")
+
+                    records_completed = await copy_records_to_redshift(
+                        super_record_batch_generator() if properties_type == "SUPER" else record_batch_generator(),
+                        redshift_client,
+                        inputs.schema,
+                        redshift_stage_table if requires_merge else redshift_table,
+                        columns=[field[0] for field in table_fields],
+                        copy_inputs=copy_inputs,
+                        key_prefix=posixpath.join(
+                            copy_inputs.s3_key_prefix,
+                            f"{inputs.table_name}-{data_interval_start or 'START'}-{inputs.data_interval_end}",
+                        ),
+                        heartbeater=heartbeater,
+                        max_bytes=settings.BATCH_EXPORT_REDSHIFT_UPLOAD_CHUNK_SIZE_BYTES,
+                    )
+                else:
+                    records_completed = await insert_records_to_redshift(
+                        record_generator(),
+                        redshift_client,
+                        inputs.schema,
+                        redshift_stage_table if requires_merge else redshift_table,
+                        heartbeater=heartbeater,
+                        use_super=properties_type == "SUPER",
+                        known_super_columns=known_super_columns,
+                    )
 
                 if requires_merge:
                     merge_key: Fields = (
@@ -660,6 +878,8 @@ class RedshiftBatchExportWorkflow(PostHogWorkflow):
             is_backfill=inputs.is_backfill,
             batch_export_model=inputs.batch_export_model,
             batch_export_schema=inputs.batch_export_schema,
+            mode=inputs.mode,
+            copy_inputs=inputs.copy_inputs,
         )
 
         await execute_batch_export_insert_activity(
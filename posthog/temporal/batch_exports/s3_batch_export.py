@@ -1,10 +1,13 @@
 import asyncio
+import collections.abc
 import contextlib
 import dataclasses
 import datetime as dt
 import io
 import json
 import posixpath
+import shutil
+import tempfile
 import typing
 
 import aioboto3
@@ -146,6 +149,9 @@ class S3MultiPartUploadState(typing.NamedTuple):
     parts: list[Part]
 
 
+PartUploadedCallable = collections.abc.Callable[[int], collections.abc.Awaitable[None]]
+
+
 class S3MultiPartUpload:
     """An S3 multi-part upload.
 
@@ -160,6 +166,8 @@ class S3MultiPartUpload:
         kms_key_id: If using 'aws:kms' encryption, the KMS key ID.
         aws_access_key_id: The AWS access key ID used to connect to the bucket.
         aws_secret_access_key: The AWS secret access key used to connect to the bucket.
+        max_concurrent_uploads: How many parts scheduled with `schedule_part_upload` may be uploading
+            at the same time.
     """
 
     def __init__(
@@ -172,6 +180,7 @@ class S3MultiPartUpload:
         aws_access_key_id: str | None = None,
         aws_secret_access_key: str | None = None,
         endpoint_url: str | None = None,
+        max_concurrent_uploads: int = 1,
     ):
         self._session = aioboto3.Session()
         self.region_name = region_name
@@ -184,22 +193,39 @@ class S3MultiPartUpload:
         self.kms_key_id = kms_key_id
         self.upload_id: str | None = None
         self.parts: list[Part] = []
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self._pending_uploads: dict[int, asyncio.Task] = {}
+        self._upload_slots = asyncio.Semaphore(max_concurrent_uploads)
 
         if self.endpoint_url == "":
             raise EmptyS3EndpointURLError()
 
     def to_state(self) -> S3MultiPartUploadState:
-        """Produce state tuple that can be used to resume this S3MultiPartUpload."""
+        """Produce state tuple that can be used to resume this S3MultiPartUpload.
+
+        Only parts uploaded with every part before them are included: Resuming continues after the
+        last of these, so any later part that finished uploading early will be uploaded again.
+        """
         # The second predicate is trivial but required by type-checking.
         if self.is_upload_in_progress() is False or self.upload_id is None:
             raise NoUploadInProgressError()
 
-        return S3MultiPartUploadState(self.upload_id, self.parts)
+        return S3MultiPartUploadState(self.upload_id, self.contiguous_parts)
 
     @property
     def part_number(self):
-        """Return the current part number."""
-        return len(self.parts)
+        """Return the current part number, including parts that are still uploading."""
+        return max((*(int(part["PartNumber"]) for part in self.parts), *self._pending_uploads), default=0)
+
+    @property
+    def contiguous_parts(self) -> list[Part]:
+        """Return the uploaded parts that are not preceded by a part that is missing or still uploading."""
+        parts = []
+        for part_number, part in enumerate(sorted(self.parts, key=lambda part: part["PartNumber"]), start=1):
+            if part["PartNumber"] != part_number:
+                break
+            parts.append(part)
+        return parts
 
     def is_upload_in_progress(self) -> bool:
         """Whether this S3MultiPartUpload is in progress or not."""
@@ -257,12 +283,14 @@ class S3MultiPartUpload:
         if self.is_upload_in_progress() is False:
             raise NoUploadInProgressError()
 
+        await self.wait_for_part_uploads()
+
         async with self.s3_client() as s3_client:
             response = await s3_client.complete_multipart_upload(
                 Bucket=self.bucket_name,
                 Key=self.key,
                 UploadId=self.upload_id,
-                MultipartUpload={"Parts": self.parts},
+                MultipartUpload={"Parts": sorted(self.parts, key=lambda part: part["PartNumber"])},
             )
 
         self.upload_id = None
@@ -275,6 +303,8 @@ class S3MultiPartUpload:
         if self.is_upload_in_progress() is False:
             raise NoUploadInProgressError()
 
+        await self.cancel_part_uploads()
+
         async with self.s3_client() as s3_client:
             await s3_client.abort_multipart_upload(
                 Bucket=self.bucket_name,
@@ -322,6 +352,93 @@ class S3MultiPartUpload:
 
         self.parts.append({"PartNumber": next_part_number, "ETag": etag})
 
+    async def schedule_part_upload(
+        self,
+        body: BatchExportTemporaryFile,
+        on_uploaded: PartUploadedCallable | None = None,
+        rewind: bool = True,
+    ) -> int:
+        """Start uploading a part of this multi-part upload in the background.
+
+        The contents of `body` are copied to a spooled temporary file owned by the upload, so `body`
+        may be reset and written to as soon as this returns. We wait for a free slot when
+        `max_concurrent_uploads` parts are already uploading.
+
+        Arguments:
+            body: The file containing the part to upload.
+            on_uploaded: Called with the part number once the part has been uploaded.
+            rewind: Whether to seek to the start of `body` before copying it.
+
+        Returns:
+            The number of the part scheduled.
+
+        Raises:
+            Any exception raised by a part upload that has failed since the last call.
+        """
+        self.raise_for_failed_part_uploads()
+        await self._upload_slots.acquire()
+
+        try:
+            self.raise_for_failed_part_uploads()
+
+            if rewind is True:
+                body.rewind()
+
+            # Parts under the chunk size, like the last one, never need to touch the disk.
+            part_file = tempfile.SpooledTemporaryFile(max_size=settings.BATCH_EXPORT_S3_UPLOAD_CHUNK_SIZE_BYTES)
+            await asyncio.to_thread(shutil.copyfileobj, body, part_file)
+            part_file.seek(0)
+        except BaseException:
+            self._upload_slots.release()
+            raise
+
+        part_number = self.part_number + 1
+        self._pending_uploads[part_number] = asyncio.create_task(
+            self._upload_part_file(part_file, part_number, on_uploaded)
+        )
+
+        return part_number
+
+    async def _upload_part_file(
+        self,
+        part_file: tempfile.SpooledTemporaryFile,
+        part_number: int,
+        on_uploaded: PartUploadedCallable | None,
+    ) -> None:
+        """Upload a part scheduled with `schedule_part_upload`, freeing its slot when done."""
+        try:
+            etag = await self.upload_part_retryable(part_file, part_number)  # type: ignore
+        finally:
+            part_file.close()
+            self._upload_slots.release()
+
+        # Failed uploads and callbacks stay pending so that their exception is raised by the next call that checks.
+        self.parts.append({"PartNumber": part_number, "ETag": etag})
+
+        if on_uploaded is not None:
+            await on_uploaded(part_number)
+
+        del self._pending_uploads[part_number]
+
+    def raise_for_failed_part_uploads(self) -> None:
+        """Raise the exception of the first part scheduled with `schedule_part_upload` that failed, if any."""
+        for task in self._pending_uploads.values():
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()  # type: ignore
+
+    async def wait_for_part_uploads(self) -> None:
+        """Wait for all parts scheduled with `schedule_part_upload` to finish uploading."""
+        await asyncio.gather(*self._pending_uploads.values())
+
+    async def cancel_part_uploads(self) -> None:
+        """Cancel all parts scheduled with `schedule_part_upload` that are still uploading."""
+        pending = list(self._pending_uploads.values())
+        for task in pending:
+            task.cancel()
+
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._pending_uploads.clear()
+
     async def upload_part_retryable(
         self,
         reader: io.BufferedReader,
@@ -374,8 +491,11 @@ class S3MultiPartUpload:
     async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
         """Asynchronous context manager protocol exit.
 
-        We re-raise any exceptions captured.
+        We re-raise any exceptions captured, after cancelling any parts still uploading.
         """
+        if exc_value is not None:
+            await self.cancel_part_uploads()
+
         return False
 
 
@@ -396,6 +516,25 @@ class HeartbeatDetails(typing.NamedTuple):
         upload_state = S3MultiPartUploadState(*details[1])
         return cls(last_uploaded_part_timestamp, upload_state)
 
+    @classmethod
+    def from_upload_state(
+        cls, upload_state: S3MultiPartUploadState, last_inserted_at_by_part: dict[int, dt.datetime]
+    ) -> "HeartbeatDetails | None":
+        """Produce details to resume after the last part in `upload_state`, if this activity execution uploaded it.
+
+        There are no new details when no part can be resumed after yet, or when the last such part was uploaded
+        before resuming, as the details we resumed from already cover it.
+        """
+        if not upload_state.parts:
+            return None
+
+        last_part_number = int(upload_state.parts[-1]["PartNumber"])
+        last_inserted_at = last_inserted_at_by_part.get(last_part_number)
+        if last_inserted_at is None:
+            return None
+
+        return cls(str(last_inserted_at), upload_state)
+
 
 @dataclasses.dataclass
 class S3InsertInputs:
@@ -426,6 +565,7 @@ class S3InsertInputs:
     batch_export_model: BatchExportModel | None = None
     # TODO: Remove after updating existing batch exports
     batch_export_schema: BatchExportSchema | None = None
+    max_concurrent_uploads: int | None = None
 
 
 async def initialize_and_resume_multipart_upload(inputs: S3InsertInputs) -> tuple[S3MultiPartUpload, str | None]:
@@ -442,6 +582,7 @@ async def initialize_and_resume_multipart_upload(inputs: S3InsertInputs) -> tupl
         aws_access_key_id=inputs.aws_access_key_id,
         aws_secret_access_key=inputs.aws_secret_access_key,
         endpoint_url=inputs.endpoint_url,
+        max_concurrent_uploads=inputs.max_concurrent_uploads or settings.BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS,
     )
 
     details = activity.info().heartbeat_details
@@ -556,6 +697,19 @@ async def insert_into_s3_activity(inputs: S3InsertInputs) -> RecordsCompleted:
             return records_completed
 
         async with s3_upload as s3_upload:
+            # Parts are uploaded concurrently, so we keep what each part contains until it's been uploaded.
+            part_details: dict[int, tuple[int, int]] = {}
+            last_inserted_at_by_part: dict[int, dt.datetime] = {}
+
+            async def on_part_uploaded(part_number: int):
+                records_in_part, bytes_in_part = part_details[part_number]
+                rows_exported.add(records_in_part)
+                bytes_exported.add(bytes_in_part)
+
+                # We can only resume after parts that were uploaded along with all parts before them.
+                details = HeartbeatDetails.from_upload_state(s3_upload.to_state(), last_inserted_at_by_part)
+                if details is not None:
+                    heartbeater.details = details
 
             async def flush_to_s3(
                 local_results_file,
@@ -582,12 +736,9 @@ async def insert_into_s3_activity(inputs: S3InsertInputs) -> RecordsCompleted:
                     bytes_since_last_flush,
                 )
 
-                await s3_upload.upload_part(local_results_file)
-
-                rows_exported.add(records_since_last_flush)
-                bytes_exported.add(bytes_since_last_flush)
-
-                heartbeater.details = (str(last_inserted_at), s3_upload.to_state())
+                part_details[s3_upload.part_number + 1] = (records_since_last_flush, bytes_since_last_flush)
+                last_inserted_at_by_part[s3_upload.part_number + 1] = last_inserted_at
+                await s3_upload.schedule_part_upload(local_results_file, on_uploaded=on_part_uploaded)
 
             first_record_batch = cast_record_batch_json_columns(first_record_batch)
             column_names = first_record_batch.column_names
@@ -723,6 +874,7 @@ class S3BatchExportWorkflow(PostHogWorkflow):
             batch_export_model=inputs.batch_export_model,
             # TODO: Remove after updating existing batch exports.
             batch_export_schema=inputs.batch_export_schema,
+            max_concurrent_uploads=inputs.max_concurrent_uploads,
         )
 
         await execute_batch_export_insert_activity(
@@ -6,6 +6,7 @@ import collections.abc
 import contextlib
 import csv
 import datetime as dt
+import functools
 import gzip
 import json
 import tempfile
@@ -14,6 +15,8 @@ import typing
 import brotli
 import orjson
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 import pyarrow.parquet as pq
 import structlog
 
@@ -42,6 +45,99 @@ def json_dumps_bytes(d) -> bytes:
         return orjson.dumps(cleaned_d, default=str)
 
 
+# Strings matching this need escaping to be written as JSON
+JSON_ESCAPED_CHARACTERS = r'[\x00-\x1f"\\]'
+# JSON strings matching this are repaired by `JsonScalar.as_py` before decoding
+JSON_REPAIRED_CHARACTERS = r"[\t\n\r\f\v]"
+
+
+def encode_json_column(array: pa.Array, default: typing.Callable = str) -> pa.Array:
+    """Encode each value in an Arrow array as JSON.
+
+    Strings, integers and booleans are encoded by Arrow compute functions. Anything else is
+    converted to Python and encoded one value at a time with orjson, as `json_dumps_bytes` would.
+
+    Returns:
+        A binary array with the encoded values, which is null where a value could not be strictly
+        encoded (i.e. `json_dumps_bytes` would have to take its slow path).
+    """
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        encoded = pc.fill_null(pc.binary_join_element_wise('"', array, '"', ""), "null").cast(pa.binary())
+        needs_escaping = pc.fill_null(pc.match_substring_regex(array, JSON_ESCAPED_CHARACTERS), False)
+
+        if pc.any(needs_escaping).as_py():
+            escaped = [_dumps_or_none(value, default) for value in array.filter(needs_escaping).to_pylist()]
+            encoded = pc.replace_with_mask(encoded, needs_escaping, pa.array(escaped, type=pa.binary()))
+
+        return encoded
+
+    if pa.types.is_integer(array.type) or pa.types.is_boolean(array.type):
+        return pc.fill_null(array.cast(pa.string()), "null").cast(pa.binary())
+
+    if isinstance(array.type, pa.ExtensionType) and array.type.extension_name == "json":
+        values = _decode_json_array(array)
+    else:
+        values = array.to_pylist()
+
+    return pa.array([_dumps_or_none(value, default) for value in values], type=pa.binary())
+
+
+def _decode_json_array(array: pa.ExtensionArray) -> list[typing.Any]:
+    """Decode an array of JSON strings, only going through `as_py` for values that need repairing."""
+    storage = array.storage
+    needs_repair = pc.fill_null(pc.match_substring_regex(storage, JSON_REPAIRED_CHARACTERS), False)
+
+    values: list[typing.Any] = []
+    for index, (value, repair) in enumerate(zip(storage.to_pylist(), needs_repair.to_pylist())):
+        if not value:
+            values.append(None)
+            continue
+
+        if not repair:
+            try:
+                values.append(orjson.loads(value))
+                continue
+            except orjson.JSONDecodeError:
+                pass
+
+        values.append(array[index].as_py())
+
+    return values
+
+
+def _dumps_or_none(value: typing.Any, default: typing.Callable) -> bytes | None:
+    try:
+        return orjson.dumps(value, default=default)
+    except orjson.JSONEncodeError:
+        return None
+
+
+def iter_strict_runs(is_strict: pa.BooleanArray) -> collections.abc.Iterator[tuple[int, int, bool]]:
+    """Split rows into runs of consecutive rows that are strict or not, yielding offset, length and strictness."""
+    if pc.all(is_strict).as_py():
+        yield 0, len(is_strict), True
+        return
+
+    offset = 0
+    for index in pc.indices_nonzero(pc.invert(is_strict)).to_pylist():
+        if index > offset:
+            yield offset, index - offset, True
+        yield index, 1, False
+        offset = index + 1
+
+    if offset < len(is_strict):
+        yield offset, len(is_strict) - offset, True
+
+
+def concatenate_binary_array(array: pa.Array) -> bytes:
+    """Concatenate all values of a binary array without nulls."""
+    if len(array) == 0:
+        return b""
+    _, offsets_buffer, data_buffer = array.buffers()
+    offsets = pa.Array.from_buffers(pa.int32(), len(array) + 1, [None, offsets_buffer], offset=array.offset)
+    return data_buffer[offsets[0].as_py() : offsets[-1].as_py()].to_pybytes()
+
+
 class BatchExportTemporaryFile:
     """A TemporaryFile used to as an intermediate step while exporting data.
 
@@ -443,6 +539,8 @@ class JSONLBatchExportWriter(BatchExportWriter):
     Attributes:
         default: The default function to use to cast non-serializable Python objects to serializable objects.
             By default, non-serializable objects will be cast to string via `str()`.
+        write_by_row: Whether to write records one by one instead of column by column. Only meant
+            for comparing both ways of writing, as the output is the same.
     """
 
     def __init__(
@@ -451,6 +549,7 @@ class JSONLBatchExportWriter(BatchExportWriter):
         flush_callable: FlushCallable,
         compression: None | str = None,
         default: typing.Callable = str,
+        write_by_row: bool = False,
     ):
         super().__init__(
             max_bytes=max_bytes,
@@ -459,6 +558,7 @@ class JSONLBatchExportWriter(BatchExportWriter):
         )
 
         self.default = default
+        self.write_by_row = write_by_row
 
     def write_dict(self, d: dict[str, typing.Any]) -> int:
         """Write a single row of JSONL."""
@@ -504,7 +604,40 @@ class JSONLBatchExportWriter(BatchExportWriter):
         return n
 
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
-        """Write records to a temporary file as JSONL."""
+        """Write records to a temporary file as JSONL.
+
+        Records are encoded column by column. Records with a value that can't be strictly encoded are
+        written one by one with `write_dict` instead, which knows how to deal with them.
+        """
+        if self.write_by_row:
+            self._write_record_batch_by_row(record_batch)
+            return
+
+        if record_batch.num_columns == 0:
+            return
+
+        lines = pc.binary_join_element_wise(*self._iter_line_parts(record_batch), pa.scalar(b"", type=pa.binary()))
+        is_strict = lines.is_valid()
+        not_strict_records = iter(record_batch.filter(pc.invert(is_strict)).to_pylist())
+
+        for offset, length, is_run_strict in iter_strict_runs(is_strict):
+            if is_run_strict:
+                self.batch_export_file.write(concatenate_binary_array(lines.slice(offset, length)))
+            else:
+                self.write_dict(next(not_strict_records))
+
+    def _iter_line_parts(self, record_batch: pa.RecordBatch) -> collections.abc.Iterator[pa.Scalar | pa.Array]:
+        """Yield the keys and encoded values that make up each JSONL line, in order."""
+        separator = b"{"
+        for name, column in zip(record_batch.column_names, record_batch.columns):
+            yield pa.scalar(separator + orjson.dumps(name) + b":", type=pa.binary())
+            yield encode_json_column(column, default=self.default)
+            separator = b","
+
+        yield pa.scalar(b"}\n", type=pa.binary())
+
+    def _write_record_batch_by_row(self, record_batch: pa.RecordBatch) -> None:
+        """Write records to a temporary file as JSONL, one by one."""
         for record_dict in record_batch.to_pylist():
             if not record_dict:
                 continue
@@ -513,7 +646,12 @@ class JSONLBatchExportWriter(BatchExportWriter):
 
 
 class CSVBatchExportWriter(BatchExportWriter):
-    """A `BatchExportWriter` for CSV format."""
+    """A `BatchExportWriter` for CSV format.
+
+    Attributes:
+        write_by_row: Whether to write records one by one with `csv.DictWriter`, instead of with Arrow when
+            possible. Only meant for comparing both ways of writing.
+    """
 
     def __init__(
         self,
@@ -527,6 +665,7 @@ class CSVBatchExportWriter(BatchExportWriter):
         line_terminator: str = "\n",
         quoting=csv.QUOTE_NONE,
         compression: str | None = None,
+        write_by_row: bool = False,
     ):
         super().__init__(
             max_bytes=max_bytes,
@@ -540,6 +679,7 @@ class CSVBatchExportWriter(BatchExportWriter):
         self.escape_char = escape_char
         self.line_terminator = line_terminator
         self.quoting = quoting
+        self.write_by_row = write_by_row
 
         self._csv_writer: csv.DictWriter | None = None
 
@@ -560,9 +700,100 @@ class CSVBatchExportWriter(BatchExportWriter):
         return self._csv_writer
 
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
-        """Write records to a temporary file as CSV."""
+        """Write records to a temporary file as CSV.
+
+        When possible, records are written by `pyarrow.csv.write_csv`. Arrow can't escape values, and it
+        quotes every string, so either way some records may not be written as `csv.DictWriter` would:
+        * With `csv.QUOTE_MINIMAL`, and no escape character, Arrow quotes values with any character that
+          needs quoting, so they are read back the same. Except for empty strings, which would be read as
+          an empty string instead of a null, so we write them as nulls.
+        * Otherwise, records with a value that would need quoting or escaping are written one by one with
+          `csv.DictWriter`.
+        """
+        if self.write_by_row or not self.can_write_with_arrow(record_batch):
+            self._write_record_batch_by_row(record_batch)
+            return
+
+        columns = [self._csv_column(record_batch, field_name) for field_name in self.field_names]
+
+        if self.quoting == csv.QUOTE_MINIMAL and self.quote_char == '"' and self.escape_char is None:
+            columns = [
+                pc.if_else(pc.equal(column, ""), None, column) if pa.types.is_string(column.type) else column
+                for column in columns
+            ]
+            quoting_style = "needed"
+            is_strict = pa.array([True] * len(record_batch))
+        else:
+            pattern = "[" + "".join(f"\\x{{{ord(char):x}}}" for char in self.special_characters) + "]"
+            needs_escaping = [
+                pc.fill_null(pc.match_substring_regex(column, pattern), False)
+                for column in columns
+                if pa.types.is_string(column.type)
+            ]
+            quoting_style = "none"
+            is_strict = (
+                pc.invert(functools.reduce(pc.or_, needs_escaping))
+                if needs_escaping
+                else pa.array([True] * len(record_batch))
+            )
+
+        table = pa.Table.from_arrays(columns, names=[str(index) for index in range(len(columns))])
+        write_options = pa_csv.WriteOptions(include_header=False, delimiter=self.delimiter, quoting_style=quoting_style)
+        not_strict_records = iter(record_batch.filter(pc.invert(is_strict)).to_pylist())
+
+        for offset, length, is_run_strict in iter_strict_runs(is_strict):
+            if is_run_strict:
+                output = pa.BufferOutputStream()
+                pa_csv.write_csv(table.slice(offset, length), output, write_options=write_options)
+                self.batch_export_file.write(output.getvalue().to_pybytes())
+            else:
+                self.csv_writer.writerow(next(not_strict_records))
+
+    def _write_record_batch_by_row(self, record_batch: pa.RecordBatch) -> None:
+        """Write records to a temporary file as CSV, one by one."""
         self.csv_writer.writerows(record_batch.to_pylist())
 
+    @property
+    def special_characters(self) -> set[str]:
+        """Characters that `csv.DictWriter` would quote or escape, along with those Arrow refuses to write unquoted."""
+        characters = {self.delimiter, '"', "\r", "\n"}
+        if self.quote_char is not None:
+            characters.add(self.quote_char)
+        if self.escape_char is not None:
+            characters.add(self.escape_char)
+        return characters
+
+    def can_write_with_arrow(self, record_batch: pa.RecordBatch) -> bool:
+        """Whether `pyarrow.csv.write_csv` can write records so that they read back as `csv.DictWriter`'s would.
+
+        Arrow always terminates lines with a newline, and `csv.DictWriter` quotes a row with a single empty field.
+        """
+        if self.line_terminator != "\n" or len(self.field_names) < 2:
+            return False
+        if self.quoting not in (csv.QUOTE_NONE, csv.QUOTE_MINIMAL):
+            return False
+        if self.extras_action == "raise" and not set(record_batch.column_names) <= set(self.field_names):
+            return False
+        return True
+
+    @staticmethod
+    def _csv_column(record_batch: pa.RecordBatch, field_name: str) -> pa.Array:
+        """Return the column for `field_name` as Arrow should write it to match `csv.DictWriter`."""
+        if field_name not in record_batch.column_names:
+            return pa.nulls(len(record_batch), type=pa.string())
+
+        column = record_batch.column(field_name)
+        if pa.types.is_string(column.type) or pa.types.is_integer(column.type):
+            return column
+        if pa.types.is_boolean(column.type):
+            return pc.if_else(column, "True", "False")
+
+        if isinstance(column.type, pa.ExtensionType) and column.type.extension_name == "json":
+            values = _decode_json_array(column)
+        else:
+            values = column.to_pylist()
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
 
 class ParquetBatchExportWriter(BatchExportWriter):
     """A `BatchExportWriter` for Apache Parquet format.
@@ -580,6 +811,8 @@ class ParquetBatchExportWriter(BatchExportWriter):
     Attributes:
         schema: The schema used by the Parquet file. Should match the schema of written RecordBatches.
         compression: Compression codec passed to underlying `pyarrow.parquet.ParquetWriter`.
+        complete_file_on_flush: Whether to write the Parquet footer before every flush, so that each
+            flushed file can be read on its own, instead of only the concatenation of all of them.
     """
 
     def __init__(
@@ -588,6 +821,7 @@ class ParquetBatchExportWriter(BatchExportWriter):
         flush_callable: FlushCallable,
         schema: pa.Schema,
         compression: str | None = "snappy",
+        complete_file_on_flush: bool = False,
     ):
         super().__init__(
             max_bytes=max_bytes,
@@ -596,6 +830,7 @@ class ParquetBatchExportWriter(BatchExportWriter):
         )
         self.schema = schema
         self.compression = compression
+        self.complete_file_on_flush = complete_file_on_flush
 
         self._parquet_writer: pq.ParquetWriter | None = None
 
@@ -620,6 +855,18 @@ class ParquetBatchExportWriter(BatchExportWriter):
                     self._parquet_writer.writer.close()
                     self._parquet_writer = None
 
+    async def flush(self, last_inserted_at: dt.datetime, is_last: bool = False) -> None:
+        """Write the Parquet footer before flushing if each flushed file must be complete.
+
+        A new `pyarrow.parquet.ParquetWriter` is created on the next write, starting a new file.
+        """
+        if self.complete_file_on_flush and self._parquet_writer is not None:
+            self._parquet_writer.writer.close()
+            self._parquet_writer = None
+            self.track_bytes_written(self.batch_export_file)
+
+        await super().flush(last_inserted_at, is_last=is_last)
+
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
         """Write records to a temporary file as Parquet."""
 
@@ -1,6 +1,10 @@
 import asyncio
+import dataclasses
+import time
 import typing
+import zlib
 
+import brotli
 import pyarrow as pa
 import structlog
 
@@ -13,12 +17,66 @@ class InvalidMessageFormat(Exception):
     pass
 
 
-class AsyncMessageReader:
-    """Asynchronously read PyArrow messages from bytes iterator."""
+class UnsupportedContentEncodingError(Exception):
+    """Raised when a stream of bytes is compressed with an encoding we cannot decompress."""
+
+    def __init__(self, content_encoding: str):
+        super().__init__(f"Content encoding '{content_encoding}' is not supported")
+
+
+def get_decompress_function(content_encoding: str | None) -> typing.Callable[[bytes], bytes] | None:
+    """Return a function to incrementally decompress chunks of bytes in the given HTTP content encoding.
+
+    Returns `None` if the content is not compressed.
+
+    Raises:
+        UnsupportedContentEncodingError: If we cannot decompress the content encoding.
+    """
+    match content_encoding:
+        case None | "" | "identity":
+            return None
+        case "gzip":
+            return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16).decompress
+        case "deflate":
+            return zlib.decompressobj().decompress
+        case "br":
+            return brotli.Decompressor().process
+        case _:
+            raise UnsupportedContentEncodingError(content_encoding)
+
+
+@dataclasses.dataclass
+class ReadStatistics:
+    """Statistics on reading a stream of bytes.
 
-    def __init__(self, bytes_iter: typing.AsyncIterator[tuple[bytes, bool]]):
+    Attributes:
+        bytes_received: Bytes received from the stream, before decompressing them.
+        bytes_read: Bytes read from the stream, after decompressing them.
+        seconds_receiving: Seconds spent waiting to receive bytes from the stream.
+    """
+
+    bytes_received: int = 0
+    bytes_read: int = 0
+    seconds_receiving: float = 0.0
+
+
+class AsyncMessageReader:
+    """Asynchronously read PyArrow messages from bytes iterator.
+
+    The bytes may be compressed with an HTTP `content_encoding`, in which case they are decompressed as
+    they are read.
+    """
+
+    def __init__(
+        self,
+        bytes_iter: typing.AsyncIterator[tuple[bytes, bool]],
+        content_encoding: str | None = None,
+        statistics: ReadStatistics | None = None,
+    ):
         self._bytes = bytes_iter
         self._buffer = bytearray()
+        self._decompress = get_decompress_function(content_encoding)
+        self.statistics = statistics if statistics is not None else ReadStatistics()
 
     def __aiter__(self) -> "AsyncMessageReader":
         return self
@@ -64,7 +122,15 @@ class AsyncMessageReader:
     async def read_until(self, n: int) -> None:
         """Read from self._bytes until there are at least n bytes in self._buffer."""
         while len(self._buffer) < n:
+            start = time.perf_counter()
             bytes, _ = await anext(self._bytes)
+            self.statistics.seconds_receiving += time.perf_counter() - start
+            self.statistics.bytes_received += len(bytes)
+
+            if self._decompress is not None:
+                bytes = self._decompress(bytes)
+
+            self.statistics.bytes_read += len(bytes)
             self._buffer.extend(bytes)
 
     def parse_body_size(self, metadata_flatbuffer: bytearray) -> int:
@@ -105,10 +171,19 @@ class AsyncMessageReader:
 class AsyncRecordBatchReader:
     """Asynchronously read PyArrow RecordBatches from an iterator of bytes."""
 
-    def __init__(self, bytes_iter: typing.AsyncIterator[tuple[bytes, bool]]) -> None:
-        self._reader = AsyncMessageReader(bytes_iter)
+    def __init__(
+        self,
+        bytes_iter: typing.AsyncIterator[tuple[bytes, bool]],
+        content_encoding: str | None = None,
+        statistics: ReadStatistics | None = None,
+    ) -> None:
+        self._reader = AsyncMessageReader(bytes_iter, content_encoding=content_encoding, statistics=statistics)
         self._schema: None | pa.Schema = None
 
+    @property
+    def statistics(self) -> ReadStatistics:
+        return self._reader.statistics
+
     def __aiter__(self) -> "AsyncRecordBatchReader":
         return self
 
@@ -137,8 +212,13 @@ class AsyncRecordBatchReader:
 
 
 class AsyncRecordBatchProducer(AsyncRecordBatchReader):
-    def __init__(self, bytes_iter: typing.AsyncIterator[tuple[bytes, bool]]) -> None:
-        super().__init__(bytes_iter)
+    def __init__(
+        self,
+        bytes_iter: typing.AsyncIterator[tuple[bytes, bool]],
+        content_encoding: str | None = None,
+        statistics: ReadStatistics | None = None,
+    ) -> None:
+        super().__init__(bytes_iter, content_encoding=content_encoding, statistics=statistics)
 
     async def produce(self, queue: asyncio.Queue):
         """Read all record batches and produce them to a queue for async processing."""
@@ -6,8 +6,10 @@ import json
 import ssl
 import typing
 import uuid
+import zlib
 
 import aiohttp
+import brotli
 import pyarrow as pa
 import requests
 from django.conf import settings
@@ -102,6 +104,9 @@ class ClickHouseClient:
         headers: Headers sent to ClickHouse in an HTTP request. Includes authentication details.
         params: Parameters passed as query arguments in the HTTP request. Common ones include the
             ClickHouse database and the 'max_execution_time'.
+        arrow_http_compression: The HTTP content encoding to request for responses streaming Arrow record
+            batches asynchronously, which are decompressed as they are read. Either 'gzip', 'deflate', 'br',
+            or `None` to not compress them.
     """
 
     def __init__(
@@ -112,6 +117,7 @@ class ClickHouseClient:
         database: str = "default",
         timeout: None | aiohttp.ClientTimeout = None,
         ssl: ssl.SSLContext | bool = True,
+        arrow_http_compression: str | None = None,
         **kwargs,
     ):
         self.url = url
@@ -119,6 +125,7 @@ class ClickHouseClient:
         self.params = {}
         self.timeout = timeout
         self.ssl = ssl
+        self.arrow_http_compression = arrow_http_compression
         self.connector: None | aiohttp.TCPConnector = None
         self.session: None | aiohttp.ClientSession = None
 
@@ -189,14 +196,30 @@ class ClickHouseClient:
             request_data = None
         return request_data
 
-    async def acheck_response(self, response, query) -> None:
+    async def acheck_response(self, response, query, decompress: bool = False) -> None:
         """Asynchronously check the HTTP response received from ClickHouse.
 
+        Arguments:
+            decompress: Whether to decompress the body of an error response, as it was requested
+                compressed and without decompressing it automatically.
+
         Raises:
             ClickHouseError: If the status code is not 200.
         """
         if response.status != 200:
-            error_message = await response.text()
+            body = await response.read()
+            decompress_function = (
+                asyncpa.get_decompress_function(response.headers.get("Content-Encoding")) if decompress else None
+            )
+
+            if decompress_function is not None:
+                try:
+                    body = decompress_function(body)
+                except (zlib.error, brotli.error):
+                    # Errors raised before ClickHouse started streaming the response may not be compressed.
+                    pass
+
+            error_message = body.decode("utf-8", errors="replace")
             raise ClickHouseError(query, error_message)
 
     def check_response(self, response, query) -> None:
@@ -243,7 +266,7 @@ class ClickHouseClient:
 
     @contextlib.asynccontextmanager
     async def apost_query(
-        self, query, *data, query_parameters, query_id
+        self, query, *data, query_parameters, query_id, compression: str | None = None
     ) -> collections.abc.AsyncIterator[aiohttp.ClientResponse]:
         """POST a query to the ClickHouse HTTP interface.
 
@@ -254,6 +277,8 @@ class ClickHouseClient:
             *data: Iterable of values to include in the body of the request. For example, the tuples of VALUES for an INSERT query.
             query_parameters: Parameters to be formatted in the query.
             query_id: A query ID to pass to ClickHouse.
+            compression: An HTTP content encoding to request the response in. The response is not
+                decompressed, and its 'Content-Encoding' header tells how it's compressed.
 
         Returns:
             The response received from the ClickHouse HTTP interface.
@@ -265,6 +290,11 @@ class ClickHouseClient:
         if query_id is not None:
             params["query_id"] = query_id
 
+        headers = self.headers
+        if compression is not None:
+            params["enable_http_compression"] = "1"
+            headers = {**self.headers, "Accept-Encoding": compression}
+
         query = self.prepare_query(query, query_parameters)
         request_data = self.prepare_request_data(data)
 
@@ -273,8 +303,10 @@ class ClickHouseClient:
         else:
             request_data = query.encode("utf-8")
 
-        async with self.session.post(url=self.url, params=params, headers=self.headers, data=request_data) as response:
-            await self.acheck_response(response, query)
+        async with self.session.post(
+            url=self.url, params=params, headers=headers, data=request_data, auto_decompress=compression is None
+        ) as response:
+            await self.acheck_response(response, query, decompress=compression is not None)
             yield response
 
     @contextlib.contextmanager
@@ -380,13 +412,25 @@ class ClickHouseClient:
         *data,
         query_parameters=None,
         query_id: str | None = None,
+        statistics: asyncpa.ReadStatistics | None = None,
     ) -> typing.AsyncGenerator[pa.RecordBatch, None]:
         """Execute the given query in ClickHouse and stream back the response as Arrow record batches.
 
         This method makes sense when running with FORMAT ArrowStream, although we currently do not enforce this.
+        If given, `statistics` are updated as the response is read.
         """
-        async with self.apost_query(query, *data, query_parameters=query_parameters, query_id=query_id) as response:
-            reader = asyncpa.AsyncRecordBatchReader(response.content.iter_chunks())
+        async with self.apost_query(
+            query,
+            *data,
+            query_parameters=query_parameters,
+            query_id=query_id,
+            compression=self.arrow_http_compression,
+        ) as response:
+            reader = asyncpa.AsyncRecordBatchReader(
+                response.content.iter_chunks(),
+                content_encoding=self.get_content_encoding(response),
+                statistics=statistics,
+            )
             async for batch in reader:
                 yield batch
 
@@ -397,17 +441,36 @@ class ClickHouseClient:
         queue: asyncio.Queue,
         query_parameters=None,
         query_id: str | None = None,
+        statistics: asyncpa.ReadStatistics | None = None,
     ) -> None:
         """Execute the given query in ClickHouse and produce Arrow record batches to given buffer queue.
 
         This method makes sense when running with FORMAT ArrowStream, although we currently do not enforce this.
         This method is intended to be ran as a background task, producing record batches continuously, while other
-        downstream consumer tasks process them from the queue.
+        downstream consumer tasks process them from the queue. If given, `statistics` are updated as the response
+        is read.
         """
-        async with self.apost_query(query, *data, query_parameters=query_parameters, query_id=query_id) as response:
-            reader = asyncpa.AsyncRecordBatchProducer(response.content.iter_chunks())
+        async with self.apost_query(
+            query,
+            *data,
+            query_parameters=query_parameters,
+            query_id=query_id,
+            compression=self.arrow_http_compression,
+        ) as response:
+            reader = asyncpa.AsyncRecordBatchProducer(
+                response.content.iter_chunks(),
+                content_encoding=self.get_content_encoding(response),
+                statistics=statistics,
+            )
             await reader.produce(queue=queue)
 
+    def get_content_encoding(self, response: aiohttp.ClientResponse) -> str | None:
+        """Return how the response to a query streaming Arrow record batches is compressed, if it is."""
+        if self.arrow_http_compression is None:
+            # The response was decompressed automatically.
+            return None
+        return response.headers.get("Content-Encoding")
+
     async def __aenter__(self):
         """Enter method part of the AsyncContextManager protocol."""
         self.connector = aiohttp.TCPConnector(ssl=self.ssl)
@@ -480,6 +543,8 @@ async def get_client(
         max_memory_usage=settings.CLICKHOUSE_MAX_MEMORY_USAGE,
         max_block_size=max_block_size,
         output_format_arrow_string_as_string="true",
+        output_format_arrow_compression_method=settings.CLICKHOUSE_ARROW_COMPRESSION_METHOD,
+        arrow_http_compression=settings.CLICKHOUSE_ARROW_HTTP_COMPRESSION or None,
         **kwargs,
     ) as client:
         yield client
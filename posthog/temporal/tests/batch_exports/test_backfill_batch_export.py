@@ -1,6 +1,7 @@
 import asyncio
 import datetime as dt
 import random
+import typing
 import uuid
 import zoneinfo
 from unittest import mock
@@ -25,6 +26,8 @@ from posthog.temporal.batch_exports.backfill_batch_export import (
     backfill_range,
     backfill_schedule,
     get_schedule_frequency,
+    is_interval_completed,
+    merge_empty_intervals,
 )
 from posthog.temporal.tests.utils.datetimes import date_range
 from posthog.temporal.tests.utils.events import (
@@ -212,6 +215,61 @@ def test_backfill_range(start_at, end_at, step, expected):
     assert result == expected
 
 
+def hour(hour: int) -> dt.datetime:
+    return dt.datetime(2023, 1, 1, hour, 0, 0, tzinfo=dt.UTC)
+
+
+@pytest.mark.parametrize(
+    "non_empty_hours,expected",
+    [
+        ([], [(hour(0), hour(6))]),
+        ([0, 1, 2, 3, 4, 5], [(hour(i), hour(i + 1)) for i in range(6)]),
+        ([2], [(hour(0), hour(2)), (hour(2), hour(3)), (hour(3), hour(6))]),
+        ([0, 5], [(hour(0), hour(1)), (hour(1), hour(5)), (hour(5), hour(6))]),
+        ([1, 3], [(hour(0), hour(1)), (hour(1), hour(2)), (hour(2), hour(3)), (hour(3), hour(4)), (hour(4), hour(6))]),
+    ],
+)
+def test_merge_empty_intervals(non_empty_hours, expected):
+    """Test merge_empty_intervals merges consecutive intervals without events."""
+    intervals = typing.cast(
+        list[tuple[dt.datetime, dt.datetime]], list(backfill_range(hour(0), hour(6), dt.timedelta(hours=1)))
+    )
+    non_empty_buckets = [int(hour(h).timestamp()) for h in non_empty_hours]
+
+    assert merge_empty_intervals(intervals, non_empty_buckets) == expected
+
+
+def test_merge_empty_intervals_with_buckets_smaller_than_intervals():
+    """Test intervals are not empty if any of the buckets within them has events."""
+    intervals = typing.cast(
+        list[tuple[dt.datetime, dt.datetime]], list(backfill_range(hour(0), hour(6), dt.timedelta(hours=2)))
+    )
+    non_empty_buckets = [int((hour(3) - dt.timedelta(minutes=1)).timestamp())]
+
+    assert merge_empty_intervals(intervals, non_empty_buckets) == [
+        (hour(0), hour(2)),
+        (hour(2), hour(4)),
+        (hour(4), hour(6)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "start_at,end_at,completed_intervals,expected",
+    [
+        (hour(1), hour(2), [], False),
+        (hour(1), hour(2), [(hour(1), hour(2))], True),
+        (hour(1), hour(2), [(hour(0), hour(2))], True),
+        (hour(1), hour(2), [(None, hour(2))], True),
+        (hour(0), hour(2), [(hour(1), hour(2))], False),
+        (hour(1), hour(2), [(hour(1), hour(3))], False),
+        (None, hour(2), [(hour(1), hour(2))], False),
+    ],
+)
+def test_is_interval_completed(start_at, end_at, completed_intervals, expected):
+    """Test an interval is completed only if a completed interval ending with it covers it."""
+    assert is_interval_completed(start_at, end_at, completed_intervals) is expected
+
+
 @pytest.mark.django_db(transaction=True)
 async def test_get_schedule_frequency(activity_environment, temporal_worker, temporal_schedule):
     """Test get_schedule_frequency returns the correct interval."""
@@ -277,6 +335,49 @@ async def test_backfill_schedule_activity(activity_environment, temporal_worker,
                 assert args[0]["is_backfill"] is True
 
 
+@pytest.mark.django_db(transaction=True)
+async def test_backfill_schedule_activity_with_concurrent_runs(
+    activity_environment, temporal_worker, temporal_client, temporal_schedule
+):
+    """Test backfill_schedule activity schedules all backfill runs when running them concurrently."""
+    start_at = dt.datetime(2023, 1, 1, 0, 0, 0, tzinfo=dt.UTC)
+    end_at = dt.datetime(2023, 1, 1, 0, 10, 0, tzinfo=dt.UTC)
+
+    desc = await temporal_schedule.describe()
+    inputs = BackfillScheduleInputs(
+        schedule_id=desc.id,
+        start_at=start_at.isoformat(),
+        end_at=end_at.isoformat(),
+        start_delay=0.1,
+        frequency_seconds=desc.schedule.spec.intervals[0].every.total_seconds(),
+        max_concurrent_runs=4,
+    )
+
+    await activity_environment.run(backfill_schedule, inputs)
+
+    query = f'TemporalScheduledById="{desc.id}"'
+    workflows: list[temporalio.client.WorkflowExecution] = []
+
+    timeout = 20
+    waited = 0
+    expected = 10
+    while len(workflows) < expected:
+        # It can take a few seconds for workflows to be query-able
+        waited += 1
+        if waited > timeout:
+            raise TimeoutError("Timed-out waiting for workflows to be query-able")
+
+        await asyncio.sleep(1)
+
+        workflows = [workflow async for workflow in temporal_client.list_workflows(query=query)]
+
+    assert len(workflows) == expected
+    assert all(workflow.status == temporalio.client.WorkflowExecutionStatus.COMPLETED for workflow in workflows)
+    assert {workflow.id for workflow in workflows} == {
+        f"{desc.id}-{end:%Y-%m-%dT%H:%M:%S}Z" for _, end in backfill_range(start_at, end_at, dt.timedelta(minutes=1))
+    }
+
+
 @pytest.mark.django_db(transaction=True)
 async def test_backfill_batch_export_workflow(temporal_worker, temporal_schedule, temporal_client, team):
     """Test BackfillBatchExportWorkflow executes all backfill runs and updates model."""
@@ -793,6 +793,52 @@ async def test_record_batch_queue_sets_schema():
     assert schema == record_batch.schema
 
 
+async def test_record_batch_queue_slices_large_record_batches():
+    """Test `RecordBatchQueue` slices record batches over the target size, blocking on each slice."""
+    record_batch = pa.RecordBatch.from_pydict({"properties": ["x" * 1000] * 100, "test": list(range(100))})
+    target_size = record_batch.nbytes // 10
+
+    queue = RecordBatchQueue(max_size_bytes=target_size, target_record_batch_size_bytes=target_size)
+    put_task = asyncio.create_task(queue.put(record_batch))
+
+    await asyncio.sleep(0)
+    assert not put_task.done()
+    assert 0 < queue.qsize() <= target_size
+
+    slices = []
+    while not put_task.done() or not queue.empty():
+        slices.append(await queue.get())
+
+    assert len(slices) == 10
+    assert all(record_batch_slice.nbytes <= target_size for record_batch_slice in slices)
+    assert pa.Table.from_batches(slices) == pa.Table.from_batches([record_batch])
+    assert queue.qsize() == 0
+
+
+async def test_record_batch_queue_adapts_max_size_to_consumer_throughput():
+    """Test `RecordBatchQueue` limit follows the throughput of consumers within its bounds."""
+    record_batch = pa.RecordBatch.from_pydict({"test": list(range(1000))})
+
+    queue = RecordBatchQueue(max_size_bytes=record_batch.nbytes, min_size_bytes=1000, target_buffer_seconds=20)
+    await queue.put(record_batch)
+    await queue.get()
+
+    assert queue._first_put_time is not None
+    start = queue._first_put_time
+
+    queue.adapt_max_size(start + queue.adapt_after_seconds / 2)
+    assert queue.maxsize == record_batch.nbytes
+
+    queue.adapt_max_size(start + 40)
+    assert queue.maxsize == record_batch.nbytes // 2
+
+    queue.adapt_max_size(start + 1000)
+    assert queue.maxsize == 1000
+
+    queue.adapt_max_size(start + 10)
+    assert queue.maxsize == record_batch.nbytes
+
+
 async def test_raise_on_produce_task_failure_raises_record_batch_producer_error():
     """Test a `RecordBatchProducerError` is raised with the right cause."""
     cause = ValueError("Oh no!")
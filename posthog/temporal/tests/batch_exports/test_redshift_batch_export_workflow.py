@@ -1,11 +1,18 @@
 import datetime as dt
+import functools
+import gzip
+import io
 import json
 import operator
 import os
+import types
 import warnings
 from uuid import uuid4
 
+import aioboto3
 import psycopg
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 import pytest_asyncio
 from django.conf import settings
@@ -17,7 +24,7 @@ from temporalio.common import RetryPolicy
 from temporalio.testing import WorkflowEnvironment
 from temporalio.worker import UnsandboxedWorkflowRunner, Worker
 
-from posthog.batch_exports.service import BatchExportModel, BatchExportSchema
+from posthog.batch_exports.service import BatchExportModel, BatchExportSchema, RedshiftCopyInputs
 from posthog.temporal.batch_exports.batch_exports import (
     finish_batch_export_run,
     iter_model_records,
@@ -27,6 +34,7 @@ from posthog.temporal.batch_exports.redshift_batch_export import (
     RedshiftBatchExportInputs,
     RedshiftBatchExportWorkflow,
     RedshiftInsertInputs,
+    copy_records_to_redshift,
     insert_into_redshift_activity,
     redshift_default_fields,
     remove_escaped_whitespace_recursive,
@@ -51,6 +59,9 @@ MISSING_REQUIRED_ENV_VARS = any(env_var not in os.environ for env_var in REQUIRE
 
 pytestmark = [pytest.mark.django_db, pytest.mark.asyncio]
 
+SESSION = aioboto3.Session()
+create_test_client = functools.partial(SESSION.client, endpoint_url=settings.OBJECT_STORAGE_ENDPOINT)
+
 
 async def assert_clickhouse_records_in_redshfit(
     redshift_connection,
@@ -592,3 +603,122 @@ async def test_redshift_export_workflow_handles_insert_activity_non_retryable_er
     assert run.status == "Failed"
     assert run.latest_error == "InsufficientPrivilege: A useful error message"
     assert run.records_completed is None
+
+
+@pytest.fixture
+def bucket_name() -> str:
+    """Name for a test S3 bucket to stage files in."""
+    return f"test-redshift-copy-{str(uuid4())}"
+
+
+@pytest_asyncio.fixture
+async def minio_client(bucket_name):
+    """Manage an S3 client to interact with a MinIO bucket, which stands in for the staging bucket."""
+    async with create_test_client(
+        "s3",
+        aws_access_key_id="object_storage_root_user",
+        aws_secret_access_key="object_storage_root_password",
+    ) as minio_client:
+        await minio_client.create_bucket(Bucket=bucket_name)
+
+        yield minio_client
+
+        response = await minio_client.list_objects_v2(Bucket=bucket_name)
+        for obj in response.get("Contents", []):
+            await minio_client.delete_object(Bucket=bucket_name, Key=obj["Key"])
+
+        await minio_client.delete_bucket(Bucket=bucket_name)
+
+
+class CopyRecordingRedshiftClient:
+    """Stands in for a RedshiftClient by reading the files it is asked to COPY from MinIO."""
+
+    def __init__(self, minio_client, bucket_name: str):
+        self.minio_client = minio_client
+        self.bucket_name = bucket_name
+        self.copies: list[tuple[str | None, str, list[str], str]] = []
+        self.staged_files: list[bytes] = []
+
+    async def acopy_from_s3(self, schema, table_name, columns, s3_uri, copy_inputs):
+        self.copies.append((schema, table_name, list(columns), s3_uri))
+
+        key = s3_uri.removeprefix(f"s3://{self.bucket_name}/")
+        response = await self.minio_client.get_object(Bucket=self.bucket_name, Key=key)
+        self.staged_files.append(await response["Body"].read())
+
+
+def read_staged_records(staged_file: bytes, file_format: str) -> list[dict]:
+    if file_format == "Parquet":
+        return pq.read_table(io.BytesIO(staged_file)).to_pylist()
+    return [json.loads(line) for line in gzip.decompress(staged_file).splitlines()]
+
+
+@pytest.mark.parametrize("file_format", ["JSONLines", "Parquet"])
+async def test_copy_records_to_redshift_stages_files_in_s3(
+    activity_environment, minio_client, bucket_name, file_format
+):
+    """Test records are staged in S3, COPY-ed into Redshift, and the staged files deleted afterwards."""
+    inserted_at = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    record_batches = [
+        pa.RecordBatch.from_pydict(
+            {
+                "event": [f"event-{batch}-{i}" for i in range(10)],
+                "distinct_id": [f"user-{i}" for i in range(10)],
+                "_inserted_at": [inserted_at + dt.timedelta(minutes=batch)] * 10,
+            }
+        )
+        for batch in range(3)
+    ]
+
+    async def record_batch_generator():
+        for record_batch in record_batches:
+            yield record_batch
+
+    redshift_client = CopyRecordingRedshiftClient(minio_client, bucket_name)
+    heartbeater = types.SimpleNamespace(details=())
+    copy_inputs = RedshiftCopyInputs(
+        s3_bucket=bucket_name,
+        region_name="us-east-1",
+        s3_key_prefix="stage",
+        aws_access_key_id="object_storage_root_user",
+        aws_secret_access_key="object_storage_root_password",
+        endpoint_url=settings.OBJECT_STORAGE_ENDPOINT,
+        file_format=file_format,
+    )
+
+    records_completed = await activity_environment.run(
+        copy_records_to_redshift,
+        record_batch_generator(),
+        redshift_client,
+        "exports_test_schema",
+        "test_table",
+        columns=["event", "distinct_id"],
+        copy_inputs=copy_inputs,
+        key_prefix="stage/test_table",
+        heartbeater=heartbeater,
+        # Small enough to flush after every record batch.
+        max_bytes=1,
+    )
+
+    assert records_completed == 30
+    assert len(redshift_client.copies) == 3
+    assert all(
+        copy[:3] == ("exports_test_schema", "test_table", ["event", "distinct_id"]) for copy in redshift_client.copies
+    )
+    assert all(copy[3].startswith(f"s3://{bucket_name}/stage/test_table/") for copy in redshift_client.copies)
+
+    staged_records = [
+        {key: record[key] for key in ("event", "distinct_id")}
+        for staged_file in redshift_client.staged_files
+        for record in read_staged_records(staged_file, file_format)
+    ]
+    expected_records = [
+        {key: record[key] for key in ("event", "distinct_id")}
+        for record_batch in record_batches
+        for record in record_batch.to_pylist()
+    ]
+    assert staged_records == expected_records
+    assert heartbeater.details == (str(inserted_at + dt.timedelta(minutes=2)),)
+
+    objects = await minio_client.list_objects_v2(Bucket=bucket_name, Prefix="stage/")
+    assert objects.get("KeyCount", 0) == 0
@@ -30,10 +30,12 @@ from posthog.temporal.batch_exports.s3_batch_export import (
     FILE_FORMAT_EXTENSIONS,
     HeartbeatDetails,
     IntermittentUploadPartTimeoutError,
+    Part,
     S3BatchExportInputs,
     S3BatchExportWorkflow,
     S3InsertInputs,
     S3MultiPartUpload,
+    S3MultiPartUploadState,
     get_s3_key,
     insert_into_s3_activity,
     s3_default_fields,
@@ -1472,6 +1474,140 @@ async def test_s3_multi_part_upload_raises_retryable_exception(bucket_name, s3_k
         await s3_upload.upload_part(io.BytesIO(b"1010"), rewind=False)  # type: ignore
 
 
+def s3_upload_with_fake_client(
+    release_part: dict[int, asyncio.Event], uploaded_bodies: dict[int, bytes], completed_parts: list[dict]
+) -> S3MultiPartUpload:
+    """Produce an S3MultiPartUpload whose parts only finish uploading once their event in `release_part` is set."""
+    s3_upload = S3MultiPartUpload(
+        bucket_name="test-bucket",
+        key="test-key",
+        encryption=None,
+        kms_key_id=None,
+        region_name="us-east-1",
+        max_concurrent_uploads=3,
+    )
+    s3_upload.upload_id = "test-upload-id"
+
+    class FakeClient:
+        async def upload_part(self, PartNumber, Body, **kwargs):
+            uploaded_bodies[PartNumber] = Body.read()
+            await release_part[PartNumber].wait()
+            return {"ETag": f"etag-{PartNumber}"}
+
+        async def complete_multipart_upload(self, MultipartUpload, **kwargs):
+            completed_parts.extend(MultipartUpload["Parts"])
+            return {"Location": "test-location"}
+
+    class FakeSession(aioboto3.Session):
+        @contextlib.asynccontextmanager
+        async def client(self, *args, **kwargs):
+            yield FakeClient()
+
+    s3_upload._session = FakeSession()
+    return s3_upload
+
+
+async def test_s3_multi_part_upload_schedules_concurrent_part_uploads():
+    """Test parts scheduled with `schedule_part_upload` upload concurrently and complete in order.
+
+    Parts finish uploading in reverse order, so the resumable state should only include the parts
+    uploaded along with every part before them.
+    """
+    release_part = {part_number: asyncio.Event() for part_number in (1, 2, 3)}
+    uploaded_bodies: dict[int, bytes] = {}
+    completed_parts: list[dict] = []
+    s3_upload = s3_upload_with_fake_client(release_part, uploaded_bodies, completed_parts)
+
+    states = []
+
+    async def on_uploaded(part_number):
+        states.append(s3_upload.to_state().parts)
+
+    for part_number in (1, 2, 3):
+        body = io.BytesIO(f"part {part_number}".encode())
+        scheduled = await s3_upload.schedule_part_upload(body, on_uploaded=on_uploaded, rewind=False)  # type: ignore
+        assert scheduled == part_number
+
+    await asyncio.sleep(0)
+    assert uploaded_bodies == {1: b"part 1", 2: b"part 2", 3: b"part 3"}
+    assert s3_upload.part_number == 3
+
+    for part_number in (3, 2, 1):
+        release_part[part_number].set()
+        await asyncio.sleep(0)
+
+    assert await s3_upload.complete() == "test-location"
+    assert states == [
+        [],
+        [],
+        [{"PartNumber": 1, "ETag": "etag-1"}, {"PartNumber": 2, "ETag": "etag-2"}, {"PartNumber": 3, "ETag": "etag-3"}],
+    ]
+    assert completed_parts == [
+        {"PartNumber": 1, "ETag": "etag-1"},
+        {"PartNumber": 2, "ETag": "etag-2"},
+        {"PartNumber": 3, "ETag": "etag-3"},
+    ]
+
+
+async def test_s3_multi_part_upload_resumes_with_parts_uploaded_out_of_order():
+    """Test heartbeat details of a resumed upload whose new parts finish uploading out of order.
+
+    Until the first new part is uploaded, the last part we can resume after is from before resuming,
+    so there are no new heartbeat details to report.
+    """
+    release_part = {part_number: asyncio.Event() for part_number in (3, 4)}
+    completed_parts: list[dict] = []
+    s3_upload = s3_upload_with_fake_client(release_part, {}, completed_parts)
+    resumed_parts: list[Part] = [{"PartNumber": 1, "ETag": "etag-1"}, {"PartNumber": 2, "ETag": "etag-2"}]
+    s3_upload.continue_from_state(S3MultiPartUploadState("test-upload-id", list(resumed_parts)))
+
+    last_inserted_at_by_part = {
+        3: dt.datetime(2024, 1, 1, 1, tzinfo=dt.UTC),
+        4: dt.datetime(2024, 1, 1, 2, tzinfo=dt.UTC),
+    }
+    heartbeat_details = []
+
+    async def on_uploaded(part_number):
+        heartbeat_details.append(HeartbeatDetails.from_upload_state(s3_upload.to_state(), last_inserted_at_by_part))
+
+    for part_number in (3, 4):
+        body = io.BytesIO(f"part {part_number}".encode())
+        scheduled = await s3_upload.schedule_part_upload(body, on_uploaded=on_uploaded, rewind=False)  # type: ignore
+        assert scheduled == part_number
+
+    for part_number in (4, 3):
+        release_part[part_number].set()
+        await asyncio.sleep(0)
+
+    await s3_upload.wait_for_part_uploads()
+    all_parts: list[Part] = [*resumed_parts, {"PartNumber": 3, "ETag": "etag-3"}, {"PartNumber": 4, "ETag": "etag-4"}]
+    assert heartbeat_details == [
+        None,
+        HeartbeatDetails(str(last_inserted_at_by_part[4]), S3MultiPartUploadState("test-upload-id", all_parts)),
+    ]
+    assert s3_upload.part_number == 4
+
+    assert await s3_upload.complete() == "test-location"
+    assert completed_parts == all_parts
+
+
+async def test_s3_multi_part_upload_raises_failed_part_uploaded_callback():
+    """Test an exception raised by the `on_uploaded` callback of a part is raised like a failed upload."""
+    release_part = {1: asyncio.Event()}
+    s3_upload = s3_upload_with_fake_client(release_part, {}, [])
+
+    async def on_uploaded(part_number):
+        raise ValueError(f"Failed to record part {part_number}")
+
+    await s3_upload.schedule_part_upload(io.BytesIO(b"part 1"), on_uploaded=on_uploaded, rewind=False)  # type: ignore
+    release_part[1].set()
+
+    with pytest.raises(ValueError, match="Failed to record part 1"):
+        await s3_upload.wait_for_part_uploads()
+    with pytest.raises(ValueError, match="Failed to record part 1"):
+        s3_upload.raise_for_failed_part_uploads()
+
+
 @pytest.mark.parametrize("model", [TEST_S3_MODELS[1], TEST_S3_MODELS[2], None])
 async def test_s3_export_workflow_with_request_timeouts(
     clickhouse_client,
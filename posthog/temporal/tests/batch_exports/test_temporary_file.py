@@ -15,6 +15,7 @@ from posthog.temporal.batch_exports.temporary_file import (
     ParquetBatchExportWriter,
     json_dumps_bytes,
 )
+from posthog.temporal.batch_exports.utils import cast_record_batch_json_columns
 
 
 @pytest.mark.parametrize(
@@ -423,6 +424,47 @@ async def test_flushing_parquet_writer_resets_underlying_file(record_batch):
     assert flush_counter == 2
 
 
+@pytest.mark.asyncio
+async def test_parquet_writer_completes_each_flushed_file():
+    """Test each flushed file can be read on its own when writing complete files on flush."""
+    flushed_tables = []
+
+    async def read_parquet_on_flush(
+        batch_export_file,
+        records_since_last_flush,
+        bytes_since_last_flush,
+        flush_counter,
+        last_inserted_at,
+        is_last,
+        error,
+    ):
+        flushed_tables.append(pq.read_table(io.BytesIO(batch_export_file.read())))
+
+    record_batches = [
+        pa.RecordBatch.from_pydict(
+            {
+                "event": [f"event-{batch}-{i}" for i in range(5)],
+                "_inserted_at": [dt.datetime(2024, 1, 1, batch, tzinfo=dt.UTC)] * 5,
+            }
+        )
+        for batch in range(3)
+    ]
+    writer = ParquetBatchExportWriter(
+        max_bytes=1,
+        flush_callable=read_parquet_on_flush,
+        schema=record_batches[0].select(["event"]).schema,
+        complete_file_on_flush=True,
+    )
+
+    async with writer.open_temporary_file():
+        for record_batch in record_batches:
+            await writer.write_record_batch(record_batch)
+
+    assert [table.to_pylist() for table in flushed_tables] == [
+        record_batch.select(["event"]).to_pylist() for record_batch in record_batches
+    ]
+
+
 @pytest.mark.asyncio
 async def test_jsonl_writer_deals_with_web_vitals():
     """Test old $web_vitals record batches are written as valid JSONL."""
@@ -526,3 +568,99 @@ async def test_jsonl_writer_deals_with_nested_user_events():
     assert "_inserted_at" not in written_jsonl
     assert written_jsonl == {k: v for k, v in expected_jsonl.items() if k != "_inserted_at"}
     assert inserted_ats_seen == [record_batch.column("_inserted_at")[-1].as_py()]
+
+
+MIXED_RECORD_BATCH = pa.RecordBatch.from_pydict(
+    {
+        "event": pa.array(["plain", 'with "quotes"', "tab\there", "new\nline", "back\\slash", "comma,", "", None]),
+        "count": pa.array([1, None, 3, 4, 5, 6, 7, -8]),
+        "flag": pa.array([True, False, None, True, False, True, False, True]),
+        "value": pa.array([1.0, 1.5, None, float("nan"), 1e20, 2.0, 3.0, 4.0]),
+        "timestamp": pa.array(
+            [dt.datetime(2024, 1, 1, tzinfo=dt.UTC) + dt.timedelta(microseconds=i) for i in range(8)]
+        ),
+        "properties": cast_record_batch_json_columns(
+            pa.RecordBatch.from_pydict(
+                {"properties": ['{"a": 1}', '{"b": "\\u00e9"}', "", None, "not json", '{"c": "d"}', "[1, 2]", '"x"']}
+            )
+        ).column("properties"),
+        "nested": pa.array([{"x": [1, 2]}] * 8),
+        "_inserted_at": pa.array([0] * 8),
+    }
+)
+
+
+async def flush_nowhere(*args) -> None:
+    pass
+
+
+async def write_record_batch_to_bytes(writer, record_batch) -> bytes:
+    """Write a record batch with writer and return what was flushed."""
+    in_memory_file_obj = io.BytesIO()
+
+    async def store_in_memory_on_flush(batch_export_file, *args):
+        in_memory_file_obj.write(batch_export_file.read())
+
+    writer.flush_callable = store_in_memory_on_flush
+
+    async with writer.open_temporary_file():
+        await writer.write_record_batch(record_batch)
+
+    return in_memory_file_obj.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_jsonl_writer_writes_same_records_by_column_as_by_row():
+    """Test writing JSONL column by column produces exactly the same output as writing row by row."""
+    by_column = await write_record_batch_to_bytes(
+        JSONLBatchExportWriter(max_bytes=1, flush_callable=flush_nowhere), MIXED_RECORD_BATCH
+    )
+    by_row = await write_record_batch_to_bytes(
+        JSONLBatchExportWriter(max_bytes=1, flush_callable=flush_nowhere, write_by_row=True), MIXED_RECORD_BATCH
+    )
+
+    assert len(by_column.splitlines()) == MIXED_RECORD_BATCH.num_rows
+    assert by_column == by_row
+
+
+@pytest.mark.parametrize(
+    "writer_kwargs",
+    [
+        {},
+        {"delimiter": "\t", "escape_char": None, "quoting": csv.QUOTE_MINIMAL},
+    ],
+)
+@pytest.mark.asyncio
+async def test_csv_writer_writes_same_records_by_column_as_by_row(writer_kwargs):
+    """Test writing CSV column by column reads back the same as writing row by row.
+
+    Arrow quotes all strings, so we can only expect exactly the same output when not quoting.
+    """
+    field_names = [name for name in MIXED_RECORD_BATCH.column_names if name != "_inserted_at"] + ["missing"]
+
+    by_column = await write_record_batch_to_bytes(
+        CSVBatchExportWriter(max_bytes=1, flush_callable=flush_nowhere, field_names=field_names, **writer_kwargs),
+        MIXED_RECORD_BATCH,
+    )
+    by_row = await write_record_batch_to_bytes(
+        CSVBatchExportWriter(
+            max_bytes=1, flush_callable=flush_nowhere, field_names=field_names, write_by_row=True, **writer_kwargs
+        ),
+        MIXED_RECORD_BATCH,
+    )
+
+    reader_kwargs = {
+        "delimiter": writer_kwargs.get("delimiter", ","),
+        "escapechar": writer_kwargs.get("escape_char", "\\"),
+        "quoting": writer_kwargs.get("quoting", csv.QUOTE_NONE),
+    }
+    read_by_column = list(csv.reader(io.StringIO(by_column.decode("utf-8")), **reader_kwargs))
+    read_by_row = list(csv.reader(io.StringIO(by_row.decode("utf-8")), **reader_kwargs))
+
+    assert len(read_by_column) == MIXED_RECORD_BATCH.num_rows
+    assert read_by_column == read_by_row
+    if writer_kwargs.get("quoting", csv.QUOTE_NONE) == csv.QUOTE_NONE:
+        assert by_column == by_row
+    else:
+        # The empty string must not be quoted, or Postgres would read it as an empty string instead of a null.
+        assert "\n\t7\t" in by_column.decode("utf-8")
@@ -0,0 +1,80 @@
+import io
+import zlib
+
+import brotli
+import pyarrow as pa
+import pytest
+
+from posthog.temporal.common.asyncpa import (
+    AsyncRecordBatchReader,
+    UnsupportedContentEncodingError,
+    get_decompress_function,
+)
+
+TEST_RECORD_BATCHES = [
+    pa.RecordBatch.from_pydict(
+        {
+            "event": [f"event-{batch}-{i}" for i in range(1000)],
+            "properties": ['{"$browser": "Chrome", "$os": "Mac OS X"}'] * 1000,
+            "team_id": [batch] * 1000,
+        }
+    )
+    for batch in range(3)
+]
+
+
+def write_arrow_stream(record_batches: list[pa.RecordBatch], compression: str | None) -> bytes:
+    """Write record batches in the Arrow IPC streaming format, as ClickHouse's 'FORMAT ArrowStream'."""
+    sink = io.BytesIO()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+
+    with pa.ipc.new_stream(sink, record_batches[0].schema, options=options) as writer:
+        for record_batch in record_batches:
+            writer.write_batch(record_batch)
+
+    return sink.getvalue()
+
+
+def compress(data: bytes, content_encoding: str | None) -> bytes:
+    match content_encoding:
+        case "gzip":
+            compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+            return compressor.compress(data) + compressor.flush()
+        case "deflate":
+            return zlib.compress(data)
+        case "br":
+            return brotli.compress(data)
+        case _:
+            return data
+
+
+async def iter_chunks(data: bytes, chunk_size: int):
+    """Mimic `aiohttp.StreamReader.iter_chunks` by yielding chunks of data."""
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size], True
+
+
+@pytest.mark.parametrize("content_encoding", [None, "gzip", "deflate", "br"])
+@pytest.mark.parametrize("arrow_compression", [None, "lz4", "zstd"])
+@pytest.mark.asyncio
+async def test_async_record_batch_reader_reads_compressed_streams(content_encoding, arrow_compression):
+    """Test record batches are read from streams compressed over HTTP and with compressed bodies."""
+    arrow_stream = write_arrow_stream(TEST_RECORD_BATCHES, compression=arrow_compression)
+    compressed = compress(arrow_stream, content_encoding)
+
+    reader = AsyncRecordBatchReader(iter_chunks(compressed, chunk_size=1000), content_encoding=content_encoding)
+    record_batches = [record_batch async for record_batch in reader]
+
+    assert record_batches == TEST_RECORD_BATCHES
+    assert reader.statistics.bytes_received == len(compressed)
+    assert reader.statistics.bytes_read == len(arrow_stream)
+    assert reader.statistics.seconds_receiving > 0
+
+
+def test_get_decompress_function_raises_on_unsupported_content_encoding():
+    """Test we raise when trying to decompress an encoding we don't support."""
+    assert get_decompress_function(None) is None
+    assert get_decompress_function("identity") is None
+
+    with pytest.raises(UnsupportedContentEncodingError):
+        get_decompress_function("zstd")
@@ -3,7 +3,7 @@ from time import sleep
 from typing import Optional
 from unittest.mock import Mock
 
-from posthog.cache_utils import cache_for
+from posthog.cache_utils import LRUCache, cache_for
 from posthog.test.base import APIBaseTest
 
 mocked_dependency = Mock()
@@ -93,3 +93,25 @@ class TestCacheUtils(APIBaseTest):
             "Background task finished",
             "Post refresh call 1",
         ]
+
+    def test_lru_cache_evicts_least_recently_used(self) -> None:
+        lru: LRUCache[str, int] = LRUCache(maxsize=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        assert lru.get("a") == 1  # "b" is now the least recently used
+
+        lru.set("c", 3)
+
+        assert lru.get("a") == 1
+        assert lru.get("b") is None
+        assert lru.get("c") == 3
+        assert len(lru) == 2
+
+    def test_lru_cache_expires_entries(self) -> None:
+        lru: LRUCache[str, int] = LRUCache(maxsize=2, ttl=timedelta(milliseconds=100))
+        lru.set("a", 1)
+        assert lru.get("a") == 1
+
+        sleep(0.2)
+
+        assert lru.get("a") is None
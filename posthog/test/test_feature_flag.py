@@ -13,6 +13,7 @@ import pytest
 from posthog.api.test.test_feature_flag import QueryTimeoutWrapper
 from posthog.models import Cohort, FeatureFlag, GroupTypeMapping, Person
 from posthog.models.feature_flag import get_feature_flags_for_team_in_cache
+from posthog.models.feature_flag.flag_index import clear_flag_index_cache, get_compiled_feature_flag
 from posthog.models.feature_flag.flag_matching import (
     FeatureFlagHashKeyOverride,
     FeatureFlagMatch,
@@ -20,6 +21,7 @@ from posthog.models.feature_flag.flag_matching import (
     FeatureFlagMatchReason,
     FlagsMatcherCache,
     get_all_feature_flags,
+    get_all_feature_flags_for_distinct_ids,
     get_feature_flag_hash_key_overrides,
     set_feature_flag_hash_key_overrides,
 )
@@ -746,6 +748,215 @@ class TestModelCache(BaseTest):
         self.assertEqual(0, len(cached_flags))
 
 
+class TestFlagIndex(BaseTest):
+    def setUp(self):
+        clear_flag_index_cache()
+        return super().setUp()
+
+    def test_compiled_flag_is_reused_until_filters_change(self):
+        flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={
+                "groups": [{"properties": [{"key": "email", "value": "a@b.com", "type": "person"}]}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first", "rollout_percentage": 25},
+                        {"key": "second", "rollout_percentage": 75},
+                    ]
+                },
+            },
+        )
+
+        compiled_flag = get_compiled_feature_flag(flag)
+        self.assertEqual([condition.property_keys for condition in compiled_flag.conditions], [frozenset({"email"})])
+        self.assertEqual(
+            compiled_flag.variant_lookup_table,
+            [
+                {"value_min": 0, "value_max": 0.25, "key": "first"},
+                {"value_min": 0.25, "value_max": 1.0, "key": "second"},
+            ],
+        )
+        self.assertIs(get_compiled_feature_flag(FeatureFlag.objects.get(pk=flag.pk)), compiled_flag)
+
+        # e.g. the flag was changed by another process, which invalidated only its own index
+        flag.filters = {"groups": [{"properties": [], "rollout_percentage": 50}]}
+        recompiled_flag = get_compiled_feature_flag(flag)
+        self.assertIsNot(recompiled_flag, compiled_flag)
+        self.assertEqual(recompiled_flag.conditions[0].rollout_percentage, 50)
+        self.assertEqual(recompiled_flag.variant_lookup_table, [])
+
+    def test_compiled_flag_is_not_reused_after_nested_filters_change_in_place(self):
+        flag = FeatureFlag.objects.create(
+            team=self.team, key="beta-feature", created_by=self.user, filters={"groups": [{"rollout_percentage": 50}]}
+        )
+        compiled_flag = get_compiled_feature_flag(flag)
+
+        flag.filters["groups"][0]["rollout_percentage"] = 100
+
+        recompiled_flag = get_compiled_feature_flag(flag)
+        self.assertIsNot(recompiled_flag, compiled_flag)
+        self.assertEqual(recompiled_flag.conditions[0].rollout_percentage, 100)
+
+    def test_save_invalidates_team_index(self):
+        flag = FeatureFlag.objects.create(
+            team=self.team, key="beta-feature", created_by=self.user, filters={"groups": [{"rollout_percentage": 50}]}
+        )
+        compiled_flag = get_compiled_feature_flag(flag)
+
+        flag.name = "New name"
+        flag.save()
+
+        self.assertIsNot(get_compiled_feature_flag(flag), compiled_flag)
+
+    def test_only_conditions_that_need_the_database_are_queried(self):
+        Person.objects.create(team=self.team, distinct_ids=["example_id"], properties={"email": "a@b.com"})
+        email_flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="email-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "email", "value": "a@b.com", "type": "person"}]}]},
+        )
+        rollout_flag = FeatureFlag.objects.create(
+            team=self.team, key="rollout-flag", created_by=self.user, filters={"groups": [{"rollout_percentage": 100}]}
+        )
+        # Only is_not, so would need the person to exist, if not for the override
+        country_flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="country-flag",
+            created_by=self.user,
+            filters={
+                "groups": [{"properties": [{"key": "country", "value": "US", "operator": "is_not", "type": "person"}]}]
+            },
+        )
+
+        with self.assertNumQueries(0):
+            matches, *_ = FeatureFlagMatcher(
+                [rollout_flag, country_flag], "example_id", property_value_overrides={"country": "UK"}
+            ).get_matches()
+        self.assertEqual(matches, {"rollout-flag": True, "country-flag": True})
+
+        # One person query, with neither an existence check nor any fields for the other flags' conditions
+        matcher = FeatureFlagMatcher(
+            [email_flag, rollout_flag, country_flag], "example_id", property_value_overrides={"country": "UK"}
+        )
+        with self.assertNumQueries(4):
+            matches, *_ = matcher.get_matches()
+        self.assertEqual(matches, {"email-flag": True, "rollout-flag": True, "country-flag": True})
+        self.assertEqual(matcher.query_conditions, {f"flag_{email_flag.pk}_condition_0": True})
+
+
+class TestGetAllFeatureFlagsForDistinctIds(BaseTest):
+    def setUp(self):
+        cache.clear()
+        return super().setUp()
+
+    def _create_flags(self):
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "country", "value": "UK", "type": "person"}]}],
+            name="UK",
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="email-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "email", "value": "a@b.com", "type": "person"}]}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="cohort-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "id", "value": cohort.pk, "type": "cohort"}]}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="not-us-flag",
+            created_by=self.user,
+            filters={
+                "groups": [{"properties": [{"key": "country", "value": "US", "operator": "is_not", "type": "person"}]}]
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="continuity-flag",
+            created_by=self.user,
+            ensure_experience_continuity=True,
+            filters={
+                "groups": [{"rollout_percentage": 100}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first", "rollout_percentage": 50},
+                        {"key": "second", "rollout_percentage": 50},
+                    ]
+                },
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="group-flag",
+            created_by=self.user,
+            filters={"aggregation_group_type_index": 0, "groups": [{"rollout_percentage": 100}]},
+        )
+
+    def test_matches_flags_evaluated_one_distinct_id_at_a_time(self):
+        self._create_flags()
+        person = Person.objects.create(
+            team=self.team, distinct_ids=["uk_person", "uk_person_2"], properties={"email": "a@b.com", "country": "UK"}
+        )
+        Person.objects.create(team=self.team, distinct_ids=["us_person"], properties={"country": "US"})
+        FeatureFlagHashKeyOverride.objects.create(
+            team=self.team, person=person, feature_flag_key="continuity-flag", hash_key="some_other_id"
+        )
+        property_value_overrides: dict[str, dict[str, str | int]] = {
+            "us_person": {"email": "a@b.com"},
+            # Partly overrides the cohort, so can't be evaluated in bulk
+            "uk_person_2": {"country": "US"},
+        }
+        distinct_ids = ["uk_person", "uk_person_2", "us_person", "not_ingested"]
+
+        flag_values = get_all_feature_flags_for_distinct_ids(self.team.pk, distinct_ids, property_value_overrides)
+
+        for distinct_id in distinct_ids:
+            expected_flag_values, *_ = get_all_feature_flags(
+                self.team.pk, distinct_id, property_value_overrides=property_value_overrides.get(distinct_id)
+            )
+            self.assertEqual(flag_values[distinct_id], expected_flag_values, distinct_id)
+        self.assertEqual(
+            flag_values["uk_person"],
+            {
+                "email-flag": True,
+                "cohort-flag": True,
+                "not-us-flag": True,
+                "continuity-flag": flag_values["uk_person_2"]["continuity-flag"],
+                "group-flag": False,
+            },
+        )
+        self.assertEqual(flag_values["not_ingested"]["not-us-flag"], True)
+
+    def test_person_conditions_are_queried_once_per_chunk(self):
+        self._create_flags()
+        distinct_ids = [f"person_{index}" for index in range(5)]
+        for index, distinct_id in enumerate(distinct_ids):
+            Person.objects.create(
+                team=self.team, distinct_ids=[distinct_id], properties={"email": "a@b.com" if index % 2 else "c@d.com"}
+            )
+        get_all_feature_flags_for_distinct_ids(self.team.pk, distinct_ids[:1])
+
+        # Same queries however many distinct IDs there are: 2 for hash key overrides, 1 for the cohort,
+        # 1 for person conditions, and 4 for group types (flags are fetched from the cache warmed above)
+        with self.assertNumQueries(8):
+            flag_values = get_all_feature_flags_for_distinct_ids(self.team.pk, distinct_ids)
+
+        self.assertEqual(
+            [flag_values[distinct_id]["email-flag"] for distinct_id in distinct_ids], [False, True] * 2 + [False]
+        )
+
+        with patch("posthog.models.feature_flag.flag_matching.BULK_FLAG_EVALUATION_CHUNK_SIZE", 2):
+            self.assertEqual(get_all_feature_flags_for_distinct_ids(self.team.pk, distinct_ids), flag_values)
+
+
 class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
     maxDiff = None
 
@@ -2957,9 +3168,9 @@ class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
         )
 
         with (
-            self.assertNumQueries(10),
+            self.assertNumQueries(9),
             snapshot_postgres_queries_context(self),
-        ):  # 1 to fill group cache, 2 to match feature flags with group properties (of each type), 1 to match feature flags with person properties
+        ):  # 1 to fill group cache, 1 to match feature flags with group properties (project flags are rollout only), 1 to match feature flags with person properties
             matches, reasons, payloads, _ = FeatureFlagMatcher(
                 [
                     feature_flag_one,
@@ -3855,9 +4066,8 @@ class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
                 FeatureFlagMatch(True, None, FeatureFlagMatchReason.CONDITION_MATCH, 0),
             )
 
-        # override means one less query to fetch group property values
-        # TODO: We still make a query for existence check, but this is unnecessary. Consider optimising.
-        with self.assertNumQueries(10):
+        # override means no query to fetch group property values, nor to check the group exists
+        with self.assertNumQueries(9):
             matcher = FeatureFlagMatcher(
                 [feature_flag, feature_flag_different_group],
                 "",
@@ -3882,9 +4092,8 @@ class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
                 FeatureFlagMatch(True, None, FeatureFlagMatchReason.CONDITION_MATCH, 0),
             )
 
-        # 9 queries same as before for groups, 1 extra for person existence check, no person query because overrides
-        # TODO: We still make a query for existence check, but this is unnecessary. Consider optimising.
-        with self.assertNumQueries(10):
+        # 9 queries same as before for groups, no person existence check nor person query because overrides
+        with self.assertNumQueries(9):
             self.assertEqual(
                 FeatureFlagMatcher(
                     [feature_flag, feature_flag_with_person_is_not_set],
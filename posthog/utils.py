@@ -18,7 +18,7 @@ from enum import Enum
 from functools import lru_cache, wraps
 from operator import itemgetter
 from typing import TYPE_CHECKING, Any, Optional, Union, cast
-from urllib.parse import unquote, urljoin, urlparse
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urljoin, urlparse, urlunparse
 from zoneinfo import ZoneInfo
 from rest_framework import serializers
 
@@ -1161,6 +1161,28 @@ def format_query_params_absolute_url(
     return url_to_format
 
 
+def add_query_params(url: str, params: dict[str, str]) -> str:
+    """
+    Uses parse_qsl because parse_qs turns all values into lists but doesn't unbox them when re-encoded
+    """
+    parsed = urlparse(url)
+    query_params = parse_qsl(parsed.query, keep_blank_values=True)
+
+    update_params: list[tuple[str, Any]] = []
+    for param, value in query_params:
+        if param in params:
+            update_params.append((param, params.pop(param)))
+        else:
+            update_params.append((param, value))
+
+    for key, value in params.items():
+        update_params.append((key, value))
+
+    encodedQueryParams = urlencode(update_params, quote_via=quote)
+    parsed = parsed._replace(query=encodedQueryParams)
+    return urlunparse(parsed)
+
+
 def get_milliseconds_between_dates(d1: dt.datetime, d2: dt.datetime) -> int:
     return abs(int((d1 - d2).total_seconds() * 1000))
 